@@ -4,74 +4,74 @@ FreshRetail Forecasting API initialization.
 
 from fastapi import APIRouter  # Change from FastAPI to APIRouter
 from fastapi.middleware.cors import CORSMiddleware
+import importlib
 import logging
 import os
 
-# Import API modules
-from api.forecast import router as forecast_router
-from api.promotions import router as promotions_router
-from api.analytics_api import router as analytics_router
-from api.enhanced_multi_modal_api import router as enhanced_router
-from api.multi_dimensional_forecast import router as multi_dimensional_router
-from api.clustering_segmentation import router as clustering_router
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-# Create main API router
-router = APIRouter(
-    prefix="",  # Adjusted prefix as this will be included under /api in main.py
-    tags=["Core API"],
-)
+# Submodule routers and their prefixes. They are only imported when
+# ``api.router`` is first accessed, so importing one ``api.*`` module does not
+# pull in all the others (and their scikit-learn/Prophet dependencies).
+SUBROUTERS = [
+    ("api.promotions", "/promotions"),
+    ("api.forecast", "/forecast"),
+    ("api.analytics_api", "/analytics"),
+    ("api.enhanced_multi_modal_api", "/enhanced"),
+    ("api.multi_dimensional_forecast", "/multi-dimensional"),
+    ("api.clustering_segmentation", "/clustering"),
+]
+
 
-# Remove CORS middleware from here, it should be in main.py
-# app.add_middleware(
-#     CORSMiddleware,
-#     allow_origins=["*"],  # Update this for production with specific origins
-#     allow_credentials=True,
-#     allow_methods=["*"],
-#     allow_headers=["*"],
-# )
+def _build_router() -> APIRouter:
+    # Create main API router
+    router = APIRouter(
+        prefix="",  # Adjusted prefix as this will be included under /api in main.py
+        tags=["Core API"],
+    )
 
-# Include routers from other modules
-router.include_router(promotions_router, prefix="/promotions")
-router.include_router(forecast_router, prefix="/forecast")
-router.include_router(analytics_router, prefix="/analytics")
-router.include_router(enhanced_router, prefix="/enhanced")
-router.include_router(multi_dimensional_router, prefix="/multi-dimensional")
-router.include_router(clustering_router, prefix="/clustering")
+    # Include routers from other modules
+    for module, prefix in SUBROUTERS:
+        router.include_router(importlib.import_module(module).router, prefix=prefix)
 
+    # Root endpoint
+    @router.get("/")  # Changed from @app.get
+    async def root():
+        """Root endpoint."""
+        return {
+            "message": "Welcome to the FreshRetail Forecasting API",
+            "version": "1.0.0",
+            "endpoints": {
+                "forecast": "/api/forecast/",
+                "promotions": "/api/promotions/",
+                "analytics": "/api/analytics/",
+                "enhanced": "/api/enhanced/",
+                "multi-dimensional": "/api/multi-dimensional/",
+                "clustering": "/api/clustering/",
+            },
+        }
 
-# Root endpoint
-@router.get("/")  # Changed from @app.get
-async def root():
-    """Root endpoint."""
-    return {
-        "message": "Welcome to the FreshRetail Forecasting API",
-        "version": "1.0.0",
-        "endpoints": {
-            "forecast": "/api/forecast/",
-            "promotions": "/api/promotions/",
-            "analytics": "/api/analytics/",
-            "enhanced": "/api/enhanced/",
-            "multi-dimensional": "/api/multi-dimensional/",
-            "clustering": "/api/clustering/",
-        },
-    }
+    # Health check endpoint
+    @router.get("/health")  # Changed from @app.get
+    async def health():
+        """Health check endpoint."""
+        return {"status": "healthy"}
 
+    return router
 
-# Health check endpoint
-@router.get("/health")  # Changed from @app.get
-async def health():
-    """Health check endpoint."""
-    return {"status": "healthy"}
 
+def __getattr__(name):
+    # Export the router as 'app' for main.py to import
+    if name in ("router", "app"):
+        router = _build_router()
+        globals().update(router=router, app=router)
+        return router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Export the router as 'app' for main.py to import
-app = router
 
 # Remove if __name__ == "__main__" block
 # if __name__ == "__main__":
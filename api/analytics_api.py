@@ -24,6 +24,7 @@ from services.inventory_optimization_service import InventoryOptimizationService
 from services.portfolio_analysis_service import PortfolioAnalysisService
 from services.customer_behavior_service import CustomerBehaviorService
 from utils.logger import get_logger
+from utils.response_encoding import EncodedAPIRoute
 
 logger = get_logger(__name__)
 
@@ -33,7 +34,11 @@ logger = get_logger(__name__)
 # portfolio_service = PortfolioAnalysisService()
 # customer_service = CustomerBehaviorService()
 
-router = APIRouter(prefix="/api/analytics", tags=["Analytics Intelligence"])
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["Analytics Intelligence"],
+    route_class=EncodedAPIRoute,
+)
 
 
 # Pydantic models for request/response
@@ -49,6 +54,7 @@ class InventoryOptimizationRequest(BaseModel):
     store_id: Optional[int] = None
     min_optimization_score: float = Field(60.0, ge=0, le=100)
     max_transfer_distance: float = Field(50.0, ge=1, le=200)
+    solver: str = Field("greedy", pattern="^(greedy|network_flow)$")
 
 
 class PortfolioAnalysisRequest(BaseModel):
@@ -247,11 +253,17 @@ async def analyze_inventory_optimization(
         )
 
         inventory_service = InventoryOptimizationService()  # Instantiate service
+        inventory_service.optimization_params["max_transfer_distance_km"] = (
+            request_body.max_transfer_distance
+        )
 
         # Run optimization analysis
         opportunities = await inventory_service.analyze_cross_store_opportunities(
-            request, city_id=request_body.city_id  # Pass request
+            request,  # Pass request
+            city_id=request_body.city_id,
+            solver=request_body.solver,
         )
+        solver_report = inventory_service.last_solver_report
 
         # Filter by minimum optimization score
         filtered_opportunities = [
@@ -308,6 +320,8 @@ async def analyze_inventory_optimization(
                 "store_id": request_body.store_id,
                 "min_optimization_score": request_body.min_optimization_score,
             },
+            "solver": request_body.solver,
+            "solver_report": solver_report.to_dict() if solver_report else None,
         }
 
     except Exception as e:
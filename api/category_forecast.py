@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Union, Any
 import pandas as pd  # type: ignore
 import numpy as np  # type: ignore
-from fastapi import FastAPI, Query, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, Query, HTTPException, Depends, BackgroundTasks, Request
 from pydantic import BaseModel, Field, validator
 import logging
 import asyncio
@@ -73,6 +73,10 @@ class CategoryForecastRequest(BaseModel):
     include_confidence: bool = Field(
         default=True, description="Include confidence intervals"
     )
+    include_subcategories: bool = Field(
+        default=False,
+        description="Split forecasts into subcategories by historical share",
+    )
 
     @validator("categories")
     def validate_categories(cls, v):
@@ -162,6 +166,38 @@ class CategoryModelTrainingRequest(BaseModel):
         return v
 
 
+class CategoryCubeRequest(BaseModel):
+    """Request model for category cube roll-up and slicing queries."""
+
+    dimensions: List[str] = Field(
+        default=["category"],
+        description="Roll-up dimensions: date, category, subcategory, store, city",
+    )
+    category_id: Optional[int] = None
+    store_id: Optional[int] = None
+    city_id: Optional[int] = None
+    start_date: Optional[str] = Field(None, description="Start date (YYYY-MM-DD)")
+    end_date: Optional[str] = Field(None, description="End date (YYYY-MM-DD)")
+
+    @validator("dimensions")
+    def validate_dimensions(cls, v):
+        valid_dimensions = ["date", "category", "subcategory", "store", "city"]
+        invalid = [d for d in v if d not in valid_dimensions]
+        if invalid:
+            raise ValueError(f"Dimensions must be among: {valid_dimensions}")
+        return v
+
+    @validator("start_date", "end_date")
+    def validate_date_format(cls, v):
+        if v is None:
+            return v
+        try:
+            datetime.strptime(v, "%Y-%m-%d")
+            return v
+        except ValueError:
+            raise ValueError("Date must be in YYYY-MM-DD format")
+
+
 class CategoryHierarchyRequest(BaseModel):
     """Request model for category hierarchy information."""
 
@@ -183,22 +219,27 @@ async def read_root():
             "performance": "/category/performance/",
             "train": "/category/train/",
             "hierarchy": "/category/hierarchy/",
+            "cube": "/category/cube/",
         },
     }
 
 
 @app.post("/category/seasonality/")
-async def analyze_category_seasonality(request: CategorySeasonalityRequest):
+async def analyze_category_seasonality(
+    request: CategorySeasonalityRequest, http_request: Request
+):
     """
     Analyze seasonality patterns for categories.
 
     This endpoint analyzes seasonal patterns, trends, and holiday impacts
-    for product categories over a specified time period.
+    for product categories over a specified time period. Profiles are
+    stored per request scope and served until new sales data arrives.
     """
     try:
         logger.info(f"Category seasonality analysis request: {request.dict()}")
 
         result = await category_service.analyze_category_seasonality(
+            http_request,
             category_id=request.category_id,
             store_id=request.store_id,
             city_id=request.city_id,
@@ -221,8 +262,49 @@ async def analyze_category_seasonality(request: CategorySeasonalityRequest):
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post("/category/cube/")
+async def query_category_cube(request: CategoryCubeRequest, http_request: Request):
+    """
+    Roll up and slice the pre-aggregated category cube.
+
+    Sales, stockout hours, promo share and weather are aggregated over
+    category x subcategory x store x city x day; any subset of those
+    dimensions can be requested, filtered by category, store, city and
+    date range.
+    """
+    try:
+        logger.info(f"Category cube request: {request.dict()}")
+
+        result = await category_service.query_category_cube(
+            http_request,
+            dimensions=request.dimensions,
+            category_id=request.category_id,
+            store_id=request.store_id,
+            city_id=request.city_id,
+            start_date=request.start_date,
+            end_date=request.end_date,
+        )
+
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+
+        return {
+            "status": "success",
+            "cube": result,
+            "request_parameters": request.dict(),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Category cube query error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Cube query failed: {str(e)}")
+
+
 @app.post("/category/forecast/")
-async def forecast_category_demand(request: CategoryForecastRequest):
+async def forecast_category_demand(
+    request: CategoryForecastRequest, http_request: Request
+):
     """
     Generate category-level demand forecasts.
 
@@ -233,6 +315,7 @@ async def forecast_category_demand(request: CategoryForecastRequest):
         logger.info(f"Category demand forecast request: {request.dict()}")
 
         result = await category_service.forecast_category_demand(
+            http_request,
             categories=request.categories,
             stores=request.stores,
             start_date=request.start_date,
@@ -240,6 +323,7 @@ async def forecast_category_demand(request: CategoryForecastRequest):
             aggregation_level=request.aggregation_level,
             model_type=request.model_type,
             include_confidence=request.include_confidence,
+            include_subcategories=request.include_subcategories,
         )
 
         if "error" in result:
@@ -563,6 +647,16 @@ async def get_usage_examples():
                 },
                 "description": "Analyze seasonal patterns across all categories",
             },
+            "category_cube_rollup": {
+                "endpoint": "/category/cube/",
+                "method": "POST",
+                "payload": {
+                    "dimensions": ["category", "city"],
+                    "start_date": "2023-01-01",
+                    "end_date": "2023-12-31",
+                },
+                "description": "Category sales, stockouts, promo share and weather per city",
+            },
             "forecast_specific_categories": {
                 "endpoint": "/category/forecast/",
                 "method": "POST",
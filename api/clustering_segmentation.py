@@ -19,13 +19,28 @@ import logging
 from sklearn.cluster import KMeans, DBSCAN
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score, calinski_harabasz_score
+from sklearn.metrics import calinski_harabasz_score
 import json
 import warnings
 
 warnings.filterwarnings("ignore")
 
 from database.connection import DatabaseManager
+from services.clustering_feature_store import (
+    clustering_feature_store,
+    sales_data_version,
+)
+from services.cluster_count_search import (
+    DEFAULT_SAMPLE_SIZE,
+    estimate_silhouette,
+    select_cluster_count,
+)
+from services.neighbor_index import NeighborIndex, neighbor_index_for
+from services.scalable_clustering import (
+    BirchDBSCAN,
+    scalable_algorithm,
+    streaming_models,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,7 +53,9 @@ router = APIRouter()
 # Pydantic models
 class ClusteringRequest(BaseModel):
     entity_type: str  # 'products', 'stores', 'cities'
-    clustering_algorithm: str = "kmeans"  # 'kmeans', 'dbscan'
+    # 'kmeans', 'dbscan', 'minibatch_kmeans', 'birch_dbscan'; large entity
+    # sets switch to the mini-batch/BIRCH variants automatically
+    clustering_algorithm: str = "kmeans"
     n_clusters: Optional[int] = None
     features: List[str] = [
         "demand_profile",
@@ -93,6 +110,8 @@ async def perform_clustering_analysis(
 
         logger.info(f"Starting clustering analysis for {request_body.entity_type}")
 
+        data_version = await sales_data_version(db_manager)
+
         # Get connection
         async with db_manager.get_connection() as conn:
             # Extract features for clustering
@@ -102,6 +121,7 @@ async def perform_clustering_analysis(
                 request_body.features,
                 request_body.analysis_period_days,
                 request_body.min_data_points,
+                data_version,
             )
 
             logger.info(
@@ -140,7 +160,7 @@ async def perform_clustering_analysis(
             return ClusteringResponse(
                 success=True,
                 entity_type=request_body.entity_type,
-                algorithm_used=request_body.clustering_algorithm,
+                algorithm_used=clustering_result["algorithm"],
                 n_clusters=clustering_result["n_clusters"],
                 cluster_profiles=cluster_profiles,
                 entity_assignments=entity_assignments,
@@ -160,9 +180,13 @@ async def extract_clustering_features(
     features: List[str],
     analysis_period_days: int,
     min_data_points: int,
+    data_version: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Extract features for clustering analysis
+
+    Features come from the clustering feature store; ``data_version`` (the
+    ``sales_data`` version) decides when they are recomputed.
     """
     try:
         # Dynamically determine start and end dates from sales_data table
@@ -203,15 +227,15 @@ async def extract_clustering_features(
 
         if entity_type == "products":
             df = await extract_product_features(
-                conn, features, start_date, end_date, min_data_points
+                conn, features, start_date, end_date, min_data_points, data_version
             )
         elif entity_type == "stores":
             df = await extract_store_features(
-                conn, features, start_date, end_date, min_data_points
+                conn, features, start_date, end_date, min_data_points, data_version
             )
         elif entity_type == "cities":
             df = await extract_city_features(
-                conn, features, start_date, end_date, min_data_points
+                conn, features, start_date, end_date, min_data_points, data_version
             )
         else:
             raise ValueError(f"Unsupported entity type: {entity_type}")
@@ -232,105 +256,22 @@ async def extract_product_features(
     start_date: date,
     end_date: date,
     min_data_points: int,
+    data_version: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Extract product-level features for clustering (real data)
     """
     try:
-        query = """
-        WITH product_metrics AS (
-            SELECT 
-                p.product_id,
-                p.product_name,
-                p.first_category_id,
-                p.second_category_id,
-                p.third_category_id,
-                COUNT(DISTINCT s.dt) as active_days,
-                COUNT(*) as total_transactions,
-                AVG(CAST(s.sale_amount AS FLOAT)) as avg_sale_amount,
-                STDDEV(CAST(s.sale_amount AS FLOAT)) as sale_amount_stddev,
-                AVG(CASE WHEN (s.discount > 0) IS TRUE THEN s.discount ELSE NULL END) as avg_discount,
-                COUNT(CASE WHEN (s.discount > 0) IS TRUE THEN 1 END)::FLOAT / COUNT(*) as discount_frequency,
-                AVG(CASE WHEN s.activity_flag = '1' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_promo_sale,
-                AVG(CASE WHEN s.activity_flag = '0' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_regular_sale,
-                AVG(CASE WHEN s.holiday_flag = '1' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_holiday_sale,
-                COUNT(CASE WHEN s.holiday_flag = '1' THEN 1 END)::FLOAT / COUNT(*) as holiday_sales_ratio
-            FROM product_hierarchy p
-            JOIN sales_data s ON p.product_id = s.product_id
-            WHERE s.dt BETWEEN $1 AND $2
-            GROUP BY p.product_id, p.product_name, p.first_category_id, p.second_category_id, p.third_category_id
-            -- Diagnostic: Log counts before filtering
-            -- SELECT p.product_id, COUNT(DISTINCT s.dt) as distinct_active_days FROM product_hierarchy p JOIN sales_data s ON p.product_id = s.product_id WHERE s.dt BETWEEN $1 AND $2 GROUP BY p.product_id
-            HAVING COUNT(DISTINCT s.dt) >= $3
-        ),
-        demand_variability AS (
-            SELECT 
-                product_id,
-                STDDEV(daily_sales) / NULLIF(AVG(daily_sales), 0) as demand_cv,
-                COUNT(CASE WHEN daily_sales = 0 THEN 1 END)::FLOAT / COUNT(*) as zero_sales_ratio
-            FROM (
-                SELECT 
-                    product_id,
-                    dt,
-                    SUM(CAST(sale_amount AS FLOAT)) as daily_sales
-                FROM sales_data
-                WHERE dt BETWEEN $1 AND $2
-                GROUP BY product_id, dt
-            ) daily_agg
-            GROUP BY product_id
-        ),
-        stockout_analysis AS (
-            SELECT 
-                product_id,
-                AVG(CASE WHEN stock_hour6_22_cnt = '0' THEN 1.0 ELSE 0.0 END) as stockout_rate,
-                AVG(CAST(stock_hour6_22_cnt AS FLOAT)) as avg_stock_level
-            FROM sales_data
-            WHERE dt BETWEEN $1 AND $2
-            GROUP BY product_id
-        ),
-        weather_sensitivity AS (
-            SELECT 
-                s.product_id,
-                CORR(CAST(s.sale_amount AS FLOAT), s.avg_temperature) as temp_correlation,
-                CORR(CAST(s.sale_amount AS FLOAT), s.precpt) as precip_correlation,
-                CORR(CAST(s.sale_amount AS FLOAT), s.avg_humidity) as humidity_correlation
-            FROM sales_data s
-            WHERE s.dt BETWEEN $1 AND $2
-            GROUP BY s.product_id
-            HAVING COUNT(*) >= $3
+        # One grouped pass in the database, persisted and cached per window
+        df = await clustering_feature_store.get_features(
+            conn,
+            "products",
+            start_date,
+            end_date,
+            data_version=data_version,
+            min_data_points=min_data_points,
         )
-        SELECT 
-            pm.*,
-            COALESCE(dv.demand_cv, 0) as demand_coefficient_variation,
-            COALESCE(dv.zero_sales_ratio, 0) as zero_sales_ratio,
-            COALESCE(sa.stockout_rate, 0) as stockout_rate,
-            COALESCE(sa.avg_stock_level, 0) as avg_stock_level,
-            COALESCE(ws.temp_correlation, 0) as temperature_sensitivity,
-            COALESCE(ws.precip_correlation, 0) as precipitation_sensitivity,
-            COALESCE(ws.humidity_correlation, 0) as humidity_sensitivity,
-            CASE 
-                WHEN pm.avg_promo_sale IS NOT NULL AND pm.avg_regular_sale IS NOT NULL 
-                THEN (pm.avg_promo_sale - pm.avg_regular_sale) / NULLIF(pm.avg_regular_sale, 0)
-                ELSE 0 
-            END as discount_response_ratio
-        FROM product_metrics pm
-        LEFT JOIN demand_variability dv ON pm.product_id = dv.product_id
-        LEFT JOIN stockout_analysis sa ON pm.product_id = sa.product_id
-        LEFT JOIN weather_sensitivity ws ON pm.product_id = ws.product_id
-        ORDER BY pm.product_id
-        """
-        rows = await conn.fetch(
-            query,
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d"),
-            min_data_points,
-        )
-
-        if rows:
-            logger.debug(f"First row keys from asyncpg: {rows[0].keys()}")
-
-        df = pd.DataFrame(rows, columns=rows[0].keys() if rows else [])
-        logger.info(f"Product features query returned {len(df)} rows")
+        logger.info(f"Product feature store returned {len(df)} rows")
 
         if df.empty:
             logger.warning("No product features found for clustering query.")
@@ -391,114 +332,22 @@ async def extract_store_features(
     start_date: date,
     end_date: date,
     min_data_points: int,
+    data_version: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Extract store-level features for clustering (real data)
     """
     try:
-        query = """
-        WITH store_metrics AS (
-            SELECT 
-                sh.store_id,
-                sh.store_name,
-                sh.city_id,
-                COUNT(DISTINCT s.dt) as active_days,
-                COUNT(DISTINCT s.product_id) as unique_products,
-                COUNT(*) as total_transactions,
-                SUM(CAST(s.sale_amount AS FLOAT)) as total_revenue,
-                AVG(CAST(s.sale_amount AS FLOAT)) as avg_transaction_value,
-                STDDEV(CAST(s.sale_amount AS FLOAT)) as transaction_value_stddev,
-                AVG(CASE WHEN (s.discount > 0) IS TRUE THEN s.discount ELSE NULL END) as avg_discount,
-                COUNT(CASE WHEN (s.discount > 0) IS TRUE THEN 1 END)::FLOAT / COUNT(*) as discount_frequency,
-                AVG(CASE WHEN s.activity_flag = '1' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_promo_sale,
-                AVG(CASE WHEN s.activity_flag = '0' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_regular_sale,
-                COUNT(CASE WHEN s.holiday_flag = '1' THEN 1 END)::FLOAT / COUNT(*) as holiday_sales_ratio
-            FROM store_hierarchy sh
-            JOIN sales_data s ON sh.store_id = s.store_id
-            WHERE s.dt BETWEEN $1 AND $2
-            GROUP BY sh.store_id, sh.store_name, sh.city_id
-            -- Diagnostic: Log counts before filtering
-            -- SELECT sh.store_id, COUNT(DISTINCT s.dt) as distinct_active_days FROM store_hierarchy sh JOIN sales_data s ON sh.store_id = s.store_id WHERE s.dt BETWEEN $1 AND $2 GROUP BY sh.store_id
-            HAVING COUNT(DISTINCT s.dt) >= $3
-        ),
-        store_demand_variability AS (
-            SELECT 
-                store_id,
-                STDDEV(daily_revenue) / NULLIF(AVG(daily_revenue), 0) as revenue_cv,
-                COUNT(CASE WHEN daily_revenue = 0 THEN 1 END)::FLOAT / COUNT(*) as zero_revenue_ratio
-            FROM (
-                SELECT 
-                    store_id,
-                    dt,
-                    SUM(CAST(sale_amount AS FLOAT)) as daily_revenue
-                FROM sales_data
-                WHERE dt BETWEEN $1 AND $2
-                GROUP BY store_id, dt
-            ) daily_agg
-            GROUP BY store_id
-        ),
-        store_stockout_analysis AS (
-            SELECT 
-                store_id,
-                AVG(CASE WHEN stock_hour6_22_cnt = '0' THEN 1.0 ELSE 0.0 END) as avg_stockout_rate,
-                AVG(CAST(stock_hour6_22_cnt AS FLOAT)) as avg_stock_level,
-                COUNT(CASE WHEN stock_hour6_22_cnt = '0' THEN 1 END)::FLOAT / COUNT(*) as stockout_frequency
-            FROM sales_data
-            WHERE dt BETWEEN $1 AND $2
-            GROUP BY store_id
-        ),
-        store_weather_sensitivity AS (
-            SELECT 
-                s.store_id,
-                CORR(s.daily_revenue, w.avg_temperature) as temp_correlation,
-                CORR(s.daily_revenue, w.precpt) as precip_correlation,
-                CORR(s.daily_revenue, w.avg_humidity) as humidity_correlation
-            FROM (
-                SELECT 
-                    store_id,
-                    dt,
-                    SUM(CAST(sale_amount AS FLOAT)) as daily_revenue
-                FROM sales_data
-                WHERE dt BETWEEN $1 AND $2
-                GROUP BY store_id, dt
-            ) s
-            JOIN sales_data w ON s.store_id = w.store_id AND s.dt = w.dt
-            GROUP BY s.store_id
-            HAVING COUNT(*) >= $3
-        )
-        SELECT 
-            sm.*,
-            COALESCE(sdv.revenue_cv, 0) as revenue_coefficient_variation,
-            COALESCE(sdv.zero_revenue_ratio, 0) as zero_revenue_ratio,
-            COALESCE(ssa.avg_stockout_rate, 0) as avg_stockout_rate,
-            COALESCE(ssa.avg_stock_level, 0) as avg_stock_level,
-            COALESCE(ssa.stockout_frequency, 0) as stockout_frequency,
-            COALESCE(sws.temp_correlation, 0) as temperature_sensitivity,
-            COALESCE(sws.precip_correlation, 0) as precipitation_sensitivity,
-            COALESCE(sws.humidity_correlation, 0) as humidity_sensitivity,
-            CASE 
-                WHEN sm.avg_promo_sale IS NOT NULL AND sm.avg_regular_sale IS NOT NULL 
-                THEN (sm.avg_promo_sale - sm.avg_regular_sale) / NULLIF(sm.avg_regular_sale, 0)
-                ELSE 0 
-            END as discount_response_ratio
-        FROM store_metrics sm
-        LEFT JOIN store_demand_variability sdv ON sm.store_id = sdv.store_id
-        LEFT JOIN store_stockout_analysis ssa ON sm.store_id = ssa.store_id
-        LEFT JOIN store_weather_sensitivity sws ON sm.store_id = sws.store_id
-        ORDER BY sm.store_id
-        """
-        rows = await conn.fetch(
-            query,
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d"),
-            min_data_points,
+        # One grouped pass in the database, persisted and cached per window
+        df = await clustering_feature_store.get_features(
+            conn,
+            "stores",
+            start_date,
+            end_date,
+            data_version=data_version,
+            min_data_points=min_data_points,
         )
-
-        if rows:
-            logger.debug(f"First row keys from asyncpg: {rows[0].keys()}")
-
-        df = pd.DataFrame(rows, columns=rows[0].keys() if rows else [])
-        logger.info(f"Store features query returned {len(df)} rows")
+        logger.info(f"Store feature store returned {len(df)} rows")
 
         if df.empty:
             logger.warning("No store features found for clustering query.")
@@ -567,136 +416,22 @@ async def extract_city_features(
     start_date: date,
     end_date: date,
     min_data_points: int,
+    data_version: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Extract city-level features for clustering (real data)
     """
     try:
-        query = """
-        WITH city_metrics AS (
-            SELECT 
-                sh.city_id,
-                ch.city_name,
-                COUNT(DISTINCT sh.store_id) as num_stores,
-                COUNT(DISTINCT s.dt) as active_days,
-                COUNT(DISTINCT s.product_id) as unique_products,
-                COUNT(*) as total_transactions,
-                SUM(CAST(s.sale_amount AS FLOAT)) as total_revenue,
-                AVG(CAST(s.sale_amount AS FLOAT)) as avg_transaction_value,
-                STDDEV(CAST(s.sale_amount AS FLOAT)) as transaction_value_stddev,
-                AVG(CASE WHEN (s.discount > 0) IS TRUE THEN s.discount ELSE NULL END) as avg_discount,
-                COUNT(CASE WHEN (s.discount > 0) IS TRUE THEN 1 END)::FLOAT / COUNT(*) as discount_frequency,
-                AVG(CASE WHEN s.activity_flag = '1' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_promo_sale,
-                AVG(CASE WHEN s.activity_flag = '0' THEN CAST(s.sale_amount AS FLOAT) ELSE NULL END) as avg_regular_sale,
-                COUNT(CASE WHEN s.holiday_flag = '1' THEN 1 END)::FLOAT / COUNT(*) as holiday_sales_ratio
-            FROM store_hierarchy sh
-            JOIN sales_data s ON sh.store_id = s.store_id
-            JOIN city_hierarchy ch ON sh.city_id = ch.city_id
-            WHERE s.dt BETWEEN $1 AND $2
-            GROUP BY sh.city_id, ch.city_name
-            -- Diagnostic: Log counts before filtering
-            -- SELECT sh.city_id, COUNT(DISTINCT s.dt) as distinct_active_days FROM store_hierarchy sh JOIN sales_data s ON sh.store_id = s.store_id WHERE s.dt BETWEEN $1 AND $2 GROUP BY sh.city_id
-            HAVING COUNT(DISTINCT s.dt) >= $3
-        ),
-        city_demand_variability AS (
-            SELECT 
-                daily_agg.city_id,
-                STDDEV(daily_revenue) / NULLIF(AVG(daily_revenue), 0) as revenue_cv,
-                COUNT(CASE WHEN daily_revenue = 0 THEN 1 END)::FLOAT / COUNT(*) as zero_revenue_ratio
-            FROM (
-                SELECT 
-                    sh.city_id,
-                    s.dt,
-                    SUM(CAST(s.sale_amount AS FLOAT)) as daily_revenue
-                FROM sales_data s
-                JOIN store_hierarchy sh ON s.store_id = sh.store_id
-                WHERE s.dt BETWEEN $1 AND $2
-                GROUP BY sh.city_id, s.dt
-            ) daily_agg
-            GROUP BY daily_agg.city_id
-        ),
-        city_stockout_analysis AS (
-            SELECT 
-                sh.city_id,
-                AVG(CASE WHEN s.stock_hour6_22_cnt = '0' THEN 1.0 ELSE 0.0 END) as avg_stockout_rate,
-                AVG(CAST(s.stock_hour6_22_cnt AS FLOAT)) as avg_stock_level,
-                COUNT(CASE WHEN s.stock_hour6_22_cnt = '0' THEN 1 END)::FLOAT / COUNT(*) as stockout_frequency
-            FROM sales_data s
-            JOIN store_hierarchy sh ON s.store_id = sh.store_id
-            WHERE s.dt BETWEEN $1 AND $2
-            GROUP BY sh.city_id
-        ),
-        city_weather_data AS (
-            SELECT 
-                sh.city_id,
-                AVG(s.avg_temperature) as avg_temperature,
-                STDDEV(s.avg_temperature) as temp_variability,
-                AVG(s.precpt) as avg_precipitation,
-                AVG(s.avg_humidity) as avg_humidity,
-                COUNT(CASE WHEN s.precpt > 0 THEN 1 END)::FLOAT / COUNT(*) as rainy_days_ratio
-            FROM sales_data s
-            JOIN store_hierarchy sh ON s.store_id = sh.store_id
-            WHERE s.dt BETWEEN $1 AND $2
-            GROUP BY sh.city_id
-        ),
-        city_weather_sensitivity AS (
-            SELECT 
-                daily_rev.city_id,
-                CORR(daily_rev.daily_revenue, w.avg_temperature) as temp_correlation,
-                CORR(daily_rev.daily_revenue, w.precpt) as precip_correlation,
-                CORR(daily_rev.daily_revenue, w.avg_humidity) as humidity_correlation
-            FROM (
-                SELECT 
-                    sh.city_id,
-                    s.dt,
-                    SUM(CAST(s.sale_amount AS FLOAT)) as daily_revenue
-                FROM sales_data s
-                JOIN store_hierarchy sh ON s.store_id = sh.store_id
-                WHERE s.dt BETWEEN $1 AND $2
-                GROUP BY sh.city_id, s.dt
-            ) daily_rev
-            JOIN sales_data w ON daily_rev.city_id = w.city_id AND daily_rev.dt = w.dt
-            GROUP BY daily_rev.city_id
-            HAVING COUNT(*) >= $3
-        )
-        SELECT 
-            cm.*,
-            COALESCE(cdv.revenue_cv, 0) as revenue_coefficient_variation,
-            COALESCE(cdv.zero_revenue_ratio, 0) as zero_revenue_ratio,
-            COALESCE(csa.avg_stockout_rate, 0) as avg_stockout_rate,
-            COALESCE(csa.avg_stock_level, 0) as avg_stock_level,
-            COALESCE(csa.stockout_frequency, 0) as stockout_frequency,
-            COALESCE(cwd.avg_temperature, 0) as avg_temperature,
-            COALESCE(cwd.temp_variability, 0) as temp_variability,
-            COALESCE(cwd.avg_precipitation, 0) as avg_precipitation,
-            COALESCE(cwd.avg_humidity, 0) as avg_humidity,
-            COALESCE(cwd.rainy_days_ratio, 0) as rainy_days_ratio,
-            COALESCE(cws.temp_correlation, 0) as temperature_sensitivity,
-            COALESCE(cws.precip_correlation, 0) as precipitation_sensitivity,
-            COALESCE(cws.humidity_correlation, 0) as humidity_sensitivity,
-            CASE 
-                WHEN cm.avg_promo_sale IS NOT NULL AND cm.avg_regular_sale IS NOT NULL 
-                THEN (cm.avg_promo_sale - cm.avg_regular_sale) / NULLIF(cm.avg_regular_sale, 0)
-                ELSE 0 
-            END as discount_response_ratio
-        FROM city_metrics cm
-        LEFT JOIN city_demand_variability cdv ON cm.city_id = cdv.city_id
-        LEFT JOIN city_stockout_analysis csa ON cm.city_id = csa.city_id
-        LEFT JOIN city_weather_data cwd ON cm.city_id = cwd.city_id
-        LEFT JOIN city_weather_sensitivity cws ON cm.city_id = cws.city_id
-        ORDER BY cm.city_id
-        """
-        rows = await conn.fetch(
-            query,
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d"),
-            min_data_points,
+        # One grouped pass in the database, persisted and cached per window
+        df = await clustering_feature_store.get_features(
+            conn,
+            "cities",
+            start_date,
+            end_date,
+            data_version=data_version,
+            min_data_points=min_data_points,
         )
-        if rows:
-            logger.debug(f"First row keys from asyncpg: {rows[0].keys()}")
-
-        df = pd.DataFrame(rows, columns=rows[0].keys() if rows else [])
-        logger.info(f"City features query returned {len(df)} rows")
+        logger.info(f"City feature store returned {len(df)} rows")
         if df.empty:
             logger.warning("No city features found for clustering query.")
             logger.info("DataFrame is empty, returning empty dataframe")
@@ -767,12 +502,16 @@ async def perform_clustering(
     try:
         # Prepare features for clustering
         entity_columns = []
+        entity_type = "entities"
         if "product_id" in features_df.columns:
             entity_columns = ["product_id", "product_name"]
+            entity_type = "products"
         elif "store_id" in features_df.columns:
             entity_columns = ["store_id", "store_name", "city_id"]
+            entity_type = "stores"
         elif "city_id" in features_df.columns:
             entity_columns = ["city_id", "num_stores"]
+            entity_type = "cities"
 
         # Get numeric features for clustering
         numeric_features = features_df.select_dtypes(
@@ -798,20 +537,51 @@ async def perform_clustering(
         scaler = StandardScaler()
         X_scaled = scaler.fit_transform(X)
 
+        # Large entity sets run on the bounded-memory backends
+        algorithm = scalable_algorithm(algorithm, len(X_scaled))
+
         # Perform clustering
-        if algorithm.lower() == "kmeans":
+        if algorithm in ("kmeans", "minibatch_kmeans"):
             # Determine optimal number of clusters if not specified
             if n_clusters is None:
-                n_clusters = determine_optimal_clusters(X_scaled)
+                # CPU-bound search, kept off the event loop
+                n_clusters = await asyncio.to_thread(
+                    determine_optimal_clusters,
+                    X_scaled,
+                    entity_type=entity_type,
+                    feature_set=numeric_features,
+                )
+
+            if algorithm == "kmeans":
+                clusterer = KMeans(
+                    n_clusters=n_clusters, random_state=42, n_init="auto"
+                )
+                cluster_labels = clusterer.fit_predict(X_scaled)
+            else:
+                # Repeat calls fold the current features into the stored
+                # model instead of refitting it
+                clusterer, cluster_labels, _ = await asyncio.to_thread(
+                    streaming_models.fit_or_update,
+                    X_scaled,
+                    algorithm,
+                    entity_type=entity_type,
+                    feature_set=numeric_features,
+                    n_clusters=n_clusters,
+                )
 
-            clusterer = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
-            cluster_labels = clusterer.fit_predict(X_scaled)
+        elif algorithm == "dbscan":
+            # Use DBSCAN with automatic parameter selection; eps and the
+            # neighbourhoods come from the shared index over X_scaled
+            index = neighbor_index_for(X_scaled)
+            eps, min_samples = determine_dbscan_parameters(X_scaled, index)
+            clusterer = DBSCAN(eps=eps, min_samples=min_samples, metric="precomputed")
+            cluster_labels = clusterer.fit_predict(index.radius_graph(eps))
+            n_clusters = len(set(cluster_labels)) - (1 if -1 in cluster_labels else 0)
 
-        elif algorithm.lower() == "dbscan":
-            # Use DBSCAN with automatic parameter selection
+        elif algorithm == "birch_dbscan":
             eps, min_samples = determine_dbscan_parameters(X_scaled)
-            clusterer = DBSCAN(eps=eps, min_samples=min_samples)
-            cluster_labels = clusterer.fit_predict(X_scaled)
+            clusterer = BirchDBSCAN(eps=eps, min_samples=min_samples)
+            cluster_labels = await asyncio.to_thread(clusterer.fit_predict, X_scaled)
             n_clusters = len(set(cluster_labels)) - (1 if -1 in cluster_labels else 0)
 
         else:
@@ -837,9 +607,17 @@ async def perform_clustering(
         raise
 
 
-def determine_optimal_clusters(X_scaled: np.ndarray, max_clusters: int = 10) -> int:
+def determine_optimal_clusters(
+    X_scaled: np.ndarray,
+    max_clusters: int = 10,
+    entity_type: str = "entities",
+    feature_set: Optional[List[str]] = None,
+) -> int:
     """
-    Determine optimal number of clusters using elbow method and silhouette score
+    Determine optimal number of clusters by (sampled) silhouette score.
+
+    The selection is cached per entity type, feature set and data, so
+    repeat calls on unchanged features skip the search.
     """
     try:
         n_samples = X_scaled.shape[0]
@@ -848,49 +626,34 @@ def determine_optimal_clusters(X_scaled: np.ndarray, max_clusters: int = 10) ->
         if max_clusters < 2:
             return 2
 
-        silhouette_scores = []
-        inertias = []
-
-        for k in range(2, max_clusters + 1):
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init="auto")
-            cluster_labels = kmeans.fit_predict(X_scaled)
-
-            if len(set(cluster_labels)) > 1:  # Ensure we have multiple clusters
-                silhouette_avg = silhouette_score(X_scaled, cluster_labels)
-                silhouette_scores.append(silhouette_avg)
-                inertias.append(kmeans.inertia_)
-            else:
-                silhouette_scores.append(0)
-                inertias.append(float("inf"))
-
-        # Find optimal k using silhouette score
-        if silhouette_scores:
-            optimal_k = silhouette_scores.index(max(silhouette_scores)) + 2
-        else:
-            optimal_k = 3
-
-        return min(optimal_k, max_clusters)
+        selection = select_cluster_count(
+            X_scaled,
+            entity_type=entity_type,
+            feature_set=feature_set or [],
+            max_k=max_clusters,
+        )
+        return min(selection.optimal_k, max_clusters)
 
     except Exception as e:
         logger.error(f"Error determining optimal clusters: {e}")
         return 3
 
 
-def determine_dbscan_parameters(X_scaled: np.ndarray) -> Tuple[float, int]:
+def determine_dbscan_parameters(
+    X_scaled: np.ndarray, index: Optional[NeighborIndex] = None
+) -> Tuple[float, int]:
     """
     Determine optimal DBSCAN parameters
+
+    The k-distance curve comes from the shared neighbour index (exact for
+    small inputs, a sample of queried rows for large ones).
     """
     try:
-        from sklearn.neighbors import NearestNeighbors
+        index = index or neighbor_index_for(X_scaled)
 
-        # Calculate k-distance for determining eps
+        # Sorted k-distance curve for determining eps
         k = min(4, X_scaled.shape[0] - 1)
-        neighbors = NearestNeighbors(n_neighbors=k)
-        neighbors_fit = neighbors.fit(X_scaled)
-        distances, indices = neighbors_fit.kneighbors(X_scaled)
-
-        # Sort distances and find elbow point
-        distances = np.sort(distances[:, k - 1], axis=0)
+        distances = index.k_distances(k)
 
         # Use 75th percentile as eps
         eps = np.percentile(distances, 75)
@@ -918,6 +681,8 @@ async def generate_cluster_profiles(
         features_df = clustering_result["features_df"]
         numeric_features = clustering_result["numeric_features"]
         n_clusters = clustering_result["n_clusters"]
+        cluster_labels = np.asarray(clustering_result["cluster_labels"])
+        index = neighbor_index_for(clustering_result["X_scaled"])
 
         cluster_profiles = []
 
@@ -957,9 +722,11 @@ async def generate_cluster_profiles(
                 cluster_id, characteristics, entity_type
             )
 
-            # Get representative entities
+            # Get representative entities: the members nearest the centre
+            members = np.flatnonzero(cluster_labels == cluster_id)
+            nearest = index.nearest_to_centre(cluster_labels, cluster_id)
             representative_entities = get_representative_entities(
-                cluster_data, entity_type
+                cluster_data, entity_type, np.searchsorted(members, nearest)
             )
 
             cluster_profile = ClusterProfile(
@@ -1058,17 +825,26 @@ def generate_cluster_name(
 
 
 def get_representative_entities(
-    cluster_data: pd.DataFrame, entity_type: str
+    cluster_data: pd.DataFrame,
+    entity_type: str,
+    positions: Optional[np.ndarray] = None,
 ) -> List[Dict[str, Any]]:
     """
     Get representative entities from cluster
+
+    Args:
+        positions: Rows of ``cluster_data`` to use, closest to the cluster
+            centre first; a random sample is used when not given
     """
     try:
         representatives = []
 
         # Get up to 5 representative entities
         sample_size = min(5, len(cluster_data))
-        sample_data = cluster_data.sample(n=sample_size, random_state=42)
+        if positions is not None:
+            sample_data = cluster_data.iloc[positions[:sample_size]]
+        else:
+            sample_data = cluster_data.sample(n=sample_size, random_state=42)
 
         for _, row in sample_data.iterrows():
             if entity_type == "products":
@@ -1231,10 +1007,16 @@ def calculate_cluster_quality_metrics(
 
         quality_metrics = {}
 
-        # Calculate silhouette score
+        # Calculate silhouette score (exact up to DEFAULT_SAMPLE_SIZE rows,
+        # a stratified-sample estimate above that)
         if len(set(cluster_labels)) > 1:
             try:
-                silhouette_avg = silhouette_score(X_scaled, cluster_labels)
+                silhouette_avg, _, _, _ = estimate_silhouette(
+                    X_scaled,
+                    np.asarray(cluster_labels),
+                    DEFAULT_SAMPLE_SIZE,
+                    np.random.default_rng(42),
+                )
                 quality_metrics["silhouette_score"] = (
                     float(silhouette_avg) if not np.isnan(silhouette_avg) else 0.0
                 )
@@ -1607,7 +1389,7 @@ async def get_available_clustering_features():
         return {
             "success": True,
             "features": features,
-            "algorithms": ["kmeans", "dbscan"],
+            "algorithms": ["kmeans", "dbscan", "minibatch_kmeans", "birch_dbscan"],
             "description": "Available features and algorithms for clustering analysis",
         }
 
@@ -1634,11 +1416,18 @@ async def compare_clusters(
 
         logger.info(f"Comparing clustering approaches for {entity_type}")
 
+        data_version = await sales_data_version(db_manager)
+
         # Get connection
         async with db_manager.get_connection() as conn:
             # Extract features
             features_df = await extract_clustering_features(
-                conn, entity_type, features, analysis_period_days, min_data_points
+                conn,
+                entity_type,
+                features,
+                analysis_period_days,
+                min_data_points,
+                data_version,
             )
 
             if features_df.empty:
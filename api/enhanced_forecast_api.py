@@ -56,6 +56,25 @@ class ForecastingMethodEnum(str, Enum):
     random_forest = "random_forest"
     ensemble = "ensemble"
     naive = "naive"
+    statistical = "statistical"
+
+
+class ForecastModeEnum(str, Enum):
+    """Serving modes: fast uses the vectorised statistical engine"""
+
+    standard = "standard"
+    fast = "fast"
+
+
+class HierarchicalMethodEnum(str, Enum):
+    """Hierarchical forecasting options (see services.hierarchical_forecast)"""
+
+    top_down_historical = "top_down_historical"
+    top_down_forecast = "top_down_forecast"
+    ols = "ols"
+    wls_struct = "wls_struct"
+    wls_var = "wls_var"
+    mint_shrink = "mint_shrink"
 
 
 class EnhancedForecastRequestModel(BaseModel):
@@ -91,6 +110,16 @@ class EnhancedForecastRequestModel(BaseModel):
     confidence_level: float = Field(
         0.95, description="Confidence level for intervals", ge=0.5, le=0.99
     )
+    hierarchical_method: Optional[HierarchicalMethodEnum] = Field(
+        None,
+        description="Forecast stores and products as one hierarchy: top-down "
+        "disaggregation or reconciliation, instead of one model per pair",
+    )
+    mode: ForecastModeEnum = Field(
+        ForecastModeEnum.standard,
+        description="fast forecasts every series at once with the statistical "
+        "engine (exponential smoothing, TSB, seasonal naive)",
+    )
 
     @validator("store_ids", "product_ids")
     def validate_ids(cls, v):
@@ -220,6 +249,12 @@ async def generate_multi_dimensional_forecast(
             include_promotion_factors=request.include_promotion_factors,
             forecasting_method=ForecastingMethod(request.forecasting_method.value),
             confidence_level=request.confidence_level,
+            hierarchical_method=(
+                request.hierarchical_method.value
+                if request.hierarchical_method
+                else None
+            ),
+            mode=request.mode.value,
         )
 
         # Generate forecast
@@ -232,7 +267,13 @@ async def generate_multi_dimensional_forecast(
             "forecast_summary": {
                 "total_forecasts_generated": len(result.forecast_data),
                 "forecast_horizon_days": request.forecast_horizon_days,
-                "forecasting_method": request.forecasting_method.value,
+                "forecasting_method": service_request.forecasting_method.value,
+                "mode": request.mode.value,
+                "hierarchical_method": (
+                    request.hierarchical_method.value
+                    if request.hierarchical_method
+                    else None
+                ),
                 "confidence_level": request.confidence_level,
                 "analysis_timestamp": datetime.now().isoformat(),
             },
@@ -9,11 +9,13 @@ from typing import Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 import asyncio
+import inspect
 import logging
 import random
 import numpy as np
 import pandas as pd
 import math
+import time
 
 from services.dynamic_weather_service import DynamicWeatherService
 from services.dynamic_promotion_service import DynamicPromotionService
@@ -21,8 +23,17 @@ from services.dynamic_stockout_service import DynamicStockoutService
 from services.dynamic_category_service import DynamicCategoryService
 from services.dynamic_store_service import DynamicStoreService
 from services.real_time_alerts_service import RealTimeAlertsService
+from services.dashboard_snapshot_service import (
+    DEFAULT_WINDOW_DAYS,
+    get_snapshot_entry,
+    snapshot_key,
+    use_base_dataset,
+)
+from services.cache_warmup_service import track_request
+from services.data_version_service import http_cache
 from utils.logger import get_logger
-from database.connection import cached
+from utils.response_encoding import EncodedAPIRoute
+from database.connection import cached, is_cache_refresh
 
 logger = get_logger(__name__)
 
@@ -34,7 +45,9 @@ logger = get_logger(__name__)
 # store_service = DynamicStoreService()
 # alerts_service = RealTimeAlertsService()
 
-router = APIRouter(prefix="/enhanced", tags=["Enhanced Multi-Modal"])
+router = APIRouter(
+    prefix="/enhanced", tags=["Enhanced Multi-Modal"], route_class=EncodedAPIRoute
+)
 
 
 class CompetitiveIntelligenceService:
@@ -1813,6 +1826,13 @@ async def get_dynamic_insights(
 
 @router.get("/curated-data")
 @cached(ttl=300)
+@http_cache(
+    "city_hierarchy",
+    "store_hierarchy",
+    "product_hierarchy",
+    "sales_data",
+    cache_control="public, max-age=60",
+)
 async def get_curated_data(request: Request):
     """Get curated list of all 18 cities, select 25 stores, and 15 products for frontend"""
     try:
@@ -5401,3 +5421,152 @@ async def seasonal_patterns_analysis(request_body: Dict[str, Any], request: Requ
     to identify recurring trends and inform inventory planning.
     """
     dynamic_weather_service = DynamicWeatherService()
+
+
+# ============================================================================
+# DASHBOARD SNAPSHOT
+# ============================================================================
+
+# Snapshot panel -> endpoint it reproduces. Panels run the endpoint handlers
+# unchanged; only their sales_data fetches are served from the base dataset.
+# The handlers' @cached result cache is skipped: its key holds neither the
+# window nor the base dataset, and the snapshot caches its panels itself.
+DASHBOARD_PANELS: Dict[str, str] = {
+    "curated_data": "/enhanced/curated-data",
+    "forecast": "/enhanced/forecast",
+    "confidence_intervals": "/enhanced/confidence-intervals",
+    "seasonal_patterns": "/enhanced/seasonal-patterns",
+    "weather_scenarios": "/enhanced/weather-scenarios",
+    "market_share": "/enhanced/market-share",
+    "category_correlations": "/enhanced/category-correlations",
+    "portfolio_optimization": "/enhanced/portfolio-optimization",
+    "store_clustering": "/enhanced/store-clustering",
+    "performance_ranking": "/enhanced/performance-ranking",
+    "safety_stock": "/enhanced/safety-stock",
+    "reorder_optimization": "/enhanced/reorder-optimization",
+    "cross_store_optimization": "/enhanced/cross-store-optimization",
+    "cross_product_effects": "/enhanced/cross-product-effects",
+    "optimal_pricing": "/enhanced/optimal-pricing",
+    "roi_optimization": "/enhanced/roi-optimization",
+    "live_alerts": "/enhanced/live-alerts",
+    "demand_monitoring": "/enhanced/demand-monitoring",
+    "competitive_intelligence": "/enhanced/competitive-intelligence",
+    "customer_behavior": "/enhanced/customer-behavior",
+    "anomaly_detection": "/enhanced/anomaly-detection",
+}
+
+
+class DashboardSnapshotRequest(BaseModel):
+    city_id: int = Field(0, description="City ID")
+    store_id: int = Field(104, description="Store ID")
+    product_id: int = Field(4, description="Product ID")
+    window_days: int = Field(
+        DEFAULT_WINDOW_DAYS, ge=7, le=730, description="Days of history to load"
+    )
+    panels: Optional[List[str]] = Field(
+        None, description="Panels to include (default: all)"
+    )
+    refresh: bool = Field(False, description="Reload the base dataset")
+
+
+def _panel_endpoint(path: str):
+    """Handler registered for an ``/enhanced`` POST/GET path (unencoded, uncached)."""
+    for route in router.routes:
+        if getattr(route, "path", None) == path:
+            return inspect.unwrap(
+                getattr(route.endpoint, "raw_endpoint", route.endpoint)
+            )
+    raise KeyError(path)
+
+
+def _sanitize_panel(data):
+    """Like ``sanitize_dict`` but leaves integers (ids, counts) as integers"""
+    if isinstance(data, dict):
+        return {key: _sanitize_panel(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_sanitize_panel(item) for item in data]
+    if isinstance(data, (float, np.floating)):
+        return sanitize_float(data)
+    if isinstance(data, np.integer):
+        return int(data)
+    if isinstance(data, np.bool_):
+        return bool(data)
+    return data
+
+
+async def _compose_panel(name: str, params: Dict[str, Any], request: Request):
+    path = DASHBOARD_PANELS[name]
+    endpoint = _panel_endpoint(path)
+    try:
+        if path == "/enhanced/curated-data":
+            return await endpoint(request)
+        if path == "/enhanced/forecast":
+            return await endpoint(EnhancedForecastRequest(**params), request)
+        return await endpoint(dict(params), request)
+    except Exception as e:
+        logger.error(f"Dashboard panel {name} failed: {str(e)}")
+        return {"status": "error", "panel": name, "error": str(e)}
+
+
+@router.post("/dashboard-snapshot", dependencies=[Depends(track_request)])
+async def dashboard_snapshot(request_body: DashboardSnapshotRequest, request: Request):
+    """
+    🧩 DASHBOARD SNAPSHOT
+
+    Returns every dashboard panel (or the selected ``panels``) in one payload.
+    Panels are derived from one shared base dataset per (city, store, product,
+    window) loaded with a single query; base data and panel payloads are
+    cached together for a few minutes.
+    """
+    panels = request_body.panels or list(DASHBOARD_PANELS)
+    unknown = sorted(set(panels) - set(DASHBOARD_PANELS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown panels {unknown}; valid panels: {list(DASHBOARD_PANELS)}",
+        )
+
+    db_manager = getattr(request.app.state, "db_manager", None)
+    key = snapshot_key(
+        request_body.city_id,
+        request_body.store_id,
+        request_body.product_id,
+        request_body.window_days,
+    )
+    entry, base_cached = await get_snapshot_entry(
+        db_manager,
+        key,
+        refresh=request_body.refresh or is_cache_refresh(request),
+    )
+
+    missing = [name for name in panels if name not in entry.panels]
+    params = {
+        "city_id": request_body.city_id,
+        "store_id": request_body.store_id,
+        "product_id": request_body.product_id,
+    }
+    start = time.perf_counter()
+    if missing:
+        with use_base_dataset(entry.base):
+            results = await asyncio.gather(
+                *(_compose_panel(name, params, request) for name in missing)
+            )
+        entry.panels.update(
+            (name, _sanitize_panel(result)) for name, result in zip(missing, results)
+        )
+    compose_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "success": True,
+        "selection": {**params, "window_days": request_body.window_days},
+        "panels": {name: entry.panels[name] for name in panels},
+        "snapshot": {
+            "base_rows": len(entry.base),
+            "base_load_ms": round(entry.base.load_ms, 2),
+            "base_from_cache": base_cached,
+            "panels_computed": missing,
+            "panels_from_cache": [name for name in panels if name not in missing],
+            "compose_ms": round(compose_ms, 2),
+            "loaded_at": datetime.fromtimestamp(entry.base.loaded_at).isoformat(),
+        },
+    }
@@ -24,6 +24,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.prophet_forecaster import ProphetForecaster
 from models.promo_uplift_model import PromoUpliftModel
 from database.connection import cached  # Keep cached decorator
+from services.holiday_calendar import load_holiday_calendar
 
 # Configure logging
 logging.basicConfig(
@@ -403,41 +404,17 @@ async def fetch_holiday_data(
     future_periods: int = 0,
 ):
     """
-    Fetch holiday data from the database.
+    Fetch holiday data for a date range.
+
+    Served from the shared holiday calendar (services.holiday_calendar), which
+    is loaded once and cached instead of queried on every call.
 
     Returns:
         pd.DataFrame: Holiday data
     """
-    manager = db_manager_instance  # Use the passed instance
-
-    query = """
-    SELECT 
-        date,
-        holiday_name,
-        holiday_type,
-        significance
-    FROM holiday_calendar
-    WHERE 1=1
-    """
-
-    params = []  # Use list for asyncpg params
-    param_count = 1
-
-    if start_date is not None:
-        query += f" AND date >= ${{{param_count}}}"
-        params.append(start_date)
-        param_count += 1
-
-    if end_date is not None:
-        query += f" AND date <= ${{{param_count}}}"
-        params.append(end_date)
-        param_count += 1
-
-    query += " ORDER BY date"
-
     try:
-        # Use manager.execute_dataframe_query
-        df = await manager.execute_dataframe_query(query, tuple(params))
+        calendar = await load_holiday_calendar(db_manager_instance)
+        df = calendar.to_frame(start_date, end_date)
         logger.info(f"Fetched {len(df)} holiday records")
         return df
     except Exception as e:
@@ -499,7 +476,9 @@ async def create_forecast(
                 and fastapi_request.method == "POST"
             ):
                 await websocket_manager.broadcast(
-                    f"Notification: {forecast_name} generation started..."
+                    f"Notification: {forecast_name} generation started...",
+                    topic="forecast",
+                    coalesce_key="forecast-progress",
                 )
         else:
             logger.debug(
@@ -528,7 +507,8 @@ async def create_forecast(
                 and fastapi_request.method == "POST"
             ):
                 await websocket_manager.broadcast(
-                    f"Notification: {forecast_name} failed - No historical data."
+                    f"Notification: {forecast_name} failed - No historical data.",
+                    topic="forecast",
                 )
             raise HTTPException(
                 status_code=400, detail="No historical data for forecasting."
@@ -542,7 +522,9 @@ async def create_forecast(
             and fastapi_request.method == "POST"
         ):
             await websocket_manager.broadcast(
-                f"Notification: Historical data fetched for {forecast_name}."
+                f"Notification: Historical data fetched for {forecast_name}.",
+                topic="forecast",
+                coalesce_key="forecast-progress",
             )
 
         from services.forecast_service import generate_forecast
@@ -584,7 +566,9 @@ async def create_forecast(
             and fastapi_request.method == "POST"
         ):
             await websocket_manager.broadcast(
-                f"Notification: {forecast_name} generated successfully. Analyzing insights..."
+                f"Notification: {forecast_name} generated successfully. Analyzing insights...",
+                topic="forecast",
+                coalesce_key="forecast-progress",
             )
 
         # Example of generating insights based on forecast result
@@ -606,7 +590,9 @@ async def create_forecast(
                     insight_message = f"Insight for {forecast_name}: Average predicted sales are high ({avg_forecast:.2f}). Ensure sufficient stock levels."
                 else:
                     insight_message = f"Insight for {forecast_name}: Sales predictions are stable ({avg_forecast:.2f})."
-                await websocket_manager.broadcast(f"Notification: {insight_message}")
+                await websocket_manager.broadcast(
+                    f"Notification: {insight_message}", topic="forecast"
+                )
 
         if (
             websocket_manager
@@ -616,7 +602,7 @@ async def create_forecast(
             and fastapi_request.method == "POST"
         ):
             await websocket_manager.broadcast(
-                f"Notification: {forecast_name} processing complete."
+                f"Notification: {forecast_name} processing complete.", topic="forecast"
             )
         return result
 
@@ -630,7 +616,8 @@ async def create_forecast(
             and fastapi_request.method == "POST"
         ):
             await websocket_manager.broadcast(
-                f"Notification: {forecast_name} failed due to an error: {str(e)}"
+                f"Notification: {forecast_name} failed due to an error: {str(e)}",
+                topic="forecast",
             )
         raise HTTPException(status_code=500, detail=f"Forecast error: {str(e)}")
 
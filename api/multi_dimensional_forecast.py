@@ -9,11 +9,35 @@ import asyncpg
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, validator
 import json
 from database.connection import cached
+from services.cache_warmup_service import track_request
+from services.forecast_stream_service import (
+    STREAM_MEDIA_TYPES,
+    StreamingForecastSummary,
+    encode_event,
+    negotiate_stream_format,
+    stream_combinations,
+)
+from services.hierarchical_forecast import (
+    HIERARCHICAL_METHODS,
+    TOP_DOWN_METHODS,
+    align_residuals,
+    build_hierarchy,
+    reconcile,
+    top_down,
+)
+from services.statistical_forecast import (
+    SEASON_LENGTH,
+    fit_accuracy,
+    forecast_matrix,
+)
+from utils.response_encoding import EncodedAPIRoute
+from utils.tracing import span
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import logging
@@ -56,7 +80,7 @@ class ForecastModelManager:
 
 model_manager = ForecastModelManager()
 
-router = APIRouter()
+router = APIRouter(route_class=EncodedAPIRoute)
 
 
 class WeatherCondition(BaseModel):
@@ -149,8 +173,8 @@ class DemandForecastResponse(BaseModel):
     inventory_recommendations: List[Dict[str, Any]]
 
 
-@router.post("/demand-forecast")
-@cached(ttl=300)  # Cache for 5 minutes
+@router.post("/demand-forecast", dependencies=[Depends(track_request)])
+@cached(ttl=300, http=True)  # Cache for 5 minutes; a warm-up target
 async def demand_forecast(request_body: dict, request: Request):
     """
     Generate demand forecasts with inventory management insights
@@ -205,7 +229,7 @@ async def demand_forecast(request_body: dict, request: Request):
                         msg = f"Demand Forecast: {len(inventory_status)} products analyzed."
                     else:
                         msg = "Demand Forecast: No insights available."
-                    await websocket_manager.broadcast(msg)
+                    await websocket_manager.broadcast(msg, topic="demand")
             except Exception as ws_exc:
                 logger.warning(f"WebSocket notification failed: {ws_exc}")
 
@@ -222,6 +246,108 @@ async def demand_forecast(request_body: dict, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def forecast_stream_response(
+    request: Request,
+    stream_format: Optional[str],
+    combinations: List[tuple],
+    worker,
+    summary: StreamingForecastSummary,
+    to_event,
+) -> StreamingResponse:
+    """
+    Stream one ``combination`` event per finished grid cell, then ``summary``.
+
+    Args:
+        combinations: (city_id, store_id, product_id) tuples to forecast
+        worker: ``worker(conn, combination)`` coroutine producing one result
+        summary: Accumulator folded with every result
+        to_event: Maps (combination, result) to the event payload and folds
+            it into ``summary``
+    """
+    try:
+        fmt = negotiate_stream_format(stream_format, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    manager = request.app.state.db_manager
+    if not manager.pool:
+        raise HTTPException(
+            status_code=500,
+            detail="Database pool not initialized. Check startup events.",
+        )
+
+    async def events():
+        yield encode_event(fmt, "start", {"total_combinations": len(combinations)})
+        results = stream_combinations(manager, combinations, worker)
+        try:
+            async for combo, result, error in results:
+                if error is not None:
+                    summary.failed += 1
+                    city_id, store_id, product_id = combo
+                    yield encode_event(
+                        fmt,
+                        "error",
+                        {
+                            "city_id": city_id,
+                            "store_id": store_id,
+                            "product_id": product_id,
+                            "error": str(error),
+                        },
+                    )
+                    continue
+                yield encode_event(fmt, "combination", to_event(combo, result))
+        finally:
+            await results.aclose()
+        yield encode_event(fmt, "summary", summary.to_dict())
+
+    return StreamingResponse(
+        events(),
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/demand-forecast/stream")
+async def demand_forecast_stream(
+    request_body: dict, request: Request, format: Optional[str] = None
+):
+    """
+    Stream demand forecasts as NDJSON lines or Server-Sent Events
+
+    Emits ``start``, one ``combination`` event per (city, store, product) as
+    soon as its forecast is ready, and a final ``summary``. The format comes
+    from ``?format=ndjson|sse`` or the Accept header (default NDJSON).
+    """
+    forecast_days = request_body.get("forecast_days", 30)
+    combinations = [
+        (city_id, store_id, product_id)
+        for city_id in request_body.get("city_ids", [])
+        for store_id in request_body.get("store_ids", [])
+        for product_id in request_body.get("product_ids", [])
+    ]
+    summary = StreamingForecastSummary(
+        prediction_key="demand_predictions", total_key="total_demand"
+    )
+
+    async def worker(conn, combo):
+        return await demand_forecast_combination(conn, *combo, forecast_days)
+
+    def to_event(combo, forecast):
+        summary.add(combo, forecast)
+        city_id, store_id, product_id = combo
+        return {
+            "key": f"{city_id}_{store_id}_{product_id}",
+            "city_id": city_id,
+            "store_id": store_id,
+            "product_id": product_id,
+            "forecast": forecast,
+        }
+
+    return forecast_stream_response(
+        request, format, combinations, worker, summary, to_event
+    )
+
+
 async def get_inventory_status(
     conn: asyncpg.Connection,
     city_ids: List[str],
@@ -732,20 +858,10 @@ async def generate_demand_forecasts(
         for store_id in store_ids:
             for product_id in product_ids:
                 try:
-                    # Get historical demand data
-                    historical_data = await get_historical_demand_data(
-                        conn, city_id, store_id, product_id
+                    forecast = await demand_forecast_combination(
+                        conn, city_id, store_id, product_id, forecast_days
                     )
 
-                    if not historical_data.empty:
-                        # Generate demand forecast
-                        forecast = await generate_demand_forecast_single(
-                            historical_data, forecast_days
-                        )
-                    else:
-                        # Generate fallback demand forecast
-                        forecast = generate_fallback_demand_forecast(forecast_days)
-
                     key = f"{city_id}_{store_id}_{product_id}"
                     demand_forecasts[key] = forecast
 
@@ -758,6 +874,28 @@ async def generate_demand_forecasts(
     return demand_forecasts
 
 
+async def demand_forecast_combination(
+    conn: asyncpg.Connection,
+    city_id: str,
+    store_id: str,
+    product_id: int,
+    forecast_days: int,
+) -> Dict[str, Any]:
+    """
+    Generate the demand forecast for one combination
+    """
+    # Get historical demand data
+    historical_data = await get_historical_demand_data(
+        conn, city_id, store_id, product_id
+    )
+
+    if not historical_data.empty:
+        # Generate demand forecast
+        return await generate_demand_forecast_single(historical_data, forecast_days)
+    # Generate fallback demand forecast
+    return generate_fallback_demand_forecast(forecast_days)
+
+
 async def get_historical_demand_data(
     conn: asyncpg.Connection, city_id: str, store_id: str, product_id: int
 ) -> pd.DataFrame:
@@ -785,7 +923,8 @@ async def get_historical_demand_data(
         ORDER BY CAST(dt AS DATE)
         """
 
-        rows = await conn.fetch(query)
+        with span("db_fetch"):
+            rows = await conn.fetch(query)
 
         if not rows:
             return pd.DataFrame()
@@ -824,7 +963,8 @@ async def generate_demand_forecast_single(
             return generate_fallback_demand_forecast(forecast_days)
 
         # Prepare features for demand forecasting
-        features = prepare_demand_features(historical_data)
+        with span("feature_build"):
+            features = prepare_demand_features(historical_data)
 
         if features.empty:
             return generate_fallback_demand_forecast(forecast_days)
@@ -846,17 +986,22 @@ async def generate_demand_forecast_single(
         # Fit scaler and model only if new data requires re-training,
         # or if it's the first time and model needs a fit for prediction
         # In a real system, you'd load pre-trained models.
-        X_scaled = scaler.fit_transform(X)
-        model.fit(X_scaled, y)
+        with span("fit"):
+            X_scaled = scaler.fit_transform(X)
+            model.fit(X_scaled, y)
 
         # Generate future predictions
         last_date = historical_data["date"].max()
         future_dates = [last_date + timedelta(days=i + 1) for i in range(forecast_days)]
 
-        future_features = prepare_future_demand_features(historical_data, future_dates)
-        future_features_scaled = scaler.transform(future_features)
+        with span("feature_build"):
+            future_features = prepare_future_demand_features(
+                historical_data, future_dates
+            )
+            future_features_scaled = scaler.transform(future_features)
 
-        predictions = model.predict(future_features_scaled)
+        with span("predict"):
+            predictions = model.predict(future_features_scaled)
         predictions = np.maximum(predictions, 0)  # Ensure non-negative demand
 
         # Calculate confidence intervals
@@ -1515,6 +1660,26 @@ class MultiDimensionalForecastRequest(BaseModel):
     forecast_days: int = 30
     include_insights: bool = True
     forecast_model_type: str = "ensemble"
+    # Forecast the grid as a city -> store -> product hierarchy instead of
+    # one model per combination (see services.hierarchical_forecast)
+    hierarchical_method: Optional[str] = None
+    # "fast" forecasts the whole grid at once with the vectorised statistical
+    # engine (see services.statistical_forecast)
+    mode: str = "standard"
+
+    @validator("hierarchical_method")
+    def validate_hierarchical_method(cls, v):
+        if v is not None and v not in HIERARCHICAL_METHODS:
+            raise ValueError(
+                f"Hierarchical method must be one of: {list(HIERARCHICAL_METHODS)}"
+            )
+        return v
+
+    @validator("mode")
+    def validate_mode(cls, v):
+        if v not in ("standard", "fast"):
+            raise ValueError("Mode must be 'standard' or 'fast'")
+        return v
 
 
 class ForecastInsight(BaseModel):
@@ -1585,9 +1750,11 @@ async def get_diverse_store_selection(
 
 
 @router.post(
-    "/multi-dimensional-forecast", response_model=MultiDimensionalForecastResponse
+    "/multi-dimensional-forecast",
+    response_model=MultiDimensionalForecastResponse,
+    dependencies=[Depends(track_request)],
 )
-@cached(ttl=300)  # Cache for 5 minutes
+@cached(ttl=300, http=True)  # Cache for 5 minutes; a warm-up target
 async def multi_dimensional_forecast(
     request_body: MultiDimensionalForecastRequest, request: Request
 ):
@@ -1605,34 +1772,54 @@ async def multi_dimensional_forecast(
             )
 
             # Get data for all combinations
-            forecast_results = await generate_multi_dimensional_forecast(
-                conn,
-                request_body.city_ids,
-                diverse_store_ids,
-                request_body.product_ids,
-                request_body.forecast_days,
-            )
+            if request_body.hierarchical_method:
+                forecast_results = await generate_hierarchical_forecast(
+                    conn,
+                    request_body.city_ids,
+                    diverse_store_ids,
+                    request_body.product_ids,
+                    request_body.forecast_days,
+                    request_body.hierarchical_method,
+                    fast=request_body.mode == "fast",
+                )
+            elif request_body.mode == "fast":
+                forecast_results = await generate_fast_forecast(
+                    conn,
+                    request_body.city_ids,
+                    diverse_store_ids,
+                    request_body.product_ids,
+                    request_body.forecast_days,
+                )
+            else:
+                forecast_results = await generate_multi_dimensional_forecast(
+                    conn,
+                    request_body.city_ids,
+                    diverse_store_ids,
+                    request_body.product_ids,
+                    request_body.forecast_days,
+                )
 
-            # Generate insights
-            insights = await generate_forecast_insights(
-                conn,
-                forecast_results,
-                request_body.city_ids,
-                request_body.store_ids,
-                request_body.product_ids,
-            )
+            with span("analysis"):
+                # Generate insights
+                insights = await generate_forecast_insights(
+                    conn,
+                    forecast_results,
+                    request_body.city_ids,
+                    request_body.store_ids,
+                    request_body.product_ids,
+                )
 
-            # Generate comparative analysis
-            comparative_analysis = await generate_comparative_analysis(
-                conn,
-                forecast_results,
-                request_body.city_ids,
-                request_body.store_ids,
-                request_body.product_ids,
-            )
+                # Generate comparative analysis
+                comparative_analysis = await generate_comparative_analysis(
+                    conn,
+                    forecast_results,
+                    request_body.city_ids,
+                    request_body.store_ids,
+                    request_body.product_ids,
+                )
 
-            # Generate summary
-            summary = generate_forecast_summary(forecast_results, insights)
+                # Generate summary
+                summary = generate_forecast_summary(forecast_results, insights)
 
             # --- WebSocket Notification ---
             try:
@@ -1648,7 +1835,7 @@ async def multi_dimensional_forecast(
                         msg = f"Sales Forecast: {summary['total_combinations']} combinations analyzed."
                     else:
                         msg = "Sales Forecast: No insights available."
-                    await websocket_manager.broadcast(msg)
+                    await websocket_manager.broadcast(msg, topic="sales")
             except Exception as ws_exc:
                 logger.warning(f"WebSocket notification failed: {ws_exc}")
 
@@ -1665,6 +1852,54 @@ async def multi_dimensional_forecast(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/multi-dimensional-forecast/stream")
+async def multi_dimensional_forecast_stream(
+    request_body: MultiDimensionalForecastRequest,
+    request: Request,
+    format: Optional[str] = None,
+):
+    """
+    Stream multi-dimensional forecasts as NDJSON lines or Server-Sent Events
+
+    Emits ``start``, one ``combination`` event per (city, store, product) as
+    soon as its forecast is ready, and a final ``summary`` with the grid
+    totals and aggregates. Whole-grid insights and comparative analysis stay
+    on ``/multi-dimensional-forecast``.
+    """
+    manager = request.app.state.db_manager
+    if not manager.pool:
+        raise HTTPException(
+            status_code=500,
+            detail="Database pool not initialized. Check startup events.",
+        )
+    async with manager.get_connection() as conn:
+        store_ids = await get_diverse_store_selection(
+            conn, request_body.city_ids, request_body.store_ids
+        )
+    combinations = [
+        (city_id, store_id, product_id)
+        for city_id in request_body.city_ids
+        for store_id in store_ids
+        for product_id in request_body.product_ids
+    ]
+    summary = StreamingForecastSummary()
+
+    async def worker(conn, combo):
+        return await forecast_combination(conn, *combo, request_body.forecast_days)
+
+    def to_event(combo, combination_result):
+        summary.add(
+            combo,
+            combination_result["forecast"],
+            combination_result["historical_stats"].get("avg_daily_sales"),
+        )
+        return combination_result
+
+    return forecast_stream_response(
+        request, format, combinations, worker, summary, to_event
+    )
+
+
 async def generate_multi_dimensional_forecast(
     conn: asyncpg.Connection,
     city_ids: List[str],
@@ -1682,45 +1917,9 @@ async def generate_multi_dimensional_forecast(
         for store_id in store_ids:
             for product_id in product_ids:
                 try:
-                    # Get historical sales data
-                    historical_data = await get_historical_sales_data(
-                        conn, city_id, store_id, product_id
-                    )
-
-                    # Generate forecast for this combination (use fallback if no data)
-                    if not historical_data.empty:
-                        forecast = await generate_single_forecast(
-                            historical_data, forecast_days
-                        )
-                        historical_stats = calculate_historical_stats(historical_data)
-                    else:
-                        # Use fallback forecast with realistic data
-                        forecast = generate_fallback_forecast(forecast_days)
-                        historical_stats = {
-                            "avg_daily_sales": 120,
-                            "total_sales": 120 * 365,
-                            "sales_volatility": 25,
-                            "max_sales": 200,
-                            "min_sales": 50,
-                            "data_points": 0,  # Indicates fallback data
-                        }
-
-                    # Get location and product names
-                    location_info = await get_location_info(
-                        conn, city_id, store_id, product_id
+                    combination_result = await forecast_combination(
+                        conn, city_id, store_id, product_id, forecast_days
                     )
-
-                    combination_result = {
-                        "city_id": city_id,
-                        "store_id": store_id,
-                        "product_id": product_id,
-                        "city_name": location_info.get("city_name", "Unknown"),
-                        "store_name": location_info.get("store_name", "Unknown"),
-                        "product_name": location_info.get("product_name", "Unknown"),
-                        "forecast": forecast,
-                        "historical_stats": historical_stats,
-                    }
-
                     forecast_results["combinations"].append(combination_result)
 
                 except Exception as e:
@@ -1737,6 +1936,397 @@ async def generate_multi_dimensional_forecast(
     return forecast_results
 
 
+# Levels of the forecast grid below the total
+HIERARCHY_LEVELS = [
+    ["city_id"],
+    ["city_id", "store_id"],
+    ["city_id", "store_id", "product_id"],
+]
+
+
+async def generate_hierarchical_forecast(
+    conn: asyncpg.Connection,
+    city_ids: List[str],
+    store_ids: List[str],
+    product_ids: List[int],
+    forecast_days: int,
+    method: str,
+    fast: bool = False,
+) -> Dict[str, Any]:
+    """
+    Forecast the city x store x product grid as one hierarchy
+
+    Top-down methods fit models only for aggregate series (the total, or
+    every city and store) and split them down the grid by forecast or
+    historical proportions; reconciliation methods forecast every node and
+    reconcile them. Either way product, store, city and total forecasts
+    add up. With ``fast`` the base forecasts of all nodes come from one
+    pass of the statistical engine instead of a model per node.
+    """
+    history = await get_grid_sales_data(conn, city_ids, store_ids, product_ids)
+    leaf_keys = HIERARCHY_LEVELS[-1]
+    grid = [
+        (city_id, store_id, product_id)
+        for city_id in city_ids
+        for store_id in store_ids
+        for product_id in product_ids
+    ]
+    hierarchy = build_hierarchy(pd.DataFrame(grid, columns=leaf_keys), HIERARCHY_LEVELS)
+    leaf_position = {
+        key: i for i, key in enumerate(hierarchy.leaves.itertuples(index=False))
+    }
+
+    if method == "top_down_historical":
+        forecast_levels = [0]
+    elif method in TOP_DOWN_METHODS:
+        forecast_levels = list(range(len(hierarchy.levels) - 1))
+    else:
+        forecast_levels = list(range(len(hierarchy.levels)))
+    with_residuals = method in ("wls_var", "mint_shrink")
+
+    if history.empty:
+        last_date = pd.Timestamp(datetime.now().date())
+        leaf_history: Dict[Any, pd.DataFrame] = {}
+    else:
+        last_date = history["dt"].max()
+        leaf_history = dict(list(history.groupby(leaf_keys)))
+    dates = [last_date + timedelta(days=i + 1) for i in range(forecast_days)]
+    leaf_sales = np.array(
+        [
+            leaf_history[key]["sale_amount"].sum() if key in leaf_history else 0.0
+            for key in hierarchy.leaves.itertuples(index=False, name=None)
+        ]
+    )
+
+    # Base forecasts of the forecast levels
+    base = np.full((hierarchy.n_nodes, forecast_days), np.nan)
+    node_forecasts: Dict[int, Dict[str, Any]] = {}
+    residuals: Dict[int, pd.Series] = {}
+    if fast:
+        nodes = np.concatenate(
+            [
+                np.arange(rows.start, rows.stop)
+                for rows in (hierarchy.level_slices[l] for l in forecast_levels)
+            ]
+        )
+        leaf_matrix, last_day = grid_sales_matrix(
+            history,
+            leaf_keys,
+            list(hierarchy.leaves.itertuples(index=False, name=None)),
+        )
+        days = pd.date_range(end=last_day, periods=leaf_matrix.shape[1], freq="D")
+        # A node's history starts with the first of its leaves to sell
+        observed = (~np.isnan(leaf_matrix)).astype(float)
+        started = hierarchy.aggregate(observed)[nodes] > 0
+        node_matrix = np.where(
+            started, hierarchy.aggregate(np.nan_to_num(leaf_matrix))[nodes], np.nan
+        )
+        with span("statistical_forecast"):
+            forecast = forecast_matrix(node_matrix, forecast_days)
+        base[nodes] = forecast.mean
+        accuracy = fit_accuracy(node_matrix, forecast.residuals)
+        # The first season only initialises the engine; the days before a
+        # node's history starts count as zero error
+        node_residuals = np.nan_to_num(forecast.residuals[:, SEASON_LENGTH:])
+        for i, node in enumerate(nodes):
+            node_forecasts[node] = {
+                "model_accuracy": float(accuracy[i]),
+                "feature_importance": {},
+                "statistical_method": forecast.methods[i],
+            }
+            if with_residuals:
+                residuals[node] = pd.Series(
+                    node_residuals[i], index=days[SEASON_LENGTH:]
+                )
+    else:
+        for level in forecast_levels:
+            keys = list(hierarchy.levels[level])
+            node_history = aggregate_node_history(history, keys)
+            rows = hierarchy.level_slices[level]
+            for node, key in zip(
+                range(rows.start, rows.stop), hierarchy.node_keys(level)
+            ):
+                frame = node_history.get(key)
+                if frame is None or frame["sale_amount"].sum() == 0:
+                    base[node] = 0.0
+                elif len(frame) < 30:
+                    # Too short to fit a model: recent average
+                    base[node] = frame["sale_amount"].tail(30).mean()
+                else:
+                    forecast = await generate_single_forecast(
+                        frame, forecast_days, include_residuals=with_residuals
+                    )
+                    base[node] = forecast["predictions"]
+                    node_forecasts[node] = forecast
+                    if "residuals" in forecast:
+                        residuals[node] = forecast.pop("residuals")
+
+    residual_matrix = None
+    if with_residuals:
+        # Node histories can start late or skip days: pair residuals by
+        # date, not by position; nodes without residuals stay zero
+        fitted = sorted(residuals)
+        aligned = (
+            align_residuals([residuals[node] for node in fitted])
+            if fitted
+            else np.empty((0, 0))
+        )
+        if aligned.shape[1] < 2:
+            logger.warning(f"No model residuals for {method}; using wls_struct")
+            method = "wls_struct"
+        else:
+            residual_matrix = np.zeros((hierarchy.n_nodes, aligned.shape[1]))
+            residual_matrix[fitted] = aligned
+
+    with span("reconcile"):
+        if method in TOP_DOWN_METHODS:
+            leaf_forecasts = top_down(hierarchy, base, leaf_sales)
+        else:
+            leaf_forecasts = reconcile(hierarchy, base, method, residual_matrix)
+
+    combinations = []
+    for city_id, store_id, product_id in grid:
+        leaf = leaf_position[(city_id, store_id, product_id)]
+        predictions = leaf_forecasts[leaf]
+        # Accuracy and drivers of the nearest forecast node
+        node = hierarchy.level_slices[-1].start + leaf
+        while node not in node_forecasts and node > 0:
+            node = hierarchy.parent[node]
+        source = node_forecasts.get(node, {})
+
+        combo_history = leaf_history.get((city_id, store_id, product_id))
+        if combo_history is not None:
+            bounds = calculate_confidence_intervals(
+                predictions, combo_history["sale_amount"]
+            )
+        else:
+            bounds = {"upper": predictions, "lower": predictions}
+
+        combinations.append(
+            await grid_combination(
+                conn,
+                (city_id, store_id, product_id),
+                dates,
+                predictions,
+                bounds,
+                combo_history,
+                source,
+            )
+        )
+
+    return {
+        "combinations": combinations,
+        "aggregated_data": await generate_aggregated_forecasts(
+            conn, combinations, city_ids, store_ids, product_ids
+        ),
+        "time_series": {},
+        "hierarchy": {
+            "method": method,
+            "levels": [list(keys) for keys in hierarchy.levels],
+            "nodes": hierarchy.n_nodes,
+            "models_fitted": len(node_forecasts),
+        },
+    }
+
+
+async def generate_fast_forecast(
+    conn: asyncpg.Connection,
+    city_ids: List[str],
+    store_ids: List[str],
+    product_ids: List[int],
+    forecast_days: int,
+) -> Dict[str, Any]:
+    """
+    Forecast every combination of the grid with the statistical engine
+
+    One history query and one vectorised pass over all combinations
+    (exponential smoothing, TSB for intermittent sales, seasonal naive for
+    short histories) instead of a model fit per combination.
+    """
+    history = await get_grid_sales_data(conn, city_ids, store_ids, product_ids)
+    grid = [
+        (city_id, store_id, product_id)
+        for city_id in city_ids
+        for store_id in store_ids
+        for product_id in product_ids
+    ]
+    leaf_keys = HIERARCHY_LEVELS[-1]
+    leaf_history = {} if history.empty else dict(list(history.groupby(leaf_keys)))
+
+    sales, last_date = grid_sales_matrix(history, leaf_keys, grid)
+    with span("statistical_forecast"):
+        forecast = forecast_matrix(sales, forecast_days)
+    accuracy = fit_accuracy(sales, forecast.residuals)
+    dates = [last_date + timedelta(days=i + 1) for i in range(forecast_days)]
+
+    combinations = []
+    for i, key in enumerate(grid):
+        combinations.append(
+            await grid_combination(
+                conn,
+                key,
+                dates,
+                forecast.mean[i],
+                {"upper": forecast.upper[i], "lower": forecast.lower[i]},
+                leaf_history.get(key),
+                {
+                    "model_accuracy": float(accuracy[i]),
+                    "statistical_method": forecast.methods[i],
+                },
+            )
+        )
+
+    return {
+        "combinations": combinations,
+        "aggregated_data": await generate_aggregated_forecasts(
+            conn, combinations, city_ids, store_ids, product_ids
+        ),
+        "time_series": {},
+    }
+
+
+def grid_sales_matrix(
+    history: pd.DataFrame, keys: List[str], grid: List[tuple]
+) -> Tuple[np.ndarray, pd.Timestamp]:
+    """
+    Daily sales of each grid combination as a (combinations x days) array
+
+    Days before a combination's first sales row are NaN (its history has not
+    started); later days without a row count as zero. Returns the array and
+    its last day.
+    """
+    if history.empty:
+        return np.zeros((len(grid), 1)), pd.Timestamp(datetime.now().date())
+    days = pd.date_range(history["dt"].min(), history["dt"].max(), freq="D")
+    daily = history.pivot_table(
+        index=keys, columns="dt", values="sale_amount", aggfunc="sum"
+    )
+    daily = daily.reindex(
+        index=pd.MultiIndex.from_tuples(grid, names=keys), columns=days
+    ).to_numpy(dtype=float)
+    started = np.maximum.accumulate(~np.isnan(daily), axis=1)
+    return np.where(started, np.nan_to_num(daily), np.nan), days[-1]
+
+
+async def grid_combination(
+    conn: asyncpg.Connection,
+    key: tuple,
+    dates: List[datetime],
+    predictions: np.ndarray,
+    bounds: Dict[str, np.ndarray],
+    combo_history: Optional[pd.DataFrame],
+    source: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Combination result of a grid forecast, shaped like ``forecast_combination``
+    """
+    city_id, store_id, product_id = key
+    if combo_history is not None:
+        historical_stats = calculate_historical_stats(combo_history)
+    else:
+        historical_stats = {"avg_daily_sales": 0.0, "data_points": 0}
+
+    forecast = {
+        "dates": [d.strftime("%Y-%m-%d") for d in dates],
+        "predictions": predictions.tolist(),
+        "upper_bounds": bounds["upper"].tolist(),
+        "lower_bounds": bounds["lower"].tolist(),
+        "total_predicted": float(np.sum(predictions)),
+        "avg_daily_predicted": float(np.mean(predictions)),
+        "model_accuracy": source.get("model_accuracy", 0.0),
+        "feature_importance": source.get("feature_importance", {}),
+    }
+    if "statistical_method" in source:
+        forecast["statistical_method"] = source["statistical_method"]
+
+    location_info = await get_location_info(conn, city_id, store_id, product_id)
+    return {
+        "city_id": city_id,
+        "store_id": store_id,
+        "product_id": product_id,
+        "city_name": location_info.get("city_name", "Unknown"),
+        "store_name": location_info.get("store_name", "Unknown"),
+        "product_name": location_info.get("product_name", "Unknown"),
+        "forecast": forecast,
+        "historical_stats": historical_stats,
+    }
+
+
+def aggregate_node_history(
+    history: pd.DataFrame, keys: List[str]
+) -> Dict[Any, pd.DataFrame]:
+    """
+    Daily history of every node of a hierarchy level: summed sales,
+    averaged drivers
+    """
+    if history.empty:
+        return {}
+    daily = (
+        history.groupby(keys + ["dt"])
+        .agg(
+            sale_amount=("sale_amount", "sum"),
+            discount=("discount", "mean"),
+            holiday_flag=("holiday_flag", "max"),
+            temperature=("temperature", "mean"),
+            humidity=("humidity", "mean"),
+            precipitation=("precipitation", "mean"),
+        )
+        .reset_index()
+    )
+    if not keys:
+        return {(): daily}
+    return {
+        key if isinstance(key, tuple) else (key,): frame.reset_index(drop=True)
+        for key, frame in daily.groupby(keys)
+    }
+
+
+async def forecast_combination(
+    conn: asyncpg.Connection,
+    city_id: str,
+    store_id: str,
+    product_id: int,
+    forecast_days: int,
+) -> Dict[str, Any]:
+    """
+    Generate the forecast, historical stats and names for one combination
+    """
+    # Get historical sales data
+    historical_data = await get_historical_sales_data(
+        conn, city_id, store_id, product_id
+    )
+
+    # Generate forecast for this combination (use fallback if no data)
+    if not historical_data.empty:
+        forecast = await generate_single_forecast(historical_data, forecast_days)
+        historical_stats = calculate_historical_stats(historical_data)
+    else:
+        # Use fallback forecast with realistic data
+        forecast = generate_fallback_forecast(forecast_days)
+        historical_stats = {
+            "avg_daily_sales": 120,
+            "total_sales": 120 * 365,
+            "sales_volatility": 25,
+            "max_sales": 200,
+            "min_sales": 50,
+            "data_points": 0,  # Indicates fallback data
+        }
+
+    # Get location and product names
+    location_info = await get_location_info(conn, city_id, store_id, product_id)
+
+    return {
+        "city_id": city_id,
+        "store_id": store_id,
+        "product_id": product_id,
+        "city_name": location_info.get("city_name", "Unknown"),
+        "store_name": location_info.get("store_name", "Unknown"),
+        "product_name": location_info.get("product_name", "Unknown"),
+        "forecast": forecast,
+        "historical_stats": historical_stats,
+    }
+
+
 async def get_historical_sales_data(
     conn: asyncpg.Connection,
     city_id: str,
@@ -1766,7 +2356,8 @@ async def get_historical_sales_data(
     """
 
     try:
-        rows = await conn.fetch(query)
+        with span("db_fetch"):
+            rows = await conn.fetch(query)
         if not rows:
             return pd.DataFrame()
 
@@ -1789,18 +2380,84 @@ async def get_historical_sales_data(
         return pd.DataFrame()
 
 
+async def get_grid_sales_data(
+    conn: asyncpg.Connection,
+    city_ids: List[str],
+    store_ids: List[str],
+    product_ids: List[int],
+    days_back: int = 365,
+) -> pd.DataFrame:
+    """
+    Get historical sales data for every combination of a grid in one query
+    """
+    city_list = "','".join(str(c).replace("'", "''") for c in city_ids)
+    store_list = "','".join(str(s).replace("'", "''") for s in store_ids)
+    product_list = ",".join(str(int(p)) for p in product_ids)
+    query = f"""
+    SELECT 
+        dt,
+        city_id::text as city_id,
+        store_id::text as store_id,
+        product_id,
+        CAST(sale_amount AS FLOAT) as sale_amount,
+        CAST(discount AS FLOAT) as discount,
+        CAST(holiday_flag AS INTEGER) as holiday_flag,
+        CAST(avg_temperature AS FLOAT) as temperature,
+        CAST(avg_humidity AS FLOAT) as humidity,
+        CAST(precpt AS FLOAT) as precipitation
+    FROM sales_data 
+    WHERE city_id::text IN ('{city_list}') 
+        AND store_id::text IN ('{store_list}') 
+        AND product_id IN ({product_list})
+        AND CAST(dt AS DATE) >= (CURRENT_DATE - INTERVAL '{days_back} days')
+    ORDER BY CAST(dt AS DATE)
+    """
+
+    try:
+        with span("db_fetch"):
+            rows = await conn.fetch(query)
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame([dict(r) for r in rows])
+        df["dt"] = pd.to_datetime(df["dt"])
+        df["product_id"] = df["product_id"].astype(int)
+        df = df.sort_values("dt")
+
+        # Fill missing values (per combination, as for a single one)
+        leaf = df.groupby(["city_id", "store_id", "product_id"])
+        df["sale_amount"] = df["sale_amount"].fillna(0)
+        df["discount"] = df["discount"].fillna(0)
+        df["holiday_flag"] = df["holiday_flag"].fillna(0)
+        df["temperature"] = df["temperature"].fillna(
+            leaf["temperature"].transform("mean")
+        )
+        df["humidity"] = df["humidity"].fillna(leaf["humidity"].transform("mean"))
+        df["precipitation"] = df["precipitation"].fillna(0)
+
+        return df
+
+    except Exception as e:
+        logger.error(f"Error getting grid historical data: {e}")
+        return pd.DataFrame()
+
+
 async def generate_single_forecast(
-    historical_data: pd.DataFrame, forecast_days: int
+    historical_data: pd.DataFrame, forecast_days: int, include_residuals: bool = False
 ) -> Dict[str, Any]:
     """
     Generate forecast for a single combination using machine learning
+
+    With ``include_residuals`` the in-sample residuals (a Series indexed by
+    date) are returned too, for forecast reconciliation.
     """
     if historical_data.empty or len(historical_data) < 30:
         return generate_fallback_forecast(forecast_days)
 
     try:
         # Prepare features
-        features = prepare_features(historical_data)
+        with span("feature_build"):
+            features = prepare_features(historical_data)
 
         if features.empty:
             return generate_fallback_forecast(forecast_days)
@@ -1821,26 +2478,29 @@ async def generate_single_forecast(
         y = features["sale_amount"]
 
         # Fit scaler and model only if new data requires re-training
-        X_scaled = scaler.fit_transform(X)
-        model.fit(X_scaled, y)
+        with span("fit"):
+            X_scaled = scaler.fit_transform(X)
+            model.fit(X_scaled, y)
 
         # Generate future dates
         last_date = historical_data["dt"].max()
         future_dates = [last_date + timedelta(days=i + 1) for i in range(forecast_days)]
 
         # Prepare future features
-        future_features = prepare_future_features(historical_data, future_dates)
-        future_features_scaled = scaler.transform(future_features)
+        with span("feature_build"):
+            future_features = prepare_future_features(historical_data, future_dates)
+            future_features_scaled = scaler.transform(future_features)
 
         # Make predictions
-        predictions = model.predict(future_features_scaled)
+        with span("predict"):
+            predictions = model.predict(future_features_scaled)
 
         # Calculate confidence intervals
         confidence_intervals = calculate_confidence_intervals(
             predictions, historical_data["sale_amount"]
         )
 
-        return {
+        result = {
             "dates": [d.strftime("%Y-%m-%d") for d in future_dates],
             "predictions": predictions.tolist(),
             "upper_bounds": confidence_intervals["upper"].tolist(),
@@ -1850,6 +2510,12 @@ async def generate_single_forecast(
             "model_accuracy": calculate_model_accuracy(model, X_scaled, y),
             "feature_importance": dict(zip(X.columns, model.feature_importances_)),
         }
+        if include_residuals:
+            result["residuals"] = pd.Series(
+                y.to_numpy() - model.predict(X_scaled),
+                index=historical_data.loc[features.index, "dt"].to_numpy(),
+            )
+        return result
 
     except Exception as e:
         logger.error(f"Error in single forecast: {e}")
@@ -1929,13 +2595,17 @@ def prepare_future_features(
             # Get recent historical data for lag features
             recent_data = historical_data.tail(30)
 
+            temperature = recent_data["temperature"].mean()
+            humidity = recent_data["humidity"].mean()
+            precipitation = recent_data["precipitation"].mean()
+
             # Basic time features
             features = {
                 "discount": recent_data["discount"].mean(),
                 "holiday_flag": 0,  # Could be enhanced with holiday calendar
-                "temperature": recent_data["temperature"].mean(),
-                "humidity": recent_data["humidity"].mean(),
-                "precipitation": recent_data["precipitation"].mean(),
+                "temperature": temperature,
+                "humidity": humidity,
+                "precipitation": precipitation,
                 "day_of_week": date.weekday(),
                 "month": date.month,
                 "day_of_month": date.day,
@@ -1953,10 +2623,8 @@ def prepare_future_features(
                 ),
                 "sale_amount_ma7": recent_data["sale_amount"].tail(7).mean(),
                 "sale_amount_ma30": recent_data["sale_amount"].mean(),
-                "temp_humidity_interaction": features["temperature"]
-                * features["humidity"],
-                "temp_precipitation_interaction": features["temperature"]
-                * features["precipitation"],
+                "temp_humidity_interaction": temperature * humidity,
+                "temp_precipitation_interaction": temperature * precipitation,
             }
 
             future_features.append(features)
@@ -2714,7 +3382,7 @@ async def weather_holiday_forecast(request_body: dict, request: Request):
                         msg = f"Weather Impact: {top_weather.product_name} in {top_weather.city_name} ({top_weather.store_name}): {top_weather.reasoning}"
                     else:
                         msg = "Weather/Holiday Forecast: No insights available."
-                    await websocket_manager.broadcast(msg)
+                    await websocket_manager.broadcast(msg, topic="weather")
             except Exception as ws_exc:
                 logger.warning(f"WebSocket notification failed: {ws_exc}")
 
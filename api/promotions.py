@@ -21,6 +21,7 @@ import sys
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.promo_uplift_model import PromoUpliftModel
+from services.promotion_logic import simulate_and_recommend_promotions
 from api.forecast import (
     get_promo_model,
     fetch_historical_data,
@@ -93,6 +94,7 @@ class PromotionRecommendationRequest(BaseModel):
     target_uplift: Optional[float] = None
     max_discount: Optional[float] = 0.5
     count: int = 10
+    durations: Optional[List[int]] = None  # Promotion lengths (days) to simulate
 
 
 class PromotionRecommendationResponse(BaseModel):
@@ -398,6 +400,7 @@ async def recommend_promotions(
     - target_uplift: Target uplift percentage (optional)
     - max_discount: Maximum discount percentage (default: 0.5)
     - count: Number of recommendations to return (default: 10)
+    - durations: Promotion lengths in days to simulate (default: [7])
 
     Returns:
     - List of recommended promotions with estimated uplift
@@ -449,118 +452,23 @@ async def recommend_promotions(
         if not group_cols:
             group_cols = ["product_id"]
 
-        # Get unique combinations
-        combinations = df[group_cols].drop_duplicates()
-
-        # For each combination, simulate different discount levels and predict uplift
-        recommendations = []
-        discount_levels = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
-        discount_levels = [d for d in discount_levels if d <= request_body.max_discount]
-
-        for _, combo in combinations.iterrows():
-            # Filter data for this combination
-            combo_filter = True
-            for col in group_cols:
-                combo_filter = combo_filter & (df[col] == combo[col])
-
-            combo_data = df[combo_filter].copy()
-
-            if len(combo_data) < 10:  # Skip if too little data
-                continue
-
-            # Calculate baseline metrics (no promo)
-            baseline = (
-                combo_data[~combo_data["promo_flag"]]["sale_amount"].mean()
-                if "promo_flag" in combo_data.columns
-                else combo_data["sale_amount"].mean()
-            )
-
-            for discount in discount_levels:
-                # Create a copy with simulated discount
-                sim_data = combo_data.copy()
-                sim_data["discount"] = discount
-                sim_data["promo_flag"] = True
-
-                # Predict uplift
-                try:
-                    pred_uplift = model.predict(sim_data).mean()
-
-                    # Skip negative uplift predictions
-                    if pred_uplift <= 0:
-                        continue
-
-                    # Calculate ROI
-                    incremental_sales = pred_uplift
-                    discount_cost = baseline * discount
-                    roi = (
-                        (incremental_sales - discount_cost) / discount_cost
-                        if discount_cost > 0
-                        else 0
-                    )
-
-                    # Add to recommendations
-                    rec = {
-                        "discount_percentage": float(discount),
-                        "estimated_uplift": float(pred_uplift),
-                        "estimated_roi": float(roi),
-                        "baseline_sales": float(baseline),
-                        "projected_sales": float(baseline + pred_uplift),
-                        "promotion_type": "Discount",
-                    }
-
-                    # Add grouping columns
-                    for col in group_cols:
-                        rec[col] = int(combo[col]) if pd.notnull(combo[col]) else None
-
-                    recommendations.append(rec)
-                except Exception as e:
-                    logger.warning(f"Error predicting uplift for {combo}: {str(e)}")
-
-        # Sort by estimated ROI and take the top n
-        recommendations.sort(key=lambda x: x["estimated_roi"], reverse=True)
-        top_recommendations = recommendations[
-            : request_body.count
-        ]  # Use request_body.count
-
-        # If target uplift is specified, filter to meet target
-        if request_body.target_uplift is not None:
-            top_recommendations = [
-                rec
-                for rec in top_recommendations
-                if rec["estimated_uplift"] >= request_body.target_uplift
-            ]
-
-        # Calculate summary statistics
-        avg_uplift = (
-            sum(rec["estimated_uplift"] for rec in top_recommendations)
-            / len(top_recommendations)
-            if top_recommendations
-            else 0
-        )
-        avg_roi = (
-            sum(rec["estimated_roi"] for rec in top_recommendations)
-            / len(top_recommendations)
-            if top_recommendations
-            else 0
-        )
-        avg_discount = (
-            sum(rec["discount_percentage"] for rec in top_recommendations)
-            / len(top_recommendations)
-            if top_recommendations
-            else 0
+        # Score every (combination x discount x duration) scenario in one
+        # batched model call and keep the best scenario per combination
+        return simulate_and_recommend_promotions(
+            df,
+            model,
+            group_cols,
+            max_discount=(
+                request_body.max_discount
+                if request_body.max_discount is not None
+                else 0.5
+            ),
+            count=request_body.count,
+            target_uplift=request_body.target_uplift,
+            target_date=target_date,
+            durations=request_body.durations,
         )
 
-        return {
-            "recommendations": top_recommendations,
-            "summary": {
-                "total_recommendations": len(top_recommendations),
-                "average_uplift": float(avg_uplift),
-                "average_roi": float(avg_roi),
-                "average_discount": float(avg_discount),
-                "target_date": target_date.strftime("%Y-%m-%d"),
-            },
-        }
-
     except Exception as e:
         logger.error(f"Error generating promotion recommendations: {str(e)}")
         raise HTTPException(
@@ -38,14 +38,10 @@ import traceback
 from contextlib import asynccontextmanager
 from fastapi import APIRouter  # Import APIRouter
 from database.connection import cached  # Still need cached decorator
+from services.data_version_service import http_cache
+from utils.response_encoding import EncodedAPIRoute
 
 
-# Import analytics router
-from api.analytics_api import router as analytics_router
-from api.enhanced_multi_modal_api import router as enhanced_router
-from api.multi_dimensional_forecast import router as multi_dimensional_router
-from api.clustering_segmentation import router as clustering_router
-
 # Create FastAPI app
 # app = FastAPI(
 #     title="FreshRetail Forecasting API",
@@ -55,13 +51,11 @@ from api.clustering_segmentation import router as clustering_router
 router = APIRouter(
     prefix="",  # Adjust prefix as needed, usually empty if integrated into main app at a specific /api prefix
     tags=["Core API"],
+    route_class=EncodedAPIRoute,
 )
 
-# Include analytics router
-router.include_router(analytics_router)
-router.include_router(enhanced_router)
-router.include_router(multi_dimensional_router)
-router.include_router(clustering_router)
+# The analytics, enhanced, multi-dimensional and clustering routers are
+# mounted under /api on first use (see LAZY_ROUTERS in app/main.py)
 
 # Export the router as 'app' for main.py to import
 app = router
@@ -122,6 +116,7 @@ async def root():
 
 
 @router.get("/cities")
+@http_cache("city_hierarchy", cache_control="public, max-age=300")
 async def get_cities(request: Request):  # Accept request object
     try:
         async with request.app.state.db_manager.get_connection() as conn:  # Access from app.state
@@ -135,6 +130,7 @@ async def get_cities(request: Request):  # Accept request object
 
 
 @router.get("/stores")
+@http_cache("store_hierarchy", "city_hierarchy", cache_control="public, max-age=300")
 async def get_stores(request: Request):  # Accept request object
     try:
         async with request.app.state.db_manager.get_connection() as conn:  # Access from app.state
@@ -148,6 +144,7 @@ async def get_stores(request: Request):  # Accept request object
 
 
 @router.get("/products")
+@http_cache("product_hierarchy", cache_control="public, max-age=300")
 async def get_products(request: Request):  # Accept request object
     try:
         async with request.app.state.db_manager.get_connection() as conn:  # Access from app.state
@@ -782,6 +779,7 @@ def get_fallback_stockout_data():
 
 
 @router.get("/valid-combinations")
+@http_cache("sales_data", "store_hierarchy", cache_control="public, max-age=60")
 async def get_valid_combinations(conn=Depends(get_db)):
     """Get valid data combinations for testing"""
     try:
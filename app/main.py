@@ -2,15 +2,24 @@
 Main application entry point.
 """
 
+import time
+
+_import_started = time.perf_counter()
+
 import os
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware  # Import CORSMiddleware
 from app.api import app as api_app
 from dotenv import load_dotenv
 from database.connection import DatabaseManager  # Import DatabaseManager class directly
 import logging  # Import logging
+from services.cache_warmup_service import cache_warmer
+from services.realtime_push_service import ConnectionManager
+from utils.response_encoding import CompressionMiddleware
+from utils.lazy_routes import LazyRouterMiddleware, lazy_routers, startup_profile
+from utils.tracing import TracingMiddleware, metrics, render_metrics
 
 load_dotenv()
 
@@ -19,36 +28,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-# Connection Manager for WebSockets
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected: {websocket.client}")
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected: {websocket.client}")
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except RuntimeError as e:
-                logger.error(
-                    f"Error sending message to WebSocket {connection.client}: {e}"
-                )
-                self.active_connections.remove(connection)  # Remove broken connection
-
-
 app = FastAPI()
 
+# Innermost: mount lazily loaded routers before the request is routed
+app.add_middleware(LazyRouterMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -58,6 +42,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large JSON bodies (threshold: RESPONSE_COMPRESSION_MIN_BYTES)
+app.add_middleware(CompressionMiddleware)
+
+# Outermost: per-route latency histograms and Server-Timing stage breakdowns
+app.add_middleware(TracingMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -89,16 +79,62 @@ def enhanced_multi_dimensional():
 # WebSocket endpoint for real-time notifications
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await app.state.websocket_manager.connect(websocket)
+    # Optional ?topics=forecast,alerts; default is every topic
+    topics = [
+        t for t in websocket.query_params.get("topics", "").split(",") if t.strip()
+    ]
+    manager = app.state.websocket_manager
+    await manager.connect(websocket, [t.strip() for t in topics] or None)
     try:
         while True:
-            # Keep connection alive, or handle incoming messages if needed
-            await websocket.receive_text()
+            # Keep-alives and subscribe/unsubscribe control messages
+            await manager.handle_client_message(
+                websocket, await websocket.receive_text()
+            )
     except WebSocketDisconnect:
-        app.state.websocket_manager.disconnect(websocket)
+        manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        app.state.websocket_manager.disconnect(websocket)
+        manager.disconnect(websocket)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Latency histograms, pool wait, cache hit/miss counters (Prometheus)."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/health", include_in_schema=False)
+def health():
+    """Liveness check; needs none of the lazily loaded routers."""
+    return {"status": "healthy"}
+
+
+@app.get("/startup", include_in_schema=False)
+def startup_report():
+    """Import/startup phase timings against STARTUP_BUDGET_MS, router imports."""
+    return startup_profile.to_dict()
+
+
+@app.get("/ready", include_in_schema=False)
+def readiness():
+    """503 until the DB pool is up and the first cache warm-up has finished."""
+    db_manager = getattr(app.state, "db_manager", None)
+    database_ready = db_manager is not None and db_manager.pool is not None
+    warmup = cache_warmer.status()
+    ready = database_ready and warmup["warmed"]
+    return JSONResponse(
+        {"ready": ready, "database": database_ready, "warmup": warmup},
+        status_code=200 if ready else 503,
+    )
+
+
+@app.get("/ws/stats")
+def websocket_stats():
+    """Fan-out counters: connections, topics, queued/sent/dropped frames."""
+    return app.state.websocket_manager.get_stats()
 
 
 # Mount the API under /api
@@ -107,30 +143,95 @@ app.include_router(
     api_app, prefix="/api"
 )  # Use include_router instead to share app.state
 
+# Heavy feature routers, imported and mounted on first use: (module, prefix,
+# path prefixes they serve). Paths no router claims are not loaded for, so
+# every route a router serves must fall under one of its prefixes.
+LAZY_ROUTERS = [
+    ("api.analytics_api", "/api", ["/api/api/analytics"]),
+    ("api.enhanced_multi_modal_api", "/api", ["/api/enhanced"]),
+    (
+        "api.multi_dimensional_forecast",
+        "/api",
+        [
+            "/api/multi-dimensional-forecast",
+            "/api/demand-forecast",
+            "/api/valid-products",
+            "/api/weather-holiday-data",
+            "/api/weather-api-status",
+            "/api/weather-holiday-forecast",
+        ],
+    ),
+    (
+        "api.clustering_segmentation",
+        "/api",
+        [
+            "/api/cluster-analysis",
+            "/api/cluster-comparison",
+            "/api/clustering-features",
+        ],
+    ),
+    # Enhanced endpoints are also served directly on the main app
+    ("api.enhanced_multi_modal_api", "", ["/enhanced"]),
+]
+for module, prefix, paths in LAZY_ROUTERS:
+    lazy_routers.add(module, prefix=prefix, paths=paths)
+
 
 # Add startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
+    started = time.perf_counter()
     app.state.db_manager = DatabaseManager()  # Instantiate DatabaseManager directly
     await app.state.db_manager.initialize()
     app.state.websocket_manager = (
         ConnectionManager()
     )  # Instantiate WebSocket ConnectionManager
 
+    def pool_connections():
+        pool = app.state.db_manager.pool
+        if pool is None:
+            return []
+        return [
+            ({"state": "open"}, pool.get_size()),
+            ({"state": "idle"}, pool.get_idle_size()),
+        ]
+
+    metrics.gauge("db_pool_connections", "Pooled DB connections", pool_connections)
+    metrics.gauge(
+        "websocket_connections",
+        "Connected WebSocket clients",
+        lambda: [({}, len(app.state.websocket_manager.clients))],
+    )
+    metrics.gauge(
+        "cache_warmup_steps",
+        "Steps of the current cache warm-up run",
+        lambda: [
+            ({"state": "total"}, cache_warmer.progress.total),
+            ({"state": "completed"}, cache_warmer.progress.completed),
+            ({"state": "failed"}, cache_warmer.progress.failed),
+        ],
+    )
+
+    # LAZY_ROUTES=eager mounts every router before serving
+    if os.getenv("LAZY_ROUTES") == "eager":
+        await lazy_routers.load_all(app)
+    startup_profile.mark("startup", started)
+    startup_profile.report()
+    lazy_routers.start(app)
+
+    # Replay hot requests in the background; /ready reports progress
+    cache_warmer.start(app)
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    await app.state.db_manager.close()
-
-
-# Add enhanced endpoints directly to main app
-try:
-    from api.enhanced_multi_modal_api import router as enhanced_router
+    from services.live_weather_service import live_weather_service
 
-    app.include_router(enhanced_router)
-except ImportError as e:
-    print(f"Warning: Could not load enhanced API: {e}")
-    pass
+    await cache_warmer.stop()
+    await lazy_routers.stop()
+    await live_weather_service.close()
+    await app.state.websocket_manager.close()
+    await app.state.db_manager.close()
 
 
 # Debug endpoint to find valid data combinations
@@ -170,6 +271,9 @@ async def debug_data():
         return {"error": str(e)}
 
 
+startup_profile.mark("import", _import_started)
+
+
 if __name__ == "__main__":
     import uvicorn
 
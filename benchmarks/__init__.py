@@ -0,0 +1,8 @@
+"""
+Reproducible benchmark suite.
+
+``python -m benchmarks`` generates a synthetic FreshRetailNet-shaped dataset,
+loads it into an embedded stand-in database (or a local Postgres), runs
+micro-benchmarks of the hot functions and macro-benchmarks of the main
+endpoints, and writes the timings to JSON for comparison between commits.
+"""
@@ -0,0 +1,172 @@
+"""
+Run the benchmark suite.
+
+Examples:
+    python -m benchmarks --scale small --output bench.json
+    python -m benchmarks --scale medium --kind micro --compare bench.json
+    python -m benchmarks --backend postgres --dsn postgresql://localhost/bench
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from benchmarks.database import load_postgres
+from benchmarks.suite import (
+    BenchmarkContext,
+    BenchmarkResult,
+    build_report,
+    compare_reports,
+    run_suite,
+    standin_manager,
+)
+from benchmarks.synthetic_data import SCALES, generate_dataset, get_scale
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reproducible micro/macro benchmarks on synthetic data"
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--cities", type=int, help="Override the scale's cities")
+    parser.add_argument("--stores-per-city", type=int, help="Override stores/city")
+    parser.add_argument("--products", type=int, help="Override the scale's products")
+    parser.add_argument("--days", type=int, help="Override the days of history")
+    parser.add_argument("--seed", type=int, help="Override the random seed")
+    parser.add_argument(
+        "--backend",
+        choices=["standin", "postgres"],
+        default="standin",
+        help="Embedded SQLite stand-in (default) or a local Postgres",
+    )
+    parser.add_argument(
+        "--dsn",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="Postgres DSN for --backend postgres (its tables are replaced)",
+    )
+    parser.add_argument("--kind", choices=["micro", "macro", "all"], default="all")
+    parser.add_argument("--only", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--forecast-days", type=int, default=30)
+    parser.add_argument(
+        "--grid",
+        type=int,
+        default=2,
+        help="Cities, stores and products (each) in grid endpoint requests",
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Allowed median slowdown before a benchmark counts as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+async def create_db_manager(args, dataset):
+    if args.backend != "postgres":
+        return standin_manager(dataset)
+
+    import asyncpg
+
+    from database.connection import DatabaseManager
+
+    if not args.dsn:
+        raise SystemExit("--backend postgres needs --dsn or BENCH_DATABASE_URL")
+    await load_postgres(args.dsn, dataset)
+    manager = DatabaseManager()
+    manager.pool = await asyncpg.create_pool(args.dsn, statement_cache_size=0)
+    return manager
+
+
+def print_result(result: BenchmarkResult):
+    summary = result.to_dict()
+    if summary.get("error"):
+        print(f"  {result.name:<40} ERROR {summary['error']}")
+    else:
+        print(
+            f"  {result.name:<40} median {summary['median_ms']:>10.2f} ms  "
+            f"p95 {summary['p95_ms']:>10.2f} ms  (n={summary['iterations']})"
+        )
+
+
+async def main_async(args) -> int:
+    scale = get_scale(
+        args.scale,
+        cities=args.cities,
+        stores_per_city=args.stores_per_city,
+        products=args.products,
+        days=args.days,
+        seed=args.seed,
+    )
+    start = time.perf_counter()
+    dataset = generate_dataset(scale)
+    print(
+        f"Generated {len(dataset.sales)} sales rows ({scale.cities} cities x "
+        f"{scale.stores} stores x {scale.products} products x {scale.days} days) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    manager = await create_db_manager(args, dataset)
+    context = BenchmarkContext(
+        dataset=dataset,
+        db_manager=manager,
+        forecast_days=args.forecast_days,
+        grid=(
+            [str(c) for c in dataset.cities["city_id"][: args.grid]],
+            [str(s) for s in dataset.stores["store_id"][: args.grid]],
+            [int(p) for p in dataset.products["product_id"][: args.grid]],
+        ),
+    )
+    kinds = ("micro", "macro") if args.kind == "all" else (args.kind,)
+    try:
+        results = await run_suite(
+            context,
+            kinds=kinds,
+            only=args.only,
+            iterations=args.iterations,
+            warmup=args.warmup,
+            progress=print_result,
+        )
+    finally:
+        await manager.pool.close()
+
+    report = build_report(results, context, args.backend)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.tolerance)
+        for regression in regressions:
+            if "error" in regression:
+                print(f"REGRESSION {regression['name']}: {regression['error']}")
+            else:
+                print(
+                    f"REGRESSION {regression['name']}: "
+                    f"{regression['baseline_ms']:.2f} ms -> "
+                    f"{regression['current_ms']:.2f} ms "
+                    f"(+{regression['change']:.0%})"
+                )
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+def main(argv=None):
+    logging.disable(logging.CRITICAL)
+    sys.exit(asyncio.run(main_async(parse_args(argv))))
+
+
+if __name__ == "__main__":
+    main()
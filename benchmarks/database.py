@@ -0,0 +1,363 @@
+"""
+Benchmark databases.
+
+The synthetic dataset can be loaded into either backend:
+
+- ``load_postgres`` creates the tables in a local Postgres (``--dsn``) and
+  bulk-loads them with ``COPY``; the app then runs against a real pool.
+- ``StandInPool`` is an embedded stand-in needing no server: an in-memory
+  SQLite database behind an asyncpg-like pool (``acquire``, ``fetch``,
+  ``fetchrow``, ``fetchval``, ``execute``). Queries are translated from the
+  Postgres dialect the app uses (``$n`` parameters, ``::`` casts,
+  ``CAST(dt AS DATE)``, ``CURRENT_DATE - INTERVAL 'n days'``, ``= ANY($n)``,
+  ``STDDEV``, ``EXTRACT``) and ``CURRENT_DATE`` is pinned to the last day
+  of the dataset, so results do not depend on when the benchmark runs.
+
+The stand-in measures the application's own work (query building, frame
+handling, features, models, serialization) reproducibly; absolute database
+time is only meaningful with the Postgres backend.
+"""
+
+import json
+import math
+import re
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from benchmarks.synthetic_data import SyntheticDataset
+
+# (column, Postgres type) per table, in load order
+TABLES: Dict[str, List[Tuple[str, str]]] = {
+    "city_hierarchy": [("city_id", "INTEGER PRIMARY KEY"), ("city_name", "TEXT")],
+    "store_hierarchy": [
+        ("store_id", "INTEGER PRIMARY KEY"),
+        ("store_name", "TEXT"),
+        ("city_id", "INTEGER"),
+        ("management_group_id", "INTEGER"),
+        ("format_type", "TEXT"),
+        ("size_type", "TEXT"),
+    ],
+    "product_hierarchy": [
+        ("product_id", "INTEGER PRIMARY KEY"),
+        ("product_name", "TEXT"),
+        ("management_group_id", "INTEGER"),
+        ("first_category_id", "INTEGER"),
+        ("second_category_id", "INTEGER"),
+        ("third_category_id", "INTEGER"),
+    ],
+    "sales_data": [
+        ("city_id", "INTEGER"),
+        ("store_id", "INTEGER"),
+        ("management_group_id", "INTEGER"),
+        ("first_category_id", "INTEGER"),
+        ("second_category_id", "INTEGER"),
+        ("third_category_id", "INTEGER"),
+        ("product_id", "INTEGER"),
+        ("dt", "DATE"),
+        ("sale_amount", "DECIMAL(12,4)"),
+        ("hours_sale", "DECIMAL[]"),
+        ("stock_hour6_22_cnt", "INTEGER"),
+        ("hours_stock_status", "INTEGER[]"),
+        ("discount", "DECIMAL(5,4)"),
+        ("holiday_flag", "INTEGER"),
+        ("activity_flag", "INTEGER"),
+        ("precpt", "DECIMAL(8,2)"),
+        ("avg_temperature", "DECIMAL(5,2)"),
+        ("avg_humidity", "DECIMAL(5,2)"),
+        ("avg_wind_level", "DECIMAL(5,2)"),
+    ],
+}
+
+INDEXES = [
+    "CREATE INDEX {prefix}sales_combo_dt ON sales_data "
+    "(city_id, store_id, product_id, dt)",
+    "CREATE INDEX {prefix}sales_dt ON sales_data (dt)",
+]
+
+
+def table_records(dataset: SyntheticDataset, table: str) -> Iterable[Tuple[Any, ...]]:
+    if table == "sales_data":
+        return dataset.sales_records()
+    frame = {
+        "city_hierarchy": dataset.cities,
+        "store_hierarchy": dataset.stores,
+        "product_hierarchy": dataset.products,
+    }[table]
+    columns = [c for c, _ in TABLES[table]]
+    return (
+        tuple(v.item() if hasattr(v, "item") else v for v in row)
+        for row in frame[columns].itertuples(index=False, name=None)
+    )
+
+
+async def load_postgres(dsn: str, dataset: SyntheticDataset):
+    """(Re)create the benchmark tables in the Postgres at ``dsn`` and load them."""
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        for table in reversed(list(TABLES)):
+            await conn.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+        for table, columns in TABLES.items():
+            ddl = ", ".join(f"{name} {kind}" for name, kind in columns)
+            await conn.execute(f"CREATE TABLE {table} ({ddl})")
+            await conn.copy_records_to_table(
+                table,
+                records=list(table_records(dataset, table)),
+                columns=[c for c, _ in columns],
+            )
+        for index in INDEXES:
+            await conn.execute(index.format(prefix="bench_"))
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Embedded stand-in
+# ---------------------------------------------------------------------------
+
+
+def _sqlite_type(pg_type: str) -> str:
+    if pg_type.endswith("[]"):
+        return "pgarray"
+    if pg_type == "DATE":
+        return "pgdate"
+    if pg_type.startswith("DECIMAL"):
+        return "REAL"
+    return pg_type
+
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+sqlite3.register_converter("pgdate", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("pgarray", lambda raw: json.loads(raw))
+
+
+class _StdDev:
+    """Sample standard deviation aggregate (``STDDEV``/``STDDEV_SAMP``)."""
+
+    def __init__(self):
+        self.values: List[float] = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(float(value))
+
+    def finalize(self):
+        n = len(self.values)
+        if n < 2:
+            return None
+        mean = sum(self.values) / n
+        return math.sqrt(sum((v - mean) ** 2 for v in self.values) / (n - 1))
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None
+    return date.fromisoformat(str(value)[:10])
+
+
+def _extract(field: str, value: Any) -> Optional[float]:
+    day = _as_date(value)
+    if day is None:
+        return None
+    field = field.lower()
+    if field == "dow":
+        return (day.weekday() + 1) % 7
+    if field == "isodow":
+        return day.isoweekday()
+    if field == "doy":
+        return day.timetuple().tm_yday
+    if field == "week":
+        return day.isocalendar()[1]
+    if field == "quarter":
+        return (day.month - 1) // 3 + 1
+    return getattr(day, field)
+
+
+def _date_trunc(field: str, value: Any) -> Optional[str]:
+    day = _as_date(value)
+    if day is None:
+        return None
+    field = field.lower()
+    if field == "year":
+        day = day.replace(month=1, day=1)
+    elif field == "month":
+        day = day.replace(day=1)
+    elif field == "week":
+        day = day - timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+@lru_cache(maxsize=512)
+def translate_sql(query: str, today: date) -> str:
+    """Rewrite the Postgres constructs the app uses into SQLite."""
+    sql = query
+
+    def relative_day(match: "re.Match[str]") -> str:
+        days = int(match.group(2) or 0)
+        return f"'{(today - timedelta(days=days)).isoformat()}'"
+
+    sql = re.sub(
+        r"(CURRENT_DATE|CURRENT_TIMESTAMP|NOW\(\))"
+        r"(?:\s*-\s*INTERVAL\s*'(\d+)\s*days?')?",
+        relative_day,
+        sql,
+        flags=re.IGNORECASE,
+    )
+    # (date expression) - n  ->  date(expr, '-' || n || ' days')
+    sql = re.sub(
+        r"(\(SELECT\s+MAX\(\w+\)\s+FROM\s+\w+\))\s*-\s*(\$\d+)(?:::\w+)?",
+        r"date(\1, '-' || \2 || ' days')",
+        sql,
+        flags=re.IGNORECASE,
+    )
+    sql = re.sub(
+        r"=\s*ANY\s*\(\s*\$(\d+)(?:::\w+(?:\[\])?)?\s*\)",
+        r"IN (SELECT value FROM json_each(?\1))",
+        sql,
+        flags=re.IGNORECASE,
+    )
+    sql = re.sub(r"\$(\d+)", r"?\1", sql)
+    sql = re.sub(r"::\s*\w+(?:\s*\(\d+(?:,\s*\d+)?\))?(?:\[\])?", "", sql)
+    sql = re.sub(
+        r"CAST\(\s*([\w.]+)\s+AS\s+(?:DATE|TIMESTAMP)\s*\)",
+        r"date(\1)",
+        sql,
+        flags=re.IGNORECASE,
+    )
+    sql = re.sub(
+        r"EXTRACT\(\s*(\w+)\s+FROM\s+",
+        r"pg_extract('\1', ",
+        sql,
+        flags=re.IGNORECASE,
+    )
+    sql = re.sub(r"\bDATE_TRUNC\(", "pg_date_trunc(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bSTDDEV(?:_SAMP)?\(", "pg_stddev(", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bILIKE\b", "LIKE", sql, flags=re.IGNORECASE)
+    return sql
+
+
+def _bind(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set)):
+        return json.dumps([_bind(v) for v in value])
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _convert(value: Any) -> Any:
+    # Date expressions (MAX(dt), date(dt), ...) come back as ISO text
+    if isinstance(value, str) and _ISO_DATE.fullmatch(value):
+        return date.fromisoformat(value)
+    return value
+
+
+class StandInRecord(dict):
+    """Row supporting both ``row["name"]`` and ``row[index]`` like asyncpg."""
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self.values())[key]
+        return super().__getitem__(key)
+
+
+class StandInConnection:
+    """asyncpg-like connection over the shared SQLite database."""
+
+    def __init__(self, pool: "StandInPool"):
+        self._pool = pool
+
+    def _execute(self, query: str, args: Sequence[Any]) -> sqlite3.Cursor:
+        self._pool.queries += 1
+        sql = translate_sql(query, self._pool.today)
+        return self._pool.db.execute(sql, [_bind(a) for a in args])
+
+    @staticmethod
+    def _record(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> StandInRecord:
+        return StandInRecord(
+            (d[0], _convert(value)) for d, value in zip(cursor.description, row)
+        )
+
+    async def fetch(self, query: str, *args: Any) -> List[StandInRecord]:
+        cursor = self._execute(query, args)
+        return [self._record(cursor, row) for row in cursor.fetchall()]
+
+    async def fetchrow(self, query: str, *args: Any) -> Optional[StandInRecord]:
+        cursor = self._execute(query, args)
+        row = cursor.fetchone()
+        return self._record(cursor, row) if row is not None else None
+
+    async def fetchval(self, query: str, *args: Any, column: int = 0) -> Any:
+        row = self._execute(query, args).fetchone()
+        return _convert(row[column]) if row is not None else None
+
+    async def execute(self, query: str, *args: Any) -> str:
+        cursor = self._execute(query, args)
+        return f"OK {cursor.rowcount}"
+
+    async def executemany(self, query: str, args: Iterable[Sequence[Any]]):
+        sql = translate_sql(query, self._pool.today)
+        self._pool.db.executemany(sql, [[_bind(a) for a in row] for row in args])
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield self
+
+
+class StandInPool:
+    """
+    asyncpg-like pool over an in-memory SQLite copy of the dataset.
+
+    Args:
+        dataset: Data to load
+        today: Date used for ``CURRENT_DATE`` (defaults to the dataset's
+            last day)
+    """
+
+    def __init__(self, dataset: SyntheticDataset, today: Optional[date] = None):
+        self.today = today or dataset.scale.end_date
+        self.queries = 0
+        self.db = sqlite3.connect(
+            ":memory:",
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        self.db.create_aggregate("pg_stddev", 1, _StdDev)
+        self.db.create_function("pg_extract", 2, _extract, deterministic=True)
+        self.db.create_function("pg_date_trunc", 2, _date_trunc, deterministic=True)
+        self._load(dataset)
+
+    def _load(self, dataset: SyntheticDataset):
+        for table, columns in TABLES.items():
+            ddl = ", ".join(f"{name} {_sqlite_type(kind)}" for name, kind in columns)
+            self.db.execute(f"CREATE TABLE {table} ({ddl})")
+            placeholders = ", ".join("?" for _ in columns)
+            self.db.executemany(
+                f"INSERT INTO {table} VALUES ({placeholders})",
+                ([_bind(v) for v in row] for row in table_records(dataset, table)),
+            )
+        for index in INDEXES:
+            self.db.execute(index.format(prefix=""))
+        self.db.commit()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield StandInConnection(self)
+
+    def get_size(self) -> int:
+        return 1
+
+    def get_idle_size(self) -> int:
+        return 1
+
+    async def close(self):
+        self.db.close()
@@ -0,0 +1,539 @@
+"""
+Load generator with latency SLO reporting.
+
+Replays a weighted mix of forecast, dashboard and analytics calls against a
+running server (``--base-url``) or the app in-process on the synthetic
+stand-in database (``--in-process``), either closed-loop at a fixed
+concurrency or open-loop at a fixed arrival rate. Reports p50/p95/p99,
+throughput and error rate per scenario, finds the saturation point of a
+concurrency (or rate) sweep, and checks the results against declared SLOs.
+
+Examples:
+    python -m benchmarks.loadgen --concurrency 8 --duration 60
+    python -m benchmarks.loadgen --rate 5 --duration 120 --replay calls.jsonl
+    python -m benchmarks.loadgen --sweep 1,2,4,8,16 --duration 30
+    python -m benchmarks.loadgen --in-process --scale small --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Combination = Dict[str, Any]
+RequestSpec = Tuple[str, str, Optional[Dict[str, Any]]]
+
+DEFAULT_COMBINATIONS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "random_valid_combinations.json",
+)
+
+
+@dataclass
+class Scenario:
+    """
+    One kind of call in the traffic mix.
+
+    Args:
+        name: Scenario name used in reports and SLOs
+        weight: Relative frequency in the mix
+        build: Returns ``(method, path, json_body)`` for one request
+    """
+
+    name: str
+    weight: float
+    build: Callable[[random.Random, List[Combination]], RequestSpec]
+
+
+def _sample_ids(
+    rng: random.Random, combinations: List[Combination], key: str, n: int
+) -> List[Any]:
+    ids = sorted({c[key] for c in combinations})
+    return rng.sample(ids, min(n, len(ids)))
+
+
+def _grid(rng: random.Random, combinations: List[Combination], size: int):
+    return {
+        "city_ids": [str(i) for i in _sample_ids(rng, combinations, "city_id", size)],
+        "store_ids": [str(i) for i in _sample_ids(rng, combinations, "store_id", size)],
+        "product_ids": [
+            int(i) for i in _sample_ids(rng, combinations, "product_id", size)
+        ],
+        "forecast_days": 30,
+    }
+
+
+def _forecast_grid(rng, combinations):
+    return "POST", "/api/multi-dimensional-forecast", _grid(rng, combinations, 5)
+
+
+def _forecast_repeat(rng, combinations):
+    # The same 5x5x5 selection every time, so it can be answered from cache
+    return (
+        "POST",
+        "/api/multi-dimensional-forecast",
+        _grid(random.Random(0), combinations, 5),
+    )
+
+
+def _demand_forecast(rng, combinations):
+    return "POST", "/api/demand-forecast", _grid(rng, combinations, 2)
+
+
+def _dashboard_snapshot(rng, combinations):
+    combo = rng.choice(combinations)
+    return (
+        "POST",
+        "/api/enhanced/dashboard-snapshot",
+        {
+            "city_id": int(combo["city_id"]),
+            "store_id": int(combo["store_id"]),
+            "product_id": int(combo["product_id"]),
+        },
+    )
+
+
+def _dynamic_insights(rng, combinations):
+    combo = rng.choice(combinations)
+    path = (
+        f"/api/enhanced/dynamic-insights/"
+        f"{combo['city_id']}/{combo['store_id']}/{combo['product_id']}"
+    )
+    return "GET", path, None
+
+
+def _analytics_overview(rng, combinations):
+    combo = rng.choice(combinations)
+    return (
+        "GET",
+        f"/api/api/analytics/dashboard/overview?city_id={combo['city_id']}",
+        None,
+    )
+
+
+def _hierarchy(rng, combinations):
+    return "GET", rng.choice(["/api/cities", "/api/stores", "/api/products"]), None
+
+
+# Dashboard-heavy traffic with occasional grid forecasts
+DEFAULT_MIX = [
+    Scenario("forecast_5x5x5", 1, _forecast_grid),
+    Scenario("forecast_5x5x5_repeat", 2, _forecast_repeat),
+    Scenario("demand_forecast", 1, _demand_forecast),
+    Scenario("dashboard_snapshot", 3, _dashboard_snapshot),
+    Scenario("dynamic_insights", 2, _dynamic_insights),
+    Scenario("analytics_overview", 2, _analytics_overview),
+    Scenario("hierarchy", 3, _hierarchy),
+]
+
+
+def load_replay(path: str) -> List[Scenario]:
+    """
+    Scenarios from a JSONL file of recorded calls, one per line:
+    ``{"method": "POST", "path": "/api/...", "body": {...}, "name": ...,
+    "weight": ...}`` (only ``path`` is required).
+    """
+    scenarios = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            call = json.loads(line)
+            if "path" not in call:
+                raise ValueError(f"{path}:{number}: replayed call needs a 'path'")
+            spec = (call.get("method", "GET").upper(), call["path"], call.get("body"))
+            scenarios.append(
+                Scenario(
+                    call.get("name") or f"replay:{spec[0]} {spec[1].split('?')[0]}",
+                    float(call.get("weight", 1)),
+                    lambda rng, combinations, spec=spec: spec,
+                )
+            )
+    return scenarios
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Sample:
+    scenario: str
+    started: float
+    latency_ms: float
+    status: int
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status < 400
+
+
+async def _send(client, scenario: Scenario, spec: RequestSpec, origin: float):
+    method, path, body = spec
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, json=body)
+        status, error = response.status_code, None
+        if status < 400 and response.headers.get("content-type", "").startswith(
+            "application/json"
+        ):
+            payload = response.json()
+            # Several endpoints report failures in a 200 body
+            if isinstance(payload, dict) and payload.get("error"):
+                error = str(payload["error"])[:200]
+    except Exception as e:
+        status, error = 0, f"{type(e).__name__}: {e}"
+    return Sample(
+        scenario.name,
+        started - origin,
+        (time.perf_counter() - started) * 1000,
+        status,
+        error,
+    )
+
+
+class TrafficMix:
+    """Weighted random choice of scenarios and their requests."""
+
+    def __init__(
+        self, scenarios: Sequence[Scenario], combinations: List[Combination], seed: int
+    ):
+        self.scenarios = list(scenarios)
+        self.weights = [s.weight for s in self.scenarios]
+        self.combinations = combinations
+        self.rng = random.Random(seed)
+
+    def next(self) -> Tuple[Scenario, RequestSpec]:
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        return scenario, scenario.build(self.rng, self.combinations)
+
+
+async def run_closed_loop(
+    client, mix: TrafficMix, concurrency: int, duration: float, max_requests: int = 0
+) -> List[Sample]:
+    """``concurrency`` users each send their next request when the last returns."""
+    samples: List[Sample] = []
+    origin = time.perf_counter()
+    deadline = origin + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            if max_requests and len(samples) >= max_requests:
+                return
+            scenario, spec = mix.next()
+            samples.append(await _send(client, scenario, spec, origin))
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return samples
+
+
+async def run_open_loop(
+    client, mix: TrafficMix, rate: float, duration: float, max_in_flight: int = 256
+) -> Tuple[List[Sample], int]:
+    """
+    Poisson arrivals at ``rate`` requests/s, independent of response times.
+
+    Returns:
+        tuple: (samples, arrivals skipped because ``max_in_flight`` was hit)
+    """
+    samples: List[Sample] = []
+    origin = time.perf_counter()
+    in_flight: set = set()
+    skipped = 0
+    next_arrival = origin
+    while next_arrival < origin + duration:
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        if len(in_flight) >= max_in_flight:
+            skipped += 1
+        else:
+            scenario, spec = mix.next()
+            task = asyncio.ensure_future(_send(client, scenario, spec, origin))
+            task.add_done_callback(lambda t: samples.append(t.result()))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_arrival += mix.rng.expovariate(rate)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return samples, skipped
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (``q`` in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    latencies = [s.latency_ms for s in samples if s.ok]
+    errors = [s for s in samples if not s.ok]
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "max_ms": _round(max(latencies) if latencies else None),
+        "sample_errors": sorted({e.error or f"HTTP {e.status}" for e in errors})[:5],
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def summarize_by_scenario(
+    samples: List[Sample], elapsed: float
+) -> Dict[str, Dict[str, Any]]:
+    names = sorted({s.scenario for s in samples})
+    return {
+        "*": summarize(samples, elapsed),
+        **{
+            name: summarize([s for s in samples if s.scenario == name], elapsed)
+            for name in names
+        },
+    }
+
+
+@dataclass
+class SLO:
+    """
+    Service-level objective on one scenario (``*`` for all traffic).
+
+    Args:
+        scenario: Scenario name or ``*``
+        metric: ``p50_ms``, ``p95_ms``, ``p99_ms`` or ``error_rate``
+        threshold: Upper bound for the metric
+    """
+
+    scenario: str
+    metric: str
+    threshold: float
+
+    def evaluate(self, summaries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        observed = summaries.get(self.scenario, {}).get(self.metric)
+        return {
+            **asdict(self),
+            "observed": observed,
+            # None when the scenario completed no request in this run
+            "passed": observed <= self.threshold if observed is not None else None,
+        }
+
+
+# Targets from OPTIMIZATION_ACTION_PLAN.md
+DEFAULT_SLOS = [
+    SLO("forecast_5x5x5", "p95_ms", 10_000),
+    SLO("forecast_5x5x5_repeat", "p95_ms", 3_000),
+    SLO("*", "error_rate", 0.01),
+]
+
+
+def load_slos(path: str) -> List[SLO]:
+    with open(path) as f:
+        return [SLO(**slo) for slo in json.load(f)]
+
+
+def find_saturation(stages: List[Dict[str, Any]], min_gain: float = 0.10):
+    """
+    First sweep stage where adding load stopped paying off: throughput grew
+    by less than ``min_gain`` over the best earlier stage, or an SLO failed.
+    """
+    best = 0.0
+    for stage in stages:
+        throughput = stage["summary"]["*"]["throughput_rps"]
+        if best and throughput < best * (1 + min_gain):
+            return {
+                "load": stage["load"],
+                "reason": f"throughput {throughput} rps vs best {best} rps",
+            }
+        failed = [r for r in stage["slos"] if r["passed"] is False]
+        if failed:
+            return {
+                "load": stage["load"],
+                "reason": "SLO failed: "
+                + ", ".join(f"{r['scenario']} {r['metric']}" for r in failed),
+            }
+        best = max(best, throughput)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test with latency SLOs")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://127.0.0.1:8000")
+    target.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Drive the app in-process on the synthetic stand-in database",
+    )
+    parser.add_argument("--scale", default="small", help="Scale for --in-process")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=4, help="Closed-loop users")
+    load.add_argument("--rate", type=float, help="Open-loop arrivals per second")
+    load.add_argument(
+        "--sweep",
+        help="Comma-separated concurrencies (or rates with --sweep-rate) to step "
+        "through, reporting the saturation point",
+    )
+    parser.add_argument("--sweep-rate", action="store_true")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds/stage")
+    parser.add_argument("--max-requests", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--combinations", default=DEFAULT_COMBINATIONS)
+    parser.add_argument(
+        "--replay", help="JSONL of recorded calls to use instead of the mix"
+    )
+    parser.add_argument(
+        "--mix",
+        help="Comma-separated scenario names from the default mix to keep",
+    )
+    parser.add_argument("--slo", help="JSON list of {scenario, metric, threshold}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load-report.json")
+    return parser.parse_args(argv)
+
+
+async def _in_process_client(args):
+    import httpx
+
+    from benchmarks.suite import attach_app, standin_manager
+    from benchmarks.synthetic_data import generate_dataset, get_scale
+
+    dataset = generate_dataset(get_scale(args.scale))
+    app = attach_app(standin_manager(dataset))
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://loadgen",
+        timeout=args.timeout,
+    )
+    combinations = [
+        {"city_id": c, "store_id": s, "product_id": p}
+        for c, s, p in dataset.combinations()
+    ]
+    return client, combinations
+
+
+async def main_async(args) -> int:
+    import httpx
+
+    if args.in_process:
+        client, combinations = await _in_process_client(args)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        with open(args.combinations) as f:
+            combinations = json.load(f)
+
+    scenarios = load_replay(args.replay) if args.replay else DEFAULT_MIX
+    if args.mix:
+        keep = set(args.mix.split(","))
+        scenarios = [s for s in scenarios if s.name in keep]
+    slos = load_slos(args.slo) if args.slo else DEFAULT_SLOS
+    mix = TrafficMix(scenarios, combinations, args.seed)
+
+    if args.sweep:
+        loads = [float(v) for v in args.sweep.split(",")]
+        mode = "open" if args.sweep_rate else "closed"
+    elif args.rate:
+        loads, mode = [args.rate], "open"
+    else:
+        loads, mode = [float(args.concurrency)], "closed"
+
+    stages = []
+    try:
+        for load in loads:
+            start = time.perf_counter()
+            skipped = 0
+            if mode == "open":
+                samples, skipped = await run_open_loop(client, mix, load, args.duration)
+            else:
+                samples = await run_closed_loop(
+                    client, mix, int(load), args.duration, args.max_requests
+                )
+            elapsed = time.perf_counter() - start
+            summary = summarize_by_scenario(samples, elapsed)
+            stage = {
+                "mode": mode,
+                "load": load,
+                "elapsed_s": round(elapsed, 2),
+                "skipped_arrivals": skipped,
+                "summary": summary,
+                "slos": [slo.evaluate(summary) for slo in slos],
+            }
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        await client.aclose()
+
+    report = {
+        "target": "in-process" if args.in_process else args.base_url,
+        "seed": args.seed,
+        "duration_s": args.duration,
+        "scenarios": [{"name": s.name, "weight": s.weight} for s in scenarios],
+        "stages": stages,
+        "saturation": find_saturation(stages) if len(stages) > 1 else None,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if report["saturation"]:
+        print(
+            f"Saturation at {report['saturation']['load']:g}: "
+            f"{report['saturation']['reason']}"
+        )
+    print(f"Report written to {args.output}")
+    return 1 if any(r["passed"] is False for r in stages[-1]["slos"]) else 0
+
+
+def print_stage(stage: Dict[str, Any]):
+    unit = "rps" if stage["mode"] == "open" else "users"
+    print(f"\n== {stage['load']:g} {unit}, {stage['elapsed_s']}s ==")
+    print(
+        f"  {'scenario':<26}{'reqs':>7}{'err%':>7}{'rps':>8}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for name, s in stage["summary"].items():
+        print(
+            f"  {name:<26}{s['requests']:>7}{s['error_rate'] * 100:>7.1f}"
+            f"{s['throughput_rps']:>8.2f}{_fmt(s['p50_ms'])}{_fmt(s['p95_ms'])}"
+            f"{_fmt(s['p99_ms'])}"
+        )
+    for result in stage["slos"]:
+        status = {True: "PASS", False: "FAIL", None: "NO DATA"}[result["passed"]]
+        print(
+            f"  SLO {status} {result['scenario']} {result['metric']} "
+            f"<= {result['threshold']:g} (observed {result['observed']})"
+        )
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:>10.1f}" if value is not None else f"{'-':>10}"
+
+
+def main(argv=None):
+    logging.disable(logging.CRITICAL)
+    sys.exit(asyncio.run(main_async(parse_args(argv))))
+
+
+if __name__ == "__main__":
+    main()
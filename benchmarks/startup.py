@@ -0,0 +1,176 @@
+"""
+Import-time profile and startup budget check.
+
+Imports the application in fresh interpreters. It reports the import wall
+time against the startup budget, the slowest modules from
+``python -X importtime``, and any heavy libraries the import pulled in.
+Exits with status 1 when the import is over budget or loads a heavy
+library (routers that need them are mounted lazily, see
+``utils.lazy_routes``).
+
+Examples:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-ms 1500 --top 30 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from utils.lazy_routes import HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMED_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"import_ms": elapsed, "heavy_modules": heavy}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # database.config requires these at import time; nothing connects here
+    for key in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+        env.setdefault(key, "benchmark")
+    return env
+
+
+def time_import(module: str) -> Dict[str, Any]:
+    """Import ``module`` in a fresh interpreter and time it."""
+    code = TIMED_IMPORT.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of ``-X importtime`` output: module, depth, self and cumulative ms."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return rows
+
+
+def profile_import(module: str) -> List[Dict[str, Any]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def top_level_packages(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Self time summed per top-level package, slowest first."""
+    totals: Dict[str, float] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        totals[package] = totals.get(package, 0.0) + row["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def build_report(
+    module: str, runs: List[Dict[str, Any]], rows: List[Dict[str, Any]], budget_ms
+):
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    heavy = sorted({m for r in runs for m in r["heavy_modules"]})
+    return {
+        "module": module,
+        "budget_ms": budget_ms,
+        "import_ms": round(import_ms, 1),
+        "runs_ms": [round(r["import_ms"], 1) for r in runs],
+        "within_budget": import_ms <= budget_ms,
+        "heavy_modules": heavy,
+        "packages_ms": {
+            k: round(v, 1) for k, v in list(top_level_packages(rows).items())[:15]
+        },
+        "slowest": sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile of the app")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_MS", "2000")),
+        help="Allowed median import time (default: STARTUP_BUDGET_MS or 2000)",
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--allow-heavy",
+        action="store_true",
+        help=f"Do not fail when the import loads {', '.join(HEAVY_MODULES)}",
+    )
+    parser.add_argument("--output", help="Write the full report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [time_import(args.module) for _ in range(args.runs)]
+    rows = profile_import(args.module)
+    report = build_report(args.module, runs, rows, args.budget_ms)
+
+    print(f"Slowest imports under {args.module} (cumulative ms):")
+    for row in report["slowest"][: args.top]:
+        indent = "  " * row["depth"]
+        print(
+            f"  {row['cumulative_ms']:>9.1f} {row['self_ms']:>8.1f}  "
+            f"{indent}{row['module']}"
+        )
+    print("Self time by package (ms):")
+    for package, ms in report["packages_ms"].items():
+        print(f"  {ms:>9.1f}  {package}")
+
+    status = "OK" if report["within_budget"] else "OVER BUDGET"
+    print(
+        f"import {args.module}: {report['import_ms']:.0f}ms median of "
+        f"{args.runs} (budget {args.budget_ms:.0f}ms) {status}"
+    )
+    if report["heavy_modules"]:
+        print(f"Heavy libraries loaded at import: {', '.join(report['heavy_modules'])}")
+
+    if args.output:
+        report["slowest"] = report["slowest"][: args.top]
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    failed = not report["within_budget"] or (
+        report["heavy_modules"] and not args.allow_heavy
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
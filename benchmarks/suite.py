@@ -0,0 +1,455 @@
+"""
+Micro- and macro-benchmarks over the synthetic dataset.
+
+Micro-benchmarks call the hot functions directly (historical fetches,
+feature building, model fit/predict, summaries, encoding); macro-benchmarks
+drive the main endpoints in-process through an ASGI client, so neither needs
+a running server. Each benchmark may reset caches before every iteration
+(outside the timed region) so the cold path is what gets measured.
+"""
+
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_data import SyntheticDataset
+
+# The app reads its database settings at import time; the benchmark injects
+# its own pool, so these only need to be present
+for _name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(_name, "benchmark")
+
+
+@dataclass
+class BenchmarkContext:
+    """Shared state handed to every benchmark."""
+
+    dataset: SyntheticDataset
+    db_manager: Any
+    forecast_days: int = 30
+    # (city_ids, store_ids, product_ids) sent to the grid endpoints
+    grid: Tuple[List[str], List[str], List[int]] = ([], [], [])
+    cache: Dict[str, Any] = field(default_factory=dict)
+    client: Any = None
+
+    @property
+    def combination(self) -> Tuple[str, str, int]:
+        return self.dataset.combinations(1)[0]
+
+
+@dataclass
+class Benchmark:
+    """
+    One timed operation.
+
+    Args:
+        name: Dotted name, ``<area>.<operation>``
+        kind: ``micro`` or ``macro``
+        run: Coroutine function taking the context
+        reset: Optional callable run (untimed) before every iteration
+    """
+
+    name: str
+    kind: str
+    run: Callable[[BenchmarkContext], Awaitable[Any]]
+    reset: Optional[Callable[[BenchmarkContext], Any]] = None
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    kind: str
+    timings_ms: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.timings_ms:
+            return {"kind": self.kind, "iterations": 0, "error": self.error}
+        timings = sorted(self.timings_ms)
+        return {
+            "kind": self.kind,
+            "iterations": len(timings),
+            "min_ms": round(timings[0], 4),
+            "median_ms": round(statistics.median(timings), 4),
+            "mean_ms": round(statistics.fmean(timings), 4),
+            "p95_ms": round(
+                timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4
+            ),
+            "max_ms": round(timings[-1], 4),
+            "stdev_ms": round(statistics.pstdev(timings), 4),
+            "error": self.error,
+        }
+
+
+async def run_benchmark(
+    benchmark: Benchmark, context: BenchmarkContext, iterations: int, warmup: int
+) -> BenchmarkResult:
+    """Run ``warmup`` untimed and ``iterations`` timed calls."""
+    result = BenchmarkResult(benchmark.name, benchmark.kind)
+    try:
+        for i in range(warmup + iterations):
+            if benchmark.reset is not None:
+                benchmark.reset(context)
+            gc.collect()
+            start = time.perf_counter()
+            await benchmark.run(context)
+            elapsed = (time.perf_counter() - start) * 1000
+            if i >= warmup:
+                result.timings_ms.append(elapsed)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Micro-benchmarks
+# ---------------------------------------------------------------------------
+
+
+async def _historical_sales(context: BenchmarkContext):
+    from api.multi_dimensional_forecast import get_historical_sales_data
+
+    async with context.db_manager.get_connection() as conn:
+        frame = await get_historical_sales_data(conn, *context.combination)
+    context.cache["sales_history"] = frame
+    return frame
+
+
+async def _historical_demand(context: BenchmarkContext):
+    from api.multi_dimensional_forecast import get_historical_demand_data
+
+    async with context.db_manager.get_connection() as conn:
+        frame = await get_historical_demand_data(conn, *context.combination)
+    context.cache["demand_history"] = frame
+    return frame
+
+
+async def _sales_history(context: BenchmarkContext):
+    if "sales_history" not in context.cache:
+        await _historical_sales(context)
+    return context.cache["sales_history"]
+
+
+async def _demand_history(context: BenchmarkContext):
+    if "demand_history" not in context.cache:
+        await _historical_demand(context)
+    return context.cache["demand_history"]
+
+
+async def _prepare_features(context: BenchmarkContext):
+    from api.multi_dimensional_forecast import prepare_features
+
+    return prepare_features(await _sales_history(context))
+
+
+async def _prepare_demand_features(context: BenchmarkContext):
+    from api.multi_dimensional_forecast import prepare_demand_features
+
+    return prepare_demand_features(await _demand_history(context))
+
+
+async def _single_forecast(context: BenchmarkContext):
+    from api.multi_dimensional_forecast import generate_single_forecast
+
+    return await generate_single_forecast(
+        await _sales_history(context), context.forecast_days
+    )
+
+
+async def _single_demand_forecast(context: BenchmarkContext):
+    from api.multi_dimensional_forecast import generate_demand_forecast_single
+
+    return await generate_demand_forecast_single(
+        await _demand_history(context), context.forecast_days
+    )
+
+
+async def _snapshot_base_dataset(context: BenchmarkContext):
+    from services.dashboard_snapshot_service import get_snapshot_entry, snapshot_key
+
+    city_id, store_id, product_id = context.combination
+    key = snapshot_key(city_id, store_id, product_id, 90)
+    return await get_snapshot_entry(context.db_manager, key, refresh=True)
+
+
+def _grid_forecasts(context: BenchmarkContext) -> List[Dict[str, Any]]:
+    """A realistic list of per-combination forecast payloads."""
+    if "grid_forecasts" not in context.cache:
+        import numpy as np  # type: ignore
+        import pandas as pd  # type: ignore
+
+        rng = np.random.default_rng(0)
+        dates = (
+            pd.date_range(context.dataset.scale.end_date, periods=context.forecast_days)
+            .strftime("%Y-%m-%d")
+            .tolist()
+        )
+        context.cache["grid_forecasts"] = [
+            {
+                "city_id": city_id,
+                "store_id": store_id,
+                "product_id": product_id,
+                "dates": dates,
+                "predictions": rng.gamma(2.0, 1.0, context.forecast_days).tolist(),
+                "confidence_upper": rng.gamma(2.0, 1.2, context.forecast_days).tolist(),
+                "confidence_lower": rng.gamma(2.0, 0.8, context.forecast_days).tolist(),
+                "total_predicted": float(context.forecast_days),
+                "model_accuracy": 0.8,
+            }
+            for city_id, store_id, product_id in context.dataset.combinations(200)
+        ]
+    return context.cache["grid_forecasts"]
+
+
+async def _streaming_summary(context: BenchmarkContext):
+    from services.forecast_stream_service import StreamingForecastSummary
+
+    summary = StreamingForecastSummary()
+    for forecast in _grid_forecasts(context):
+        combo = (forecast["city_id"], forecast["store_id"], forecast["product_id"])
+        summary.add(combo, forecast, historical_avg=1.5)
+    return summary.to_dict()
+
+
+async def _encode_json(context: BenchmarkContext):
+    from utils.response_encoding import dumps
+
+    return dumps({"forecasts": _grid_forecasts(context)})
+
+
+async def _encode_columnar(context: BenchmarkContext):
+    from utils.response_encoding import dumps, to_columnar
+
+    return dumps(to_columnar({"forecasts": _grid_forecasts(context)}))
+
+
+MICRO_BENCHMARKS = [
+    Benchmark("db.historical_sales", "micro", _historical_sales),
+    Benchmark("db.historical_demand", "micro", _historical_demand),
+    Benchmark("db.snapshot_base_dataset", "micro", _snapshot_base_dataset),
+    Benchmark("features.prepare_features", "micro", _prepare_features),
+    Benchmark("features.prepare_demand_features", "micro", _prepare_demand_features),
+    Benchmark("forecast.single", "micro", _single_forecast),
+    Benchmark("forecast.single_demand", "micro", _single_demand_forecast),
+    Benchmark("summary.streaming_fold", "micro", _streaming_summary),
+    Benchmark("encoding.json", "micro", _encode_json),
+    Benchmark("encoding.columnar", "micro", _encode_columnar),
+]
+
+
+# ---------------------------------------------------------------------------
+# Macro-benchmarks (in-process HTTP)
+# ---------------------------------------------------------------------------
+
+
+def _reset_app_caches(context: BenchmarkContext):
+    from services.dashboard_snapshot_service import clear_snapshot_cache
+    from services.data_version_service import data_versions
+
+    clear_snapshot_cache()
+    data_versions.clear()
+    context.db_manager.clear_cache()
+
+
+async def _request(context: BenchmarkContext, method: str, path: str, **kwargs):
+    response = await context.client.request(method, path, **kwargs)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {path} returned {response.status_code}")
+    return response
+
+
+def _grid_body(context: BenchmarkContext) -> Dict[str, Any]:
+    city_ids, store_ids, product_ids = context.grid
+    return {
+        "city_ids": list(city_ids),
+        "store_ids": list(store_ids),
+        "product_ids": list(product_ids),
+        "forecast_days": context.forecast_days,
+    }
+
+
+def _get(path: str) -> Callable[[BenchmarkContext], Awaitable[Any]]:
+    async def run(context: BenchmarkContext):
+        return await _request(context, "GET", path)
+
+    return run
+
+
+async def _multi_dimensional_forecast(context: BenchmarkContext):
+    return await _request(
+        context, "POST", "/api/multi-dimensional-forecast", json=_grid_body(context)
+    )
+
+
+async def _demand_forecast(context: BenchmarkContext):
+    return await _request(
+        context, "POST", "/api/demand-forecast", json=_grid_body(context)
+    )
+
+
+async def _dashboard_snapshot(context: BenchmarkContext):
+    city_id, store_id, product_id = context.combination
+    return await _request(
+        context,
+        "POST",
+        "/api/enhanced/dashboard-snapshot",
+        json={
+            "city_id": int(city_id),
+            "store_id": int(store_id),
+            "product_id": product_id,
+        },
+    )
+
+
+MACRO_BENCHMARKS = [
+    Benchmark("http.cities", "macro", _get("/api/cities"), _reset_app_caches),
+    Benchmark("http.stores", "macro", _get("/api/stores"), _reset_app_caches),
+    Benchmark(
+        "http.valid_combinations",
+        "macro",
+        _get("/api/valid-combinations"),
+        _reset_app_caches,
+    ),
+    Benchmark(
+        "http.multi_dimensional_forecast",
+        "macro",
+        _multi_dimensional_forecast,
+        _reset_app_caches,
+    ),
+    Benchmark("http.demand_forecast", "macro", _demand_forecast, _reset_app_caches),
+    Benchmark(
+        "http.dashboard_snapshot", "macro", _dashboard_snapshot, _reset_app_caches
+    ),
+    Benchmark("http.dashboard_snapshot_warm", "macro", _dashboard_snapshot),
+]
+
+
+def standin_manager(dataset: SyntheticDataset):
+    """A ``DatabaseManager`` whose pool is the embedded stand-in."""
+    from benchmarks.database import StandInPool
+    from database.connection import DatabaseManager
+
+    manager = DatabaseManager()
+    manager.pool = StandInPool(dataset)
+    return manager
+
+
+def attach_app(db_manager: Any):
+    """The FastAPI app wired to ``db_manager`` without running its startup."""
+    from app.main import app
+    from services.realtime_push_service import ConnectionManager
+
+    app.state.db_manager = db_manager
+    if not hasattr(app.state, "websocket_manager"):
+        app.state.websocket_manager = ConnectionManager()
+    return app
+
+
+async def run_suite(
+    context: BenchmarkContext,
+    kinds: Tuple[str, ...] = ("micro", "macro"),
+    only: Optional[str] = None,
+    iterations: int = 5,
+    warmup: int = 1,
+    progress: Optional[Callable[[BenchmarkResult], None]] = None,
+) -> List[BenchmarkResult]:
+    """Run the selected benchmarks in order."""
+    benchmarks = [
+        b
+        for b in MICRO_BENCHMARKS + MACRO_BENCHMARKS
+        if b.kind in kinds and (not only or only in b.name)
+    ]
+    results = []
+    if any(b.kind == "macro" for b in benchmarks):
+        import httpx
+
+        context.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=attach_app(context.db_manager)),
+            base_url="http://benchmark",
+            timeout=None,
+        )
+    try:
+        for benchmark in benchmarks:
+            result = await run_benchmark(benchmark, context, iterations, warmup)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    finally:
+        if context.client is not None:
+            await context.client.aclose()
+            context.client = None
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            ).stdout.strip()
+            or None
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(
+    results: List[BenchmarkResult], context: BenchmarkContext, backend: str
+) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend,
+            "scale": context.dataset.scale.to_dict(),
+            "rows": len(context.dataset.sales),
+            "grid": [list(dimension) for dimension in context.grid],
+            "forecast_days": context.forecast_days,
+        },
+        "results": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare_reports(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.10
+) -> List[Dict[str, Any]]:
+    """
+    Benchmarks whose median got slower than the baseline by more than
+    ``tolerance`` (a fraction), or that newly fail.
+    """
+    regressions = []
+    for name, result in current.get("results", {}).items():
+        before = baseline.get("results", {}).get(name)
+        if not before or before.get("error") or not before.get("median_ms"):
+            continue
+        if result.get("error"):
+            regressions.append({"name": name, "error": result["error"]})
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        if change > tolerance:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_ms": before["median_ms"],
+                    "current_ms": result["median_ms"],
+                    "change": round(change, 4),
+                }
+            )
+    return regressions
@@ -0,0 +1,348 @@
+"""
+Synthetic FreshRetailNet-shaped dataset.
+
+Generates the hierarchy tables and a daily ``sales_data`` table with 24-value
+hourly sales and stock-status arrays for a configurable grid of cities x
+stores x products x days. Generation is vectorized and fully determined by
+the seed, so two runs with the same scale produce identical data.
+
+Series combine a per-(store, product) base level, weekly and annual
+seasonality, a small trend, city weather (temperature, humidity,
+precipitation, wind), holidays, discount-driven promotions and intraday
+stockouts that cut the remaining hours' sales, matching the shape of the
+real dataset closely enough for the hot paths to behave realistically.
+"""
+
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+HOURS = 24
+# Stock is tracked between 06:00 and 22:00, as in stock_hour6_22_cnt
+STOCK_HOURS = slice(6, 22)
+
+CITY_NAMES = [
+    "New York",
+    "Los Angeles",
+    "Chicago",
+    "Houston",
+    "Phoenix",
+    "Philadelphia",
+    "San Antonio",
+    "San Diego",
+    "Dallas",
+    "San Jose",
+    "Austin",
+    "Jacksonville",
+    "Fort Worth",
+    "Columbus",
+    "Charlotte",
+    "San Francisco",
+    "Indianapolis",
+    "Seattle",
+]
+STORE_FORMATS = ["supermarket", "convenience", "hypermarket"]
+STORE_SIZES = ["small", "medium", "large"]
+PRODUCT_NAMES = [
+    "Bananas",
+    "Apples",
+    "Tomatoes",
+    "Lettuce",
+    "Strawberries",
+    "Whole Milk",
+    "Greek Yogurt",
+    "Cheddar Cheese",
+    "Chicken Breast",
+    "Ground Beef",
+    "Salmon Fillet",
+    "Sourdough Bread",
+    "Croissants",
+    "Eggs",
+    "Orange Juice",
+    "Spinach",
+    "Avocados",
+    "Blueberries",
+    "Carrots",
+    "Potatoes",
+]
+
+SALES_COLUMNS = [
+    "city_id",
+    "store_id",
+    "management_group_id",
+    "first_category_id",
+    "second_category_id",
+    "third_category_id",
+    "product_id",
+    "dt",
+    "sale_amount",
+    "hours_sale",
+    "stock_hour6_22_cnt",
+    "hours_stock_status",
+    "discount",
+    "holiday_flag",
+    "activity_flag",
+    "precpt",
+    "avg_temperature",
+    "avg_humidity",
+    "avg_wind_level",
+]
+
+
+@dataclass(frozen=True)
+class SyntheticScale:
+    """
+    Size of the generated grid.
+
+    Args:
+        cities: Number of cities
+        stores_per_city: Stores in each city
+        products: Products sold in every store
+        days: Days of history per (store, product)
+        seed: Random seed; the same scale and seed give identical data
+        end_date: Last day of history (defaults to a fixed date so the data
+            does not change between runs)
+    """
+
+    cities: int = 2
+    stores_per_city: int = 2
+    products: int = 4
+    days: int = 180
+    seed: int = 42
+    end_date: date = date(2024, 6, 30)
+
+    @property
+    def stores(self) -> int:
+        return self.cities * self.stores_per_city
+
+    @property
+    def rows(self) -> int:
+        return self.stores * self.products * self.days
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "end_date": self.end_date.isoformat()}
+
+
+SCALES = {
+    "small": SyntheticScale(),
+    "medium": SyntheticScale(cities=4, stores_per_city=5, products=10, days=365),
+    "large": SyntheticScale(cities=18, stores_per_city=10, products=25, days=365),
+}
+
+
+def get_scale(name: str, **overrides: Any) -> SyntheticScale:
+    """Preset scale by name, with any non-None fields overridden."""
+    if name not in SCALES:
+        raise ValueError(f"Unknown scale '{name}'; use one of {sorted(SCALES)}")
+    return replace(
+        SCALES[name], **{k: v for k, v in overrides.items() if v is not None}
+    )
+
+
+@dataclass
+class SyntheticDataset:
+    """Generated tables; hourly arrays are kept as (rows, 24) matrices."""
+
+    scale: SyntheticScale
+    cities: pd.DataFrame
+    stores: pd.DataFrame
+    products: pd.DataFrame
+    sales: pd.DataFrame
+    hours_sale: np.ndarray
+    hours_stock_status: np.ndarray
+
+    @property
+    def start_date(self) -> date:
+        return self.scale.end_date - timedelta(days=self.scale.days - 1)
+
+    def combinations(self, limit: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """(city_id, store_id, product_id) combinations that have history."""
+        combos = [
+            (str(store.city_id), str(store.store_id), int(product_id))
+            for store in self.stores.itertuples()
+            for product_id in self.products["product_id"]
+        ]
+        return combos[:limit] if limit is not None else combos
+
+    def sales_records(self) -> Iterator[Tuple[Any, ...]]:
+        """``sales_data`` rows as tuples in ``SALES_COLUMNS`` order."""
+        columns = {
+            "dt": [d.date() for d in self.sales["dt"]],
+            "hours_sale": np.round(self.hours_sale, 4).tolist(),
+            "hours_stock_status": self.hours_stock_status.tolist(),
+        }
+        yield from zip(
+            *(columns.get(c) or self.sales[c].tolist() for c in SALES_COLUMNS)
+        )
+
+
+def _hourly_profile() -> np.ndarray:
+    """Share of daily sales per hour: morning and evening peaks, closed at night."""
+    hours = np.arange(HOURS)
+    profile = np.exp(-((hours - 10) ** 2) / 8.0) + 1.4 * np.exp(
+        -((hours - 18) ** 2) / 6.0
+    )
+    profile[(hours < 6) | (hours > 22)] *= 0.05
+    return profile / profile.sum()
+
+
+def generate_dataset(scale: SyntheticScale) -> SyntheticDataset:
+    """Generate every table for ``scale``."""
+    rng = np.random.default_rng(scale.seed)
+    n_cities, n_stores, n_products, n_days = (
+        scale.cities,
+        scale.stores,
+        scale.products,
+        scale.days,
+    )
+
+    cities = pd.DataFrame(
+        {
+            "city_id": np.arange(1, n_cities + 1),
+            "city_name": [
+                CITY_NAMES[i % len(CITY_NAMES)]
+                + (f" {i // len(CITY_NAMES) + 1}" if i >= len(CITY_NAMES) else "")
+                for i in range(n_cities)
+            ],
+        }
+    )
+
+    store_city = np.repeat(cities["city_id"].to_numpy(), scale.stores_per_city)
+    stores = pd.DataFrame(
+        {
+            "store_id": np.arange(1, n_stores + 1),
+            "store_name": [f"Store {i}" for i in range(1, n_stores + 1)],
+            "city_id": store_city,
+            "management_group_id": rng.integers(1, 6, n_stores),
+            "format_type": rng.choice(STORE_FORMATS, n_stores),
+            "size_type": rng.choice(STORE_SIZES, n_stores),
+        }
+    )
+
+    first_category = rng.integers(1, 8, n_products)
+    second_category = first_category * 10 + rng.integers(0, 4, n_products)
+    products = pd.DataFrame(
+        {
+            "product_id": np.arange(1, n_products + 1),
+            "product_name": [
+                PRODUCT_NAMES[i % len(PRODUCT_NAMES)]
+                + (
+                    f" #{i // len(PRODUCT_NAMES) + 1}"
+                    if i >= len(PRODUCT_NAMES)
+                    else ""
+                )
+                for i in range(n_products)
+            ],
+            "management_group_id": rng.integers(1, 6, n_products),
+            "first_category_id": first_category,
+            "second_category_id": second_category,
+            "third_category_id": second_category * 10 + rng.integers(0, 5, n_products),
+        }
+    )
+
+    dates = pd.date_range(end=pd.Timestamp(scale.end_date), periods=n_days, freq="D")
+    day_of_year = dates.dayofyear.to_numpy()
+    weekday = dates.dayofweek.to_numpy()
+
+    # City weather: (cities, days)
+    annual = np.sin(2 * np.pi * (day_of_year - 105) / 365.25)
+    temperature = (
+        rng.uniform(8, 20, (n_cities, 1))
+        + rng.uniform(6, 14, (n_cities, 1)) * annual
+        + rng.normal(0, 2.5, (n_cities, n_days))
+    )
+    humidity = np.clip(
+        rng.uniform(45, 75, (n_cities, 1)) + rng.normal(0, 8, (n_cities, n_days)),
+        10,
+        100,
+    )
+    rainy = rng.random((n_cities, n_days)) < 0.25
+    precipitation = np.where(rainy, rng.gamma(1.5, 4.0, (n_cities, n_days)), 0.0)
+    wind = np.clip(rng.normal(2.5, 1.0, (n_cities, n_days)), 0, None)
+
+    holiday = np.zeros(n_days, dtype=int)
+    holiday[weekday >= 5] = 1
+    holiday[rng.random(n_days) < 0.03] = 1
+
+    # Series grid: (stores, products, days)
+    shape = (n_stores, n_products, n_days)
+    base = rng.lognormal(mean=0.0, sigma=0.6, size=(n_stores, n_products, 1))
+    weekly = 1 + 0.15 * np.where(weekday >= 5, 1.0, -0.3)
+    seasonal = 1 + rng.uniform(0.0, 0.3, (1, n_products, 1)) * annual
+    trend = 1 + rng.normal(0, 0.0005, (n_stores, n_products, 1)) * np.arange(n_days)
+    city_index = store_city - 1
+    temperature_effect = 1 + rng.normal(0, 0.01, (1, n_products, 1)) * (
+        temperature[city_index][:, None, :] - 15
+    )
+    rain_effect = 1 - 0.02 * np.minimum(precipitation[city_index][:, None, :], 10)
+
+    activity = rng.random(shape) < 0.12
+    discount = np.where(activity, rng.choice([0.7, 0.8, 0.9], shape), 1.0)
+    promotion_effect = 1 + (1 - discount) * rng.uniform(1.0, 2.5, (1, n_products, 1))
+
+    demand = (
+        base
+        * weekly
+        * seasonal
+        * trend
+        * np.clip(temperature_effect, 0.5, 1.5)
+        * rain_effect
+        * promotion_effect
+        * (1 + 0.2 * holiday)
+        * rng.gamma(20.0, 1 / 20.0, shape)
+    )
+
+    n_rows = n_stores * n_products * n_days
+    hourly_share = rng.dirichlet(_hourly_profile() * 200, n_rows)
+    hours_sale = demand.reshape(-1, 1) * hourly_share
+
+    # Intraday stockouts: stock runs out at a random hour and is not restocked
+    stockout = rng.random(n_rows) < 0.15
+    stockout_hour = rng.integers(8, 22, n_rows)
+    hour_grid = np.arange(HOURS)
+    out_of_stock = stockout[:, None] & (hour_grid[None, :] >= stockout_hour[:, None])
+    hours_sale[out_of_stock] = 0.0
+    hours_stock_status = (~out_of_stock).astype(int)
+    stock_hour6_22_cnt = out_of_stock[:, STOCK_HOURS].sum(axis=1)
+
+    store_rows = np.repeat(np.arange(n_stores), n_products * n_days)
+    product_rows = np.tile(np.repeat(np.arange(n_products), n_days), n_stores)
+    day_rows = np.tile(np.arange(n_days), n_stores * n_products)
+    city_rows = store_city[store_rows] - 1
+
+    sales = pd.DataFrame(
+        {
+            "city_id": store_city[store_rows],
+            "store_id": stores["store_id"].to_numpy()[store_rows],
+            "management_group_id": products["management_group_id"].to_numpy()[
+                product_rows
+            ],
+            "first_category_id": first_category[product_rows],
+            "second_category_id": second_category[product_rows],
+            "third_category_id": products["third_category_id"].to_numpy()[product_rows],
+            "product_id": products["product_id"].to_numpy()[product_rows],
+            "dt": dates[day_rows],
+            "sale_amount": np.round(hours_sale.sum(axis=1), 4),
+            "stock_hour6_22_cnt": stock_hour6_22_cnt,
+            "discount": discount.reshape(-1),
+            "holiday_flag": holiday[day_rows],
+            "activity_flag": activity.reshape(-1).astype(int),
+            "precpt": np.round(precipitation[city_rows, day_rows], 2),
+            "avg_temperature": np.round(temperature[city_rows, day_rows], 2),
+            "avg_humidity": np.round(humidity[city_rows, day_rows], 2),
+            "avg_wind_level": np.round(wind[city_rows, day_rows], 2),
+        }
+    )
+
+    return SyntheticDataset(
+        scale=scale,
+        cities=cities,
+        stores=stores,
+        products=products,
+        sales=sales,
+        hours_sale=hours_sale,
+        hours_stock_status=hours_stock_status,
+    )
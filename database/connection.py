@@ -18,7 +18,11 @@ import os
 from dotenv import load_dotenv
 from .config import get_db_config
 import hashlib
+import hmac
+import secrets
 from fastapi import Request  # Import Request for type hinting in decorator
+from services.data_version_service import data_versions
+from utils.tracing import pool_wait, record_cache
 
 # Load environment variables
 load_dotenv()
@@ -86,7 +90,9 @@ class DatabaseManager:
             # This should ideally be initialized by startup event
             raise RuntimeError("Database pool not initialized.")
 
+        start = time.perf_counter()
         async with self.pool.acquire() as connection:
+            pool_wait.observe(time.perf_counter() - start)
             yield connection
 
     def cache_key(self, query: str, params: tuple = ()) -> str:
@@ -126,12 +132,16 @@ class DatabaseManager:
             cached_result, timestamp = self.query_cache[cache_key_str]
             if self.is_cache_valid(timestamp):
                 logger.debug(f"Cache hit for query: {query[:50]}...")
+                record_cache("query", True)
                 return cached_result
             else:
                 logger.debug(f"Cache expired for query: {query[:50]}... Cache miss.")
         else:
             logger.debug(f"Cache miss for query: {query[:50]}...")
 
+        if cache_enabled:
+            record_cache("query", False)
+
         # Execute query
         async with self.get_connection() as conn:
             try:
@@ -746,7 +756,8 @@ class DatabaseManager:
 
         async with self.get_connection() as conn:
             result = await conn.fetchrow(query, *values)
-            return dict(result) if result else {}
+        data_versions.bump(table_name)
+        return dict(result) if result else {}
 
     async def execute_update(
         self, table_name: str, data: Dict[str, Any], conditions: Dict[str, Any]
@@ -763,7 +774,8 @@ class DatabaseManager:
 
         async with self.get_connection() as conn:
             results = await conn.fetch(query, *values)
-            return [dict(row) for row in results]
+        data_versions.bump(table_name)
+        return [dict(row) for row in results]
 
     async def execute_delete(self, table_name: str, conditions: Dict[str, Any]) -> int:
         """Executes a DELETE query and returns the number of deleted rows."""
@@ -775,8 +787,9 @@ class DatabaseManager:
 
         async with self.get_connection() as conn:
             status = await conn.execute(query, *values)
-            # The status string is typically 'DELETE N' where N is the number of rows.
-            return int(status.split(" ")[1]) if " " in status else 0
+        data_versions.bump(table_name)
+        # The status string is typically 'DELETE N' where N is the number of rows.
+        return int(status.split(" ")[1]) if " " in status else 0
 
 
 # Remove global db_manager instance, it will be managed by app.state
@@ -817,8 +830,28 @@ class DatabaseManager:
 #     await get_db_manager().close()
 
 
-def cached(ttl: int = 300):
-    """Decorator for caching function results"""
+# Requests carrying this header bypass cached results and store fresh ones.
+# Only the in-process cache warmer knows the token, so outside callers
+# sending the header are served from cache as usual.
+CACHE_REFRESH_HEADER = "x-cache-refresh"
+CACHE_REFRESH_TOKEN = os.getenv("CACHE_REFRESH_TOKEN") or secrets.token_urlsafe(32)
+
+
+def is_cache_refresh(request: Optional[Request]) -> bool:
+    """Whether a request is a cache warm-up replay allowed to bypass caches"""
+    if request is None:
+        return False
+    token = request.headers.get(CACHE_REFRESH_HEADER)
+    return token is not None and hmac.compare_digest(token, CACHE_REFRESH_TOKEN)
+
+
+def cached(ttl: int = 300, http: bool = False):
+    """Decorator for caching function results
+
+    HTTP requests are only cached for endpoints that opt in with
+    ``http=True`` (the ones the cache warmer keeps fresh); other endpoints
+    run uncached, as they always have.
+    """
 
     def decorator(func):
         @wraps(func)
@@ -840,14 +873,11 @@ def cached(ttl: int = 300):
                 return await func(*args, **kwargs)
 
             # Now that we know request is not None, we can safely access its attributes
-            # If it's not an HTTP request (e.g., ASGI lifespan, background task), bypass caching
-            if (
-                request.scope is None
-                or not hasattr(request.scope, "type")
-                or request.scope["type"] != "http"
-            ):
+            # Only endpoints that opt in cache HTTP requests; others, and non-HTTP
+            # requests (e.g., ASGI lifespan, background task), bypass caching
+            if not http or request.scope is None or request.scope.get("type") != "http":
                 logger.debug(
-                    f"Bypassing cache for non-HTTP request (scope type is not 'http') to {func.__name__}"
+                    f"Bypassing cache for {func.__name__} (HTTP caching not enabled or non-HTTP request)"
                 )
                 return await func(*args, **kwargs)
 
@@ -927,12 +957,19 @@ def cached(ttl: int = 300):
                 f"Current query_cache size: {len(manager.query_cache)}. query_cache ID: {id(manager.query_cache)}"
             )
 
-            if hasattr(manager, "query_cache") and cache_key in manager.query_cache:
+            # Cache warm-up recomputes and replaces entries instead of reading them
+            refresh = is_cache_refresh(request)
+            if (
+                not refresh
+                and hasattr(manager, "query_cache")
+                and cache_key in manager.query_cache
+            ):
                 cached_result, timestamp = manager.query_cache[cache_key]
                 if (time.time() - timestamp) < ttl:
                     logger.info(
                         f"Cache hit for function {func.__name__} with key: {cache_key}"
                     )
+                    record_cache("function", True)
                     return cached_result
                 else:
                     logger.info(
@@ -946,6 +983,7 @@ def cached(ttl: int = 300):
                     f"Cache miss for function {func.__name__} with key: {cache_key}"
                 )
 
+            record_cache("function", False)
             result = await func(*args, **kwargs)
             if hasattr(manager, "query_cache"):
                 # Manage cache size before adding new item
@@ -972,5 +1010,8 @@ def cached(ttl: int = 300):
 # Export main components
 __all__ = [
     "DatabaseManager",
+    "CACHE_REFRESH_HEADER",
+    "CACHE_REFRESH_TOKEN",
+    "is_cache_refresh",
     "cached",
 ]
@@ -16,13 +16,45 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score  #
 import joblib  # type: ignore
 from pathlib import Path
 import warnings
-from statsmodels.tsa.seasonal import seasonal_decompose  # type: ignore
 from scipy import stats  # type: ignore
 
+from services.category_training import ParallelCategoryTrainer
+from services.hierarchical_forecast import build_hierarchy, top_down
+from services.holiday_calendar import HolidayCalendar, cached_holiday_calendar
+from services.seasonality_profiles import build_profiles, category_key
+
 warnings.filterwarnings("ignore")
 
 logger = logging.getLogger(__name__)
 
+# city_id of forecast rows whose store has no city in store_hierarchy
+UNKNOWN_CITY_ID = -1
+
+# Trained features known for a future date. The rest (lags, rolling windows,
+# category and store aggregates) describe observed sales and are taken from
+# each series' latest history row, the forecast origin.
+CALENDAR_FEATURES = frozenset(
+    [
+        "day_sin",
+        "day_cos",
+        "week_sin",
+        "week_cos",
+        "month_sin",
+        "month_cos",
+        "is_weekend",
+        "quarter",
+        "is_month_start",
+        "is_month_end",
+        "monthly_seasonality",
+        "weekly_seasonality",
+        "expected_holiday_impact",
+        "holiday_flag",
+        "promo_flag",
+    ]
+)
+# Days of history the forecast needs: the longest lag and rolling window
+HISTORY_DAYS = 60
+
 
 class CategoryLevelForecaster:
     """Category-level demand forecasting with hierarchical aggregation."""
@@ -139,6 +171,28 @@ class CategoryLevelForecaster:
         logger.info(f"Aggregated to {len(category_df)} category-level records")
         return category_df
 
+    def from_category_cube(self, cube_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Category-level data from a category cube roll-up.
+
+        Args:
+            cube_df: Rows of ``services.category_cube`` at this model's
+                aggregation level (already named like
+                ``aggregate_to_category_level`` output)
+
+        Returns:
+            Category-level data with category features
+        """
+        category_col = (
+            "second_category_id"
+            if self.aggregation_level == "subcategory"
+            else "first_category_id"
+        )
+        category_df = self._add_category_features(cube_df, category_col)
+
+        logger.info(f"Loaded {len(category_df)} category-level records from cube")
+        return category_df
+
     def _add_category_features(
         self, df: pd.DataFrame, category_col: str
     ) -> pd.DataFrame:
@@ -196,98 +250,18 @@ class CategoryLevelForecaster:
         """
         logger.info("Analyzing category seasonality patterns...")
 
-        seasonality_results = {}
         category_col = (
             "first_category_id"
             if "first_category_id" in df.columns
             else df.select_dtypes(include=[np.number]).columns[1]
         )
 
-        for category in df[category_col].unique():
-            if pd.isna(category):
-                continue
-
-            cat_data = df[df[category_col] == category].copy()
-            cat_data = cat_data.sort_values("sale_date")
-
-            if len(cat_data) < 52:  # Need at least a year of data
-                continue
-
-            try:
-                # Create time series
-                ts_data = cat_data.set_index("sale_date")["category_sales"]
-                ts_data = ts_data.asfreq("D", fill_value=0)  # Daily frequency
-
-                # Seasonal decomposition
-                if len(ts_data) >= 730:  # 2 years for yearly seasonality
-                    decomposition = seasonal_decompose(
-                        ts_data, model="additive", period=365
-                    )
-                elif len(ts_data) >= 365:  # 1 year for monthly seasonality
-                    decomposition = seasonal_decompose(
-                        ts_data, model="additive", period=30
-                    )
-                else:
-                    decomposition = seasonal_decompose(
-                        ts_data, model="additive", period=7
-                    )
-
-                # Extract patterns
-                seasonality_results[str(category)] = {
-                    "seasonal_strength": float(
-                        np.std(decomposition.seasonal) / np.std(ts_data)
-                    ),
-                    "trend_strength": float(
-                        np.std(decomposition.trend.dropna()) / np.std(ts_data)
-                    ),
-                    "monthly_pattern": self._extract_monthly_pattern(cat_data),
-                    "weekly_pattern": self._extract_weekly_pattern(cat_data),
-                    "holiday_impact": self._calculate_holiday_impact(cat_data),
-                }
-
-            except Exception as e:
-                logger.warning(
-                    f"Could not analyze seasonality for category {category}: {e}"
-                )
-                seasonality_results[str(category)] = {
-                    "seasonal_strength": 0,
-                    "trend_strength": 0,
-                    "monthly_pattern": {},
-                    "weekly_pattern": {},
-                    "holiday_impact": 0,
-                }
+        # All categories are decomposed together (see services.seasonality_profiles)
+        seasonality_results = build_profiles(df, category_col).patterns
 
         self.seasonality_patterns = seasonality_results
         return seasonality_results
 
-    def _extract_monthly_pattern(self, df: pd.DataFrame) -> Dict[int, float]:
-        """Extract monthly seasonality pattern."""
-        df["month"] = df["sale_date"].dt.month
-        monthly_avg = df.groupby("month")["category_sales"].mean()
-        overall_avg = df["category_sales"].mean()
-
-        return {month: float(avg / overall_avg) for month, avg in monthly_avg.items()}
-
-    def _extract_weekly_pattern(self, df: pd.DataFrame) -> Dict[int, float]:
-        """Extract weekly seasonality pattern."""
-        df["dayofweek"] = df["sale_date"].dt.dayofweek
-        weekly_avg = df.groupby("dayofweek")["category_sales"].mean()
-        overall_avg = df["category_sales"].mean()
-
-        return {day: float(avg / overall_avg) for day, avg in weekly_avg.items()}
-
-    def _calculate_holiday_impact(self, df: pd.DataFrame) -> float:
-        """Calculate average holiday impact on category sales."""
-        if "holiday_flag" not in df.columns:
-            return 0.0
-
-        holiday_sales = df[df["holiday_flag"] > 0]["category_sales"].mean()
-        regular_sales = df[df["holiday_flag"] == 0]["category_sales"].mean()
-
-        if regular_sales > 0:
-            return float((holiday_sales - regular_sales) / regular_sales)
-        return 0.0
-
     def prepare_category_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Prepare features for category-level forecasting.
@@ -300,7 +274,9 @@ class CategoryLevelForecaster:
         """
         from services.feature_builder import AdvancedFeatureBuilder
 
-        feature_builder = AdvancedFeatureBuilder()
+        feature_builder = AdvancedFeatureBuilder(
+            holiday_calendar=cached_holiday_calendar()
+        )
 
         # Build category-specific features
         df = feature_builder.build_category_features(df)
@@ -341,7 +317,9 @@ class CategoryLevelForecaster:
             # Monthly seasonality
             df["month"] = df["sale_date"].dt.month
             df["monthly_seasonality"] = df.apply(
-                lambda row: self.seasonality_patterns.get(str(row[category_col]), {})
+                lambda row: self.seasonality_patterns.get(
+                    category_key(row[category_col]), {}
+                )
                 .get("monthly_pattern", {})
                 .get(row["month"], 1.0),
                 axis=1,
@@ -350,7 +328,9 @@ class CategoryLevelForecaster:
             # Weekly seasonality
             df["dayofweek"] = df["sale_date"].dt.dayofweek
             df["weekly_seasonality"] = df.apply(
-                lambda row: self.seasonality_patterns.get(str(row[category_col]), {})
+                lambda row: self.seasonality_patterns.get(
+                    category_key(row[category_col]), {}
+                )
                 .get("weekly_pattern", {})
                 .get(row["dayofweek"], 1.0),
                 axis=1,
@@ -360,7 +340,7 @@ class CategoryLevelForecaster:
             if "holiday_flag" in df.columns:
                 df["expected_holiday_impact"] = df.apply(
                     lambda row: self.seasonality_patterns.get(
-                        str(row[category_col]), {}
+                        category_key(row[category_col]), {}
                     ).get("holiday_impact", 0.0)
                     * row["holiday_flag"],
                     axis=1,
@@ -426,14 +406,14 @@ class CategoryLevelForecaster:
             if "first_category_id" in df.columns
             else df.select_dtypes(include=[np.number]).columns[1]
         )
-        training_results = {}
+        datasets = {}
 
-        # Train separate model for each category
+        # Collect each category's training data
         for category in df[category_col].unique():
             if pd.isna(category):
                 continue
 
-            cat_data = df_processed[df_processed[category_col] == category].copy()
+            cat_data = df_processed[df_processed[category_col] == category]
 
             if len(cat_data) < 50:  # Minimum data requirement
                 logger.warning(
@@ -446,65 +426,39 @@ class CategoryLevelForecaster:
             )
 
             # Prepare data
-            X = cat_data[feature_cols].fillna(0)
-            y = cat_data[target_col].fillna(0)
-
-            # Time-based split for time series
-            tscv = TimeSeriesSplit(n_splits=3)
-            cv_scores = []
-
-            # Initialize model
-            if self.model_type == "gradient_boost":
-                model = GradientBoostingRegressor(**self.base_model_config)
-            elif self.model_type == "random_forest":
-                model = RandomForestRegressor(**self.base_model_config)
-            elif self.model_type == "linear":
-                model = LinearRegression(**self.base_model_config)
-            else:
-                model = GradientBoostingRegressor(**self.base_model_config)
+            X = cat_data[feature_cols].fillna(0).to_numpy(dtype=float)
+            y = cat_data[target_col].fillna(0).to_numpy(dtype=float)
+            datasets[str(category)] = (X, y)
 
-            # Initialize scaler
-            scaler = StandardScaler()
-
-            # Cross-validation
-            for train_idx, test_idx in tscv.split(X):
-                X_train_cv, X_test_cv = X.iloc[train_idx], X.iloc[test_idx]
-                y_train_cv, y_test_cv = y.iloc[train_idx], y.iloc[test_idx]
-
-                # Scale features
-                X_train_scaled = scaler.fit_transform(X_train_cv)
-                X_test_scaled = scaler.transform(X_test_cv)
-
-                # Fit and predict
-                model.fit(X_train_scaled, y_train_cv)
-                y_pred_cv = model.predict(X_test_scaled)
-
-                # Calculate score
-                score = r2_score(y_test_cv, y_pred_cv)
-                cv_scores.append(score)
+        # Cross-validate and fit all categories in parallel
+        trainer = ParallelCategoryTrainer(self.model_type, self.base_model_config)
+        training_results = {}
 
-            # Final training on all data
-            X_scaled = scaler.fit_transform(X)
-            model.fit(X_scaled, y)
+        for category, result in trainer.train(datasets).items():
+            cv_scores = result.cv_scores
 
             # Store model and scaler
-            self.models[str(category)] = model
-            self.scalers[str(category)] = scaler
+            self.models[category] = result.model
+            self.scalers[category] = result.scaler
 
             # Store metadata
-            self.category_metadata[str(category)] = {
-                "data_size": len(cat_data),
+            self.category_metadata[category] = {
+                "data_size": result.data_size,
                 "feature_count": len(feature_cols),
                 "cv_scores": cv_scores,
                 "average_cv_score": np.mean(cv_scores),
                 "std_cv_score": np.std(cv_scores),
+                "training_time_seconds": result.training_seconds,
             }
 
-            training_results[str(category)] = {
+            training_results[category] = {
                 "cv_score_mean": np.mean(cv_scores),
                 "cv_score_std": np.std(cv_scores),
-                "data_size": len(cat_data),
-                "feature_importance": self._get_feature_importance(model, feature_cols),
+                "data_size": result.data_size,
+                "training_time_seconds": result.training_seconds,
+                "feature_importance": self._get_feature_importance(
+                    result.model, feature_cols
+                ),
             }
 
         self.feature_columns = feature_cols
@@ -513,15 +467,23 @@ class CategoryLevelForecaster:
         logger.info(f"Trained models for {len(self.models)} categories")
         return training_results
 
-    def predict_category_demand(self, df: pd.DataFrame) -> pd.DataFrame:
+    def predict_category_demand(
+        self, df: pd.DataFrame, history: Optional[pd.DataFrame] = None
+    ) -> pd.DataFrame:
         """
         Predict category-level demand.
 
         Args:
             df: Input data for prediction
+            history: Category-level data before the forecast dates (as from
+                ``from_category_cube``), needed when the model uses features
+                of observed sales; series without history are not scored
 
         Returns:
             DataFrame with predictions
+
+        Raises:
+            ValueError: If a trained feature cannot be built from the history
         """
         if not self.is_fitted:
             raise ValueError("Model must be fitted before making predictions")
@@ -531,59 +493,146 @@ class CategoryLevelForecaster:
         # Prepare features
         df_processed = self.prepare_category_features(df)
 
-        # Prepare results
-        results = df.copy()
-        results["predicted_category_sales"] = 0.0
-        results["prediction_confidence"] = 0.0
-
         category_col = (
             "first_category_id"
             if "first_category_id" in df.columns
             else df.select_dtypes(include=[np.number]).columns[1]
         )
 
-        # Predict for each category
-        for category in df[category_col].unique():
-            if pd.isna(category):
-                continue
-
+        features = df_processed.reindex(columns=self.feature_columns)
+        scored = np.ones(len(df_processed), dtype=bool)
+        observed = [f for f in self.feature_columns if f not in CALENDAR_FEATURES]
+        if observed:
+            origin = self._origin_features(history, observed, category_col)
+            series = pd.MultiIndex.from_frame(df_processed[[category_col, "store_id"]])
+            features[observed] = origin.reindex(series).to_numpy()
+            scored = series.isin(origin.index)
+            if not scored.all():
+                unseen = series[~scored].unique().tolist()
+                logger.warning(f"No history for {unseen}; not forecast")
+        # Gaps inside built features are filled as in training
+        features = features.fillna(0)
+        predictions = np.zeros(len(df_processed))
+        confidence = np.zeros(len(df_processed))
+
+        # Score each category's rows with one predict call
+        for category, positions in df_processed.groupby(category_col).indices.items():
             category_str = str(category)
             if category_str not in self.models:
                 logger.warning(f"No trained model found for category {category}")
                 continue
-
-            # Filter data for this category
-            cat_mask = df_processed[category_col] == category
-            cat_data = df_processed[cat_mask]
-
-            if len(cat_data) == 0:
+            positions = positions[scored[positions]]
+            if not len(positions):
                 continue
 
             # Prepare features
-            X = cat_data[self.feature_columns].fillna(0)
+            X = features.iloc[positions].to_numpy(dtype=float)
 
             # Scale and predict
             model = self.models[category_str]
             scaler = self.scalers[category_str]
-
-            X_scaled = scaler.transform(X)
-            predictions = model.predict(X_scaled)
-
-            # Store predictions
-            results.loc[cat_mask, "predicted_category_sales"] = predictions
+            predictions[positions] = model.predict(scaler.transform(X))
 
             # Calculate confidence based on CV scores
             cv_score = self.category_metadata[category_str]["average_cv_score"]
-            results.loc[cat_mask, "prediction_confidence"] = max(0, cv_score)
+            confidence[positions] = max(0, cv_score)
+
+        # Prepare results
+        results = df.copy()
+        results["predicted_category_sales"] = pd.Series(
+            predictions, index=df_processed.index
+        ).reindex(results.index, fill_value=0.0)
+        results["prediction_confidence"] = pd.Series(
+            confidence, index=df_processed.index
+        ).reindex(results.index, fill_value=0.0)
 
         return results
 
+    def _origin_features(
+        self, history: Optional[pd.DataFrame], observed: List[str], category_col: str
+    ) -> pd.DataFrame:
+        """Observed-sales features of each series' latest history row."""
+        if history is None or history.empty:
+            raise ValueError(
+                f"Category history is needed to build the features {observed}"
+            )
+        history = self.prepare_category_features(history)
+        missing = [f for f in observed if f not in history.columns]
+        if missing:
+            raise ValueError(f"Cannot build the features {missing} from the history")
+        latest = (
+            history.sort_values("sale_date").groupby([category_col, "store_id"]).tail(1)
+        )
+        return latest.set_index([category_col, "store_id"])[observed]
+
+    def build_forecast_frame(
+        self,
+        categories: List[int],
+        stores: List[int],
+        start_date: str,
+        periods: int = 30,
+        store_cities: Optional[Dict[int, int]] = None,
+        holiday_calendar: Optional[HolidayCalendar] = None,
+    ) -> pd.DataFrame:
+        """
+        Date x category x store grid to forecast, one row per combination.
+
+        Args:
+            store_cities: City of each store; stores without one get
+                ``UNKNOWN_CITY_ID`` (network-wide holidays only)
+            holiday_calendar: Calendar for ``holiday_flag`` (per store city)
+
+        Returns:
+            Frame ordered by date, then category, then store
+        """
+        dates = pd.date_range(start=start_date, periods=periods, freq="D")
+        categories = np.asarray(categories)
+        stores = np.asarray(stores)
+        per_date = len(categories) * len(stores)
+
+        forecast_df = pd.DataFrame(
+            {
+                "sale_date": np.repeat(dates.to_numpy(), per_date),
+                "first_category_id": np.tile(
+                    np.repeat(categories, len(stores)), len(dates)
+                ),
+                "store_id": np.tile(stores, len(dates) * len(categories)),
+            }
+        )
+        store_cities = store_cities or {}
+        unmapped = [store for store in stores.tolist() if store not in store_cities]
+        if unmapped:
+            logger.warning(
+                f"No city for stores {unmapped}; using city_id {UNKNOWN_CITY_ID}"
+            )
+        forecast_df["city_id"] = (
+            forecast_df["store_id"]
+            .map(store_cities)
+            .fillna(UNKNOWN_CITY_ID)
+            .astype(int)
+        )
+        # Targets are unknown; features of observed sales come from history
+        forecast_df["category_sales"] = np.nan
+        forecast_df["sale_amount"] = np.nan
+        forecast_df["holiday_flag"] = (
+            holiday_calendar.is_holiday(
+                forecast_df["sale_date"], forecast_df["city_id"]
+            ).astype(int)
+            if holiday_calendar is not None and len(forecast_df)
+            else 0
+        )
+        forecast_df["promo_flag"] = 0
+        return forecast_df
+
     def forecast_category_demand(
         self,
         categories: List[int],
         stores: List[int],
         start_date: str,
         periods: int = 30,
+        store_cities: Optional[Dict[int, int]] = None,
+        holiday_calendar: Optional[HolidayCalendar] = None,
+        history: Optional[pd.DataFrame] = None,
     ) -> pd.DataFrame:
         """
         Generate category demand forecasts.
@@ -593,6 +642,10 @@ class CategoryLevelForecaster:
             stores: List of store IDs to forecast
             start_date: Start date for forecast
             periods: Number of periods to forecast
+            store_cities: City of each store
+            holiday_calendar: Calendar used for the holiday flags
+            history: Category-level data of the ``HISTORY_DAYS`` before
+                ``start_date``, for the lag and aggregate features
 
         Returns:
             DataFrame with forecasts
@@ -602,31 +655,79 @@ class CategoryLevelForecaster:
         )
 
         # Create forecast framework
-        forecast_dates = pd.date_range(start=start_date, periods=periods, freq="D")
-
-        forecast_data = []
-        for date in forecast_dates:
-            for category in categories:
-                for store in stores:
-                    forecast_data.append(
-                        {
-                            "sale_date": date,
-                            "first_category_id": category,
-                            "store_id": store,
-                            "city_id": 1,  # Would need to map store to city
-                            "category_sales": 0,  # Placeholder
-                            "holiday_flag": 0,  # Would need holiday calendar
-                            "promo_flag": 0,
-                        }
-                    )
-
-        forecast_df = pd.DataFrame(forecast_data)
+        forecast_df = self.build_forecast_frame(
+            categories, stores, start_date, periods, store_cities, holiday_calendar
+        )
 
         # Generate predictions
-        forecasts = self.predict_category_demand(forecast_df)
+        forecasts = self.predict_category_demand(forecast_df, history)
 
         return forecasts
 
+    def disaggregate_to_subcategories(
+        self, forecasts: pd.DataFrame, subcategory_sales: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Subcategory forecasts split top-down from category forecasts.
+
+        Each category x store forecast is divided among the category's
+        subcategories by their historical share of its sales in that store,
+        so subcategory forecasts add up to the category forecast without a
+        model per subcategory.
+
+        Args:
+            forecasts: Output of ``forecast_category_demand``
+            subcategory_sales: Historical sales (``category_sales``) per
+                first_category_id x second_category_id x store_id
+
+        Returns:
+            DataFrame with predicted_subcategory_sales per date, category,
+            subcategory and store
+        """
+        keys = ["first_category_id", "store_id"]
+        history = subcategory_sales.merge(forecasts[keys].drop_duplicates(), on=keys)
+        if history.empty:
+            return pd.DataFrame()
+
+        hierarchy = build_hierarchy(
+            history, [["first_category_id"], keys, keys + ["second_category_id"]]
+        )
+        leaf_sales = (
+            history.groupby(keys + ["second_category_id"])["category_sales"]
+            .sum()
+            .reindex(pd.MultiIndex.from_frame(hierarchy.leaves), fill_value=0)
+            .to_numpy()
+        )
+
+        # Category x store forecasts are the top-down base level
+        pairs = pd.MultiIndex.from_tuples(hierarchy.node_keys(2), names=keys)
+        predicted = forecasts.pivot_table(
+            index=keys,
+            columns="sale_date",
+            values="predicted_category_sales",
+            aggfunc="sum",
+        ).reindex(pairs)
+        base = np.full((hierarchy.n_nodes, predicted.shape[1]), np.nan)
+        base[hierarchy.level_slices[2]] = predicted.to_numpy()
+
+        leaf_forecasts = top_down(hierarchy, base, leaf_sales)
+        leaves = hierarchy.leaves.loc[
+            hierarchy.leaves.index.repeat(len(predicted.columns))
+        ].reset_index(drop=True)
+        leaves["sale_date"] = np.tile(predicted.columns.to_numpy(), hierarchy.n_leaves)
+        leaves["predicted_subcategory_sales"] = leaf_forecasts.ravel()
+
+        logger.info(
+            f"Disaggregated {len(pairs)} category-store forecasts "
+            f"to {hierarchy.n_leaves} subcategory series"
+        )
+        columns = ["sale_date", "first_category_id", "second_category_id", "store_id"]
+        return (
+            leaves[columns + ["predicted_subcategory_sales"]]
+            .sort_values(["sale_date"] + keys, kind="stable")
+            .reset_index(drop=True)
+        )
+
     def get_category_insights(self) -> Dict[str, Any]:
         """Get insights about category performance and patterns."""
         if not self.is_fitted:
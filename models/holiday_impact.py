@@ -1,5 +1,3 @@
-
-
 import pandas as pd
 import numpy as np
 
@@ -14,86 +12,71 @@ def analyze_holiday_impact(df):
     Returns:
         DataFrame with holiday impact metrics
     """
+    result_columns = [
+        "product_id",
+        "avg_holiday_sales",
+        "avg_non_holiday_sales",
+        "absolute_lift",
+        "percentage_lift",
+        "holiday_count",
+    ]
+
     # Make a copy to avoid modifying the original
     analysis_df = df.copy()
 
     # Check if required columns exist
     if "holiday_flag" not in analysis_df.columns:
         # If holiday flag missing, return empty DataFrame
-        return pd.DataFrame(
-            columns=[
-                "product_id",
-                "avg_holiday_sales",
-                "avg_non_holiday_sales",
-                "absolute_lift",
-                "percentage_lift",
-                "holiday_count",
-            ]
-        )
+        return pd.DataFrame(columns=result_columns)
 
-    # Make sure date is a datetime
-    if "dt" in analysis_df.columns and analysis_df["dt"].dtype == "object":
-        analysis_df["dt"] = pd.to_datetime(analysis_df["dt"])
+    is_holiday = analysis_df["holiday_flag"] == 1
+    is_regular = analysis_df["holiday_flag"] == 0
 
-    # Separate holiday and non-holiday sales
-    holiday_sales = analysis_df[analysis_df["holiday_flag"] == 1]
-    non_holiday_sales = analysis_df[analysis_df["holiday_flag"] == 0]
-
-    if len(holiday_sales) == 0 or len(non_holiday_sales) == 0:
+    if not is_holiday.any() or not is_regular.any():
         # If no holiday data, return empty DataFrame
-        return pd.DataFrame(
-            columns=[
-                "product_id",
-                "avg_holiday_sales",
-                "avg_non_holiday_sales",
-                "absolute_lift",
-                "percentage_lift",
-                "holiday_count",
-            ]
-        )
-
-    # Calculate metrics per product
-    product_holiday_impact = []
-
-    for product in analysis_df["product_id"].unique():
-        product_holiday = holiday_sales[holiday_sales["product_id"] == product]
-        product_non_holiday = non_holiday_sales[
-            non_holiday_sales["product_id"] == product
-        ]
-
-        if len(product_holiday) == 0 or len(product_non_holiday) == 0:
-            continue
-
-        # Calculate metrics
-        avg_holiday_sales = product_holiday["sale_amount"].mean()
-        avg_non_holiday_sales = product_non_holiday["sale_amount"].mean()
-
-        # Calculate lift
-        absolute_lift = avg_holiday_sales - avg_non_holiday_sales
-        percentage_lift = (
-            (absolute_lift / avg_non_holiday_sales) * 100
-            if avg_non_holiday_sales > 0
-            else 0
+        return pd.DataFrame(columns=result_columns)
+
+    # Calculate metrics for all products at once
+    sales = analysis_df["sale_amount"]
+    by_product = pd.DataFrame(
+        {
+            "product_id": analysis_df["product_id"],
+            "holiday_sales": sales.where(is_holiday),
+            "non_holiday_sales": sales.where(is_regular),
+        }
+    ).groupby("product_id", sort=False)
+    impact_df = pd.DataFrame(
+        {
+            "avg_holiday_sales": by_product["holiday_sales"].mean(),
+            "avg_non_holiday_sales": by_product["non_holiday_sales"].mean(),
+            "holiday_count": by_product["holiday_sales"].count(),
+        }
+    )
+    impact_df = impact_df[
+        (impact_df["holiday_count"] > 0) & impact_df["avg_non_holiday_sales"].notna()
+    ].reset_index()
+
+    if impact_df.empty:
+        return pd.DataFrame(columns=result_columns)
+
+    # Calculate lift
+    impact_df["absolute_lift"] = (
+        impact_df["avg_holiday_sales"] - impact_df["avg_non_holiday_sales"]
+    )
+    impact_df["percentage_lift"] = np.where(
+        impact_df["avg_non_holiday_sales"] > 0,
+        impact_df["absolute_lift"]
+        / impact_df["avg_non_holiday_sales"].where(
+            impact_df["avg_non_holiday_sales"] > 0
         )
-
-        # Store results
-        product_holiday_impact.append(
-            {
-                "product_id": product,
-                "avg_holiday_sales": avg_holiday_sales,
-                "avg_non_holiday_sales": avg_non_holiday_sales,
-                "absolute_lift": absolute_lift,
-                "percentage_lift": percentage_lift,
-                "holiday_count": len(product_holiday),
-            }
-        )
-
-    # Convert to DataFrame
-    impact_df = pd.DataFrame(product_holiday_impact)
+        * 100,
+        0,
+    )
 
     # Sort by percentage lift
-    if not impact_df.empty:
-        impact_df = impact_df.sort_values("percentage_lift", ascending=False)
+    impact_df = impact_df[result_columns].sort_values(
+        "percentage_lift", ascending=False
+    )
 
     return impact_df
 
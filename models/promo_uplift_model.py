@@ -12,8 +12,8 @@ from sklearn.ensemble import RandomForestRegressor  # type: ignore
 from sklearn.linear_model import LinearRegression  # type: ignore
 from sklearn.preprocessing import StandardScaler  # type: ignore
 from sklearn.pipeline import Pipeline  # type: ignore
-from sklearn.model_selection import train_test_split  # type: ignore
-from sklearn.metrics import mean_squared_error, r2_score  # type: ignore
+from sklearn.model_selection import cross_val_score, train_test_split  # type: ignore
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score  # type: ignore
 import joblib  # type: ignore
 
 # Configure logging
@@ -23,6 +23,42 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def promo_run_lengths(df):
+    """
+    Length in days of the promotion run each row belongs to (0 off promo).
+
+    A run is a stretch of consecutive promo rows of one store/product series
+    in date order, so historical rows carry the same ``promo_duration``
+    feature that promotion scenarios set explicitly.
+
+    Args:
+        df (pd.DataFrame): Sales data with a promo_flag column
+
+    Returns:
+        np.ndarray: Run length per row, in the row order of ``df``
+    """
+    keys = [col for col in ["store_id", "product_id"] if col in df.columns]
+    order = keys + (["sale_date"] if "sale_date" in df.columns else [])
+    data = df.reset_index(drop=True)
+    if order:
+        data = data.sort_values(order, kind="stable")
+
+    flag = data["promo_flag"].fillna(False).astype(bool).to_numpy()
+    series = (
+        data.groupby(keys, sort=False).ngroup().to_numpy()
+        if keys
+        else np.zeros(len(data), dtype=int)
+    )
+    starts = np.ones(len(data), dtype=bool)
+    starts[1:] = (flag[1:] != flag[:-1]) | (series[1:] != series[:-1])
+    run = np.cumsum(starts)
+    lengths = np.where(flag, np.bincount(run)[run], 0)
+
+    result = np.empty(len(data), dtype=int)
+    result[data.index.to_numpy()] = lengths
+    return result
+
+
 class PromoUpliftModel:
     """
     Model to predict promotion uplift (how much sales increase due to promotions).
@@ -87,7 +123,9 @@ class PromoUpliftModel:
         # Create pipeline with scaling
         self.pipeline = Pipeline([("scaler", self.scaler), ("model", self.model)])
 
-    def prepare_data(self, df, target_col="uplift", drop_cols=None):
+    def prepare_data(
+        self, df, target_col="uplift", drop_cols=None, compute_target=True
+    ):
         """
         Prepare data for modeling by creating features and target.
 
@@ -95,15 +133,22 @@ class PromoUpliftModel:
             df (pd.DataFrame): Input dataframe with sales and promotion data
             target_col (str): Column name containing the target variable (uplift)
             drop_cols (list): Columns to drop from features
+            compute_target (bool): Derive uplift from sales when the target column
+                is missing. Disabled at prediction time, where scenario frames
+                are all-promo and carry no target.
 
         Returns:
-            tuple: X (features), y (target)
+            tuple: X (features), y (target, None when not available)
         """
         # Create a copy to avoid modifying the original
         data = df.copy()
 
+        # Promotion length as a feature; scenario frames set it explicitly
+        if "promo_flag" in data.columns and "promo_duration" not in data.columns:
+            data["promo_duration"] = promo_run_lengths(data)
+
         # Check if the target column exists
-        if target_col not in data.columns:
+        if target_col not in data.columns and compute_target:
             logger.warning(
                 f"Target column '{target_col}' not found. "
                 f"Will attempt to calculate uplift from sales data."
@@ -175,10 +220,10 @@ class PromoUpliftModel:
             target_col = "uplift"
 
         # Prepare features (X) and target (y)
-        y = data[target_col]
+        y = data[target_col] if target_col in data.columns else None
 
         # Determine columns to drop
-        cols_to_drop = drop_cols or []
+        cols_to_drop = list(drop_cols or [])
         cols_to_drop.append(target_col)
 
         # Add any target-related columns to drop
@@ -286,15 +331,18 @@ class PromoUpliftModel:
             raise ValueError("Model must be trained before making predictions")
 
         # Prepare features (assuming no target column)
-        X, _ = self.prepare_data(df, target_col="_dummy_", drop_cols=drop_cols)
+        X, _ = self.prepare_data(
+            df, target_col="_dummy_", drop_cols=drop_cols, compute_target=False
+        )
 
-        # Ensure all feature columns from training are present
-        for col in self.feature_names:
-            if col not in X.columns:
-                X[col] = 0
+        if "promo_duration" in X.columns and "promo_duration" not in self.feature_names:
+            logger.warning(
+                "Model was trained without promo_duration; promotion length "
+                "will not affect predictions until it is retrained"
+            )
 
-        # Keep only the original feature columns and in the same order
-        X = X[self.feature_names]
+        # Align to the training columns in one pass (missing ones become 0)
+        X = X.reindex(columns=self.feature_names, fill_value=0)
 
         # Make predictions
         predictions = self.pipeline.predict(X)
@@ -7,6 +7,7 @@ import pandas as pd  # type: ignore
 import numpy as np  # type: ignore
 from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
+import json
 import logging
 from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering  # type: ignore
 from sklearn.preprocessing import StandardScaler, MinMaxScaler  # type: ignore
@@ -21,10 +22,76 @@ from scipy.cluster.hierarchy import dendrogram, linkage  # type: ignore
 import matplotlib.pyplot as plt  # type: ignore
 import seaborn as sns  # type: ignore
 
+from services.cluster_count_search import (
+    DEFAULT_SAMPLE_SIZE,
+    estimate_silhouette,
+    select_cluster_count,
+)
+from services.scalable_clustering import (
+    BirchAgglomerative,
+    BirchDBSCAN,
+    StreamingKMeans,
+    scalable_algorithm,
+)
+
 warnings.filterwarnings("ignore")
 
 logger = logging.getLogger(__name__)
 
+# Used for stores whose hourly profile is missing or unreadable
+DEFAULT_PEAK_HOURS = {"peak_hour": 12, "peak_intensity": 0, "hours_active": 0}
+
+
+def _parse_hours(value: Any) -> list:
+    """One hourly sales profile as a list of floats ([] if unreadable)."""
+    try:
+        hours = json.loads(value) if isinstance(value, str) else value
+        return [float(h) for h in hours] if isinstance(hours, list) else []
+    except (TypeError, ValueError):
+        return []
+
+
+def _peak_hour_features(hours_sale: pd.Series) -> pd.DataFrame:
+    """
+    Peak hour, peak intensity (peak / mean) and active hours per profile.
+
+    String profiles are decoded with one ``json.loads`` call over the whole
+    column, falling back to per-value parsing only if one is malformed.
+    """
+    values = hours_sale.tolist()
+    if values and all(isinstance(v, str) for v in values):
+        try:
+            decoded = json.loads("[" + ",".join(values) + "]")
+            if len(decoded) == len(values):
+                values = decoded
+        except ValueError:
+            pass
+    profiles = [_parse_hours(v) for v in values]
+
+    width = max((len(p) for p in profiles), default=0)
+    if width == 0:
+        return pd.DataFrame([DEFAULT_PEAK_HOURS] * len(profiles))
+    grid = np.full((len(profiles), width), np.nan)
+    lengths = np.array([len(p) for p in profiles])
+    grid[np.arange(width) < lengths[:, None]] = [h for p in profiles for h in p]
+
+    has_hours = lengths > 0
+    totals = np.nansum(grid, axis=1)
+    peaks = np.nanmax(np.where(has_hours[:, None], grid, 0), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intensity = np.where(totals > 0, peaks / (totals / np.maximum(lengths, 1)), 0)
+    return pd.DataFrame(
+        {
+            "peak_hour": np.where(
+                has_hours,
+                np.argmax(np.where(np.isnan(grid), -np.inf, grid), axis=1),
+                DEFAULT_PEAK_HOURS["peak_hour"],
+            ),
+            "peak_intensity": intensity,
+            "hours_active": (grid > 0).sum(axis=1),
+        }
+    )
+
 
 class StoreClustering:
     """Store clustering and behavior segmentation model."""
@@ -39,7 +106,10 @@ class StoreClustering:
         Initialize store clustering model.
 
         Args:
-            clustering_method: Clustering algorithm ('kmeans', 'dbscan', 'hierarchical')
+            clustering_method: Clustering algorithm ('kmeans', 'dbscan',
+                'hierarchical', or the bounded-memory 'minibatch_kmeans',
+                'birch_dbscan', 'birch_agglomerative' used automatically for
+                large store sets)
             n_clusters: Number of clusters (for kmeans and hierarchical)
             save_path: Path to save models
         """
@@ -71,6 +141,12 @@ class StoreClustering:
             self.clustering_model = AgglomerativeClustering(
                 n_clusters=self.n_clusters, linkage="ward"
             )
+        elif self.clustering_method == "minibatch_kmeans":
+            self.clustering_model = StreamingKMeans(n_clusters=self.n_clusters)
+        elif self.clustering_method == "birch_dbscan":
+            self.clustering_model = BirchDBSCAN(eps=0.5, min_samples=5)
+        elif self.clustering_method == "birch_agglomerative":
+            self.clustering_model = BirchAgglomerative(n_clusters=self.n_clusters)
         else:
             raise ValueError(f"Unsupported clustering method: {self.clustering_method}")
 
@@ -149,39 +225,10 @@ class StoreClustering:
         """Add customer behavior indicators."""
         # Shopping pattern analysis
         if "hours_sale" in df.columns:
-
-            def analyze_peak_hours(hours_str):
-                try:
-                    import json
-
-                    hours = json.loads(hours_str) if isinstance(hours_str, str) else []
-                    if not hours:
-                        return {"peak_hour": 12, "peak_intensity": 0, "hours_active": 0}
-
-                    peak_hour = np.argmax(hours)
-                    peak_intensity = (
-                        max(hours) / (sum(hours) / len(hours)) if sum(hours) > 0 else 0
-                    )
-                    hours_active = sum([1 for h in hours if h > 0])
-
-                    return {
-                        "peak_hour": peak_hour,
-                        "peak_intensity": peak_intensity,
-                        "hours_active": hours_active,
-                    }
-                except:
-                    return {"peak_hour": 12, "peak_intensity": 0, "hours_active": 0}
-
-            shopping_patterns = (
-                df.groupby("store_id")["hours_sale"]
-                .apply(lambda x: x.iloc[0] if len(x) > 0 else "[]")
-                .apply(analyze_peak_hours)
-            )
-
-            pattern_df = pd.DataFrame(
-                shopping_patterns.tolist(), index=shopping_patterns.index
-            )
-            pattern_df["store_id"] = pattern_df.index
+            # One hourly profile per store (its first row), parsed in bulk
+            first_rows = df.drop_duplicates("store_id")
+            pattern_df = _peak_hour_features(first_rows["hours_sale"])
+            pattern_df["store_id"] = first_rows["store_id"].to_numpy()
 
             store_features = store_features.merge(pattern_df, on="store_id", how="left")
 
@@ -481,67 +528,54 @@ class StoreClustering:
         """
         logger.info("Determining optimal number of clusters...")
 
-        if self.clustering_method != "kmeans":
+        if self.clustering_method not in ("kmeans", "minibatch_kmeans"):
             logger.warning("Optimal cluster determination only supported for kmeans")
             return {"optimal_clusters": self.n_clusters}
 
-        evaluation_results = {
-            "cluster_range": list(range(2, max_clusters + 1)),
-            "inertia": [],
-            "silhouette_scores": [],
-            "calinski_harabasz_scores": [],
-            "optimal_clusters": self.n_clusters,
-        }
-
         X_scaled = self.scaler.fit_transform(X)
 
-        for n_clusters in range(2, max_clusters + 1):
-            # Fit KMeans
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-            cluster_labels = kmeans.fit_predict(X_scaled)
-
-            # Calculate metrics
-            evaluation_results["inertia"].append(kmeans.inertia_)
-            evaluation_results["silhouette_scores"].append(
-                silhouette_score(X_scaled, cluster_labels)
-            )
-            evaluation_results["calinski_harabasz_scores"].append(
-                calinski_harabasz_score(X_scaled, cluster_labels)
-            )
-
-        # Determine optimal clusters based on silhouette score
-        optimal_idx = np.argmax(evaluation_results["silhouette_scores"])
-        evaluation_results["optimal_clusters"] = evaluation_results["cluster_range"][
-            optimal_idx
-        ]
-
-        # Elbow method analysis
-        inertias = evaluation_results["inertia"]
-        elbow_scores = []
-        for i in range(1, len(inertias) - 1):
-            elbow_score = abs(inertias[i - 1] - 2 * inertias[i] + inertias[i + 1])
-            elbow_scores.append(elbow_score)
-
-        if elbow_scores:
-            elbow_optimal_idx = (
-                np.argmax(elbow_scores) + 1
-            )  # +1 because we started from index 1
-            evaluation_results["elbow_optimal_clusters"] = evaluation_results[
-                "cluster_range"
-            ][elbow_optimal_idx]
+        # Warm-started, sampled and cached search (services.cluster_count_search)
+        selection = select_cluster_count(
+            X_scaled,
+            entity_type="stores",
+            feature_set=list(X.columns),
+            max_k=max_clusters,
+        )
+        candidates = selection.candidates
+        evaluation_results = {
+            "cluster_range": selection.cluster_range,
+            "inertia": [c.inertia for c in candidates],
+            "silhouette_scores": [c.silhouette for c in candidates],
+            "silhouette_bounds": [
+                (c.silhouette_low, c.silhouette_high) for c in candidates
+            ],
+            "calinski_harabasz_scores": [c.calinski_harabasz for c in candidates],
+            "optimal_clusters": selection.optimal_k,
+            "silhouette_sample_size": selection.silhouette_sample_size,
+            "from_cache": selection.from_cache,
+        }
+        if selection.elbow_k is not None:
+            evaluation_results["elbow_optimal_clusters"] = selection.elbow_k
 
         logger.info(
             f"Optimal clusters by silhouette score: {evaluation_results['optimal_clusters']}"
         )
         return evaluation_results
 
-    def fit(self, df: pd.DataFrame, auto_optimize: bool = True) -> Dict[str, Any]:
+    def fit(
+        self,
+        df: Optional[pd.DataFrame] = None,
+        auto_optimize: bool = True,
+        store_features: Optional[pd.DataFrame] = None,
+    ) -> Dict[str, Any]:
         """
         Fit the store clustering model.
 
         Args:
             df: Sales data at product level
             auto_optimize: Whether to automatically optimize cluster count
+            store_features: Features from ``extract_store_features``, to fit
+                several configurations without re-extracting them
 
         Returns:
             Clustering results and metrics
@@ -549,7 +583,10 @@ class StoreClustering:
         logger.info("Fitting store clustering model...")
 
         # Extract store features
-        store_features = self.extract_store_features(df)
+        if store_features is None:
+            store_features = self.extract_store_features(df)
+        else:
+            store_features = store_features.copy()
 
         # Prepare clustering features
         clustering_features = self.prepare_clustering_features(store_features)
@@ -557,13 +594,16 @@ class StoreClustering:
         # Store feature names
         self.feature_columns = clustering_features.columns.tolist()
 
+        # Large store sets switch to the bounded-memory backends
+        self.clustering_method = scalable_algorithm(
+            self.clustering_method, len(clustering_features)
+        )
+
         # Optimize cluster count if requested
-        if auto_optimize and self.clustering_method == "kmeans":
+        if auto_optimize and self.clustering_method in ("kmeans", "minibatch_kmeans"):
             optimization_results = self.determine_optimal_clusters(clustering_features)
             self.n_clusters = optimization_results["optimal_clusters"]
-            self.clustering_model = KMeans(
-                n_clusters=self.n_clusters, random_state=42, n_init=10
-            )
+        self._initialize_clustering_model()
 
         # Scale features
         X_scaled = self.scaler.fit_transform(clustering_features)
@@ -637,6 +677,77 @@ class StoreClustering:
 
         return cluster_assignments
 
+    def assign_clusters(self, store_features: pd.DataFrame) -> Dict[int, int]:
+        """
+        Assign stores to the fitted clusters from their features.
+
+        One nearest-centre (or nearest-subcluster) lookup per store; needs a
+        model with ``predict`` (kmeans and the mini-batch/BIRCH methods).
+
+        Args:
+            store_features: Store-level features, as from extract_store_features
+
+        Returns:
+            Dictionary mapping store IDs to cluster assignments
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before making predictions")
+        if not hasattr(self.clustering_model, "predict"):
+            raise ValueError(
+                f"Clustering method '{self.clustering_method}' cannot assign new stores"
+            )
+
+        labels = self.clustering_model.predict(self._transform(store_features))
+        return {
+            int(store_id): int(label)
+            for store_id, label in zip(store_features["store_id"], labels)
+        }
+
+    def update(self, df: pd.DataFrame) -> Dict[int, int]:
+        """
+        Fold new sales data (e.g. the latest days) into the fitted model.
+
+        The clustering model is updated with ``partial_fit`` instead of being
+        refitted; the scaler and feature set stay as fitted. Stores in ``df``
+        get refreshed assignments, new stores are added.
+
+        Args:
+            df: Sales data at product level for the new period
+
+        Returns:
+            Dictionary mapping the updated store IDs to cluster assignments
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before it can be updated")
+        if not hasattr(self.clustering_model, "partial_fit"):
+            raise ValueError(
+                f"Clustering method '{self.clustering_method}' does not support "
+                "incremental updates; use 'minibatch_kmeans' or a BIRCH method"
+            )
+
+        store_features = self.extract_store_features(df)
+        X_scaled = self._transform(store_features)
+        self.clustering_model.partial_fit(X_scaled)
+        labels = self.clustering_model.predict(X_scaled)
+        store_features["cluster"] = labels
+
+        # Replace the updated stores' rows, keep everyone else's
+        existing = self.store_features[
+            ~self.store_features["store_id"].isin(store_features["store_id"])
+        ]
+        self.store_features = pd.concat(
+            [
+                existing,
+                store_features[existing.columns.intersection(store_features.columns)],
+            ],
+            ignore_index=True,
+        )
+        logger.info(f"Store clustering updated with {len(store_features)} stores")
+        return {
+            int(store_id): int(label)
+            for store_id, label in zip(store_features["store_id"], labels)
+        }
+
     def get_cluster_insights(self) -> Dict[str, Any]:
         """Get detailed insights about store clusters."""
         if not self.is_fitted:
@@ -728,6 +839,16 @@ class StoreClustering:
         logger.info(f"Store clustering model loaded from {model_path}")
 
     # Private helper methods
+
+    def _transform(self, store_features: pd.DataFrame) -> np.ndarray:
+        """Scale (and project) store features with the fitted transforms."""
+        X = store_features.reindex(columns=self.feature_columns).astype(float)
+        X = X.fillna(X.median()).fillna(0.0)
+        X_scaled = self.scaler.transform(X)
+        if self.pca is not None:
+            X_scaled = self.pca.transform(X_scaled)
+        return X_scaled
+
     def _generate_cluster_profiles(
         self, store_features: pd.DataFrame, clustering_features: pd.DataFrame
     ) -> Dict[str, Any]:
@@ -878,9 +999,13 @@ class StoreClustering:
 
         try:
             if len(np.unique(cluster_labels)) > 1:
-                metrics["silhouette_score"] = float(
-                    silhouette_score(X_scaled, cluster_labels)
-                )
+                # Exact up to DEFAULT_SAMPLE_SIZE stores, sampled above
+                metrics["silhouette_score"] = estimate_silhouette(
+                    X_scaled,
+                    np.asarray(cluster_labels),
+                    DEFAULT_SAMPLE_SIZE,
+                    np.random.default_rng(42),
+                )[0]
                 metrics["calinski_harabasz_score"] = float(
                     calinski_harabasz_score(X_scaled, cluster_labels)
                 )
@@ -26,6 +26,9 @@ logger = logging.getLogger(__name__)
 class WeatherSensitiveDemandModel:
     """Weather-sensitive demand forecasting model."""
 
+    # Upper bound on rows in one stacked scenario block
+    max_scenario_block_rows = 1_000_000
+
     def __init__(
         self, model_type: str = "gradient_boost", save_path: str = "models/saved"
     ):
@@ -139,35 +142,48 @@ class WeatherSensitiveDemandModel:
 
         return analysis_results
 
-    def prepare_weather_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def prepare_weather_features(
+        self, df: pd.DataFrame, scenario_col: Optional[str] = None
+    ) -> pd.DataFrame:
         """
         Prepare weather-specific features for modeling.
 
         Args:
             df: Input DataFrame
+            scenario_col: Optional column identifying stacked scenarios; lag,
+                rolling and deviation features are computed within each one
 
         Returns:
             DataFrame with weather features
         """
-        from services.feature_builder import AdvancedFeatureBuilder
+        from services.feature_builder import AdvancedFeatureBuilder, rolling_stat
+        from services.holiday_calendar import cached_holiday_calendar
 
-        feature_builder = AdvancedFeatureBuilder()
+        feature_builder = AdvancedFeatureBuilder(
+            holiday_calendar=cached_holiday_calendar()
+        )
 
         # Build weather sensitivity features
-        df = feature_builder.build_weather_sensitivity_features(df)
+        df = feature_builder.build_weather_sensitivity_features(df, scenario_col)
 
         # Add temporal features
         df = feature_builder.build_temporal_features(df)
 
         # Add lag features for weather variables
         weather_cols = ["avg_temperature", "avg_humidity", "precpt", "avg_wind_level"]
+        if scenario_col is not None:
+            df = df.sort_values([scenario_col, "sale_date"], kind="stable")
         for col in weather_cols:
             if col in df.columns:
-                df = df.sort_values("sale_date")
-                df[f"{col}_lag_1"] = df[col].shift(1)
-                df[f"{col}_lag_7"] = df[col].shift(7)
-                df[f"{col}_rolling_mean_7"] = df[col].rolling(7).mean()
-                df[f"{col}_rolling_std_7"] = df[col].rolling(7).std()
+                if scenario_col is None:
+                    df = df.sort_values("sale_date")
+                    values = df[col]
+                else:
+                    values = df.groupby(scenario_col, sort=False)[col]
+                df[f"{col}_lag_1"] = values.shift(1)
+                df[f"{col}_lag_7"] = values.shift(7)
+                df[f"{col}_rolling_mean_7"] = rolling_stat(values, 7, "mean")
+                df[f"{col}_rolling_std_7"] = rolling_stat(values, 7, "std")
 
         # Weather interaction features
         if all(col in df.columns for col in ["avg_temperature", "avg_humidity"]):
@@ -178,9 +194,12 @@ class WeatherSensitiveDemandModel:
 
         # Weather deviation from normal
         if "avg_temperature" in df.columns:
-            monthly_temp_avg = df.groupby(df["sale_date"].dt.month)[
-                "avg_temperature"
-            ].transform("mean")
+            month_keys = [df["sale_date"].dt.month]
+            if scenario_col is not None:
+                month_keys.insert(0, df[scenario_col])
+            monthly_temp_avg = df.groupby(month_keys)["avg_temperature"].transform(
+                "mean"
+            )
             df["temp_deviation_from_normal"] = df["avg_temperature"] - monthly_temp_avg
 
         return df
@@ -268,6 +287,9 @@ class WeatherSensitiveDemandModel:
         """
         Predict demand based on weather conditions.
 
+        The observed conditions and all scenarios are scored together in one
+        stacked pass (see ``predict_scenarios``).
+
         Args:
             df: Input data for prediction
             weather_scenarios: Optional weather scenarios to test
@@ -278,53 +300,60 @@ class WeatherSensitiveDemandModel:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before making predictions")
 
-        # Prepare features
-        df_processed = self.prepare_weather_features(df)
+        scenarios = [{}] + list(weather_scenarios or [])
+        predictions = self.predict_scenarios(df, scenarios)
 
-        # Select features
-        X = df_processed[self.feature_columns].fillna(0)
+        # Create results DataFrame
+        results = df.copy()
+        results["predicted_demand"] = predictions[0]
 
-        predictions = []
+        # Add weather scenario predictions if provided
+        for i in range(1, len(scenarios)):
+            results[f"scenario_{i}_demand"] = predictions[i]
 
-        if self.model_type == "ensemble":
-            # Ensemble predictions
-            ensemble_preds = {}
-            for model_name, model in self.models.items():
-                X_scaled = self.scalers[model_name].transform(X)
-                ensemble_preds[model_name] = model.predict(X_scaled)
+        return results
 
-            # Simple averaging ensemble
-            final_pred = np.mean(list(ensemble_preds.values()), axis=0)
-            predictions = final_pred
-        else:
-            # Single model prediction
-            X_scaled = self.scalers["main"].transform(X)
-            predictions = self.models["main"].predict(X_scaled)
+    def predict_scenarios(
+        self, df: pd.DataFrame, scenarios: List[Dict[str, float]]
+    ) -> np.ndarray:
+        """
+        Score many weather scenarios over the same rows in one prediction pass.
 
-        # Create results DataFrame
-        results = df.copy()
-        results["predicted_demand"] = predictions
+        All scenarios are stacked into a single block with a scenario key, so
+        feature preparation, scaling and every ensemble member's ``predict``
+        run once per block instead of once per scenario. An empty scenario
+        dict scores the observed conditions.
 
-        # Add weather scenario predictions if provided
-        if weather_scenarios:
-            for i, scenario in enumerate(weather_scenarios):
-                scenario_df = self._apply_weather_scenario(df, scenario)
-                scenario_processed = self.prepare_weather_features(scenario_df)
-                scenario_X = scenario_processed[self.feature_columns].fillna(0)
-
-                if self.model_type == "ensemble":
-                    scenario_preds = []
-                    for model_name, model in self.models.items():
-                        X_scaled = self.scalers[model_name].transform(scenario_X)
-                        scenario_preds.append(model.predict(X_scaled))
-                    scenario_prediction = np.mean(scenario_preds, axis=0)
-                else:
-                    X_scaled = self.scalers["main"].transform(scenario_X)
-                    scenario_prediction = self.models["main"].predict(X_scaled)
+        Args:
+            df: Input data for prediction
+            scenarios: Weather overrides, e.g. ``{"avg_temperature": 30.0}``
 
-                results[f"scenario_{i+1}_demand"] = scenario_prediction
+        Returns:
+            Array of shape (len(scenarios), len(df)) aligned with ``df`` rows
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before making predictions")
 
-        return results
+        n_rows = len(df)
+        predictions = np.empty((len(scenarios), n_rows), dtype=float)
+        if n_rows == 0 or not scenarios:
+            return predictions
+
+        # Bound block memory by scoring scenarios in chunks of whole scenarios
+        per_block = max(1, self.max_scenario_block_rows // n_rows)
+        for first in range(0, len(scenarios), per_block):
+            chunk = scenarios[first : first + per_block]
+            block = self._build_scenario_block(df, chunk)
+            processed = self.prepare_weather_features(block, scenario_col="_scenario")
+            X = processed[self.feature_columns].fillna(0)
+
+            block_pred = self._predict_matrix(X)
+            predictions[
+                first + processed["_scenario"].to_numpy(),
+                processed["_row"].to_numpy(),
+            ] = block_pred
+
+        return predictions
 
     def calculate_weather_impact(
         self, df: pd.DataFrame, weather_var: str, impact_range: Tuple[float, float]
@@ -346,36 +375,23 @@ class WeatherSensitiveDemandModel:
         if weather_var not in df.columns:
             raise ValueError(f"Weather variable '{weather_var}' not found in data")
 
-        # Create scenarios with different weather values
+        # Baseline plus one scenario per test value, scored in a single pass
         test_values = np.linspace(impact_range[0], impact_range[1], 20)
-        impact_results = []
-
-        # Get baseline prediction
-        baseline_pred = self.predict_weather_demand(df)["predicted_demand"].mean()
-
-        for value in test_values:
-            # Create scenario
-            scenario_df = df.copy()
-            scenario_df[weather_var] = value
-
-            # Predict
-            scenario_pred = self.predict_weather_demand(scenario_df)[
-                "predicted_demand"
-            ].mean()
-
-            impact_results.append(
-                {
-                    weather_var: value,
-                    "predicted_demand": scenario_pred,
-                    "demand_change": scenario_pred - baseline_pred,
-                    "demand_change_pct": (
-                        (scenario_pred - baseline_pred) / baseline_pred
-                    )
-                    * 100,
-                }
-            )
+        scenarios = [{}] + [{weather_var: value} for value in test_values]
+        mean_demand = self.predict_scenarios(df, scenarios).mean(axis=1)
 
-        return pd.DataFrame(impact_results)
+        baseline_pred = mean_demand[0]
+        scenario_pred = mean_demand[1:]
+        demand_change = scenario_pred - baseline_pred
+
+        return pd.DataFrame(
+            {
+                weather_var: test_values,
+                "predicted_demand": scenario_pred,
+                "demand_change": demand_change,
+                "demand_change_pct": (demand_change / baseline_pred) * 100,
+            }
+        )
 
     def save_model(self, filename: Optional[str] = None):
         """Save the trained model."""
@@ -705,14 +721,56 @@ class WeatherSensitiveDemandModel:
 
         return coefficients
 
-    def _apply_weather_scenario(
-        self, df: pd.DataFrame, scenario: Dict[str, float]
+    def _build_scenario_block(
+        self, df: pd.DataFrame, scenarios: List[Dict[str, float]]
     ) -> pd.DataFrame:
-        """Apply a weather scenario to the data."""
-        scenario_df = df.copy()
+        """
+        Stack one copy of ``df`` per scenario with the overrides applied.
+
+        Adds ``_scenario`` (position in ``scenarios``) and ``_row`` (position
+        in ``df``) so predictions can be scattered back after feature
+        preparation reorders the block.
+        """
+        n_rows, n_scenarios = len(df), len(scenarios)
+        block = df.iloc[np.tile(np.arange(n_rows), n_scenarios)].reset_index(drop=True)
+        block["_scenario"] = np.repeat(np.arange(n_scenarios), n_rows)
+        block["_row"] = np.tile(np.arange(n_rows), n_scenarios)
+
+        for weather_var in {var for scenario in scenarios for var in scenario}:
+            if weather_var not in block.columns:
+                continue
+            values = block[weather_var].to_numpy(dtype=float, copy=True)
+            for i, scenario in enumerate(scenarios):
+                if weather_var in scenario:
+                    values[i * n_rows : (i + 1) * n_rows] = scenario[weather_var]
+            block[weather_var] = values
 
-        for weather_var, value in scenario.items():
-            if weather_var in scenario_df.columns:
-                scenario_df[weather_var] = value
+        return block
+
+    def _predict_matrix(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Predict with the fitted model(s), averaging ensemble members.
+
+        Scalers fitted to identical statistics (the ensemble members are all
+        trained on the same split) transform the block only once.
+        """
+        scaled: List[Tuple[StandardScaler, np.ndarray]] = []
+        member_preds = []
+        for model_name, model in self.models.items():
+            scaler = self.scalers[model_name]
+            X_scaled = next(
+                (
+                    values
+                    for fitted, values in scaled
+                    if np.array_equal(fitted.mean_, scaler.mean_)
+                    and np.array_equal(fitted.scale_, scaler.scale_)
+                ),
+                None,
+            )
+            if X_scaled is None:
+                X_scaled = scaler.transform(X)
+                scaled.append((scaler, X_scaled))
+            member_preds.append(model.predict(X_scaled))
 
-        return scenario_df
+        # Simple averaging ensemble (single model: its own prediction)
+        return np.mean(member_preds, axis=0)
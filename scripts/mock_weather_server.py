@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Local mock weather provider for offline development and benchmarking.
+
+Serves WeatherAPI.com (``/v1/current.json``) and OpenWeatherMap
+(``/data/2.5/weather``) compatible responses with deterministic per-city
+values and configurable latency.
+
+Usage:
+    python scripts/mock_weather_server.py --port 8765 --latency-ms 150
+
+    # then, for the API server
+    WEATHER_API_KEY=mock WEATHER_API_BASE_URL=http://127.0.0.1:8765 \\
+        python -m app.main
+
+    # or benchmark the pooled/cached client against it
+    python scripts/mock_weather_server.py --benchmark --requests 500
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+
+def _city_weather(city_query: str) -> dict:
+    """Deterministic synthetic conditions derived from the city name."""
+    seed = int(hashlib.md5(city_query.encode()).hexdigest()[:8], 16)
+    temp_f = 30 + seed % 70
+    humidity = 20 + (seed // 7) % 75
+    precip_mm = ((seed // 13) % 40) / 10 if seed % 3 == 0 else 0.0
+    wind_mph = 2 + (seed // 17) % 25
+    description = "Light rain" if precip_mm > 0 else "Clear"
+    return {
+        "temp_f": float(temp_f),
+        "humidity": int(humidity),
+        "precip_mm": float(precip_mm),
+        "wind_mph": float(wind_mph),
+        "description": description,
+    }
+
+
+def create_app(latency_ms: float = 0.0) -> web.Application:
+    """Build the mock provider application."""
+    app = web.Application()
+    counters = {"requests_served": 0}
+
+    async def _delay():
+        counters["requests_served"] += 1
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+
+    async def weatherapi_current(request: web.Request) -> web.Response:
+        await _delay()
+        query = request.query.get("q")
+        if not request.query.get("key"):
+            return web.json_response({"error": "API key missing"}, status=401)
+        if not query:
+            return web.json_response({"error": "q missing"}, status=400)
+        w = _city_weather(query)
+        return web.json_response(
+            {
+                "location": {"name": query.split(",")[0]},
+                "current": {
+                    "temp_f": w["temp_f"],
+                    "humidity": w["humidity"],
+                    "precip_mm": w["precip_mm"],
+                    "wind_mph": w["wind_mph"],
+                    "condition": {"text": w["description"]},
+                },
+            }
+        )
+
+    async def openweathermap_current(request: web.Request) -> web.Response:
+        await _delay()
+        query = request.query.get("q")
+        if not request.query.get("appid"):
+            return web.json_response({"message": "Invalid API key"}, status=401)
+        if not query:
+            return web.json_response({"message": "q missing"}, status=400)
+        w = _city_weather(query)
+        payload = {
+            "name": query.split(",")[0],
+            "main": {"temp": w["temp_f"], "humidity": w["humidity"]},
+            "wind": {"speed": w["wind_mph"]},
+            "weather": [{"description": w["description"].lower()}],
+        }
+        if w["precip_mm"] > 0:
+            payload["rain"] = {"1h": w["precip_mm"]}
+        return web.json_response(payload)
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(counters)
+
+    app.router.add_get("/v1/current.json", weatherapi_current)
+    app.router.add_get("/data/2.5/weather", openweathermap_current)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+async def run_benchmark(n_requests: int, latency_ms: float, port: int):
+    """
+    Start the mock provider in-process and hammer the live weather client.
+
+    Compares cold (pool + provider) and warm (cache) passes, and reports how
+    many provider calls were actually made thanks to coalescing.
+    """
+    runner = web.AppRunner(create_app(latency_ms))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+
+    cache_dir = tempfile.mkdtemp(prefix="weather_bench_")
+    os.environ.update(
+        {
+            "WEATHER_API_KEY": "mock",
+            "WEATHER_API_BASE_URL": f"http://127.0.0.1:{port}",
+            "WEATHER_CACHE_PATH": os.path.join(cache_dir, "cache.json"),
+            "WEATHER_RATE_LIMIT_PER_SEC": "0",
+        }
+    )
+    from services.live_weather_service import LiveWeatherService
+
+    service = LiveWeatherService()
+    city_ids = list(service.city_mapping.keys())
+    calls = [city_ids[i % len(city_ids)] for i in range(n_requests)]
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(service.get_current_weather(c) for c in calls))
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        await asyncio.gather(*(service.get_current_weather(c) for c in calls))
+        warm_ms = (time.perf_counter() - start) * 1000
+
+        restarted = LiveWeatherService()
+        start = time.perf_counter()
+        await asyncio.gather(*(restarted.get_current_weather(c) for c in calls))
+        restart_ms = (time.perf_counter() - start) * 1000
+    finally:
+        await service.close()
+        await runner.cleanup()
+
+    print(f"Requests per pass:      {n_requests} over {len(city_ids)} cities")
+    print(f"Provider latency:       {latency_ms:.0f}ms")
+    print(f"Cold pass:              {cold_ms:.1f}ms")
+    print(f"Warm pass (cache):      {warm_ms:.1f}ms")
+    print(f"After restart (disk):   {restart_ms:.1f}ms")
+    print(f"Client stats:           {service.get_stats()}")
+    print(f"Restarted client stats: {restarted.get_stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock weather provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        asyncio.run(run_benchmark(args.requests, args.latency_ms, args.port))
+    else:
+        web.run_app(create_app(args.latency_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
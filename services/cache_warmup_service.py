@@ -0,0 +1,411 @@
+"""
+Startup and scheduled cache warm-up.
+
+Right after a deploy the first callers of the forecast and dashboard
+endpoints pay the whole cold path: model loading, reference data, database
+reads and the forecasts themselves. The warmer does that work in the
+background instead:
+
+1. shared reference data: forecast and promotion models, the holiday
+   calendar and the hierarchy endpoints' data versions;
+2. the top-N hottest requests, replayed in-process through the app with
+   bounded concurrency so they fill the same result, snapshot and query
+   caches real callers read from.
+
+Hot requests are ranked from the requests this process has served (routes
+opt in with ``Depends(track_request)``), an optional access log
+(``WARMUP_ACCESS_LOG``, JSONL of ``{"method", "path", "body"}`` per call, the
+same format ``benchmarks.loadgen --replay`` reads), and a pinned list
+(``WARMUP_TARGETS``, always warmed first). With neither, the first entries of
+``random_valid_combinations.json`` are used.
+
+Warm-up runs once at startup. Setting ``WARMUP_INTERVAL_SECONDS`` (e.g.
+below the 5-minute result TTL) repeats it on that schedule; it is off by
+default because every pass recomputes the top-N requests whether or not
+anyone still asks for them. Replays carry ``CACHE_REFRESH_HEADER`` with the
+process's ``CACHE_REFRESH_TOKEN`` so entries are recomputed instead of served
+from cache; the header without the token is ignored. Only endpoints declared
+with ``@cached(http=True)`` keep HTTP results in the result cache.
+Progress is exposed for the ``/ready`` endpoint.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import Request
+
+from database.connection import (
+    CACHE_REFRESH_HEADER,
+    CACHE_REFRESH_TOKEN,
+    is_cache_refresh,
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_COMBINATIONS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "random_valid_combinations.json",
+)
+
+# Reference-data reads shared by every dashboard (ETag versions, DB pages)
+REFERENCE_PATHS = ["/api/cities", "/api/stores", "/api/products"]
+
+# Distinct requests remembered for ranking; the least requested is evicted
+MAX_TRACKED_REQUESTS = 1000
+MAX_REPORTED_ERRORS = 10
+
+TargetKey = Tuple[str, str, str]
+
+
+@dataclass
+class WarmupTarget:
+    """One request to replay, with how often it has been seen."""
+
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+    hits: int = 0
+
+    @property
+    def key(self) -> TargetKey:
+        body = json.dumps(self.body, sort_keys=True) if self.body is not None else ""
+        return self.method, self.path, body
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+@dataclass
+class WarmupProgress:
+    """State of the current (or last) warm-up run."""
+
+    state: str = "pending"  # pending, running, ready, disabled
+    runs: int = 0
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def warmed(self) -> bool:
+        """Whether a first warm-up has finished (or warm-up is disabled)."""
+        return self.runs > 0 or self.state == "disabled"
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at is not None:
+            end = self.finished_at or time.time()
+            duration = round((end - self.started_at) * 1000, 1)
+        return {
+            "state": self.state,
+            "warmed": self.warmed,
+            "runs": self.runs,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "progress": round(self.completed / self.total, 3) if self.total else 0.0,
+            "duration_ms": duration,
+            "errors": list(self.errors),
+        }
+
+
+def parse_targets(lines: List[str]) -> List[WarmupTarget]:
+    """
+    Targets from JSON lines (an access log or a pinned list).
+
+    Repeated requests are merged and counted; an optional ``count`` field
+    weighs a line as that many requests.
+    """
+    targets: Dict[TargetKey, WarmupTarget] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        entry = json.loads(line)
+        body = entry.get("body")
+        if isinstance(body, dict):
+            body = {k: v for k, v in body.items() if k != "refresh"}
+        target = WarmupTarget(
+            entry.get("method", "POST" if body is not None else "GET").upper(),
+            entry["path"],
+            body,
+        )
+        target = targets.setdefault(target.key, target)
+        target.hits += int(entry.get("count", 1))
+    return list(targets.values())
+
+
+def load_targets(path: str) -> List[WarmupTarget]:
+    """Targets from a JSONL file, or a JSON list of the same objects."""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return parse_targets([json.dumps(entry) for entry in json.loads(text)])
+    return parse_targets(text.splitlines())
+
+
+def default_targets(path: str, limit: int) -> List[WarmupTarget]:
+    """Forecast and dashboard requests for the first known-valid combinations."""
+    with open(path) as f:
+        combinations = json.load(f)
+    targets = []
+    for combo in combinations[:limit]:
+        city_id, store_id = int(combo["city_id"]), int(combo["store_id"])
+        product_id = int(combo["product_id"])
+        targets.append(
+            WarmupTarget(
+                "POST",
+                "/api/enhanced/dashboard-snapshot",
+                {"city_id": city_id, "store_id": store_id, "product_id": product_id},
+            )
+        )
+        targets.append(
+            WarmupTarget(
+                "POST",
+                "/api/multi-dimensional-forecast",
+                {
+                    "city_ids": [str(city_id)],
+                    "store_ids": [str(store_id)],
+                    "product_ids": [product_id],
+                    "forecast_days": 30,
+                },
+            )
+        )
+    return targets[:limit]
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off")
+
+
+class CacheWarmer:
+    """Ranks hot requests and replays them through the app in the background."""
+
+    def __init__(
+        self,
+        top_n: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        access_log: Optional[str] = None,
+        pinned: Optional[str] = None,
+        combinations: str = DEFAULT_COMBINATIONS,
+    ):
+        self.enabled = _env_flag("WARMUP_ENABLED", "true")
+        self.top_n = (
+            top_n if top_n is not None else int(os.getenv("WARMUP_TOP_N", "20"))
+        )
+        self.concurrency = concurrency or int(os.getenv("WARMUP_CONCURRENCY", "4"))
+        self.interval = (
+            interval
+            if interval is not None
+            else float(os.getenv("WARMUP_INTERVAL_SECONDS", "0"))
+        )
+        self.timeout = timeout or float(os.getenv("WARMUP_REQUEST_TIMEOUT", "120"))
+        self.access_log = access_log or os.getenv("WARMUP_ACCESS_LOG")
+        self.pinned = pinned or os.getenv("WARMUP_TARGETS")
+        self.combinations = combinations
+        self.progress = WarmupProgress()
+        self._seen: Dict[TargetKey, WarmupTarget] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, method: str, path: str, body: Optional[Dict[str, Any]]):
+        """Count one served request towards the warm-up ranking."""
+        if isinstance(body, dict):
+            body = {k: v for k, v in body.items() if k != "refresh"}
+        target = WarmupTarget(method.upper(), path, body)
+        seen = self._seen.get(target.key)
+        if seen is None:
+            if len(self._seen) >= MAX_TRACKED_REQUESTS:
+                coldest = min(self._seen, key=lambda k: self._seen[k].hits)
+                del self._seen[coldest]
+            seen = self._seen[target.key] = target
+        seen.hits += 1
+
+    def select_targets(self) -> List[WarmupTarget]:
+        """Pinned targets first, then the top-N by observed and logged hits."""
+        pinned: List[WarmupTarget] = []
+        if self.pinned:
+            try:
+                pinned = load_targets(self.pinned)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not read warm-up targets {self.pinned}: {e}")
+
+        ranked: Dict[TargetKey, WarmupTarget] = {}
+        logged: List[WarmupTarget] = []
+        if self.access_log:
+            try:
+                logged = load_targets(self.access_log)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not read access log {self.access_log}: {e}")
+        for target in logged + list(self._seen.values()):
+            merged = ranked.setdefault(
+                target.key, WarmupTarget(target.method, target.path, target.body)
+            )
+            merged.hits += target.hits
+
+        if not ranked and not pinned:
+            try:
+                return default_targets(self.combinations, self.top_n)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"No warm-up targets available: {e}")
+                return []
+
+        pinned_keys = {t.key for t in pinned}
+        hottest = sorted(
+            (t for t in ranked.values() if t.key not in pinned_keys),
+            key=lambda t: t.hits,
+            reverse=True,
+        )
+        return pinned + hottest[: self.top_n]
+
+    def _fail(self, name: str, error: Any):
+        self.progress.failed += 1
+        self.progress.errors = (self.progress.errors + [f"{name}: {error}"])[
+            -MAX_REPORTED_ERRORS:
+        ]
+        logger.warning(f"Warm-up of {name} failed: {error}")
+
+    async def _step(self, name: str, coro):
+        try:
+            await coro
+        except Exception as e:
+            self._fail(name, e)
+        finally:
+            self.progress.completed += 1
+
+    async def _warm_models(self):
+        from services.model_loader import get_forecast_model, get_promo_model
+
+        await asyncio.gather(
+            asyncio.to_thread(get_forecast_model), asyncio.to_thread(get_promo_model)
+        )
+
+    async def _warm_holiday_calendar(self, db_manager: Any):
+        from services.holiday_calendar import load_holiday_calendar
+
+        await load_holiday_calendar(db_manager, refresh=True)
+
+    async def _replay(
+        self, client: httpx.AsyncClient, target: WarmupTarget, limit: asyncio.Semaphore
+    ):
+        async with limit:
+            response = await client.request(
+                target.method,
+                target.path,
+                json=target.body,
+                headers={CACHE_REFRESH_HEADER: CACHE_REFRESH_TOKEN},
+            )
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    async def run(self, app: Any) -> Dict[str, Any]:
+        """Warm reference data, then replay the selected targets once."""
+        targets = self.select_targets()
+        db_manager = getattr(app.state, "db_manager", None)
+        self.progress = WarmupProgress(
+            state="running",
+            runs=self.progress.runs,
+            total=2 + len(REFERENCE_PATHS) + len(targets),
+            started_at=time.time(),
+        )
+        logger.info(f"Cache warm-up started: {len(targets)} hot requests")
+
+        limit = asyncio.Semaphore(self.concurrency)
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://warmup", timeout=self.timeout
+        ) as client:
+            await asyncio.gather(
+                self._step("models", self._warm_models()),
+                self._step("holiday_calendar", self._warm_holiday_calendar(db_manager)),
+                *(
+                    self._step(target.name, self._replay(client, target, limit))
+                    for target in map(lambda p: WarmupTarget("GET", p), REFERENCE_PATHS)
+                ),
+            )
+            await asyncio.gather(
+                *(
+                    self._step(target.name, self._replay(client, target, limit))
+                    for target in targets
+                )
+            )
+
+        self.progress.state = "ready"
+        self.progress.runs += 1
+        self.progress.finished_at = time.time()
+        summary = self.progress.to_dict()
+        logger.info(
+            f"Cache warm-up finished: {summary['completed']} steps, "
+            f"{summary['failed']} failed in {summary['duration_ms']:.0f}ms"
+        )
+        return summary
+
+    async def _loop(self, app: Any):
+        while True:
+            try:
+                await self.run(app)
+            except Exception as e:
+                logger.error(f"Cache warm-up run failed: {e}")
+                self.progress.state = "ready"
+                self.progress.runs += 1
+                self._fail("run", e)
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
+
+    def start(self, app: Any):
+        """Start warming in the background (no-op when disabled)."""
+        if not self.enabled:
+            self.progress.state = "disabled"
+            logger.info("Cache warm-up disabled (WARMUP_ENABLED)")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(app))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self.progress.to_dict(),
+            "top_n": self.top_n,
+            "concurrency": self.concurrency,
+            "interval_seconds": self.interval,
+            "tracked_requests": len(self._seen),
+        }
+
+
+# Global instance
+cache_warmer = CacheWarmer()
+
+
+async def track_request(request: Request):
+    """Route dependency that counts a request towards warm-up ranking."""
+    if is_cache_refresh(request):
+        return
+    body = None
+    if request.method != "GET":
+        try:
+            body = await request.json()
+        except ValueError:
+            return
+    path = request.url.path
+    if request.url.query:
+        path = f"{path}?{request.url.query}"
+    cache_warmer.record(request.method, path, body)
@@ -0,0 +1,247 @@
+"""
+Pre-aggregated category cube for category-level forecasting and analysis.
+
+The category routes used to fetch up to 100,000 raw ``sales_data`` rows and
+aggregate them to category x store x day in pandas on every call. The cube
+is a materialized view at category x subcategory x store x city x day grain
+(``mv_category_daily``) holding additive measures: sums and non-null counts
+of sales, quantity, discount, price, stockout hours, promo rows and weather.
+
+Because the measures are additive, any roll-up (e.g. category x city x
+day, or category totals) and any slice (category, store, city, date range)
+is one ``GROUP BY`` over the view, with means recomputed exactly from the
+sums and counts. Output columns are named like the pandas aggregation in
+``CategoryLevelForecaster.aggregate_to_category_level``.
+
+The view is refreshed (concurrently, so reads continue) when the
+``sales_data`` version changes, at most once per
+``CATEGORY_CUBE_MIN_REFRESH_SECONDS``.
+"""
+
+import os
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd  # type: ignore
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CUBE_VIEW = "mv_category_daily"
+MIN_REFRESH_SECONDS = float(os.getenv("CATEGORY_CUBE_MIN_REFRESH_SECONDS", "60"))
+
+CUBE_SQL = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {CUBE_VIEW} AS
+SELECT
+    sd.sale_date,
+    ph.first_category_id,
+    ph.second_category_id,
+    sd.store_id,
+    sh.city_id,
+    COUNT(*) AS row_count,
+    SUM(sd.sale_amount) AS sales_sum,
+    SUM(sd.sale_qty) AS qty_sum,
+    COUNT(sd.sale_qty) AS qty_count,
+    SUM(COALESCE(sd.discount, 0)) AS discount_sum,
+    MAX(COALESCE(sd.discount, 0)) AS discount_max,
+    SUM(sd.original_price) AS price_sum,
+    COUNT(sd.original_price) AS price_count,
+    SUM(COALESCE(sd.stock_hour6_22_cnt, 0)) AS stockout_hours_sum,
+    MAX(sd.holiday_flag::int) AS holiday_flag,
+    SUM(sd.promo_flag::int) AS promo_rows,
+    COUNT(sd.promo_flag) AS promo_count,
+    SUM(wd.avg_temperature) AS temperature_sum,
+    COUNT(wd.avg_temperature) AS temperature_count,
+    SUM(wd.avg_humidity) AS humidity_sum,
+    COUNT(wd.avg_humidity) AS humidity_count,
+    SUM(wd.precpt) AS precpt_sum,
+    COUNT(wd.precpt) AS precpt_count,
+    SUM(wd.avg_wind_level) AS wind_sum,
+    COUNT(wd.avg_wind_level) AS wind_count
+FROM sales_data sd
+JOIN store_hierarchy sh ON sd.store_id = sh.store_id
+JOIN product_hierarchy ph ON sd.product_id = ph.product_id
+LEFT JOIN weather_data wd ON sd.sale_date = wd.date AND sh.city_id = wd.city_id
+GROUP BY
+    sd.sale_date,
+    ph.first_category_id,
+    ph.second_category_id,
+    sd.store_id,
+    sh.city_id
+WITH DATA
+"""
+
+CUBE_INDEXES = [
+    # Unique grain index: required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+    f"""CREATE UNIQUE INDEX IF NOT EXISTS idx_{CUBE_VIEW}_grain ON {CUBE_VIEW}
+        (sale_date, first_category_id, second_category_id, store_id, city_id)""",
+    f"""CREATE INDEX IF NOT EXISTS idx_{CUBE_VIEW}_category ON {CUBE_VIEW}
+        (first_category_id, sale_date)""",
+    f"""CREATE INDEX IF NOT EXISTS idx_{CUBE_VIEW}_store ON {CUBE_VIEW}
+        (store_id, sale_date)""",
+]
+
+# Roll-up dimensions and their cube columns
+DIMENSIONS = {
+    "date": "sale_date",
+    "category": "first_category_id",
+    "subcategory": "second_category_id",
+    "store": "store_id",
+    "city": "city_id",
+}
+
+# Slicing filters: equality on a dimension column
+FILTERS = {
+    "category_id": "first_category_id",
+    "subcategory_id": "second_category_id",
+    "store_id": "store_id",
+    "city_id": "city_id",
+}
+
+# Rolled-up measures, named like the pandas category aggregation
+MEASURES = {
+    "category_sales": "SUM(sales_sum)",
+    "sale_amount_mean": "SUM(sales_sum) / SUM(row_count)",
+    "sale_amount_count": "SUM(row_count)::bigint",
+    "sale_qty_sum": "SUM(qty_sum)::float8",
+    "sale_qty_mean": "SUM(qty_sum)::float8 / NULLIF(SUM(qty_count), 0)",
+    "discount_mean": "SUM(discount_sum) / SUM(row_count)",
+    "discount_max": "MAX(discount_max)",
+    "original_price_mean": "SUM(price_sum) / NULLIF(SUM(price_count), 0)",
+    "stock_hour6_22_cnt_mean": "SUM(stockout_hours_sum)::float8 / SUM(row_count)",
+    "stockout_hours": "SUM(stockout_hours_sum)::float8",
+    "holiday_flag_max": "MAX(holiday_flag)",
+    "promo_flag_mean": "SUM(promo_rows)::float8 / NULLIF(SUM(promo_count), 0)",
+    "avg_temperature_mean": "SUM(temperature_sum) / NULLIF(SUM(temperature_count), 0)",
+    "avg_humidity_mean": "SUM(humidity_sum) / NULLIF(SUM(humidity_count), 0)",
+    "precpt_mean": "SUM(precpt_sum) / NULLIF(SUM(precpt_count), 0)",
+    "avg_wind_level_mean": "SUM(wind_sum) / NULLIF(SUM(wind_count), 0)",
+}
+
+WEATHER_MEASURES = [
+    "avg_temperature_mean",
+    "avg_humidity_mean",
+    "precpt_mean",
+    "avg_wind_level_mean",
+]
+
+
+def level_dimensions(aggregation_level: str) -> List[str]:
+    """Cube dimensions matching a forecaster aggregation level."""
+    if aggregation_level == "subcategory":
+        return ["date", "category", "subcategory", "store", "city"]
+    return ["date", "category", "store", "city"]
+
+
+def _as_date(value: Union[str, date]) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def cube_query(
+    dimensions: Sequence[str],
+    filters: Optional[Dict[str, Any]] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+) -> Tuple[str, List[Any]]:
+    """
+    Roll-up of the cube to ``dimensions``, sliced by ``filters`` and dates.
+
+    Returns:
+        tuple: (SQL, parameters)
+
+    Raises:
+        ValueError: For unknown dimensions or filters
+    """
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    unknown += [f for f in filters or {} if f not in FILTERS]
+    if unknown:
+        raise ValueError(f"Unknown cube dimensions or filters: {unknown}")
+
+    conditions, params = [], []
+    for name, value in (filters or {}).items():
+        if value is not None:
+            params.append(value)
+            conditions.append(f"{FILTERS[name]} = ${len(params)}")
+    if start_date is not None:
+        params.append(_as_date(start_date))
+        conditions.append(f"sale_date >= ${len(params)}")
+    if end_date is not None:
+        params.append(_as_date(end_date))
+        conditions.append(f"sale_date <= ${len(params)}")
+
+    columns = [DIMENSIONS[d] for d in dimensions]
+    select = columns + [f"{sql} AS {name}" for name, sql in MEASURES.items()]
+    query = f"SELECT {', '.join(select)} FROM {CUBE_VIEW}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if columns:
+        query += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+    return query, params
+
+
+class CategoryCube:
+    """The category cube view: creation, version-driven refresh and queries."""
+
+    def __init__(self, min_refresh_seconds: float = MIN_REFRESH_SECONDS):
+        self.min_refresh_seconds = min_refresh_seconds
+        self._ready = False
+        self._version: Optional[str] = None
+        self._refreshed_at = 0.0
+        self.refreshes = 0
+
+    async def ensure(self, conn: Any, data_version: Optional[str] = None):
+        """Create the view on first use; refresh it when ``sales_data`` changed."""
+        stale = (
+            data_version is not None
+            and data_version != self._version
+            and time.time() - self._refreshed_at >= self.min_refresh_seconds
+        )
+        if not self._ready:
+            existed = await conn.fetchval(
+                "SELECT to_regclass($1) IS NOT NULL", CUBE_VIEW
+            )
+            await conn.execute(CUBE_SQL)
+            for index in CUBE_INDEXES:
+                await conn.execute(index)
+            self._ready = True
+            # A view built by an earlier process may predate the current data
+            stale = existed
+            if not existed:
+                self._version = data_version
+                self._refreshed_at = time.time()
+
+        if stale:
+            started = time.perf_counter()
+            await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {CUBE_VIEW}")
+            self._version = data_version
+            self._refreshed_at = time.time()
+            self.refreshes += 1
+            logger.info(
+                f"Refreshed {CUBE_VIEW} for sales_data version {data_version} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+    async def query(
+        self,
+        conn: Any,
+        dimensions: Sequence[str],
+        filters: Optional[Dict[str, Any]] = None,
+        start_date: Optional[Union[str, date]] = None,
+        end_date: Optional[Union[str, date]] = None,
+        data_version: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Roll-up/slice of the cube as a frame (see ``cube_query``)."""
+        sql, params = cube_query(dimensions, filters, start_date, end_date)
+        await self.ensure(conn, data_version)
+        rows = await conn.fetch(sql, *params)
+        columns = [DIMENSIONS[d] for d in dimensions] + list(MEASURES)
+        df = pd.DataFrame([tuple(r) for r in rows], columns=columns)
+        if "sale_date" in df.columns:
+            df["sale_date"] = pd.to_datetime(df["sale_date"])
+        return df
+
+
+# Global instance
+category_cube = CategoryCube()
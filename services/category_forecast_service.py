@@ -14,10 +14,19 @@ import json
 from fastapi import Request  # Import Request
 
 # Import custom modules
-from models.category_forecaster import CategoryLevelForecaster
+from models.category_forecaster import HISTORY_DAYS, CategoryLevelForecaster
 
 # from database.connection import get_pool, cached, paginate # Removed
 from services.data_preprocessor import DataPreprocessor
+from services.category_cube import WEATHER_MEASURES, category_cube, level_dimensions
+from services.data_version_service import version_token
+from services.holiday_calendar import load_holiday_calendar
+from services.seasonality_profiles import (
+    build_profiles,
+    profile_category_id,
+    profile_scope,
+    seasonality_profiles,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -161,6 +170,19 @@ class CategoryForecastService:
             rows = await connection.fetch(query, *params)
             return [dict(row) for row in rows]
 
+    async def fetch_store_cities(
+        self, request: Request, stores: List[int]
+    ) -> Dict[int, int]:
+        """City of each store, from ``store_hierarchy``."""
+        manager = request.app.state.db_manager
+
+        async with manager.get_connection() as connection:
+            rows = await connection.fetch(
+                "SELECT store_id, city_id FROM store_hierarchy WHERE store_id = ANY($1)",
+                list(stores),
+            )
+        return {int(row["store_id"]): int(row["city_id"]) for row in rows}
+
     async def aggregate_category_data(
         self,
         request: Request,  # Add request
@@ -183,39 +205,97 @@ class CategoryForecastService:
             aggregation_level: Level of aggregation
 
         Returns:
-            Aggregated category-level DataFrame
+            Aggregated category-level DataFrame (from the category cube)
         """
-        # Fetch product-level data
-        data = await self.fetch_category_sales_data(
-            request,  # Pass request
-            category_id=category_id,
-            store_id=store_id,
-            city_id=city_id,
-            start_date=start_date,
-            end_date=end_date,
-            aggregation_level=aggregation_level,
-            limit=100000,  # Large limit for aggregation
-        )
+        manager = request.app.state.db_manager
+        data_version = await version_token(manager, "sales_data")
+
+        # Roll the category cube up to this aggregation level
+        async with manager.get_connection() as conn:
+            cube_df = await category_cube.query(
+                conn,
+                level_dimensions(aggregation_level),
+                filters={
+                    "category_id": category_id,
+                    "store_id": store_id,
+                    "city_id": city_id,
+                },
+                start_date=start_date,
+                end_date=end_date,
+                data_version=data_version,
+            )
 
-        if not data:
+        if cube_df.empty:
             return pd.DataFrame()
 
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-
-        # Preprocess data
-        df = self.preprocessor.handle_missing_values(df)
-        df = self.preprocessor.add_time_features(df)
+        # Weather gaps - fill with city-specific means
+        for col in WEATHER_MEASURES:
+            city_means = cube_df.groupby("city_id")[col].transform("mean")
+            cube_df[col] = cube_df[col].fillna(city_means)
 
         # Get model for aggregation
         model = self.get_or_create_model(aggregation_level=aggregation_level)
 
-        # Aggregate to category level
-        category_df = model.aggregate_to_category_level(df)
+        # Add category features
+        category_df = model.from_category_cube(cube_df)
 
         return category_df
 
-    # @cached("category_seasonality") # Removed, caching will be handled via DatabaseManager.execute_cached_query
+    async def query_category_cube(
+        self,
+        request: Request,
+        dimensions: List[str],
+        category_id: Optional[int] = None,
+        store_id: Optional[int] = None,
+        city_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Roll-up/slice of the category cube.
+
+        Args:
+            dimensions: Dimensions to group by (date, category, subcategory,
+                store, city); empty for network totals
+            category_id: Filter by category ID
+            store_id: Filter by store ID
+            city_id: Filter by city ID
+            start_date: Start date for data
+            end_date: End date for data
+
+        Returns:
+            Cube rows and their count
+        """
+        manager = request.app.state.db_manager
+        data_version = await version_token(manager, "sales_data")
+
+        try:
+            async with manager.get_connection() as conn:
+                cube_df = await category_cube.query(
+                    conn,
+                    dimensions,
+                    filters={
+                        "category_id": category_id,
+                        "store_id": store_id,
+                        "city_id": city_id,
+                    },
+                    start_date=start_date,
+                    end_date=end_date,
+                    data_version=data_version,
+                )
+        except ValueError as e:
+            return {"error": str(e)}
+
+        if "sale_date" in cube_df.columns:
+            cube_df["sale_date"] = cube_df["sale_date"].dt.strftime("%Y-%m-%d")
+        cube_df = cube_df.astype(object).where(cube_df.notna(), None)
+
+        return {
+            "dimensions": dimensions,
+            "row_count": len(cube_df),
+            "rows": cube_df.to_dict("records"),
+        }
+
     async def analyze_category_seasonality(
         self,
         request: Request,  # Add request
@@ -243,9 +323,8 @@ class CategoryForecastService:
         logger.info("Analyzing category seasonality patterns...")
 
         try:
-            # Get aggregated data
-            category_df = await self.aggregate_category_data(
-                request,  # Pass request
+            manager = request.app.state.db_manager
+            scope = profile_scope(
                 category_id=category_id,
                 store_id=store_id,
                 city_id=city_id,
@@ -254,41 +333,58 @@ class CategoryForecastService:
                 aggregation_level=aggregation_level,
             )
 
-            if category_df.empty:
+            # Profiles only change when new sales history arrives
+            data_version = await version_token(manager, "sales_data")
+            profiles = None
+            if data_version is not None:
+                async with manager.get_connection() as conn:
+                    profiles = await seasonality_profiles.load(
+                        conn, scope, data_version
+                    )
+
+            if profiles is None:
+                # Get aggregated data
+                category_df = await self.aggregate_category_data(
+                    request,  # Pass request
+                    category_id=category_id,
+                    store_id=store_id,
+                    city_id=city_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    aggregation_level=aggregation_level,
+                )
+
+                if category_df.empty:
+                    return {"error": "No data found for seasonality analysis"}
+
+                profiles = await asyncio.to_thread(build_profiles, category_df)
+                if data_version is not None:
+                    async with manager.get_connection() as conn:
+                        await seasonality_profiles.save(
+                            conn, scope, data_version, profiles
+                        )
+
+            if not profiles.stats:
                 return {"error": "No data found for seasonality analysis"}
 
             # Get model
             model = self.get_or_create_model(aggregation_level=aggregation_level)
-
-            # Analyze seasonality
-            seasonality_results = model.analyze_category_seasonality(category_df)
+            model.seasonality_patterns = profiles.patterns
+            seasonality_results = profiles.patterns
 
             # Add summary statistics
             analysis_summary = {
                 "total_categories_analyzed": len(seasonality_results),
-                "date_range": {
-                    "start": category_df["sale_date"].min().isoformat(),
-                    "end": category_df["sale_date"].max().isoformat(),
-                },
-                "data_summary": {
-                    "total_records": len(category_df),
-                    "average_category_sales": float(
-                        category_df["category_sales"].mean()
-                    ),
-                    "total_category_sales": float(category_df["category_sales"].sum()),
-                },
+                **profiles.summary(),
             }
 
             # Category performance ranking
             category_performance = []
             for cat, patterns in seasonality_results.items():
-                avg_sales = category_df[category_df["first_category_id"] == int(cat)][
-                    "category_sales"
-                ].mean()
                 category_performance.append(
                     {
-                        "category_id": int(cat),
-                        "average_sales": float(avg_sales),
+                        "category_id": profile_category_id(cat),
+                        "average_sales": profiles.average_sales(cat),
                         "seasonal_strength": patterns["seasonal_strength"],
                         "trend_strength": patterns["trend_strength"],
                         "holiday_impact": patterns["holiday_impact"],
@@ -403,6 +499,7 @@ class CategoryForecastService:
         aggregation_level: str = "category",
         model_type: str = "gradient_boost",
         include_confidence: bool = True,
+        include_subcategories: bool = False,
     ) -> Dict[str, Any]:
         """
         Generate category-level demand forecasts.
@@ -415,6 +512,8 @@ class CategoryForecastService:
             aggregation_level: Level of aggregation
             model_type: Type of model to use
             include_confidence: Whether to include confidence intervals
+            include_subcategories: Whether to split the forecasts into
+                subcategories by their share of the last year's sales
 
         Returns:
             Forecast results
@@ -432,26 +531,47 @@ class CategoryForecastService:
             if not model.is_fitted:
                 return {"error": "Model is not trained. Please train the model first."}
 
+            # Real store cities and holidays for the forecast grid
+            manager = request.app.state.db_manager
+            store_cities = await self.fetch_store_cities(request, stores)
+            holiday_calendar = await load_holiday_calendar(manager)
+
+            # Recent history for the lag and aggregate features
+            origin = pd.Timestamp(start_date)
+            history = await self.aggregate_category_data(
+                request,
+                start_date=(origin - pd.Timedelta(days=HISTORY_DAYS)).date(),
+                end_date=(origin - pd.Timedelta(days=1)).date(),
+                aggregation_level=aggregation_level,
+            )
+            if not history.empty:
+                history = history[history["store_id"].isin(stores)]
+
             # Generate forecasts
             forecasts_df = model.forecast_category_demand(
                 categories=categories,
                 stores=stores,
                 start_date=start_date,
                 periods=periods,
+                store_cities=store_cities,
+                holiday_calendar=holiday_calendar,
+                history=history,
             )
 
             # Convert to API response format
-            forecasts = []
-            for _, row in forecasts_df.iterrows():
-                forecast_item = {
-                    "date": row["sale_date"].isoformat(),
-                    "category_id": int(row["first_category_id"]),
-                    "store_id": int(row["store_id"]),
-                    "predicted_sales": float(row["predicted_category_sales"]),
-                    "confidence_score": float(row.get("prediction_confidence", 0.0)),
+            forecasts = pd.DataFrame(
+                {
+                    "date": forecasts_df["sale_date"].dt.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "category_id": forecasts_df["first_category_id"].astype(int),
+                    "store_id": forecasts_df["store_id"].astype(int),
+                    "predicted_sales": forecasts_df["predicted_category_sales"].astype(
+                        float
+                    ),
+                    "confidence_score": forecasts_df["prediction_confidence"].astype(
+                        float
+                    ),
                 }
-
-                forecasts.append(forecast_item)
+            ).to_dict("records")
 
             # Calculate summary statistics
             forecast_summary = {
@@ -499,7 +619,7 @@ class CategoryForecastService:
 
             logger.info("Category demand forecasting completed successfully")
 
-            return {
+            result = {
                 "status": "success",
                 "forecasts": forecasts,
                 "forecast_summary": forecast_summary,
@@ -510,6 +630,45 @@ class CategoryForecastService:
                 },
             }
 
+            if include_subcategories:
+                # Subcategory shares of the year before the forecast
+                history_start = pd.Timestamp(start_date) - pd.Timedelta(days=365)
+                data_version = await version_token(manager, "sales_data")
+                async with manager.get_connection() as conn:
+                    subcategory_sales = await category_cube.query(
+                        conn,
+                        ["category", "subcategory", "store"],
+                        start_date=history_start.date(),
+                        end_date=pd.Timestamp(start_date).date(),
+                        data_version=data_version,
+                    )
+                subcategory_df = model.disaggregate_to_subcategories(
+                    forecasts_df, subcategory_sales
+                )
+                result["subcategory_forecasts"] = (
+                    pd.DataFrame(
+                        {
+                            "date": subcategory_df["sale_date"].dt.strftime(
+                                "%Y-%m-%dT%H:%M:%S"
+                            ),
+                            "category_id": subcategory_df["first_category_id"].astype(
+                                int
+                            ),
+                            "subcategory_id": subcategory_df[
+                                "second_category_id"
+                            ].astype(int),
+                            "store_id": subcategory_df["store_id"].astype(int),
+                            "predicted_sales": subcategory_df[
+                                "predicted_subcategory_sales"
+                            ].astype(float),
+                        }
+                    ).to_dict("records")
+                    if not subcategory_df.empty
+                    else []
+                )
+
+            return result
+
         except Exception as e:
             logger.error(f"Error in category demand forecasting: {str(e)}")
             return {"error": f"Forecasting failed: {str(e)}"}
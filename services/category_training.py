@@ -0,0 +1,186 @@
+"""
+Parallel training engine for per-category forecasting models.
+
+``CategoryLevelForecaster.fit`` trains one model per category, each with
+``TimeSeriesSplit`` cross-validation and a final fit on all rows. Every
+(category, fold) fit and every final fit is independent, so they are
+fanned out as separate tasks across worker processes:
+
+- fold indices are computed once per series length and shared by every
+  category of that length;
+- tasks are dispatched largest training set first, so the biggest
+  categories don't end up running alone at the end of the pool;
+- each task builds its estimator from the same configuration (including
+  ``random_state``), so results match a serial run regardless of which
+  worker ran which task or in which order.
+
+``CATEGORY_TRAINING_JOBS`` sets the worker count (default -1, all cores;
+1 trains in-process).
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs  # type: ignore
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor  # type: ignore
+from sklearn.linear_model import LinearRegression  # type: ignore
+from sklearn.metrics import r2_score  # type: ignore
+from sklearn.model_selection import TimeSeriesSplit  # type: ignore
+from sklearn.preprocessing import StandardScaler  # type: ignore
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TRAINING_JOBS = int(os.getenv("CATEGORY_TRAINING_JOBS", "-1"))
+
+Folds = Tuple[Tuple[np.ndarray, np.ndarray], ...]
+
+
+@lru_cache(maxsize=64)
+def time_series_folds(n_rows: int, n_splits: int = 3) -> Folds:
+    """``TimeSeriesSplit`` train/test indices for a series of ``n_rows``."""
+    return tuple(TimeSeriesSplit(n_splits=n_splits).split(np.empty((n_rows, 1))))
+
+
+def build_model(model_type: str, config: Dict[str, Any]):
+    """Unfitted estimator for ``model_type`` (gradient boosting by default)."""
+    if model_type == "random_forest":
+        return RandomForestRegressor(**config)
+    if model_type == "linear":
+        return LinearRegression(**config)
+    return GradientBoostingRegressor(**config)
+
+
+@dataclass
+class CategoryTrainingResult:
+    """Cross-validation scores and final model of one category."""
+
+    category: str
+    data_size: int
+    cv_scores: List[float] = field(default_factory=list)
+    model: Any = None
+    scaler: Optional[StandardScaler] = None
+    # Summed fit time of the category's tasks (CPU seconds across workers)
+    training_seconds: float = 0.0
+
+
+def _run_task(
+    model_type: str,
+    config: Dict[str, Any],
+    X: np.ndarray,
+    y: np.ndarray,
+    train_idx: Optional[np.ndarray],
+    test_idx: Optional[np.ndarray],
+) -> Tuple[Any, float]:
+    """
+    One fit: a CV fold (returns its R^2) or, without indices, the final
+    fit on all rows (returns the model and scaler).
+    """
+    started = time.perf_counter()
+    model = build_model(model_type, config)
+    scaler = StandardScaler()
+    if train_idx is None:
+        model.fit(scaler.fit_transform(X), y)
+        outcome: Any = (model, scaler)
+    else:
+        model.fit(scaler.fit_transform(X[train_idx]), y[train_idx])
+        outcome = r2_score(y[test_idx], model.predict(scaler.transform(X[test_idx])))
+    return outcome, time.perf_counter() - started
+
+
+class ParallelCategoryTrainer:
+    """Trains per-category models with their CV folds across processes."""
+
+    def __init__(
+        self,
+        model_type: str,
+        model_config: Dict[str, Any],
+        n_splits: int = 3,
+        n_jobs: int = TRAINING_JOBS,
+    ):
+        self.model_type = model_type
+        self.model_config = dict(model_config)
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs
+
+    def schedule(
+        self, datasets: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    ) -> List[Tuple[str, Optional[int]]]:
+        """
+        (category, fold) tasks, largest training set first; fold ``None``
+        is the final fit on all rows.
+        """
+        tasks = []
+        for category, (X, _) in datasets.items():
+            folds = time_series_folds(len(X), self.n_splits)
+            tasks.append((len(X), category, None))
+            tasks.extend(
+                (len(train), category, i) for i, (train, _) in enumerate(folds)
+            )
+        tasks.sort(key=lambda task: -task[0])
+        return [(category, fold) for _, category, fold in tasks]
+
+    def _indices(
+        self, n_rows: int, fold: Optional[int]
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        if fold is None:
+            return None, None
+        return time_series_folds(n_rows, self.n_splits)[fold]
+
+    def train(
+        self, datasets: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    ) -> Dict[str, CategoryTrainingResult]:
+        """
+        Cross-validate and fit one model per category.
+
+        Args:
+            datasets: Feature matrix and target per category, rows in time order
+
+        Returns:
+            Results per category, in the order of ``datasets``
+        """
+        if not datasets:
+            return {}
+        n_jobs = effective_n_jobs(self.n_jobs)
+        config = self.model_config
+        if n_jobs > 1 and "n_jobs" in config:
+            # The categories are the parallel axis; don't nest thread pools
+            config = {**config, "n_jobs": 1}
+
+        schedule = self.schedule(datasets)
+        started = time.perf_counter()
+        outcomes = Parallel(n_jobs=n_jobs)(
+            delayed(_run_task)(
+                self.model_type,
+                config,
+                *datasets[category],
+                *self._indices(len(datasets[category][0]), fold),
+            )
+            for category, fold in schedule
+        )
+
+        results = {
+            category: CategoryTrainingResult(category=category, data_size=len(X))
+            for category, (X, _) in datasets.items()
+        }
+        fold_scores: Dict[str, Dict[int, float]] = {c: {} for c in datasets}
+        for (category, fold), (outcome, seconds) in zip(schedule, outcomes):
+            result = results[category]
+            result.training_seconds += seconds
+            if fold is None:
+                result.model, result.scaler = outcome
+            else:
+                fold_scores[category][fold] = outcome
+        for category, scores in fold_scores.items():
+            results[category].cv_scores = [scores[i] for i in sorted(scores)]
+
+        logger.info(
+            f"Trained {len(results)} category models ({len(schedule)} fits) "
+            f"on {n_jobs} worker(s) in {time.perf_counter() - started:.2f}s"
+        )
+        return results
@@ -0,0 +1,357 @@
+"""
+Cluster-count search for k-means clustering.
+
+Picks k by silhouette score without the cost of the naive search (a full
+``KMeans(n_init=10)`` and an exact O(n^2) silhouette for every k, serially):
+
+- k-means for each k runs twice with a single initialisation: one fresh
+  k-means++ start, and one warm start from the centroids found for k - 1
+  plus one new k-means++ seed; the lower inertia is kept;
+- silhouette is estimated on a sample stratified by cluster (small
+  clusters keep a minimum share), with a confidence interval from the
+  per-stratum variance; inputs up to ``sample_size`` rows are scored
+  exactly;
+- scoring runs in a thread pool, overlapping with the next fits;
+- among candidates whose silhouette interval overlaps the best one's, the
+  smallest k wins; exact scores reduce to plain argmax;
+- the selection is cached per (entity type, feature set, data version), so
+  repeat clustering calls on unchanged data skip the search.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.metrics import calinski_harabasz_score, silhouette_samples
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SAMPLE_SIZE = int(os.getenv("CLUSTER_SEARCH_SAMPLE_SIZE", "2000"))
+DEFAULT_FIT_SAMPLE_SIZE = int(os.getenv("CLUSTER_SEARCH_FIT_SAMPLE_SIZE", "20000"))
+DEFAULT_WORKERS = int(os.getenv("CLUSTER_SEARCH_WORKERS", "4"))
+# Rows every cluster keeps in the silhouette sample (if it has that many)
+MIN_STRATUM_SIZE = 20
+# Two-sided 95% normal quantile
+CONFIDENCE_Z = 1.96
+
+
+@dataclass
+class KCandidate:
+    k: int
+    inertia: float
+    silhouette: float
+    silhouette_low: float
+    silhouette_high: float
+    calinski_harabasz: float
+    fit_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            key: round(value, 6) if isinstance(value, float) else value
+            for key, value in asdict(self).items()
+        }
+
+
+@dataclass
+class ClusterCountSelection:
+    optimal_k: int
+    candidates: List[KCandidate]
+    elbow_k: Optional[int]
+    n_samples: int
+    silhouette_sample_size: int
+    exact: bool
+    search_ms: float
+    from_cache: bool = False
+
+    @property
+    def cluster_range(self) -> List[int]:
+        return [c.k for c in self.candidates]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "optimal_k": self.optimal_k,
+            "elbow_k": self.elbow_k,
+            "n_samples": self.n_samples,
+            "silhouette_sample_size": self.silhouette_sample_size,
+            "exact": self.exact,
+            "search_ms": round(self.search_ms, 1),
+            "from_cache": self.from_cache,
+            "candidates": [c.to_dict() for c in self.candidates],
+        }
+
+
+CacheKey = Tuple[str, Tuple[str, ...], str, int, int]
+
+
+@dataclass
+class ClusterCountCache:
+    """Bounded LRU of selections per (entity type, features, data version)."""
+
+    max_entries: int = 256
+    entries: "OrderedDict[CacheKey, ClusterCountSelection]" = field(
+        default_factory=OrderedDict
+    )
+    hits: int = 0
+    misses: int = 0
+
+    def get(self, key: CacheKey) -> Optional[ClusterCountSelection]:
+        selection = self.entries.get(key)
+        if selection is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return selection
+
+    def put(self, key: CacheKey, selection: ClusterCountSelection):
+        self.entries[key] = selection
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Global instance
+cluster_count_cache = ClusterCountCache()
+
+
+def data_fingerprint(X: np.ndarray) -> str:
+    """Content hash of a feature matrix, used when no data version is given."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    digest = hashlib.blake2b(X.tobytes(), digest_size=16)
+    digest.update(str(X.shape).encode())
+    return digest.hexdigest()
+
+
+def stratified_sample(
+    labels: np.ndarray, size: int, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample row indices stratified by cluster label.
+
+    Clusters get a share proportional to their size but at least
+    ``MIN_STRATUM_SIZE`` rows (or all of them).
+
+    Returns:
+        tuple: (indices, stratum of each sampled row, stratum sizes)
+    """
+    strata, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    n = len(labels)
+    if n <= size:
+        return np.arange(n), inverse, counts
+    allocation = np.minimum(
+        counts,
+        np.maximum(np.floor(size * counts / n).astype(int), MIN_STRATUM_SIZE),
+    )
+    indices = np.concatenate(
+        [
+            rng.choice(np.flatnonzero(inverse == s), a, replace=False)
+            for s, a in enumerate(allocation)
+        ]
+    )
+    return indices, inverse[indices], counts
+
+
+def estimate_silhouette(
+    X: np.ndarray, labels: np.ndarray, sample_size: int, rng: np.random.Generator
+) -> Tuple[float, float, float, int]:
+    """
+    Silhouette estimate on a stratified sample with a 95% interval.
+
+    Returns:
+        tuple: (estimate, lower bound, upper bound, rows scored)
+    """
+    if len(np.unique(labels)) < 2:
+        return 0.0, 0.0, 0.0, 0
+    indices, strata, counts = stratified_sample(labels, sample_size, rng)
+    if len(np.unique(strata)) < 2:
+        return 0.0, 0.0, 0.0, len(indices)
+    scores = silhouette_samples(X[indices], labels[indices])
+
+    n = counts.sum()
+    estimate, variance = 0.0, 0.0
+    for s, size in enumerate(counts):
+        stratum = scores[strata == s]
+        weight = size / n
+        estimate += weight * stratum.mean()
+        if len(stratum) > 1:
+            # Finite-population correction: exact when the stratum is complete
+            fpc = 1 - len(stratum) / size
+            variance += weight**2 * stratum.var(ddof=1) / len(stratum) * fpc
+    margin = CONFIDENCE_Z * float(np.sqrt(variance))
+    estimate = float(estimate)
+    return estimate, estimate - margin, estimate + margin, len(indices)
+
+
+def _next_init(
+    X: np.ndarray, centers: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Previous centroids plus one new k-means++ seed (D^2 sampling)."""
+    d2 = (
+        (X**2).sum(axis=1)[:, None]
+        - 2 * X @ centers.T
+        + (centers**2).sum(axis=1)[None, :]
+    ).min(axis=1)
+    d2 = np.maximum(d2, 0.0)
+    total = d2.sum()
+    if total <= 0:
+        seed = X[rng.integers(len(X))]
+    else:
+        seed = X[rng.choice(len(X), p=d2 / total)]
+    return np.vstack([centers, seed])
+
+
+def elbow_point(ks: Sequence[int], inertias: Sequence[float]) -> Optional[int]:
+    """k with the largest second difference of inertia."""
+    if len(inertias) < 3:
+        return None
+    curvature = [
+        abs(inertias[i - 1] - 2 * inertias[i] + inertias[i + 1])
+        for i in range(1, len(inertias) - 1)
+    ]
+    return ks[int(np.argmax(curvature)) + 1]
+
+
+def search_cluster_count(
+    X: np.ndarray,
+    min_k: int = 2,
+    max_k: int = 10,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    fit_sample_size: int = DEFAULT_FIT_SAMPLE_SIZE,
+    max_workers: int = DEFAULT_WORKERS,
+    random_state: int = 42,
+) -> ClusterCountSelection:
+    """
+    Evaluate k in [min_k, max_k] and pick the best by silhouette.
+
+    Args:
+        X: Scaled feature matrix
+        sample_size: Rows scored per k for the silhouette estimate
+        fit_sample_size: Rows k-means is fitted on during the search
+        max_workers: Threads scoring candidates in parallel
+    """
+    start = time.perf_counter()
+    X = np.asarray(X, dtype=np.float64)
+    n = len(X)
+    max_k = min(max_k, n - 1)
+    if max_k < min_k:
+        return ClusterCountSelection(min_k, [], None, n, 0, True, 0.0)
+
+    rng = np.random.default_rng(random_state)
+    X_fit = X
+    if n > fit_sample_size:
+        X_fit = X[rng.choice(n, fit_sample_size, replace=False)]
+
+    def score(k: int, model: KMeans, fit_ms: float) -> Tuple[KCandidate, int]:
+        labels = model.labels_
+        estimate, low, high, scored = estimate_silhouette(
+            X_fit, labels, sample_size, np.random.default_rng(random_state + k)
+        )
+        ch = (
+            float(calinski_harabasz_score(X_fit, labels))
+            if len(np.unique(labels)) > 1
+            else 0.0
+        )
+        return (
+            KCandidate(k, float(model.inertia_), estimate, low, high, ch, fit_ms),
+            scored,
+        )
+
+    futures: List[Future] = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        centers = None
+        for k in range(min_k, max_k + 1):
+            fit_start = time.perf_counter()
+            # One fresh k-means++ start, plus the warm start from k - 1;
+            # keep whichever converged to the lower inertia
+            model = KMeans(n_clusters=k, random_state=random_state + k, n_init=1)
+            model.fit(X_fit)
+            if centers is not None:
+                warm = KMeans(
+                    n_clusters=k,
+                    init=_next_init(X_fit, centers, rng),
+                    n_init=1,
+                    random_state=random_state,
+                ).fit(X_fit)
+                if warm.inertia_ < model.inertia_:
+                    model = warm
+            centers = model.cluster_centers_
+            fit_ms = (time.perf_counter() - fit_start) * 1000
+            futures.append(pool.submit(score, k, model, fit_ms))
+        results = [f.result() for f in futures]
+
+    candidates = [candidate for candidate, _ in results]
+    scored = max(rows for _, rows in results)
+    exact = len(X_fit) <= sample_size and len(X_fit) == n
+    best = max(candidates, key=lambda c: c.silhouette)
+    # Smallest k statistically tied with the best (plain argmax when exact)
+    optimal = min(
+        (c for c in candidates if c.silhouette_high >= best.silhouette_low),
+        key=lambda c: c.k,
+    )
+
+    selection = ClusterCountSelection(
+        optimal_k=optimal.k,
+        candidates=candidates,
+        elbow_k=elbow_point([c.k for c in candidates], [c.inertia for c in candidates]),
+        n_samples=n,
+        silhouette_sample_size=scored,
+        exact=exact,
+        search_ms=(time.perf_counter() - start) * 1000,
+    )
+    logger.info(
+        f"Cluster-count search over k={min_k}..{max_k} on {n} rows "
+        f"(silhouette on {scored}) chose k={selection.optimal_k} "
+        f"in {selection.search_ms:.0f}ms"
+    )
+    return selection
+
+
+def select_cluster_count(
+    X: np.ndarray,
+    entity_type: str = "entities",
+    feature_set: Sequence[str] = (),
+    data_version: Optional[str] = None,
+    min_k: int = 2,
+    max_k: int = 10,
+    use_cache: bool = True,
+    **search_options: Any,
+) -> ClusterCountSelection:
+    """
+    Cached ``search_cluster_count``.
+
+    Args:
+        entity_type: What the rows are (products, stores, cities, ...)
+        feature_set: Names of the feature columns
+        data_version: Version of the source data; defaults to a hash of ``X``
+    """
+    key: CacheKey = (
+        entity_type,
+        tuple(feature_set),
+        data_version or data_fingerprint(X),
+        min_k,
+        max_k,
+    )
+    if use_cache:
+        cached = cluster_count_cache.get(key)
+        if cached is not None:
+            logger.info(
+                f"Reusing k={cached.optimal_k} for {entity_type} "
+                f"({len(feature_set)} features)"
+            )
+            return replace(cached, search_ms=0.0, from_cache=True)
+
+    selection = search_cluster_count(X, min_k=min_k, max_k=max_k, **search_options)
+    if use_cache:
+        cluster_count_cache.put(key, selection)
+    return selection
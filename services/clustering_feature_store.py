@@ -0,0 +1,423 @@
+"""
+Clustering feature store.
+
+Per-entity clustering features (products, stores, cities) used to be built
+with four or five CTEs per request, each scanning the ``sales_data`` window
+again (and, for stores and cities, re-joining ``sales_data`` to itself for
+the weather correlations). The store computes them instead:
+
+- server-side in one grouped pass: a single ``GROUPING SETS`` aggregation
+  yields per-entity totals, per-entity-day revenue (for demand variability
+  and weather sensitivity) and per-entity member counts (distinct products
+  and stores) from one scan of the window;
+- into ``clustering_entity_features``, one JSONB row per entity, keyed by
+  entity type and window and tagged with the source data version, written
+  by ``INSERT ... SELECT`` so no sales rows leave the database;
+- behind a small in-memory cache, so re-clustering the same window reads
+  precomputed features instead of aggregating sales again.
+
+Features are stored for every entity in the window; the ``min_data_points``
+filter is applied when they are read.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd  # type: ignore
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FEATURE_TABLE = "clustering_entity_features"
+MAX_CACHED_FRAMES = int(os.getenv("CLUSTERING_FEATURE_CACHE_SIZE", "16"))
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {FEATURE_TABLE} (
+    entity_type TEXT NOT NULL,
+    window_start DATE NOT NULL,
+    window_end DATE NOT NULL,
+    entity_id BIGINT NOT NULL,
+    data_version TEXT NOT NULL,
+    features JSONB NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (entity_type, window_start, window_end, entity_id)
+)
+"""
+
+
+@dataclass(frozen=True)
+class EntitySpec:
+    """How one entity type is keyed, labelled and named."""
+
+    key: str
+    joins: str
+    # Member columns counted per entity (grouping set per member)
+    members: Dict[str, str]
+    # Label columns, joined after aggregation
+    labels: str
+    label_joins: str
+    # Computed column -> name the clustering routes use for this entity
+    aliases: Dict[str, str] = field(default_factory=dict)
+    # Daily revenue (stores, cities) or row-level sales (products) against weather
+    daily_weather: bool = True
+
+
+ENTITY_SPECS: Dict[str, EntitySpec] = {
+    "products": EntitySpec(
+        key="s.product_id",
+        joins="",
+        members={},
+        labels="ph.product_name, ph.first_category_id, ph.second_category_id, "
+        "ph.third_category_id",
+        label_joins="JOIN product_hierarchy ph ON ph.product_id = f.entity_id",
+        aliases={
+            "avg_transaction_value": "avg_sale_amount",
+            "transaction_value_stddev": "sale_amount_stddev",
+            "revenue_coefficient_variation": "demand_coefficient_variation",
+            "zero_revenue_ratio": "zero_sales_ratio",
+            "avg_stockout_rate": "stockout_rate",
+        },
+        daily_weather=False,
+    ),
+    "stores": EntitySpec(
+        key="s.store_id",
+        joins="",
+        members={"unique_products": "s.product_id"},
+        labels="sh.store_name, sh.city_id",
+        label_joins="JOIN store_hierarchy sh ON sh.store_id = f.entity_id",
+    ),
+    "cities": EntitySpec(
+        key="sh.city_id",
+        joins="JOIN store_hierarchy sh ON sh.store_id = s.store_id",
+        members={"unique_products": "s.product_id", "num_stores": "s.store_id"},
+        labels="ch.city_name",
+        label_joins="JOIN city_hierarchy ch ON ch.city_id = f.entity_id",
+    ),
+}
+
+# Aggregates over raw rows, evaluated for every grouping set
+ROW_AGGREGATES = """
+            COUNT(*) AS n,
+            SUM(sale) AS revenue,
+            AVG(sale) AS avg_sale,
+            STDDEV(sale) AS sale_stddev,
+            AVG(discount) FILTER (WHERE (discount > 0) IS TRUE) AS avg_discount,
+            COUNT(*) FILTER (WHERE (discount > 0) IS TRUE)::FLOAT / COUNT(*)
+                AS discount_frequency,
+            AVG(sale) FILTER (WHERE activity_flag = '1') AS avg_promo_sale,
+            AVG(sale) FILTER (WHERE activity_flag = '0') AS avg_regular_sale,
+            AVG(sale) FILTER (WHERE holiday_flag = '1') AS avg_holiday_sale,
+            COUNT(*) FILTER (WHERE holiday_flag = '1')::FLOAT / COUNT(*)
+                AS holiday_sales_ratio,
+            AVG(CASE WHEN stock_hour6_22_cnt = '0' THEN 1.0 ELSE 0.0 END)
+                AS stockout_rate,
+            AVG(CAST(stock_hour6_22_cnt AS FLOAT)) AS avg_stock_level,
+            CORR(sale, temperature) AS row_temp_corr,
+            CORR(sale, precpt) AS row_precip_corr,
+            CORR(sale, humidity) AS row_humidity_corr,
+            AVG(temperature) AS avg_temperature,
+            STDDEV(temperature) AS temp_variability,
+            AVG(precpt) AS avg_precipitation,
+            AVG(humidity) AS avg_humidity,
+            COUNT(*) FILTER (WHERE precpt > 0)::FLOAT / COUNT(*) AS rainy_days_ratio"""
+
+
+def feature_query(entity_type: str) -> str:
+    """
+    One-pass feature query for ``entity_type``.
+
+    Parameters: $1 window start, $2 window end (dates). Returns one row per
+    entity: ``entity_id``, the label columns and the feature columns.
+    """
+    spec = ENTITY_SPECS[entity_type]
+    member_columns = "".join(
+        f",\n            {expr} AS {name}_member" for name, expr in spec.members.items()
+    )
+    member_sets = "".join(f", (entity_id, {name}_member)" for name in spec.members)
+    member_counts = "".join(
+        f",\n            COUNT({name}_member) AS {name}" for name in spec.members
+    )
+    member_select = "".join(f",\n    m.{name}" for name in spec.members)
+    member_join = (
+        """
+LEFT JOIN (
+    SELECT entity_id"""
+        + member_counts
+        + """
+    FROM grouped
+    WHERE grouping_level = 'member'
+    GROUP BY entity_id
+) m ON m.entity_id = t.entity_id"""
+        if spec.members
+        else ""
+    )
+    weather = (
+        """
+    COALESCE(d.day_temp_corr, 0) AS temperature_sensitivity,
+    COALESCE(d.day_precip_corr, 0) AS precipitation_sensitivity,
+    COALESCE(d.day_humidity_corr, 0) AS humidity_sensitivity"""
+        if spec.daily_weather
+        else """
+    COALESCE(t.row_temp_corr, 0) AS temperature_sensitivity,
+    COALESCE(t.row_precip_corr, 0) AS precipitation_sensitivity,
+    COALESCE(t.row_humidity_corr, 0) AS humidity_sensitivity"""
+    )
+    # GROUPING() sets a bit per column aggregated away: per-day rows keep
+    # ``day``; the totals row drops every column; member rows keep one member
+    grouping_columns = ", ".join(["day"] + [f"{n}_member" for n in spec.members])
+    all_dropped = (1 << (len(spec.members) + 1)) - 1
+    return f"""
+WITH base AS (
+    SELECT
+        {spec.key} AS entity_id,
+        CAST(s.dt AS DATE) AS day,
+        CAST(s.sale_amount AS FLOAT) AS sale,
+        s.discount,
+        s.activity_flag,
+        s.holiday_flag,
+        s.stock_hour6_22_cnt,
+        CAST(s.avg_temperature AS FLOAT) AS temperature,
+        CAST(s.precpt AS FLOAT) AS precpt,
+        CAST(s.avg_humidity AS FLOAT) AS humidity{member_columns}
+    FROM sales_data s
+    {spec.joins}
+    WHERE CAST(s.dt AS DATE) BETWEEN $1::date AND $2::date
+),
+grouped AS (
+    SELECT
+        entity_id,
+        day,
+        CASE
+            WHEN GROUPING(day) = 0 THEN 'day'
+            WHEN GROUPING({grouping_columns}) = {all_dropped} THEN 'total'
+            ELSE 'member'
+        END AS grouping_level{"".join(f", {n}_member" for n in spec.members)},{ROW_AGGREGATES}
+    FROM base
+    GROUP BY GROUPING SETS ((entity_id), (entity_id, day){member_sets})
+)
+SELECT
+    t.entity_id,
+    d.active_days,
+    t.n AS total_transactions,
+    t.revenue AS total_revenue,
+    t.avg_sale AS avg_transaction_value,
+    t.sale_stddev AS transaction_value_stddev,
+    t.avg_discount,
+    t.discount_frequency,
+    t.avg_promo_sale,
+    t.avg_regular_sale,
+    t.avg_holiday_sale,
+    t.holiday_sales_ratio,
+    COALESCE(d.revenue_cv, 0) AS revenue_coefficient_variation,
+    COALESCE(d.zero_revenue_ratio, 0) AS zero_revenue_ratio,
+    COALESCE(t.stockout_rate, 0) AS avg_stockout_rate,
+    COALESCE(t.avg_stock_level, 0) AS avg_stock_level,
+    COALESCE(t.stockout_rate, 0) AS stockout_frequency,
+    COALESCE(t.avg_temperature, 0) AS avg_temperature,
+    COALESCE(t.temp_variability, 0) AS temp_variability,
+    COALESCE(t.avg_precipitation, 0) AS avg_precipitation,
+    COALESCE(t.avg_humidity, 0) AS avg_humidity,
+    COALESCE(t.rainy_days_ratio, 0) AS rainy_days_ratio,{weather},
+    CASE
+        WHEN t.avg_promo_sale IS NOT NULL AND t.avg_regular_sale IS NOT NULL
+        THEN (t.avg_promo_sale - t.avg_regular_sale) / NULLIF(t.avg_regular_sale, 0)
+        ELSE 0
+    END AS discount_response_ratio{member_select}
+FROM grouped t
+JOIN (
+    SELECT
+        entity_id,
+        COUNT(*) AS active_days,
+        STDDEV(revenue) / NULLIF(AVG(revenue), 0) AS revenue_cv,
+        COUNT(*) FILTER (WHERE revenue = 0)::FLOAT / COUNT(*) AS zero_revenue_ratio,
+        CORR(revenue, avg_temperature) AS day_temp_corr,
+        CORR(revenue, avg_precipitation) AS day_precip_corr,
+        CORR(revenue, avg_humidity) AS day_humidity_corr
+    FROM grouped
+    WHERE grouping_level = 'day'
+    GROUP BY entity_id
+) d ON d.entity_id = t.entity_id{member_join}
+WHERE t.grouping_level = 'total'
+"""
+
+
+def persist_query(entity_type: str) -> str:
+    """
+    ``INSERT ... SELECT`` of the features into the feature table.
+
+    Parameters: $1/$2 window, $3 entity type, $4 data version.
+    """
+    spec = ENTITY_SPECS[entity_type]
+    return f"""
+INSERT INTO {FEATURE_TABLE}
+    (entity_type, window_start, window_end, entity_id, data_version, features)
+SELECT
+    $3, $1::date, $2::date, f.entity_id, $4,
+    to_jsonb(f) || jsonb_build_object({_label_pairs(spec)})
+FROM ({feature_query(entity_type)}) f
+{spec.label_joins}
+"""
+
+
+def _label_pairs(spec: EntitySpec) -> str:
+    columns = [column.strip().split(".")[-1] for column in spec.labels.split(",")]
+    prefixed = [column.strip() for column in spec.labels.split(",")]
+    return ", ".join(f"'{name}', {expr}" for name, expr in zip(columns, prefixed))
+
+
+READ_QUERY = f"""
+SELECT features::text AS features
+FROM {FEATURE_TABLE}
+WHERE entity_type = $1 AND window_start = $2 AND window_end = $3
+    AND data_version = $4
+ORDER BY entity_id
+"""
+
+FrameKey = Tuple[str, date, date, str]
+
+
+class ClusteringFeatureStore:
+    """Versioned per-entity clustering features, computed in the database."""
+
+    def __init__(self, max_frames: int = MAX_CACHED_FRAMES):
+        self.max_frames = max_frames
+        self._frames: "OrderedDict[FrameKey, pd.DataFrame]" = OrderedDict()
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+        self.computed = 0
+
+    async def ensure_schema(self, conn: Any):
+        if not self._schema_ready:
+            await conn.execute(SCHEMA_SQL)
+            self._schema_ready = True
+
+    async def get_features(
+        self,
+        conn: Any,
+        entity_type: str,
+        start_date: date,
+        end_date: date,
+        data_version: Optional[str] = None,
+        min_data_points: int = 0,
+    ) -> pd.DataFrame:
+        """
+        Features of every ``entity_type`` entity active in the window.
+
+        Served from memory, then from the feature table; computed (and
+        persisted) when neither has them for ``data_version``.
+
+        Args:
+            data_version: Version of ``sales_data``; defaults to the window
+                end, so features are recomputed when newer days arrive
+            min_data_points: Minimum active days (and sales rows for the
+                weather sensitivities), as in the original extraction
+        """
+        if entity_type not in ENTITY_SPECS:
+            raise ValueError(f"Unsupported entity type: {entity_type}")
+        version = data_version or f"window-end:{end_date.isoformat()}"
+        key: FrameKey = (entity_type, start_date, end_date, version)
+
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            frame = await self._load(conn, key)
+            self._frames[key] = frame
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+        return self._filter(frame, entity_type, min_data_points)
+
+    async def _load(self, conn: Any, key: FrameKey) -> pd.DataFrame:
+        entity_type, start_date, end_date, version = key
+        await self.ensure_schema(conn)
+        rows = await conn.fetch(READ_QUERY, entity_type, start_date, end_date, version)
+        if not rows:
+            async with conn.transaction():
+                # One writer per (entity type, window); others wait and reread
+                await conn.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext($1))",
+                    f"{FEATURE_TABLE}:{entity_type}:{start_date}:{end_date}",
+                )
+                rows = await conn.fetch(
+                    READ_QUERY, entity_type, start_date, end_date, version
+                )
+                if not rows:
+                    await self._compute(conn, key)
+                    rows = await conn.fetch(
+                        READ_QUERY, entity_type, start_date, end_date, version
+                    )
+        return pd.DataFrame.from_records([json.loads(r["features"]) for r in rows])
+
+    async def _compute(self, conn: Any, key: FrameKey):
+        entity_type, start_date, end_date, version = key
+        await conn.execute(
+            f"DELETE FROM {FEATURE_TABLE} "
+            "WHERE entity_type = $1 AND window_start = $2 AND window_end = $3",
+            entity_type,
+            start_date,
+            end_date,
+        )
+        status = await conn.execute(
+            persist_query(entity_type), start_date, end_date, entity_type, version
+        )
+        self.computed += 1
+        logger.info(
+            f"Computed {entity_type} clustering features for {start_date}..{end_date} "
+            f"(version {version}): {status}"
+        )
+
+    @staticmethod
+    def _filter(
+        frame: pd.DataFrame, entity_type: str, min_data_points: int
+    ) -> pd.DataFrame:
+        if frame.empty:
+            return frame.copy()
+        spec = ENTITY_SPECS[entity_type]
+        frame = frame[frame["active_days"] >= min_data_points].copy()
+        # Too few rows for a meaningful correlation
+        sparse = frame["total_transactions"] < min_data_points
+        for column in (
+            "temperature_sensitivity",
+            "precipitation_sensitivity",
+            "humidity_sensitivity",
+        ):
+            frame.loc[sparse, column] = 0.0
+        id_column = {
+            "products": "product_id",
+            "stores": "store_id",
+            "cities": "city_id",
+        }[entity_type]
+        frame = frame.rename(columns={"entity_id": id_column, **spec.aliases})
+        return frame.reset_index(drop=True)
+
+    async def invalidate(self, conn: Any = None, entity_type: Optional[str] = None):
+        """Drop cached frames (and persisted rows, given a connection)."""
+        for key in [k for k in self._frames if entity_type in (None, k[0])]:
+            del self._frames[key]
+        if conn is not None:
+            await self.ensure_schema(conn)
+            if entity_type is None:
+                await conn.execute(f"DELETE FROM {FEATURE_TABLE}")
+            else:
+                await conn.execute(
+                    f"DELETE FROM {FEATURE_TABLE} WHERE entity_type = $1", entity_type
+                )
+
+
+# Global instance
+clustering_feature_store = ClusteringFeatureStore()
+
+
+async def sales_data_version(db_manager: Any) -> Optional[str]:
+    """Version token of ``sales_data`` from the data-version registry, if known."""
+    from services.data_version_service import version_token
+
+    return await version_token(db_manager, "sales_data")
@@ -0,0 +1,405 @@
+"""
+Dashboard snapshot composition.
+
+A dashboard load used to fan out into ~20 ``/enhanced/*`` requests, each of
+which re-queried ``sales_data`` for overlapping slices. The snapshot loads one
+shared base dataset per (city, store, product, window) with a single query and
+exposes it through a context variable; while it is active, the dynamic
+services serve their row fetchers (``get_category_data``, ``get_store_data``,
+...) as in-memory views of that frame instead of hitting the database.
+
+A view stands in for a fetcher only when it returns exactly the rows the
+fetcher's query would: the filters stay inside the selection's city or store,
+and the window holds at least the fetcher's ``LIMIT`` of matching rows (so
+its newest rows are the same). Other fetches, such as the all-stores
+comparison, still query the database, so panels compute what their endpoints
+do.
+
+Base datasets and the panel payloads derived from them are cached together,
+so requests for a subset of panels reuse both.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from utils.logger import get_logger
+from utils.tracing import record_cache
+
+logger = get_logger(__name__)
+
+SNAPSHOT_TTL_SECONDS = 300
+MAX_SNAPSHOT_ENTRIES = 32
+DEFAULT_WINDOW_DAYS = 90
+DEFAULT_MAX_ROWS = 200_000
+
+# Every column any dynamic-service fetcher selects, fetched once
+BASE_QUERY = """
+SELECT
+    sd.dt as date,
+    sd.store_id,
+    sd.product_id,
+    sd.city_id,
+    sd.sale_amount,
+    sd.first_category_id,
+    sd.second_category_id,
+    sd.third_category_id,
+    sd.discount,
+    sd.holiday_flag,
+    sd.activity_flag,
+    sd.stock_hour6_22_cnt,
+    sd.avg_temperature,
+    sd.avg_humidity,
+    sd.precpt,
+    sd.avg_wind_level,
+    ph.product_name,
+    sh.store_name,
+    sh.format_type,
+    sh.size_type
+FROM sales_data sd
+JOIN product_hierarchy ph ON sd.product_id = ph.product_id
+JOIN store_hierarchy sh ON sd.store_id = sh.store_id
+WHERE (sd.city_id = $1 OR sd.store_id = $2)
+    AND sd.dt >= (SELECT MAX(dt) FROM sales_data) - $3::int
+ORDER BY sd.dt DESC
+LIMIT $4
+"""
+
+NUMERIC_COLUMNS = [
+    "sale_amount",
+    "discount",
+    "stock_hour6_22_cnt",
+    "avg_temperature",
+    "avg_humidity",
+    "precpt",
+    "avg_wind_level",
+]
+
+# Output columns of each service fetcher, in the fetcher's own naming
+VIEW_COLUMNS = {
+    "category": [
+        "date",
+        "store_id",
+        "product_id",
+        "city_id",
+        "sale_amount",
+        "first_category_id",
+        "second_category_id",
+        "third_category_id",
+        "discount",
+        "holiday_flag",
+        "promotion_flag",
+        "product_name",
+        "store_name",
+        "month",
+        "year",
+        "day_of_week",
+    ],
+    "promotion": [
+        "date",
+        "store_id",
+        "product_id",
+        "sale_amount",
+        "discount",
+        "promotion_flag",
+        "holiday_flag",
+        "product_name",
+        "store_name",
+        "day_of_week",
+    ],
+    "stockout": [
+        "date",
+        "store_id",
+        "product_id",
+        "sale_amount",
+        "stock_level",
+        "discount",
+        "promotion_flag",
+        "holiday_flag",
+        "product_name",
+        "store_name",
+        "day_of_week",
+    ],
+    "store": [
+        "date",
+        "store_id",
+        "product_id",
+        "city_id",
+        "sale_amount",
+        "discount",
+        "holiday_flag",
+        "promotion_flag",
+        "product_name",
+        "store_name",
+        "format_type",
+        "size_type",
+        "day_of_week",
+    ],
+    "weather": [
+        "date",
+        "store_id",
+        "product_id",
+        "sale_amount",
+        "avg_temperature",
+        "avg_humidity",
+        "precipitation",
+        "wind_speed",
+        "discount",
+        "holiday_flag",
+        "activity_flag",
+        "product_name",
+        "store_name",
+        "city_id",
+    ],
+}
+
+# Fetcher column -> base column where the SQL aliased it
+VIEW_ALIASES = {
+    "promotion_flag": "activity_flag",
+    "stock_level": "stock_hour6_22_cnt",
+    "precipitation": "precpt",
+    "wind_speed": "avg_wind_level",
+}
+
+
+class BaseDataset:
+    """Shared rows for one dashboard selection, newest first."""
+
+    def __init__(
+        self,
+        frame: Optional[pd.DataFrame] = None,
+        load_ms: float = 0.0,
+        city_id: Optional[int] = None,
+        store_id: Optional[int] = None,
+        truncated: bool = False,
+    ):
+        """
+        Args:
+            frame: Rows of ``BASE_QUERY``
+            city_id, store_id: Selection the rows were loaded for; without
+                either the base was not loaded (no database) and views
+                serve its rows as they are
+            truncated: Whether the load stopped at its row limit, so the
+                oldest day may be incomplete
+        """
+        frame = frame if frame is not None else pd.DataFrame()
+        if not frame.empty:
+            frame = frame.copy()
+            frame["date"] = pd.to_datetime(frame["date"])
+            for col in NUMERIC_COLUMNS:
+                if col in frame.columns:
+                    frame[col] = pd.to_numeric(frame[col], errors="coerce")
+            frame = frame.sort_values("date", ascending=False, kind="stable")
+            frame = frame.reset_index(drop=True)
+            # Same conventions as the SQL EXTRACTs (DOW: Sunday = 0)
+            frame["month"] = frame["date"].dt.month
+            frame["year"] = frame["date"].dt.year
+            frame["day_of_week"] = (frame["date"].dt.dayofweek + 1) % 7
+        self.frame = frame
+        self.load_ms = load_ms
+        self.city_id = city_id
+        self.store_id = store_id
+        self.truncated = truncated
+        self.loaded_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def scoped(self) -> bool:
+        return self.city_id is not None or self.store_id is not None
+
+    def _in_scope(self, filters: Dict[str, Any], rows: pd.DataFrame) -> bool:
+        """Whether every row matching ``filters`` is in the base's selection."""
+        if self.store_id is not None and filters.get("store_id") == self.store_id:
+            return True
+        if self.city_id is None:
+            return False
+        if filters.get("city_id") == self.city_id:
+            return True
+        # Another store of the selection's city: all its rows were loaded
+        return (
+            filters.get("store_id") is not None
+            and not rows.empty
+            and bool((rows["city_id"] == self.city_id).all())
+        )
+
+    def view(
+        self, name: str, limit: Optional[int] = None, **filters: Any
+    ) -> Optional[pd.DataFrame]:
+        """
+        Rows a service fetcher would have queried, newest first.
+
+        Args:
+            name: Fetcher view (see ``VIEW_COLUMNS``)
+            limit: Maximum number of rows, like the fetcher's ``LIMIT``
+            **filters: Column equality filters; ``None`` values are ignored
+
+        Returns:
+            The rows, or None when the base cannot reproduce the fetcher's
+            query and the fetcher has to run it
+        """
+        filters = {col: value for col, value in filters.items() if value is not None}
+        if self.frame.empty:
+            return None if self.scoped else pd.DataFrame()
+
+        mask = np.ones(len(self.frame), dtype=bool)
+        for col, value in filters.items():
+            mask &= (self.frame[col] == value).to_numpy()
+        rows = self.frame.loc[mask]
+
+        if self.scoped:
+            if not self._in_scope(filters, rows):
+                return None
+            if self.truncated:
+                # The oldest loaded day may be cut off by the row limit
+                rows = rows[rows["date"] > self.frame["date"].min()]
+            # Fewer rows than the limit: the fetcher would reach further back
+            if limit is None or len(rows) < limit:
+                return None
+
+        columns = VIEW_COLUMNS[name]
+        rows = rows[[VIEW_ALIASES.get(c, c) for c in columns]]
+        if limit is not None:
+            rows = rows.head(limit)
+        if rows.empty:
+            return pd.DataFrame()
+        rows.columns = columns
+        return rows.reset_index(drop=True)
+
+
+_active_base: ContextVar[Optional[BaseDataset]] = ContextVar(
+    "dashboard_base_dataset", default=None
+)
+
+
+def active_base_dataset() -> Optional[BaseDataset]:
+    """Base dataset of the snapshot being composed in this context, if any."""
+    return _active_base.get()
+
+
+@contextmanager
+def use_base_dataset(base: BaseDataset) -> Iterator[BaseDataset]:
+    """Route dynamic-service fetchers to ``base`` within this context."""
+    token = _active_base.set(base)
+    try:
+        yield base
+    finally:
+        _active_base.reset(token)
+
+
+SnapshotKey = Tuple[int, int, int, int]
+
+
+@dataclass
+class SnapshotEntry:
+    manager: Any
+    base: BaseDataset
+    panels: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.base.loaded_at < SNAPSHOT_TTL_SECONDS
+
+
+_snapshot_cache: Dict[SnapshotKey, SnapshotEntry] = {}
+_loading: Dict[SnapshotKey, asyncio.Future] = {}
+
+
+def snapshot_key(
+    city_id: int, store_id: int, product_id: int, window_days: int
+) -> SnapshotKey:
+    return (int(city_id), int(store_id), int(product_id), int(window_days))
+
+
+async def _fetch_base_dataset(
+    db_manager: Any, key: SnapshotKey, max_rows: int
+) -> BaseDataset:
+    city_id, store_id, _, window_days = key
+    if db_manager is None or not getattr(db_manager, "pool", None):
+        return BaseDataset()
+
+    start = time.perf_counter()
+    async with db_manager.get_connection() as conn:
+        rows = await conn.fetch(BASE_QUERY, city_id, store_id, window_days, max_rows)
+    frame = pd.DataFrame([dict(r) for r in rows]) if rows else None
+    base = BaseDataset(
+        frame,
+        load_ms=(time.perf_counter() - start) * 1000,
+        city_id=city_id,
+        store_id=store_id,
+        truncated=len(rows) >= max_rows,
+    )
+    logger.info(
+        f"Loaded dashboard base dataset {key}: {len(base)} rows "
+        f"in {base.load_ms:.1f}ms"
+    )
+    return base
+
+
+async def get_snapshot_entry(
+    db_manager: Any,
+    key: SnapshotKey,
+    refresh: bool = False,
+    max_rows: int = DEFAULT_MAX_ROWS,
+) -> Tuple[SnapshotEntry, bool]:
+    """
+    Return the cache entry for a selection, loading its base dataset if needed.
+
+    Concurrent requests for the same selection share one database load.
+
+    Returns:
+        tuple: (entry, whether it was served from cache)
+    """
+    entry = _snapshot_cache.get(key)
+    if (
+        not refresh
+        and entry is not None
+        and entry.manager is db_manager
+        and entry.fresh
+    ):
+        record_cache("dashboard_snapshot", True)
+        return entry, True
+    record_cache("dashboard_snapshot", False)
+
+    loading = _loading.get(key)
+    if loading is not None:
+        return await asyncio.shield(loading), True
+
+    loading = asyncio.ensure_future(_load_entry(db_manager, key, max_rows))
+    _loading[key] = loading
+    try:
+        return await asyncio.shield(loading), False
+    finally:
+        if _loading.get(key) is loading:
+            del _loading[key]
+
+
+async def _load_entry(
+    db_manager: Any, key: SnapshotKey, max_rows: int
+) -> SnapshotEntry:
+    base = await _fetch_base_dataset(db_manager, key, max_rows)
+    entry = SnapshotEntry(manager=db_manager, base=base)
+    _store_entry(key, entry)
+    return entry
+
+
+def _store_entry(key: SnapshotKey, entry: SnapshotEntry):
+    stale = [k for k, v in _snapshot_cache.items() if not v.fresh]
+    for k in stale:
+        del _snapshot_cache[k]
+    while len(_snapshot_cache) >= MAX_SNAPSHOT_ENTRIES:
+        oldest = min(_snapshot_cache, key=lambda k: _snapshot_cache[k].base.loaded_at)
+        del _snapshot_cache[oldest]
+    _snapshot_cache[key] = entry
+
+
+def clear_snapshot_cache():
+    """Drop all cached base datasets and panels."""
+    _snapshot_cache.clear()
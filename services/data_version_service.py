@@ -0,0 +1,240 @@
+"""
+Data-version registry for HTTP revalidation.
+
+Read endpoints declare which tables (or ``table:partition`` keys) their bodies
+depend on. The registry tracks a version token and a change timestamp per key:
+
+- table tokens come from Postgres' cumulative row-change counters
+  (``pg_stat_user_tables``), probed at most once per ``probe_interval`` for
+  all tracked tables with one query;
+- writes made through this process call ``bump`` so they invalidate
+  immediately, also for finer-grained partition keys.
+
+``HttpCachePolicy`` turns the versions into strong ETags and ``Last-Modified``
+so routes can answer ``304 Not Modified`` before doing any work.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+VERSION_QUERY = """
+SELECT relname,
+       n_tup_ins + n_tup_upd + n_tup_del AS changes,
+       n_live_tup
+FROM pg_stat_user_tables
+WHERE relname = ANY($1::text[])
+"""
+
+
+@dataclass
+class DataVersion:
+    token: str
+    changed_at: float
+
+
+class DataVersionRegistry:
+    """Version tokens per table and per ``table:partition`` key."""
+
+    def __init__(self, probe_interval: Optional[float] = None):
+        self.probe_interval = (
+            probe_interval
+            if probe_interval is not None
+            else float(os.getenv("DATA_VERSION_PROBE_INTERVAL", "5"))
+        )
+        self._tables: Dict[str, DataVersion] = {}
+        self._bumps: Dict[str, DataVersion] = {}
+        self._tracked: Set[str] = set()
+        self._probed_at = 0.0
+        self._probing: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def _split(key: str) -> Tuple[str, Optional[str]]:
+        table, _, partition = key.partition(":")
+        return table, partition or None
+
+    def bump(self, table: str, partition: Optional[str] = None):
+        """
+        Record a write made by this process.
+
+        The table key changes on every write; a partition key changes on
+        writes to that partition and on table-wide writes (no partition).
+        """
+        keys = [f"{table}:{partition}", table] if partition else [table, f"{table}:*"]
+        for key in keys:
+            previous = self._bumps.get(key)
+            count = int(previous.token) + 1 if previous else 1
+            self._bumps[key] = DataVersion(str(count), time.time())
+
+    def _observe(self, table: str, token: str):
+        current = self._tables.get(table)
+        if current is None or current.token != token:
+            self._tables[table] = DataVersion(token, time.time())
+
+    async def refresh(self, db_manager: Any, force: bool = False):
+        """Probe table change counters, at most once per ``probe_interval``."""
+        if not force and time.time() - self._probed_at < self.probe_interval:
+            return
+        if self._probing is not None:
+            await asyncio.shield(self._probing)
+            return
+        self._probing = asyncio.ensure_future(self._probe(db_manager))
+        try:
+            await asyncio.shield(self._probing)
+        finally:
+            self._probing = None
+
+    async def _probe(self, db_manager: Any):
+        tables = sorted(self._tracked)
+        if db_manager is None or not getattr(db_manager, "pool", None):
+            raise RuntimeError("Database pool not initialized")
+        async with db_manager.get_connection() as conn:
+            rows = await conn.fetch(VERSION_QUERY, tables)
+        for row in rows:
+            self._observe(row["relname"], f"{row['changes']}.{row['n_live_tup']}")
+        self._probed_at = time.time()
+
+    async def versions(
+        self, db_manager: Any, keys: Iterable[str]
+    ) -> List[Tuple[str, DataVersion]]:
+        """
+        Current version of each key, refreshing stale table counters first.
+
+        Raises:
+            RuntimeError: If a table's version cannot be determined
+        """
+        keys = list(keys)
+        tables = {self._split(key)[0] for key in keys}
+        if not tables <= self._tracked:
+            self._tracked |= tables
+            await self.refresh(db_manager, force=True)
+        else:
+            await self.refresh(db_manager)
+
+        result = []
+        for key in keys:
+            table, partition = self._split(key)
+            version = self._tables.get(table)
+            if version is None:
+                raise RuntimeError(f"No version available for table '{table}'")
+            bumps = [key, f"{table}:*"] if partition else [key]
+            for bump in filter(None, (self._bumps.get(k) for k in bumps)):
+                version = DataVersion(
+                    f"{version.token}+{bump.token}",
+                    max(version.changed_at, bump.changed_at),
+                )
+            result.append((key, version))
+        return result
+
+    def clear(self):
+        self._tables.clear()
+        self._bumps.clear()
+        self._tracked.clear()
+        self._probed_at = 0.0
+
+
+# Global instance
+data_versions = DataVersionRegistry()
+
+
+async def version_token(db_manager: Any, key: str) -> Optional[str]:
+    """Current version token of ``key``, or None when it can't be determined."""
+    try:
+        [(_, version)] = await data_versions.versions(db_manager, [key])
+        return version.token
+    except Exception as e:
+        logger.debug(f"No {key} version available: {e}")
+        return None
+
+
+@dataclass
+class HttpCachePolicy:
+    """
+    Revalidation policy for one read route.
+
+    Args:
+        tables: Table or ``table:partition`` keys the response depends on
+        cache_control: ``Cache-Control`` value sent with 200 and 304 responses
+    """
+
+    tables: Sequence[str]
+    cache_control: str = "no-cache"
+
+    async def validators(
+        self, request: Any, registry: Optional[DataVersionRegistry] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        ETag/Last-Modified/Cache-Control headers for this request, or ``None``
+        when the data version is unknown (the route then runs uncached).
+        """
+        registry = registry or data_versions
+        db_manager = getattr(request.app.state, "db_manager", None)
+        try:
+            versions = await registry.versions(db_manager, self.tables)
+        except Exception as e:
+            logger.debug(f"No data version for {request.url.path}: {e}")
+            return None
+
+        digest = hashlib.sha1()
+        for part in (
+            request.url.path,
+            request.url.query,
+            request.headers.get("accept", ""),
+            request.headers.get("accept-encoding", ""),
+        ):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        for key, version in versions:
+            digest.update(f"{key}={version.token}\0".encode())
+        changed_at = max(version.changed_at for _, version in versions)
+        return {
+            "ETag": f'"{digest.hexdigest()[:20]}"',
+            "Last-Modified": formatdate(changed_at, usegmt=True),
+            "Cache-Control": self.cache_control,
+        }
+
+    @staticmethod
+    def is_not_modified(request_headers: Any, validators: Dict[str, str]) -> bool:
+        """Evaluate ``If-None-Match`` (preferred) or ``If-Modified-Since``."""
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # Weak comparison, as required for If-None-Match
+            etag = validators["ETag"]
+            return etag in tags or f"W/{etag}" in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                modified = parsedate_to_datetime(validators["Last-Modified"])
+            except (TypeError, ValueError):
+                return False
+            return modified <= since
+        return False
+
+
+def http_cache(*tables: str, cache_control: str = "no-cache"):
+    """
+    Declare the revalidation policy of a GET endpoint.
+
+    Routes built with ``EncodedAPIRoute`` answer ``304 Not Modified`` from the
+    policy before resolving dependencies or running the endpoint, and add
+    ``ETag``/``Last-Modified``/``Cache-Control`` to 200 responses.
+    """
+
+    def decorator(func):
+        func.http_cache_policy = HttpCachePolicy(tables, cache_control)
+        return func
+
+    return decorator
@@ -11,6 +11,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from fastapi import Request
 
+from services.dashboard_snapshot_service import active_base_dataset
+
 # from database.connection import get_pool # Removed
 
 logger = logging.getLogger(__name__)
@@ -28,6 +30,15 @@ class DynamicPromotionService:
     ) -> pd.DataFrame:
         """Fetch actual promotion and sales data from database."""
 
+        base = active_base_dataset()
+        if base is not None:
+            # The snapshot serves this query only if its view matches exactly
+            rows = base.view(
+                "promotion", limit, store_id=store_id, product_id=product_id
+            )
+            if rows is not None:
+                return rows
+
         manager = request.app.state.db_manager  # Access db_manager
 
         query = """
@@ -11,6 +11,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from fastapi import Request
 
+from services.dashboard_snapshot_service import active_base_dataset
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +32,19 @@ class DynamicWeatherService:
     ) -> pd.DataFrame:
         """Fetch actual weather and sales data from database."""
 
+        base = active_base_dataset()
+        if base is not None:
+            # The snapshot serves this query only if its view matches exactly
+            rows = base.view(
+                "weather",
+                limit,
+                store_id=store_id,
+                product_id=product_id,
+                city_id=city_id,
+            )
+            if rows is not None:
+                return rows
+
         manager = request.app.state.db_manager
 
         query = """
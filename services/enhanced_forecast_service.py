@@ -26,6 +26,14 @@ warnings.filterwarnings("ignore")
 # Import our database manager
 # from database.connection import db_manager, get_db_connection # Removed
 from models.prophet_forecaster import ProphetForecaster
+from services.hierarchical_forecast import (
+    TOP_DOWN_METHODS,
+    align_residuals,
+    build_hierarchy,
+    reconcile,
+    top_down,
+)
+from services.statistical_forecast import forecast_matrix
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +45,7 @@ class ForecastingMethod(Enum):
     RANDOM_FOREST = "random_forest"
     ENSEMBLE = "ensemble"
     NAIVE = "naive"
+    STATISTICAL = "statistical"
 
 
 @dataclass
@@ -53,6 +62,15 @@ class ForecastRequest:
     include_promotion_factors: bool = True
     forecasting_method: ForecastingMethod = ForecastingMethod.ENSEMBLE
     confidence_level: float = 0.95
+    # Forecast stores and products as one hierarchy (see
+    # services.hierarchical_forecast) instead of one model per pair
+    hierarchical_method: Optional[str] = None
+    # "fast" serves the request with the vectorised statistical engine
+    mode: str = "standard"
+
+    def __post_init__(self):
+        if self.mode == "fast":
+            self.forecasting_method = ForecastingMethod.STATISTICAL
 
 
 @dataclass
@@ -267,6 +285,26 @@ class EnhancedForecastService:
     ) -> pd.DataFrame:
         """Generate base forecasts using the specified method"""
 
+        if request_data.hierarchical_method:
+            return await self._generate_hierarchical_forecasts(
+                historical_data, request_data
+            )
+
+        if request_data.forecasting_method == ForecastingMethod.STATISTICAL:
+            # Every store-product pair in one vectorised pass
+            data = historical_data[
+                historical_data["store_id"].isin(request_data.store_ids)
+                & historical_data["product_id"].isin(request_data.product_ids)
+            ]
+            if data.empty:
+                return pd.DataFrame()
+            return self._generate_statistical_forecasts(
+                data,
+                ["store_id", "product_id"],
+                request_data.forecast_horizon_days,
+                request_data.confidence_level,
+            )
+
         forecasts = []
 
         for store_id in request_data.store_ids:
@@ -284,22 +322,11 @@ class EnhancedForecastService:
                     continue
 
                 # Generate forecast based on method
-                if request_data.forecasting_method == ForecastingMethod.PROPHET:
-                    forecast = await self._generate_prophet_forecast(
-                        store_product_data, request_data.forecast_horizon_days
-                    )
-                elif request_data.forecasting_method == ForecastingMethod.RANDOM_FOREST:
-                    forecast = self._generate_rf_forecast(
-                        store_product_data, request_data.forecast_horizon_days
-                    )
-                elif request_data.forecasting_method == ForecastingMethod.ENSEMBLE:
-                    forecast = await self._generate_ensemble_forecast(
-                        store_product_data, request_data.forecast_horizon_days
-                    )
-                else:  # NAIVE
-                    forecast = self._generate_naive_forecast(
-                        store_product_data, request_data.forecast_horizon_days
-                    )
+                forecast = await self._forecast_series(
+                    store_product_data,
+                    request_data.forecast_horizon_days,
+                    request_data.forecasting_method,
+                )
 
                 # Add store and product identifiers
                 forecast["store_id"] = store_id
@@ -312,6 +339,170 @@ class EnhancedForecastService:
 
         return pd.concat(forecasts, ignore_index=True)
 
+    async def _forecast_series(
+        self, data: pd.DataFrame, horizon_days: int, method: ForecastingMethod
+    ) -> pd.DataFrame:
+        """Forecast one series with the given method"""
+
+        if method == ForecastingMethod.PROPHET:
+            return await self._generate_prophet_forecast(data, horizon_days)
+        if method == ForecastingMethod.RANDOM_FOREST:
+            return self._generate_rf_forecast(data, horizon_days)
+        if method == ForecastingMethod.ENSEMBLE:
+            return await self._generate_ensemble_forecast(data, horizon_days)
+        if method == ForecastingMethod.STATISTICAL:
+            return self._generate_statistical_forecasts(data, [], horizon_days)
+        return self._generate_naive_forecast(data, horizon_days)
+
+    async def _generate_hierarchical_forecasts(
+        self, historical_data: pd.DataFrame, request_data: ForecastRequest
+    ) -> pd.DataFrame:
+        """
+        Forecast the store x product grid as a store -> product hierarchy
+
+        Top-down methods forecast the total (and each store, for forecast
+        proportions) and split it down to store-product pairs; the
+        reconciliation methods forecast every node and reconcile them, so
+        product, store and total forecasts add up. Intervals scale with the
+        forecast of the nearest node that was forecast.
+        """
+        method = request_data.hierarchical_method
+        horizon_days = request_data.forecast_horizon_days
+        data = historical_data[
+            historical_data["store_id"].isin(request_data.store_ids)
+            & historical_data["product_id"].isin(request_data.product_ids)
+        ]
+        if data.empty:
+            return pd.DataFrame()
+
+        hierarchy = build_hierarchy(
+            data[["store_id", "product_id"]], [["store_id"], ["store_id", "product_id"]]
+        )
+        if method == "top_down_historical":
+            forecast_levels = [0]
+        elif method in TOP_DOWN_METHODS:
+            forecast_levels = [0, 1]
+        else:
+            forecast_levels = [0, 1, 2]
+
+        base = np.full((hierarchy.n_nodes, horizon_days), np.nan)
+        half_widths = {}
+        residuals = {}
+        node_forecasts = {}
+        for level in forecast_levels:
+            rows = hierarchy.level_slices[level]
+            series = self._aggregate_series(data, list(hierarchy.levels[level]))
+            for node, key in zip(
+                range(rows.start, rows.stop), hierarchy.node_keys(level)
+            ):
+                node_data = series[key]
+                if len(node_data) < 30:  # Too short for a model
+                    forecast = self._generate_naive_forecast(node_data, horizon_days)
+                else:
+                    forecast = await self._forecast_series(
+                        node_data, horizon_days, request_data.forecasting_method
+                    )
+                forecast = forecast.tail(horizon_days).reset_index(drop=True)
+                base[node] = forecast["predicted_demand"].to_numpy()
+                half_widths[node] = (
+                    forecast["confidence_upper"] - forecast["confidence_lower"]
+                ).to_numpy() / 2
+                node_forecasts[node] = forecast
+                if method in ("wls_var", "mint_shrink"):
+                    # In-sample errors of the 30-day average stand in for
+                    # model residuals in the variance-weighted reconciliations
+                    sales = node_data.set_index("sale_date")["sale_amount"]
+                    average = sales.rolling(30, min_periods=1).mean().shift(1)
+                    residuals[node] = (sales - average).iloc[1:]
+
+        if method in TOP_DOWN_METHODS:
+            leaf_sales = (
+                data.groupby(["store_id", "product_id"])["sale_amount"]
+                .sum()
+                .reindex(pd.MultiIndex.from_frame(hierarchy.leaves), fill_value=0)
+                .to_numpy()
+            )
+            leaf_forecasts = top_down(hierarchy, base, leaf_sales)
+        else:
+            residual_matrix = None
+            if method in ("wls_var", "mint_shrink"):
+                # Nodes' series can start late or skip days: pair residuals
+                # by date, not by position
+                residual_matrix = align_residuals(
+                    [residuals[node] for node in range(hierarchy.n_nodes)]
+                )
+                if residual_matrix.shape[1] < 2:
+                    logger.warning(
+                        f"Too few common dates for {method}; using wls_struct"
+                    )
+                    method = "wls_struct"
+                    residual_matrix = None
+            leaf_forecasts = reconcile(hierarchy, base, method, residual_matrix)
+
+        forecasts = []
+        leaf_start = hierarchy.level_slices[-1].start
+        for leaf, (store_id, product_id) in enumerate(
+            hierarchy.leaves.itertuples(index=False, name=None)
+        ):
+            predictions = leaf_forecasts[leaf]
+            node = leaf_start + leaf
+            while node not in node_forecasts:
+                node = hierarchy.parent[node]
+            share = np.divide(
+                predictions,
+                base[node],
+                out=np.zeros(horizon_days),
+                where=base[node] != 0,
+            )
+            half_width = np.abs(share) * half_widths[node]
+            forecasts.append(
+                pd.DataFrame(
+                    {
+                        "forecast_date": node_forecasts[node][
+                            "forecast_date"
+                        ].to_numpy(),
+                        "predicted_demand": predictions,
+                        "confidence_lower": np.maximum(predictions - half_width, 0),
+                        "confidence_upper": predictions + half_width,
+                        "model_type": node_forecasts[node]["model_type"].to_numpy(),
+                        "hierarchical_method": method,
+                        "store_id": store_id,
+                        "product_id": product_id,
+                    }
+                )
+            )
+
+        logger.info(
+            f"Hierarchical forecast ({method}): {len(node_forecasts)} series "
+            f"forecast for {hierarchy.n_leaves} store-product pairs"
+        )
+        return pd.concat(forecasts, ignore_index=True)
+
+    def _aggregate_series(
+        self, data: pd.DataFrame, keys: List[str]
+    ) -> Dict[Tuple, pd.DataFrame]:
+        """Daily series of every node of a hierarchy level"""
+
+        # Sales and their lags/rolling sums add up; other drivers are averaged
+        additive = [
+            col
+            for col in data.columns
+            if col == "sale_amount" or col.startswith(("lag_", "rolling_", "trend_"))
+        ]
+        numeric = data.select_dtypes(include=[np.number]).columns
+        agg = {
+            col: "sum" if col in additive else "mean"
+            for col in numeric
+            if col not in ("store_id", "product_id", "city_id")
+        }
+        daily = data.groupby(keys + ["sale_date"]).agg(agg).reset_index()
+        if not keys:
+            return {(): daily}
+        return {
+            key if isinstance(key, tuple) else (key,): frame.reset_index(drop=True)
+            for key, frame in daily.groupby(keys)
+        }
+
     async def _generate_prophet_forecast(
         self, data: pd.DataFrame, horizon_days: int
     ) -> pd.DataFrame:
@@ -549,6 +740,55 @@ class EnhancedForecastService:
 
         return forecast_df
 
+    def _generate_statistical_forecasts(
+        self,
+        data: pd.DataFrame,
+        keys: List[str],
+        horizon_days: int,
+        confidence_level: float = 0.95,
+    ) -> pd.DataFrame:
+        """
+        Forecast every ``keys`` series of the data at once
+
+        The daily series are stacked into one (series x days) array for the
+        vectorised statistical engine (see services.statistical_forecast),
+        which picks exponential smoothing, TSB or seasonal naive per series.
+        """
+        sale_date = pd.to_datetime(data["sale_date"])
+        days = pd.date_range(sale_date.min(), sale_date.max(), freq="D")
+        daily = data.groupby(keys + [sale_date])["sale_amount"].sum()
+        # Each series starts at its first day of data (NaN before); the
+        # engine counts later missing days as zero demand
+        if keys:
+            matrix = daily.unstack("sale_date").reindex(columns=days)
+        else:
+            matrix = daily.reindex(days).to_frame().T
+
+        result = forecast_matrix(
+            matrix.to_numpy(dtype=float), horizon_days, level=confidence_level
+        )
+
+        future_dates = pd.date_range(
+            start=days[-1] + timedelta(days=1), periods=horizon_days, freq="D"
+        )
+        forecast_df = pd.DataFrame(
+            {
+                "forecast_date": np.tile(future_dates, len(matrix)),
+                "predicted_demand": result.mean.ravel(),
+                "confidence_lower": result.lower.ravel(),
+                "confidence_upper": result.upper.ravel(),
+                "model_type": np.repeat(
+                    [f"statistical_{m}" for m in result.methods], horizon_days
+                ),
+            }
+        )
+        if keys:
+            ids = matrix.index.to_frame(index=False)
+            for key in keys:
+                forecast_df[key] = np.repeat(ids[key].to_numpy(), horizon_days)
+
+        return forecast_df
+
     async def _perform_cross_store_analysis(
         self,
         historical_data: pd.DataFrame,
@@ -14,39 +14,71 @@ import json
 from pathlib import Path
 import warnings
 
+from services.holiday_calendar import HolidayCalendar
+
 warnings.filterwarnings("ignore")
 
 logger = logging.getLogger(__name__)
 
 
+def rolling_stat(values: Any, window: int, stat: str) -> pd.Series:
+    """Rolling statistic of a Series or, per group, of a SeriesGroupBy."""
+    rolled = getattr(values.rolling(window), stat)()
+    if isinstance(values, pd.core.groupby.SeriesGroupBy):
+        rolled = rolled.reset_index(level=0, drop=True)
+    return rolled
+
+
 class AdvancedFeatureBuilder:
     """Advanced feature engineering for retail demand forecasting."""
 
-    def __init__(self, save_path="models/preprocessor"):
-        """Initialize the feature builder."""
+    def __init__(
+        self,
+        save_path="models/preprocessor",
+        holiday_calendar: Optional[HolidayCalendar] = None,
+    ):
+        """
+        Initialize the feature builder.
+
+        Args:
+            save_path: Directory for persisted preprocessing artifacts
+            holiday_calendar: Shared holiday index; when omitted, holidays are
+                taken from the ``holiday_flag`` rows of each input frame
+        """
         self.save_path = Path(save_path)
         self.save_path.mkdir(parents=True, exist_ok=True)
         self.scaler = StandardScaler()
         self.label_encoders = {}
+        self.holiday_calendar = holiday_calendar
 
-    def build_weather_sensitivity_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Build weather sensitivity features for demand modeling."""
+    def build_weather_sensitivity_features(
+        self, df: pd.DataFrame, group_col: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Build weather sensitivity features for demand modeling.
+
+        Args:
+            df: Input DataFrame
+            group_col: Optional column identifying independent series (e.g.
+                stacked weather scenarios); frame-wide statistics such as
+                rolling volatility are then computed within each group
+        """
         df = df.copy()
 
         # Weather impact scores
         df["temperature_demand_impact"] = self._calculate_temperature_impact(df)
         df["humidity_demand_impact"] = self._calculate_humidity_impact(df)
         df["precipitation_demand_impact"] = self._calculate_precipitation_impact(df)
-        df["wind_demand_impact"] = self._calculate_wind_impact(df)
+        df["wind_demand_impact"] = self._calculate_wind_impact(df, group_col)
 
         # Weather seasonality patterns
-        df["weather_seasonality"] = self._calculate_weather_seasonality(df)
+        df["weather_seasonality"] = self._calculate_weather_seasonality(df, group_col)
 
         # Weather comfort index
-        df["weather_comfort_index"] = self._calculate_comfort_index(df)
+        df["weather_comfort_index"] = self._calculate_comfort_index(df, group_col)
 
         # Weather volatility (rolling std of weather conditions)
-        df = self._add_weather_volatility(df)
+        df = self._add_weather_volatility(df, group_col)
 
         # Product-weather interaction features
         df = self._add_product_weather_interactions(df)
@@ -191,40 +223,53 @@ class AdvancedFeatureBuilder:
     def _calculate_precipitation_impact(self, df: pd.DataFrame) -> pd.Series:
         """Calculate precipitation impact on demand."""
         # Light rain might increase indoor shopping, heavy rain decreases it
-        precip_impact = df["precpt"].apply(
-            lambda x: (
-                1.1
-                if 0 < x <= 5  # Light rain boosts indoor shopping
-                else (
-                    1.0 - min(x / 50, 0.5)
-                    if x > 5  # Heavy rain decreases shopping
-                    else 1.0
-                )
-            )  # No rain
+        precip = df["precpt"]
+        precip_impact = np.select(
+            [
+                (precip > 0) & (precip <= 5),  # Light rain boosts indoor shopping
+                precip > 5,  # Heavy rain decreases shopping
+            ],
+            [1.1, 1.0 - np.minimum(precip / 50, 0.5)],
+            default=1.0,  # No rain
         )
-        return precip_impact
+        return pd.Series(precip_impact, index=df.index)
 
-    def _calculate_wind_impact(self, df: pd.DataFrame) -> pd.Series:
+    def _calculate_wind_impact(
+        self, df: pd.DataFrame, group_col: Optional[str] = None
+    ) -> pd.Series:
         """Calculate wind impact on demand."""
         # High wind generally decreases shopping activity
-        return 1.0 - (df["avg_wind_level"] / df["avg_wind_level"].max()) * 0.2
-
-    def _calculate_weather_seasonality(self, df: pd.DataFrame) -> pd.Series:
+        wind = df["avg_wind_level"]
+        if group_col is None:
+            wind_max = wind.max()
+        else:
+            wind_max = wind.groupby(df[group_col]).transform("max")
+        return 1.0 - (wind / wind_max) * 0.2
+
+    def _calculate_weather_seasonality(
+        self, df: pd.DataFrame, group_col: Optional[str] = None
+    ) -> pd.Series:
         """Calculate weather-based seasonality."""
         # Combination of temperature and month for seasonal patterns
-        temp_normalized = (df["avg_temperature"] - df["avg_temperature"].min()) / (
-            df["avg_temperature"].max() - df["avg_temperature"].min()
-        )
+        temp = df["avg_temperature"]
+        if group_col is None:
+            temp_min, temp_max = temp.min(), temp.max()
+        else:
+            grouped = temp.groupby(df[group_col])
+            temp_min, temp_max = grouped.transform("min"), grouped.transform("max")
+        temp_normalized = (temp - temp_min) / (temp_max - temp_min)
         month_factor = np.sin(2 * np.pi * df["sale_date"].dt.month / 12)
         return temp_normalized * month_factor
 
-    def _calculate_comfort_index(self, df: pd.DataFrame) -> pd.Series:
+    def _calculate_comfort_index(
+        self, df: pd.DataFrame, group_col: Optional[str] = None
+    ) -> pd.Series:
         """Calculate weather comfort index."""
         # Weighted combination of weather factors
         temp_comfort = self._calculate_temperature_impact(df)
         humidity_comfort = self._calculate_humidity_impact(df)
         precip_comfort = self._calculate_precipitation_impact(df)
-        wind_comfort = self._calculate_wind_impact(df)
+        wind_comfort = self._calculate_wind_impact(df, group_col)
 
         return (
             temp_comfort * 0.4
@@ -233,16 +278,23 @@ class AdvancedFeatureBuilder:
             + wind_comfort * 0.1
         )
 
-    def _add_weather_volatility(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _add_weather_volatility(
+        self, df: pd.DataFrame, group_col: Optional[str] = None
+    ) -> pd.DataFrame:
         """Add weather volatility features."""
-        df = df.sort_values("sale_date")
+        if group_col is None:
+            df = df.sort_values("sale_date")
+            temp, humidity = df["avg_temperature"], df["avg_humidity"]
+        else:
+            df = df.sort_values([group_col, "sale_date"], kind="stable")
+            temp = df.groupby(group_col, sort=False)["avg_temperature"]
+            humidity = df.groupby(group_col, sort=False)["avg_humidity"]
 
         # Rolling standard deviation of weather conditions
-        df["temp_volatility_7d"] = df["avg_temperature"].rolling(7).std()
-        df["humidity_volatility_7d"] = df["avg_humidity"].rolling(7).std()
+        df["temp_volatility_7d"] = rolling_stat(temp, 7, "std")
+        df["humidity_volatility_7d"] = rolling_stat(humidity, 7, "std")
         df["weather_change_magnitude"] = (
-            np.abs(df["avg_temperature"].diff())
-            + np.abs(df["avg_humidity"].diff()) / 10
+            np.abs(temp.diff()) + np.abs(humidity.diff()) / 10
         )
 
         return df
@@ -467,32 +519,38 @@ class AdvancedFeatureBuilder:
 
         return df
 
-    def _calculate_days_since_holiday(self, df: pd.DataFrame) -> pd.Series:
-        """Calculate days since last holiday."""
+    def _get_holiday_calendar(self, df: pd.DataFrame) -> Optional[HolidayCalendar]:
+        """Shared calendar if configured, else one built from the frame's flags."""
+        if self.holiday_calendar is not None:
+            return self.holiday_calendar
         if "holiday_flag" not in df.columns:
-            return pd.Series(0, index=df.index)
+            return None
+        return HolidayCalendar.from_sales(df)
 
-        holiday_dates = df[df["holiday_flag"] == 1]["sale_date"].unique()
+    def _holiday_city_ids(self, df: pd.DataFrame) -> Optional[pd.Series]:
+        """City ids for per-city lookups (only meaningful with a shared calendar)."""
+        if self.holiday_calendar is not None and "city_id" in df.columns:
+            return df["city_id"]
+        return None
 
-        def days_since_holiday(date):
-            past_holidays = holiday_dates[holiday_dates <= date]
-            if len(past_holidays) == 0:
-                return 365  # No holidays found
-            return (date - past_holidays.max()).days
+    def _calculate_days_since_holiday(self, df: pd.DataFrame) -> pd.Series:
+        """Calculate days since last holiday."""
+        calendar = self._get_holiday_calendar(df)
+        if calendar is None:
+            return pd.Series(0, index=df.index)
 
-        return df["sale_date"].apply(days_since_holiday)
+        return pd.Series(
+            calendar.days_since(df["sale_date"], self._holiday_city_ids(df)),
+            index=df.index,
+        )
 
     def _calculate_days_until_holiday(self, df: pd.DataFrame) -> pd.Series:
         """Calculate days until next holiday."""
-        if "holiday_flag" not in df.columns:
+        calendar = self._get_holiday_calendar(df)
+        if calendar is None:
             return pd.Series(0, index=df.index)
 
-        holiday_dates = df[df["holiday_flag"] == 1]["sale_date"].unique()
-
-        def days_until_holiday(date):
-            future_holidays = holiday_dates[holiday_dates > date]
-            if len(future_holidays) == 0:
-                return 365  # No holidays found
-            return (future_holidays.min() - date).days
-
-        return df["sale_date"].apply(days_until_holiday)
+        return pd.Series(
+            calendar.days_until(df["sale_date"], self._holiday_city_ids(df)),
+            index=df.index,
+        )
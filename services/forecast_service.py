@@ -6,6 +6,8 @@ import asyncio
 import numpy as np
 from fastapi import Request
 
+from services.holiday_calendar import load_holiday_calendar
+
 logger = logging.getLogger(__name__)
 
 # Forecasting and analysis logic moved from api/forecast.py
@@ -520,49 +522,14 @@ async def fetch_holiday_data(
     future_periods=0,
 ) -> pd.DataFrame:
     """
-    Async fetch holiday data from the database using asyncpg.
-    """
-    # Convert date strings to datetime.date objects for asyncpg
-    if start_date is not None and isinstance(start_date, str):
-        from datetime import datetime
-
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-    if end_date is not None and isinstance(end_date, str):
-        from datetime import datetime
+    Fetch holiday data for a date range.
 
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-
-    query = """
-    SELECT 
-        date,
-        holiday_name,
-        holiday_type,
-        significance
-    FROM holiday_calendar
-    WHERE 1=1
+    Served from the shared holiday calendar, which is loaded from the database
+    once and cached, instead of querying ``holiday_calendar`` on every forecast.
     """
-    params = []
-    idx = 1
-    if start_date is not None:
-        query += f" AND date >= ${idx}"
-        params.append(start_date)
-        idx += 1
-    if end_date is not None:
-        query += f" AND date <= ${idx}"
-        params.append(end_date)
-        idx += 1
-    query += " ORDER BY date"
-
     manager = request.app.state.db_manager
-    async with manager.get_connection() as conn:
-        records = await conn.fetch(query, *params)
-
-    df = (
-        pd.DataFrame(records, columns=[k for k in records[0].keys()])
-        if records
-        else pd.DataFrame()
-    )
-    return df
+    calendar = await load_holiday_calendar(manager)
+    return calendar.to_frame(start_date, end_date)
 
 
 # The analyze_* functions can be made async if they need to await DB or other async calls, otherwise they can remain sync if only using pandas.
@@ -0,0 +1,235 @@
+"""
+Progressive forecast streaming.
+
+Grid endpoints (``/multi-dimensional-forecast``, ``/demand-forecast``) only
+answer once every (city, store, product) combination is done. Their
+``/stream`` variants instead emit each combination as an NDJSON line or a
+Server-Sent Event as soon as it is ready, followed by a summary event.
+
+Combinations are produced by a small pool of workers, each holding one pooled
+connection, feeding a bounded queue; the summary is folded incrementally, so
+memory depends on the worker count and grid dimensions, not on the number of
+combinations.
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+import numpy as np  # type: ignore
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+DEFAULT_STREAM_CONCURRENCY = int(os.getenv("FORECAST_STREAM_CONCURRENCY", "4"))
+
+Combination = Tuple[str, str, int]
+_WORKER_DONE = object()
+
+
+def negotiate_stream_format(
+    requested: Optional[str] = None, accept: Optional[str] = None
+) -> str:
+    """Pick ``ndjson`` or ``sse`` from an explicit format or the Accept header."""
+    if requested:
+        requested = requested.lower()
+        if requested not in STREAM_MEDIA_TYPES:
+            raise ValueError(
+                f"Unsupported stream format '{requested}'; "
+                f"use one of {sorted(STREAM_MEDIA_TYPES)}"
+            )
+        return requested
+    if accept and "text/event-stream" in accept:
+        return "sse"
+    return "ndjson"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def encode_event(stream_format: str, event: str, data: Any) -> str:
+    """Serialize one stream event as an NDJSON line or an SSE frame."""
+    if stream_format == "sse":
+        payload = json.dumps(data, default=_json_default)
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"event": event, "data": data}, default=_json_default) + "\n"
+
+
+async def stream_combinations(
+    db_manager: Any,
+    combinations: Iterable[Combination],
+    worker: Callable[[Any, Combination], Awaitable[Dict[str, Any]]],
+    concurrency: int = DEFAULT_STREAM_CONCURRENCY,
+) -> AsyncIterator[Tuple[Combination, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Run ``worker(conn, combination)`` over the grid and yield results as they
+    complete, as ``(combination, result, error)``.
+
+    Each of ``concurrency`` workers holds one pooled connection and pulls the
+    next combination from a shared iterator; a bounded queue applies
+    backpressure when the client reads slower than forecasts are produced.
+    If every worker fails (e.g. no connection can be acquired), each
+    combination left is yielded with that failure. Closing the generator
+    (e.g. on client disconnect) cancels the workers.
+    """
+    combos = iter(combinations)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(concurrency, 1) * 2)
+    worker_errors: List[Exception] = []
+
+    async def run_worker():
+        try:
+            async with db_manager.get_connection() as conn:
+                for combo in combos:
+                    try:
+                        item = (combo, await worker(conn, combo), None)
+                    except Exception as e:
+                        logger.error(f"Error forecasting {combo}: {e}")
+                        item = (combo, None, e)
+                    await queue.put(item)
+        except Exception as e:
+            logger.error(f"Forecast stream worker failed: {e}")
+            worker_errors.append(e)
+        await queue.put(_WORKER_DONE)
+
+    tasks = [asyncio.ensure_future(run_worker()) for _ in range(max(concurrency, 1))]
+    try:
+        finished = 0
+        while finished < len(tasks):
+            item = await queue.get()
+            if item is _WORKER_DONE:
+                finished += 1
+                continue
+            yield item
+        # No worker is left to take the rest of the grid
+        for combo in combos:
+            yield combo, None, worker_errors[-1]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@dataclass
+class StreamingForecastSummary:
+    """
+    Incremental version of the grid summaries, folded one combination at a
+    time. Daily totals are kept per city, store and product (the same shape
+    as ``generate_aggregated_forecasts``), never per combination.
+
+    Args:
+        prediction_key: Forecast field holding the daily predictions
+        total_key: Forecast field holding the horizon total
+    """
+
+    prediction_key: str = "predictions"
+    total_key: str = "total_predicted"
+    combinations: int = 0
+    failed: int = 0
+    total: float = 0.0
+    accuracy_sum: float = 0.0
+    growth_count: int = 0
+    growth_sum: float = 0.0
+    high_growth: int = 0
+    declining: int = 0
+    dates: List[str] = field(default_factory=list)
+    aggregates: Dict[str, Dict[str, Dict[str, Any]]] = field(
+        default_factory=lambda: {"by_city": {}, "by_store": {}, "by_product": {}}
+    )
+    daily_total: Optional[np.ndarray] = None
+
+    def add(
+        self,
+        combination: Combination,
+        forecast: Dict[str, Any],
+        historical_avg: Optional[float] = None,
+    ):
+        city_id, store_id, product_id = combination
+        predictions = np.asarray(forecast.get(self.prediction_key, []), dtype=float)
+        self.combinations += 1
+        self.total += float(forecast.get(self.total_key, predictions.sum()))
+        self.accuracy_sum += float(forecast.get("model_accuracy", 0.0))
+        if not self.dates:
+            self.dates = list(forecast.get("dates", []))
+
+        if historical_avg:
+            predicted_avg = float(predictions.mean()) if predictions.size else 0.0
+            growth = (predicted_avg - historical_avg) / historical_avg * 100
+            self.growth_count += 1
+            self.growth_sum += growth
+            self.high_growth += growth > 10
+            self.declining += growth < -5
+
+        if self.daily_total is None:
+            self.daily_total = np.zeros(len(predictions))
+        if len(predictions) != len(self.daily_total):
+            return
+        self.daily_total += predictions
+        for group, key in (
+            ("by_city", city_id),
+            ("by_store", store_id),
+            ("by_product", str(product_id)),
+        ):
+            bucket = self.aggregates[group].setdefault(
+                str(key), {"predictions": np.zeros(len(predictions)), "count": 0}
+            )
+            bucket["predictions"] += predictions
+            bucket["count"] += 1
+
+    def _aggregate(self, predictions: np.ndarray, count: int) -> Dict[str, Any]:
+        total = float(predictions.sum())
+        return {
+            "dates": self.dates,
+            "predictions": predictions.tolist(),
+            "total_predicted": total,
+            "avg_daily_predicted": total / len(predictions) if len(predictions) else 0,
+            "combination_count": count,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.combinations:
+            return {
+                "total_combinations": 0,
+                "failed_combinations": self.failed,
+                "message": "No forecast data available",
+            }
+        aggregated_data = {
+            group: {
+                key: self._aggregate(bucket["predictions"], bucket["count"])
+                for key, bucket in buckets.items()
+            }
+            for group, buckets in self.aggregates.items()
+        }
+        aggregated_data["total"] = self._aggregate(self.daily_total, self.combinations)
+        return {
+            "total_combinations": self.combinations,
+            "failed_combinations": self.failed,
+            "total_predicted": self.total,
+            "avg_model_accuracy": self.accuracy_sum / self.combinations * 100,
+            "avg_growth_rate": (
+                self.growth_sum / self.growth_count if self.growth_count else 0
+            ),
+            "high_growth_combinations": self.high_growth,
+            "declining_combinations": self.declining,
+            "aggregated_data": aggregated_data,
+        }
@@ -0,0 +1,366 @@
+"""
+Hierarchical forecasting: top-down disaggregation and forecast reconciliation.
+
+Forecasting every city, store and product series with its own model costs
+one model per leaf, and the forecasts don't add up across levels. Here the
+grid is a hierarchy (e.g. total -> city -> store -> product) described by
+a sparse summing matrix ``S`` (nodes x leaves), and leaf forecasts are
+derived from a few base forecasts:
+
+- top-down (``top_down_historical``, ``top_down_forecast``): forecast the
+  total, or every aggregate level, and split each node's forecast across
+  its children by forecast proportions where the children were forecast
+  and by historical proportions below that;
+- reconciliation (``ols``, ``wls_struct``, ``wls_var``, ``mint_shrink``):
+  base forecasts for every node are projected onto coherent leaf
+  forecasts with the MinT estimator ``(S' W^-1 S)^-1 S' W^-1 y_hat``.
+
+``W`` is diagonal, or diagonal plus a low-rank residual term for the
+shrunk MinT covariance, so the projection is solved with the Woodbury
+identity over the aggregate nodes and residual window: no dense
+nodes x nodes or leaves x leaves matrix is formed, and large grids cost
+one sparse product plus a small dense solve.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from scipy import sparse  # type: ignore
+
+TOP_DOWN_METHODS = ("top_down_historical", "top_down_forecast")
+RECONCILIATION_METHODS = ("ols", "wls_struct", "wls_var", "mint_shrink")
+HIERARCHICAL_METHODS = TOP_DOWN_METHODS + RECONCILIATION_METHODS
+
+# Keeps the shrunk MinT covariance invertible when the estimated
+# shrinkage intensity is zero
+MIN_SHRINKAGE = 1e-6
+
+
+@dataclass
+class Hierarchy:
+    """A strict hierarchy of series and its summing matrix."""
+
+    # Key columns of each level, from the total (no keys) to the leaves
+    levels: List[Tuple[str, ...]]
+    # One row per node: its level and key values (missing above its level)
+    nodes: pd.DataFrame
+    # Leaf keys, in summing-matrix column order
+    leaves: pd.DataFrame
+    # nodes x leaves, 1 where the leaf is under the node
+    summing: sparse.csr_matrix
+    # Parent node of each node (-1 for the total)
+    parent: np.ndarray
+    # Node rows of each level
+    level_slices: List[slice]
+
+    @property
+    def n_nodes(self) -> int:
+        return self.summing.shape[0]
+
+    @property
+    def n_leaves(self) -> int:
+        return self.summing.shape[1]
+
+    def aggregate(self, leaf_values: np.ndarray) -> np.ndarray:
+        """Values of every node from leaf values (leaves x ...)."""
+        return np.asarray(self.summing @ leaf_values)
+
+    def level_nodes(self, level: int) -> pd.DataFrame:
+        return self.nodes.iloc[self.level_slices[level]]
+
+    def node_keys(self, level: int) -> List[Tuple]:
+        """Key values of each node of a level, in node order."""
+        keys = list(self.levels[level])
+        if not keys:
+            return [()]
+        frame = self.leaves[keys].drop_duplicates().sort_values(keys)
+        return list(frame.itertuples(index=False, name=None))
+
+
+def build_hierarchy(leaves: pd.DataFrame, levels: Sequence[Sequence[str]]) -> Hierarchy:
+    """
+    Hierarchy over the rows of ``leaves``.
+
+    Args:
+        leaves: One row per leaf series (duplicates are dropped)
+        levels: Key columns per level below the total, each level adding
+            columns to the one above; the last one identifies the leaves
+
+    Raises:
+        ValueError: If the levels are not nested
+    """
+    keys: List[Tuple[str, ...]] = [()]
+    for level in levels:
+        level = tuple(level)
+        if not set(keys[-1]) < set(level):
+            raise ValueError(f"Level {list(level)} must extend {list(keys[-1])}")
+        keys.append(level)
+
+    leaf_keys = list(keys[-1])
+    leaves = (
+        leaves[leaf_keys]
+        .drop_duplicates()
+        .sort_values(leaf_keys)
+        .reset_index(drop=True)
+    )
+    n_leaves = len(leaves)
+
+    rows, node_frames, slices, codes_per_level = [], [], [], []
+    offset = 0
+    for level, level_keys in enumerate(keys):
+        if level_keys:
+            codes = leaves.groupby(list(level_keys), sort=True).ngroup().to_numpy()
+            frame = leaves.groupby(list(level_keys), sort=True).size().reset_index()
+            frame = frame[list(level_keys)]
+        else:
+            codes = np.zeros(n_leaves, dtype=int)
+            frame = pd.DataFrame(index=[0])
+        frame.insert(0, "level", level)
+        n_level = len(frame)
+        rows.append(offset + codes)
+        codes_per_level.append(offset + codes)
+        node_frames.append(frame)
+        slices.append(slice(offset, offset + n_level))
+        offset += n_level
+
+    summing = sparse.csr_matrix(
+        (
+            np.ones(n_leaves * len(keys)),
+            (np.concatenate(rows), np.tile(np.arange(n_leaves), len(keys))),
+        ),
+        shape=(offset, n_leaves),
+    )
+
+    parent = np.full(offset, -1)
+    for level in range(1, len(keys)):
+        parent[codes_per_level[level]] = codes_per_level[level - 1]
+
+    return Hierarchy(
+        levels=keys,
+        nodes=pd.concat(node_frames, ignore_index=True),
+        leaves=leaves,
+        summing=summing,
+        parent=parent,
+        level_slices=slices,
+    )
+
+
+def _split(
+    parent_values: np.ndarray,
+    weights: np.ndarray,
+    parents: np.ndarray,
+    n_nodes: int,
+) -> np.ndarray:
+    """Split each parent's values across its children in proportion to weights."""
+    weights = np.clip(weights, 0, None)
+    totals = np.zeros((n_nodes, weights.shape[1]))
+    np.add.at(totals, parents, weights)
+    children = np.bincount(parents, minlength=n_nodes)[parents][:, None]
+    parent_totals = totals[parents]
+    # Children of a parent with no sales or forecast split it evenly
+    shares = np.divide(
+        weights,
+        parent_totals,
+        out=np.broadcast_to(1.0 / children, weights.shape).copy(),
+        where=parent_totals > 0,
+    )
+    return parent_values * shares
+
+
+def top_down(hierarchy: Hierarchy, base: np.ndarray, history: np.ndarray) -> np.ndarray:
+    """
+    Leaf forecasts disaggregated from the highest fully forecast level.
+
+    Below it, each level with a base forecast for every node splits its
+    parents by forecast proportions; other levels split them by historical
+    proportions (each child's share of its parent's historical sales).
+
+    Args:
+        base: nodes x horizon base forecasts, NaN rows for nodes that
+            were not forecast
+        history: Historical leaf sales (leaves x days, or leaf totals)
+
+    Returns:
+        leaves x horizon forecasts
+
+    Raises:
+        ValueError: If no level is fully forecast
+    """
+    base = np.asarray(base, dtype=float)
+    forecast_levels = [
+        level
+        for level, rows in enumerate(hierarchy.level_slices)
+        if np.isfinite(base[rows]).all()
+    ]
+    if not forecast_levels:
+        raise ValueError("Top-down forecasting needs a fully forecast level")
+
+    history = np.asarray(history, dtype=float)
+    if history.ndim == 2:
+        history = history.sum(axis=1)
+    historical = hierarchy.aggregate(history)[:, None]
+
+    start = forecast_levels[0]
+    values = np.full(base.shape, np.nan)
+    values[hierarchy.level_slices[start]] = base[hierarchy.level_slices[start]]
+    for level in range(start + 1, len(hierarchy.levels)):
+        rows = hierarchy.level_slices[level]
+        weights = base[rows] if level in forecast_levels else historical[rows]
+        parents = hierarchy.parent[rows]
+        values[rows] = _split(
+            values[parents],
+            np.broadcast_to(weights, base[rows].shape),
+            parents,
+            hierarchy.n_nodes,
+        )
+    return values[hierarchy.level_slices[-1]]
+
+
+def align_residuals(residuals: Sequence[pd.Series]) -> np.ndarray:
+    """
+    Nodes x days residual matrix over the dates every node has.
+
+    Each node's residuals are indexed by date; series of different lengths
+    or with gaps are inner-joined on their common dates, so a column always
+    holds the same day for every node.
+    """
+    aligned = pd.concat(list(residuals), axis=1, join="inner").dropna()
+    return aligned.sort_index().to_numpy(dtype=float).T
+
+
+def shrinkage_intensity(residuals: np.ndarray) -> float:
+    """
+    Schäfer-Strimmer shrinkage of the residual correlation towards the
+    identity (as in the MinT-shrink estimator), from nodes x days residuals.
+
+    The sums over node pairs are computed through days x days Gram
+    matrices, so the cost is linear in the number of nodes.
+    """
+    x = np.asarray(residuals, dtype=float).T
+    n_obs = x.shape[0]
+    if n_obs < 2:
+        return 1.0
+    scale = np.sqrt((x**2).mean(axis=0))
+    x = x / np.where(scale > 0, scale, 1.0)
+    squares = x**2
+    gram = x @ x.T
+
+    # Sum over i != j of the estimated variance of the correlation r_ij
+    pair_fourth = (squares.sum(axis=1) ** 2).sum() - (squares**2).sum()
+    pair_cross = (gram**2).sum() - (squares.sum(axis=0) ** 2).sum()
+    variance = (pair_fourth - pair_cross / n_obs) / (n_obs * (n_obs - 1))
+    # Sum over i != j of r_ij^2
+    correlation = pair_cross / n_obs**2
+    if correlation <= 0:
+        return 1.0
+    return float(np.clip(variance / correlation, 0.0, 1.0))
+
+
+def _covariance(
+    hierarchy: Hierarchy, method: str, residuals: Optional[np.ndarray]
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """``W`` as (diagonal, low-rank factor U) with W = diag + U U'."""
+    if method == "ols":
+        return np.ones(hierarchy.n_nodes), None
+    if method == "wls_struct":
+        return np.asarray(hierarchy.summing.sum(axis=1)).ravel(), None
+
+    if residuals is None:
+        raise ValueError(f"Reconciliation method {method} needs residuals")
+    residuals = np.asarray(residuals, dtype=float)
+    variance = (residuals**2).mean(axis=1)
+    # Nodes without residuals (e.g. never forecast) get the largest variance
+    positive = variance > 0
+    fill = variance[positive].max() if positive.any() else 1.0
+    variance = np.where(positive, variance, fill)
+    if method == "wls_var":
+        return variance, None
+
+    shrinkage = max(shrinkage_intensity(residuals), MIN_SHRINKAGE)
+    factor = residuals * np.sqrt((1 - shrinkage) / residuals.shape[1])
+    return shrinkage * variance, factor
+
+
+def reconcile(
+    hierarchy: Hierarchy,
+    base: np.ndarray,
+    method: str = "ols",
+    residuals: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Coherent leaf forecasts from base forecasts of every node.
+
+    Args:
+        base: nodes x horizon base forecasts
+        method: ``ols`` (W = I), ``wls_struct`` (W = leaves per node),
+            ``wls_var`` (W = residual variances) or ``mint_shrink``
+            (shrunk residual covariance)
+        residuals: nodes x days in-sample residuals, aligned in time
+            (``wls_var`` and ``mint_shrink``)
+
+    Returns:
+        leaves x horizon forecasts; ``hierarchy.aggregate`` gives every level
+
+    Raises:
+        ValueError: For unknown methods or missing residuals
+    """
+    if method not in RECONCILIATION_METHODS:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+    base = np.asarray(base, dtype=float)
+    squeeze = base.ndim == 1
+    if squeeze:
+        base = base[:, None]
+
+    diagonal, factor = _covariance(hierarchy, method, residuals)
+    n_agg = hierarchy.n_nodes - hierarchy.n_leaves
+    # Nodes are ordered aggregates first, leaves last: S = [C; I]
+    C = hierarchy.summing[:n_agg]
+    d_agg, d_leaf = diagonal[:n_agg], diagonal[n_agg:]
+
+    # S' W^-1 S = diag(1/d_leaf) + Z K Z' with Z = [C', V] and
+    # K = blockdiag(diag(1/d_agg), -M^-1), from the Woodbury form of W^-1
+    weighted = base / diagonal[:, None]
+    rhs = C.T @ weighted[:n_agg] + weighted[n_agg:]
+    inverse_k = [np.diag(d_agg)]
+    V = None
+    if factor is not None:
+        scaled = factor / diagonal[:, None]
+        V = C.T @ scaled[:n_agg] + scaled[n_agg:]
+        M = np.eye(factor.shape[1]) + factor.T @ scaled
+        rhs = rhs - V @ np.linalg.solve(M, factor.T @ weighted)
+        inverse_k.append(-M)
+
+    def z_t(x: np.ndarray) -> np.ndarray:
+        parts = [C @ x]
+        if V is not None:
+            parts.append(V.T @ x)
+        return np.vstack(parts)
+
+    def z(y: np.ndarray) -> np.ndarray:
+        out = C.T @ y[:n_agg]
+        if V is not None:
+            out = out + V @ y[n_agg:]
+        return out
+
+    # Z' D Z with D = diag(d_leaf), blockwise
+    dC = C.multiply(d_leaf[None, :]).tocsr()
+    blocks = [[(dC @ C.T).toarray()]]
+    if V is not None:
+        cv = dC @ V
+        blocks = [[blocks[0][0], cv], [cv.T, V.T @ (V * d_leaf[:, None])]]
+    inner = np.block(blocks)
+    size = inner.shape[0]
+    k_inv = np.zeros((size, size))
+    k_inv[:n_agg, :n_agg] = inverse_k[0]
+    if V is not None:
+        k_inv[n_agg:, n_agg:] = inverse_k[1]
+
+    scaled_rhs = d_leaf[:, None] * rhs
+    if size:
+        correction = np.linalg.solve(k_inv + inner, z_t(scaled_rhs))
+        leaves = scaled_rhs - d_leaf[:, None] * z(correction)
+    else:
+        leaves = scaled_rhs
+    return leaves[:, 0] if squeeze else leaves
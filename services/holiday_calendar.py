@@ -0,0 +1,236 @@
+"""
+Holiday calendar index shared by feature building, forecasting and holiday
+impact analysis.
+
+Holiday dates are loaded once per city into sorted ``datetime64[D]`` arrays, so
+distance-to-holiday features for millions of rows cost one ``np.searchsorted``
+per city instead of a scan of the holiday list for every row.
+"""
+
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Distance reported when no holiday exists on that side of a date
+NO_HOLIDAY_DAYS = 365
+
+HOLIDAY_COLUMNS = ["date", "holiday_name", "holiday_type", "significance"]
+
+
+def _to_days(dates: Any) -> np.ndarray:
+    """Convert dates (strings, datetimes, Series) to a ``datetime64[D]`` array."""
+    values = pd.to_datetime(pd.Series(np.asarray(dates).ravel()))
+    return values.to_numpy(dtype="datetime64[D]")
+
+
+class HolidayCalendar:
+    """Sorted per-city holiday date index with vectorized distance lookups."""
+
+    def __init__(
+        self,
+        holidays: Optional[pd.DataFrame] = None,
+        city_holidays: Optional[Dict[int, Iterable[Any]]] = None,
+    ):
+        """
+        Args:
+            holidays: Network-wide holidays with ``date`` and optional
+                ``holiday_name``/``holiday_type``/``significance`` columns
+            city_holidays: Extra holiday dates per city id
+        """
+        if holidays is None or holidays.empty:
+            holidays = pd.DataFrame(columns=HOLIDAY_COLUMNS)
+        holidays = holidays.copy()
+        for col in HOLIDAY_COLUMNS:
+            if col not in holidays.columns:
+                holidays[col] = None
+        holidays["date"] = pd.to_datetime(holidays["date"])
+        self.holidays = holidays.sort_values("date").reset_index(drop=True)
+
+        self._global = np.unique(_to_days(self.holidays["date"]))
+        self._by_city: Dict[int, np.ndarray] = {
+            int(city_id): np.union1d(self._global, _to_days(list(dates)))
+            for city_id, dates in (city_holidays or {}).items()
+        }
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_sales(
+        cls,
+        df: pd.DataFrame,
+        date_col: str = "sale_date",
+        flag_col: str = "holiday_flag",
+        city_col: Optional[str] = None,
+    ) -> "HolidayCalendar":
+        """Build a calendar from the holiday flags of a sales frame."""
+        if df.empty or flag_col not in df.columns or date_col not in df.columns:
+            return cls()
+        flagged = df.loc[df[flag_col].fillna(0).astype(int) == 1]
+        if city_col is None or city_col not in flagged.columns:
+            return cls(pd.DataFrame({"date": flagged[date_col].unique()}))
+        city_holidays = {
+            city_id: group[date_col].unique()
+            for city_id, group in flagged.groupby(city_col)
+        }
+        return cls(city_holidays=city_holidays)
+
+    def dates(self, city_id: Optional[int] = None) -> np.ndarray:
+        """Sorted unique holiday dates for a city (network-wide if unknown)."""
+        if city_id is None or pd.isna(city_id):
+            return self._global
+        return self._by_city.get(int(city_id), self._global)
+
+    def _per_city(self, dates: Any, city_ids: Any, fn) -> np.ndarray:
+        days = _to_days(dates)
+        if city_ids is None or np.isscalar(city_ids):
+            return fn(days, self.dates(city_ids))
+        city_ids = pd.Series(np.asarray(city_ids).ravel())
+        out = np.empty(len(days), dtype=np.int64)
+        for city_id, idx in city_ids.groupby(city_ids, dropna=False).indices.items():
+            out[idx] = fn(days[idx], self.dates(city_id))
+        return out
+
+    @staticmethod
+    def _days_since(days: np.ndarray, holidays: np.ndarray) -> np.ndarray:
+        pos = np.searchsorted(holidays, days, side="right") - 1
+        found = pos >= 0
+        out = np.full(len(days), NO_HOLIDAY_DAYS, dtype=np.int64)
+        out[found] = (days[found] - holidays[pos[found]]).astype(np.int64)
+        return out
+
+    @staticmethod
+    def _days_until(days: np.ndarray, holidays: np.ndarray) -> np.ndarray:
+        pos = np.searchsorted(holidays, days, side="right")
+        found = pos < len(holidays)
+        out = np.full(len(days), NO_HOLIDAY_DAYS, dtype=np.int64)
+        out[found] = (holidays[pos[found]] - days[found]).astype(np.int64)
+        return out
+
+    def days_since(self, dates: Any, city_ids: Any = None) -> np.ndarray:
+        """Days since the most recent holiday on or before each date."""
+        return self._per_city(dates, city_ids, self._days_since)
+
+    def days_until(self, dates: Any, city_ids: Any = None) -> np.ndarray:
+        """Days until the next holiday strictly after each date."""
+        return self._per_city(dates, city_ids, self._days_until)
+
+    def is_holiday(self, dates: Any, city_ids: Any = None) -> np.ndarray:
+        """Whether each date is itself a holiday."""
+        return self.days_since(dates, city_ids) == 0
+
+    def in_window(
+        self, dates: Any, city_ids: Any = None, before: int = 3, after: int = 1
+    ) -> np.ndarray:
+        """Whether each date falls within ``before`` days ahead of or ``after``
+        days following a holiday."""
+        return (self.days_until(dates, city_ids) <= before) | (
+            self.days_since(dates, city_ids) <= after
+        )
+
+    def features(
+        self, dates: Any, city_ids: Any = None, before: int = 3, after: int = 1
+    ) -> pd.DataFrame:
+        """Distance-to-holiday feature block for a column of dates."""
+        since = self.days_since(dates, city_ids)
+        until = self.days_until(dates, city_ids)
+        return pd.DataFrame(
+            {
+                "days_since_last_holiday": since,
+                "days_until_next_holiday": until,
+                "is_holiday": (since == 0).astype(int),
+                "holiday_window": ((until <= before) | (since <= after)).astype(int),
+            }
+        )
+
+    def to_frame(self, start_date: Any = None, end_date: Any = None) -> pd.DataFrame:
+        """Network-wide holidays in ``[start_date, end_date]`` as a frame."""
+        holidays = self.holidays
+        if start_date is not None:
+            holidays = holidays[holidays["date"] >= pd.to_datetime(start_date)]
+        if end_date is not None:
+            holidays = holidays[holidays["date"] <= pd.to_datetime(end_date)]
+        holidays = holidays[HOLIDAY_COLUMNS].reset_index(drop=True)
+        holidays["date"] = holidays["date"].dt.date
+        return holidays
+
+
+# Single-slot cache: (db_manager, calendar). Holidays change rarely, so the
+# calendar is reloaded only after the TTL or when explicitly refreshed.
+_calendar_cache: Dict[str, Any] = {"manager": None, "calendar": None}
+CALENDAR_TTL_SECONDS = 6 * 60 * 60
+
+
+def cached_holiday_calendar() -> Optional[HolidayCalendar]:
+    """
+    The shared calendar if one has been loaded and is still fresh.
+
+    For synchronous model code that cannot await ``load_holiday_calendar``;
+    returns None before the first load (e.g. in offline training), in which
+    case callers fall back to the holiday flags of their own data.
+    """
+    cached = _calendar_cache["calendar"]
+    if cached is None or time.time() - cached.loaded_at >= CALENDAR_TTL_SECONDS:
+        return None
+    return cached
+
+
+async def load_holiday_calendar(
+    db_manager: Any, refresh: bool = False, include_city_flags: bool = True
+) -> HolidayCalendar:
+    """
+    Load (or return the cached) holiday calendar for a database manager.
+
+    Network-wide holidays come from ``holiday_calendar``; per-city holidays
+    are the dates flagged in ``sales_data.holiday_flag`` for each city.
+    """
+    cached = _calendar_cache["calendar"]
+    if (
+        not refresh
+        and cached is not None
+        and _calendar_cache["manager"] is db_manager
+        and time.time() - cached.loaded_at < CALENDAR_TTL_SECONDS
+    ):
+        return cached
+
+    async with db_manager.get_connection() as conn:
+        records = await conn.fetch(
+            """
+            SELECT date, holiday_name, holiday_type, significance
+            FROM holiday_calendar
+            ORDER BY date
+            """
+        )
+        city_records = []
+        if include_city_flags:
+            try:
+                city_records = await conn.fetch(
+                    """
+                    SELECT DISTINCT city_id, sale_date
+                    FROM sales_data
+                    WHERE holiday_flag::int = 1
+                    """
+                )
+            except Exception as e:
+                logger.warning(f"Could not load per-city holiday flags: {e}")
+
+    holidays = (
+        pd.DataFrame([dict(r) for r in records], columns=HOLIDAY_COLUMNS)
+        if records
+        else None
+    )
+    city_holidays: Dict[int, list] = {}
+    for record in city_records:
+        city_holidays.setdefault(record["city_id"], []).append(record["sale_date"])
+
+    calendar = HolidayCalendar(holidays, city_holidays)
+    _calendar_cache.update(manager=db_manager, calendar=calendar)
+    logger.info(
+        f"Loaded holiday calendar: {len(calendar.dates())} network-wide dates, "
+        f"{len(city_holidays)} cities"
+    )
+    return calendar
@@ -16,6 +16,11 @@ from scipy.spatial.distance import pdist, squareform
 from sklearn.cluster import DBSCAN
 from fastapi import Request  # Import Request
 
+from services.transfer_flow_solver import (
+    TransferSolverReport,
+    haversine_km,
+    solve_transfer_network,
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -63,12 +68,32 @@ class InventoryOptimizationService:
             "stockout_threshold_days": 3,
             "overstock_threshold_days": 30,
             "safety_stock_multiplier": 1.5,
+            "max_transfer_cost": 100,
+            "unit_revenue": 25,
+            "max_sources_per_target": 10,
+            "solver_time_limit_s": 20.0,
+            "solver_mip_rel_gap": 1e-4,
         }
+        self.last_solver_report: Optional[TransferSolverReport] = None
 
     async def analyze_cross_store_opportunities(
-        self, request: Request, city_id: Optional[int] = None
+        self,
+        request: Request,
+        city_id: Optional[int] = None,
+        solver: str = "greedy",
     ) -> List[InventoryOpportunity]:
-        """Identify cross-store inventory optimization opportunities."""
+        """
+        Identify cross-store inventory optimization opportunities.
+
+        Args:
+            request: FastAPI request (provides the database manager)
+            city_id: Optional city filter; None analyzes the whole network
+            solver: 'greedy' for per-product pairwise matching, or
+                'network_flow' to solve all products as one min-cost
+                transportation problem (see ``last_solver_report``)
+        """
+        if solver not in ("greedy", "network_flow"):
+            raise ValueError(f"Unknown solver: {solver}")
         try:
             # Get comprehensive inventory analysis
             inventory_data = await self._get_inventory_analysis(
@@ -77,20 +102,27 @@ class InventoryOptimizationService:
             store_profiles = await self._generate_store_profiles(
                 request, city_id
             )  # Pass request
-            transfer_costs = await self._calculate_transfer_costs(
-                request, city_id
-            )  # Pass request
 
             opportunities = []
 
-            # Analyze each product across stores
-            products = set(item["product_id"] for item in inventory_data)
-
-            for product_id in products:
-                product_opportunities = await self._analyze_product_optimization(
-                    product_id, inventory_data, store_profiles, transfer_costs
-                )
-                opportunities.extend(product_opportunities)
+            if solver == "network_flow":
+                opportunities = self._solve_network_transfers(inventory_data)
+            else:
+                self.last_solver_report = None
+                transfer_costs = await self._calculate_transfer_costs(
+                    request, city_id
+                )  # Pass request
+
+                # Group rows by product once instead of re-filtering per product
+                products: Dict[int, List[Dict]] = {}
+                for item in inventory_data:
+                    products.setdefault(item["product_id"], []).append(item)
+
+                for product_id, product_data in products.items():
+                    product_opportunities = await self._analyze_product_optimization(
+                        product_id, product_data, store_profiles, transfer_costs
+                    )
+                    opportunities.extend(product_opportunities)
 
             # Prioritize opportunities
             opportunities = self._prioritize_opportunities(opportunities)
@@ -288,27 +320,29 @@ class InventoryOptimizationService:
 
                 result = await conn.fetch(query, *params)
 
-                stores = {
-                    row["store_id"]: (row["latitude"], row["longitude"])
-                    for row in result
-                }
-                transfer_costs = {}
+                if not result:
+                    return {}
 
-                # Calculate distances between all store pairs
-                for store1_id, (lat1, lon1) in stores.items():
-                    for store2_id, (lat2, lon2) in stores.items():
-                        if store1_id != store2_id:
-                            # Haversine distance formula
-                            distance_km = self._calculate_distance(
-                                lat1, lon1, lat2, lon2
-                            )
-                            cost = Decimal(
-                                str(
-                                    distance_km
-                                    * self.optimization_params["transfer_cost_per_km"]
-                                )
-                            )
-                            transfer_costs[(store1_id, store2_id)] = cost
+                store_ids = np.array([row["store_id"] for row in result])
+                coords = np.array(
+                    [(row["latitude"], row["longitude"]) for row in result],
+                    dtype=float,
+                )
+
+                # Distances between all store pairs in one vectorized pass
+                distance_km = haversine_km(
+                    coords[:, None, 0],
+                    coords[:, None, 1],
+                    coords[None, :, 0],
+                    coords[None, :, 1],
+                )
+                costs = distance_km * self.optimization_params["transfer_cost_per_km"]
+
+                transfer_costs = {}
+                for i, j in zip(*np.nonzero(store_ids[:, None] != store_ids[None, :])):
+                    transfer_costs[(int(store_ids[i]), int(store_ids[j]))] = Decimal(
+                        str(float(costs[i, j]))
+                    )
 
                 return transfer_costs
 
@@ -316,23 +350,6 @@ class InventoryOptimizationService:
             self.logger.error(f"Error calculating transfer costs: {e}")
             return {}
 
-    def _calculate_distance(
-        self, lat1: float, lon1: float, lat2: float, lon2: float
-    ) -> float:
-        """Calculate distance between two points using Haversine formula."""
-        from math import radians, sin, cos, sqrt, atan2
-
-        R = 6371  # Earth's radius in kilometers
-
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-
-        a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-        return R * c
-
     async def _analyze_product_optimization(
         self,
         product_id: int,
@@ -383,7 +400,7 @@ class InventoryOptimizationService:
                 transfer_cost = transfer_costs[transfer_key]
 
                 # Skip if too expensive to transfer
-                if transfer_cost > 100:  # Max $100 transfer cost
+                if transfer_cost > self.optimization_params["max_transfer_cost"]:
                     continue
 
                 # Calculate optimal transfer quantity
@@ -465,6 +482,70 @@ class InventoryOptimizationService:
 
         return opportunities
 
+    def _solve_network_transfers(
+        self, inventory_data: List[Dict]
+    ) -> List[InventoryOpportunity]:
+        """Rebalance every product at once with the network-flow solver."""
+        flows, report = solve_transfer_network(inventory_data, self.optimization_params)
+        self.last_solver_report = report
+
+        opportunities: List[InventoryOpportunity] = []
+        for flow in flows.to_dict("records"):
+            excess_item = {
+                key[len("src_") :]: value
+                for key, value in flow.items()
+                if key.startswith("src_")
+            }
+            shortage_item = {
+                key[len("dst_") :]: value
+                for key, value in flow.items()
+                if key.startswith("dst_")
+            }
+            quantity = int(flow["quantity"])
+            transfer_cost = Decimal(str(round(float(flow["transfer_cost"]), 2)))
+
+            optimization_score = self._calculate_optimization_score(
+                excess_item, shortage_item, quantity, transfer_cost
+            )
+            potential_sales_increase = min(
+                quantity, shortage_item["avg_daily_sales"] * 7
+            )
+            revenue_impact = Decimal(
+                str(potential_sales_increase * self.optimization_params["unit_revenue"])
+            )
+            urgency_level = self._calculate_urgency_level(shortage_item, excess_item)
+
+            opportunities.append(
+                InventoryOpportunity(
+                    source_store_id=int(excess_item["store_id"]),
+                    target_store_id=int(shortage_item["store_id"]),
+                    product_id=int(excess_item["product_id"]),
+                    city_id=int(excess_item["city_id"]),
+                    recommended_quantity=quantity,
+                    optimization_score=Decimal(str(optimization_score)),
+                    potential_revenue_impact=revenue_impact,
+                    transfer_cost=transfer_cost,
+                    urgency_level=urgency_level,
+                    implementation_priority=self._determine_priority(
+                        optimization_score, urgency_level, revenue_impact
+                    ),
+                    reasoning=f"Network-flow plan: transfer {quantity} units from Store {int(excess_item['store_id'])} ({excess_item['days_of_inventory']:.1f} days inventory) to Store {int(shortage_item['store_id'])} ({shortage_item['days_of_inventory']:.1f} days inventory)",
+                    expected_benefit={
+                        "source_days_reduction": quantity
+                        / max(excess_item["avg_daily_sales"], 1),
+                        "target_days_increase": quantity
+                        / max(shortage_item["avg_daily_sales"], 1),
+                        "potential_sales_increase": potential_sales_increase,
+                        "roi_estimate": float(
+                            revenue_impact / max(transfer_cost, Decimal("1"))
+                        ),
+                        "distance_km": float(flow["distance_km"]),
+                    },
+                )
+            )
+
+        return opportunities
+
     def _calculate_optimization_score(
         self,
         excess_item: Dict,
@@ -1,15 +1,53 @@
 """
 Live Weather Service for getting current weather conditions from OpenWeatherMap API
+
+All provider calls go through one long-lived ``aiohttp`` connection pool.
+Results are cached per (city, day) with a TTL and persisted to disk, so
+restarts and dashboard refreshes do not hit the provider again; the cache
+file is written in a worker thread, at most once per
+``WEATHER_CACHE_SAVE_DELAY`` seconds, so misses never block the event loop.
+Concurrent requests for the same city share a single in-flight call, and
+outbound calls are rate limited. Point ``WEATHER_API_BASE_URL`` at
+``scripts/mock_weather_server.py`` to run and benchmark everything offline.
 """
 
 import asyncio
 import aiohttp
+import json
 import os
-from typing import Dict, Optional
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 
+from utils.logger import get_logger
+from utils.tracing import record_cache
+
 load_dotenv()
 
+logger = get_logger(__name__)
+
+
+class _RateLimiter:
+    """Spaces outbound calls to at most ``rate`` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
 
 class LiveWeatherService:
     def __init__(self):
@@ -17,13 +55,44 @@ class LiveWeatherService:
         self.api_key = os.getenv("WEATHER_API_KEY") or os.getenv("OPENWEATHER_API_KEY")
 
         # Use WeatherAPI if we have WEATHER_API_KEY, otherwise OpenWeatherMap
+        base_override = os.getenv("WEATHER_API_BASE_URL", "").rstrip("/")
         if os.getenv("WEATHER_API_KEY"):
-            self.base_url = "https://api.weatherapi.com/v1/current.json"
+            self.base_url = (base_override or "https://api.weatherapi.com") + (
+                "/v1/current.json"
+            )
             self.service_type = "weatherapi"
         else:
-            self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+            self.base_url = (base_override or "https://api.openweathermap.org") + (
+                "/data/2.5/weather"
+            )
             self.service_type = "openweathermap"
 
+        # Connection pool, cache and rate limiting settings
+        self.max_connections = int(os.getenv("WEATHER_MAX_CONNECTIONS", "8"))
+        self.request_timeout = float(os.getenv("WEATHER_REQUEST_TIMEOUT", "10"))
+        self.cache_ttl = int(os.getenv("WEATHER_CACHE_TTL", "1800"))
+        self.rate_limit = float(os.getenv("WEATHER_RATE_LIMIT_PER_SEC", "5"))
+        self.cache_path = Path(
+            os.getenv("WEATHER_CACHE_PATH", "model_cache/live_weather_cache.json")
+        )
+        self.cache_save_delay = float(os.getenv("WEATHER_CACHE_SAVE_DELAY", "1.0"))
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._rate_limiter: Optional[_RateLimiter] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._cache: Dict[str, Dict[str, Any]] = self._load_cache()
+        self._save_task: Optional[asyncio.Task] = None
+        self._cache_dirty = False
+        self._save_lock = threading.Lock()
+        self.stats = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "coalesced": 0,
+            "provider_calls": 0,
+            "provider_errors": 0,
+        }
+
         # Mapping of city_id to actual US city names
         self.city_mapping = {
             "1": "New York,NY,US",
@@ -46,79 +115,226 @@ class LiveWeatherService:
             "18": "Boston,MA,US",
         }
 
+    # ------------------------------------------------------------------
+    # Connection pool
+    # ------------------------------------------------------------------
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use in this loop."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._session_loop = loop
+            self._rate_limiter = _RateLimiter(self.rate_limit)
+        return self._session
+
+    async def close(self):
+        """Close the shared connection pool (called on application shutdown)."""
+        await self.flush_cache()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    # ------------------------------------------------------------------
+    # Persistent TTL cache
+    # ------------------------------------------------------------------
+
+    def _cache_key(self, city_id: str) -> str:
+        return f"{self.service_type}:{city_id}:{date.today().isoformat()}"
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {
+            key: entry
+            for key, entry in entries.items()
+            if now - entry.get("fetched_at", 0) < self.cache_ttl
+        }
+
+    def _save_cache(self):
+        """Write the cache file (blocking; run in a worker thread)."""
+        try:
+            with self._save_lock:
+                # Copied under the lock, so the last write has the newest entries
+                entries = dict(self._cache)
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not persist weather cache: {e}")
+
+    def _schedule_save(self):
+        """Persist the cache soon, folding a burst of misses into one write."""
+        self._cache_dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self._save_later())
+
+    async def _save_later(self):
+        # Entries stored during a write trigger one more write
+        while self._cache_dirty:
+            await asyncio.sleep(self.cache_save_delay)
+            self._cache_dirty = False
+            await asyncio.to_thread(self._save_cache)
+
+    async def flush_cache(self):
+        """Write a pending cache update now (e.g. on shutdown)."""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+            self._save_task = None
+            self._cache_dirty = False
+            await asyncio.to_thread(self._save_cache)
+
+    def _get_cached(self, key: str) -> Optional[Dict]:
+        entry = self._cache.get(key)
+        if entry and time.time() - entry["fetched_at"] < self.cache_ttl:
+            return entry["data"]
+        return None
+
+    def _store_cached(self, key: str, data: Dict):
+        now = time.time()
+        cache = {
+            k: v
+            for k, v in self._cache.items()
+            if now - v["fetched_at"] < self.cache_ttl
+        }
+        cache[key] = {"fetched_at": now, "data": data}
+        # Swapped in whole, so a writer thread never sees a half-built cache
+        self._cache = cache
+        self._schedule_save()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
     async def get_current_weather(self, city_id: str) -> Optional[Dict]:
         """
         Get current weather for a city using OpenWeatherMap API
+
+        Served from the (city, day) cache when fresh; concurrent calls for the
+        same city wait on one shared provider request.
         """
         if not self.api_key:
             return None
 
+        city_id = str(city_id)
         city_name = self.city_mapping.get(city_id)
         if not city_name:
             return None
 
+        key = self._cache_key(city_id)
+        cached = self._get_cached(key)
+        record_cache("live_weather", cached is not None)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        self.stats["cache_misses"] += 1
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.ensure_future(self._fetch_current_weather(city_id, city_name))
+        self._in_flight[key] = future
         try:
-            async with aiohttp.ClientSession() as session:
-                if self.service_type == "weatherapi":
-                    # WeatherAPI.com format
-                    params = {"key": self.api_key, "q": city_name, "aqi": "no"}
+            result = await asyncio.shield(future)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+        if result is not None:
+            self._store_cached(key, result)
+        return result
+
+    async def _fetch_current_weather(
+        self, city_id: str, city_name: str
+    ) -> Optional[Dict]:
+        """Single provider round trip through the shared pool."""
+        try:
+            session = await self._get_session()
+            if self.service_type == "weatherapi":
+                # WeatherAPI.com format
+                params = {"key": self.api_key, "q": city_name, "aqi": "no"}
+            else:
+                # OpenWeatherMap format
+                params = {
+                    "q": city_name,
+                    "appid": self.api_key,
+                    "units": "imperial",  # Fahrenheit
+                }
+
+            await self._rate_limiter.acquire()
+            self.stats["provider_calls"] += 1
+            async with session.get(self.base_url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+
+                    if self.service_type == "weatherapi":
+                        # WeatherAPI.com response format
+                        current = data["current"]
+                        return {
+                            "temperature": current["temp_f"],
+                            "humidity": current["humidity"],
+                            "precipitation": current.get("precip_mm", 0.0),
+                            "wind_level": current["wind_mph"],
+                            "weather_category": self._categorize_weather(
+                                current["temp_f"],
+                                current.get("precip_mm", 0.0),
+                                current["humidity"],
+                            ),
+                            "description": current["condition"]["text"],
+                            "city_name": city_name.split(",")[0],
+                        }
+                    else:
+                        # OpenWeatherMap response format
+                        return {
+                            "temperature": data["main"]["temp"],
+                            "humidity": data["main"]["humidity"],
+                            "precipitation": data.get("rain", {}).get("1h", 0.0),
+                            "wind_level": data["wind"]["speed"],
+                            "weather_category": self._categorize_weather(
+                                data["main"]["temp"],
+                                data.get("rain", {}).get("1h", 0.0),
+                                data["main"]["humidity"],
+                            ),
+                            "description": data["weather"][0]["description"],
+                            "city_name": city_name.split(",")[0],
+                        }
                 else:
-                    # OpenWeatherMap format
-                    params = {
-                        "q": city_name,
-                        "appid": self.api_key,
-                        "units": "imperial",  # Fahrenheit
-                    }
-
-                async with session.get(self.base_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-
-                        if self.service_type == "weatherapi":
-                            # WeatherAPI.com response format
-                            current = data["current"]
-                            return {
-                                "temperature": current["temp_f"],
-                                "humidity": current["humidity"],
-                                "precipitation": current.get("precip_mm", 0.0),
-                                "wind_level": current["wind_mph"],
-                                "weather_category": self._categorize_weather(
-                                    current["temp_f"],
-                                    current.get("precip_mm", 0.0),
-                                    current["humidity"],
-                                ),
-                                "description": current["condition"]["text"],
-                                "city_name": city_name.split(",")[0],
-                            }
-                        else:
-                            # OpenWeatherMap response format
-                            return {
-                                "temperature": data["main"]["temp"],
-                                "humidity": data["main"]["humidity"],
-                                "precipitation": data.get("rain", {}).get("1h", 0.0),
-                                "wind_level": data["wind"]["speed"],
-                                "weather_category": self._categorize_weather(
-                                    data["main"]["temp"],
-                                    data.get("rain", {}).get("1h", 0.0),
-                                    data["main"]["humidity"],
-                                ),
-                                "description": data["weather"][0]["description"],
-                                "city_name": city_name.split(",")[0],
-                            }
+                    self.stats["provider_errors"] += 1
+                    error_text = await response.text()
+                    if response.status == 401:
+                        logger.warning(
+                            f"{self.service_type.title()} API key is invalid or not activated. Status: {response.status}"
+                        )
                     else:
-                        error_text = await response.text()
-                        if response.status == 401:
-                            print(
-                                f"{self.service_type.title()} API key is invalid or not activated. Status: {response.status}"
-                            )
-                        else:
-                            print(
-                                f"{self.service_type.title()} API error for city {city_id}: {response.status} - {error_text}"
-                            )
-                        return None
+                        logger.warning(
+                            f"{self.service_type.title()} API error for city {city_id}: {response.status} - {error_text}"
+                        )
+                    return None
 
         except Exception as e:
-            print(f"Error fetching weather for city {city_id}: {e}")
+            self.stats["provider_errors"] += 1
+            logger.warning(f"Error fetching weather for city {city_id}: {e}")
             return None
 
     def _categorize_weather(
@@ -155,6 +371,16 @@ class LiveWeatherService:
 
         return weather_data
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and provider call counters."""
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return {
+            **self.stats,
+            "cache_entries": len(self._cache),
+            "cache_hit_ratio": self.stats["cache_hits"] / lookups if lookups else 0.0,
+            "in_flight": len(self._in_flight),
+        }
+
 
 # Global instance
 live_weather_service = LiveWeatherService()
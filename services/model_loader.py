@@ -1,7 +1,5 @@
 import os
 import logging
-from models.prophet_forecaster import ProphetForecaster
-from models.promo_uplift_model import PromoUpliftModel
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +13,9 @@ def get_forecast_model():
     """
     global _forecast_model
     if _forecast_model is None:
+        # Imported here so Prophet is only loaded by workers that forecast
+        from models.prophet_forecaster import ProphetForecaster
+
         model_path = os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
             "models/saved/forecast_model.json",
@@ -32,6 +33,8 @@ def get_promo_model():
     """
     global _promo_model
     if _promo_model is None:
+        from models.promo_uplift_model import PromoUpliftModel
+
         model_path = os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
             "models/saved/promo_uplift_model.joblib",
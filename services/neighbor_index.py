@@ -0,0 +1,143 @@
+"""
+Reusable nearest-neighbour index over a clustering feature matrix.
+
+One index is built per feature matrix (keyed by its content hash) and
+serves every neighbour query the clustering pipeline makes on it:
+
+- k-distance curves for DBSCAN eps selection: every row is queried for
+  inputs up to ``sample_size`` rows; above that a random sample of rows
+  is queried against the full tree, which estimates the same distribution
+  without the O(n) queries;
+- the eps-radius graph DBSCAN runs on (``metric="precomputed"``), cached
+  per eps;
+- the rows nearest a cluster's centre, used as representative entities.
+
+Results are cached on the index, so repeated pipelines over the same
+features (e.g. ``compare_clusters``) query the neighbours once.
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.neighbors import NearestNeighbors
+
+from services.cluster_count_search import data_fingerprint
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rows queried for k-distance curves; inputs up to this size are exact
+DEFAULT_SAMPLE_SIZE = int(os.getenv("NEIGHBOR_INDEX_SAMPLE_SIZE", "5000"))
+
+
+class NeighborIndex:
+    """Nearest-neighbour structure over one feature matrix, with cached queries."""
+
+    def __init__(
+        self, X: np.ndarray, sample_size: int = DEFAULT_SAMPLE_SIZE, seed: int = 42
+    ):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.sample_size = sample_size
+        self.exact = len(self.X) <= sample_size
+        self.nn = NearestNeighbors().fit(self.X)
+        rng = np.random.default_rng(seed)
+        self.query_rows = (
+            np.arange(len(self.X))
+            if self.exact
+            else np.sort(rng.choice(len(self.X), sample_size, replace=False))
+        )
+        self._k_distances: Dict[int, np.ndarray] = {}
+        self._radius_graphs: Dict[float, csr_matrix] = {}
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def k_distances(self, k: int) -> np.ndarray:
+        """
+        Sorted distance from each queried row to its k-th nearest row.
+
+        The row itself counts as the first neighbour, as in DBSCAN's
+        ``min_samples``.
+        """
+        k = max(1, min(k, len(self.X)))
+        if k not in self._k_distances:
+            distances, _ = self.nn.kneighbors(self.X[self.query_rows], n_neighbors=k)
+            self._k_distances[k] = np.sort(distances[:, k - 1])
+        return self._k_distances[k]
+
+    def radius_graph(self, eps: float) -> csr_matrix:
+        """Sparse distances between all rows within ``eps`` of each other."""
+        eps = float(eps)
+        if eps not in self._radius_graphs:
+            self._radius_graphs[eps] = self.nn.radius_neighbors_graph(
+                self.X, radius=eps, mode="distance"
+            )
+        return self._radius_graphs[eps]
+
+    def nearest_to_centre(
+        self, labels: np.ndarray, cluster: int, count: int = 5
+    ) -> np.ndarray:
+        """Row indices of ``cluster`` closest to its centroid, closest first."""
+        labels = np.asarray(labels)
+        members = np.flatnonzero(labels == cluster)
+        wanted = min(count, len(members))
+        if wanted == 0:
+            return members
+        centre = self.X[members].mean(axis=0, keepdims=True)
+        # Widen the query until enough of the hits belong to the cluster
+        k = min(len(self.X), 4 * wanted)
+        while True:
+            _, indices = self.nn.kneighbors(centre, n_neighbors=k)
+            hits = indices[0][labels[indices[0]] == cluster]
+            if len(hits) >= wanted or k == len(self.X):
+                return hits[:wanted]
+            k = min(len(self.X), 4 * k)
+
+
+@dataclass
+class NeighborIndexCache:
+    """Bounded LRU of indexes keyed by feature-matrix content."""
+
+    max_entries: int = 8
+    entries: "OrderedDict[str, NeighborIndex]" = field(default_factory=OrderedDict)
+    hits: int = 0
+    misses: int = 0
+
+    def get_or_build(
+        self, X: np.ndarray, sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> NeighborIndex:
+        key = f"{data_fingerprint(X)}:{sample_size}"
+        index = self.entries.get(key)
+        if index is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return index
+
+        self.misses += 1
+        index = NeighborIndex(X, sample_size=sample_size)
+        logger.info(
+            f"Built neighbour index over {len(index)} rows "
+            f"({'exact' if index.exact else f'{sample_size} sampled'} queries)"
+        )
+        self.entries[key] = index
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Global instance
+neighbor_indexes = NeighborIndexCache()
+
+
+def neighbor_index_for(
+    X: np.ndarray, sample_size: Optional[int] = None
+) -> NeighborIndex:
+    """Shared index for ``X``, built on first use."""
+    return neighbor_indexes.get_or_build(X, sample_size or DEFAULT_SAMPLE_SIZE)
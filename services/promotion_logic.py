@@ -1,10 +1,148 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
+import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
 import logging  # type: ignore
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DISCOUNT_LEVELS = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
+DEFAULT_DURATIONS = [7]
+
+
+def build_promotion_scenarios(
+    df: pd.DataFrame,
+    group_cols: List[str],
+    discount_levels: Sequence[float],
+    durations: Sequence[int],
+    min_rows: int = 10,
+    history_days: int = 28,
+) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Build the full (series x discount x duration) scenario grid as one frame.
+
+    Each series contributes its last ``history_days`` days of observations
+    (whole weeks by default, so every weekday is represented) as a feature
+    profile; the profile is repeated once per scenario with the promo
+    features (discount, flag and duration) overwritten, so the whole grid can
+    be scored by a single ``model.predict`` call.
+
+    Returns:
+        tuple: (scenario frame, per-series frame with baseline sales,
+        discount per scenario, duration per scenario)
+    """
+    scenario_discount = np.repeat(
+        np.asarray(discount_levels, dtype=float), len(durations)
+    )
+    scenario_duration = np.tile(np.asarray(durations, dtype=int), len(discount_levels))
+
+    data = df
+    if "sale_date" in data.columns:
+        data = data.sort_values("sale_date", kind="stable")
+
+    grouped = data.groupby(group_cols, sort=False, dropna=False)
+    data = data[grouped["sale_amount"].transform("size") >= min_rows]
+    if data.empty or len(scenario_discount) == 0:
+        return pd.DataFrame(), pd.DataFrame(), scenario_discount, scenario_duration
+
+    grouped = data.groupby(group_cols, sort=False, dropna=False)
+    series_code = grouped.ngroup().to_numpy()
+
+    # Baseline = mean non-promo sales per series (all sales if no promo flag)
+    if "promo_flag" in data.columns:
+        non_promo = data["sale_amount"].where(~data["promo_flag"].astype(bool))
+    else:
+        non_promo = data["sale_amount"]
+    series = (
+        pd.DataFrame({"baseline_sales": non_promo.to_numpy(), "_code": series_code})
+        .groupby("_code")["baseline_sales"]
+        .mean()
+        .to_frame()
+    )
+    keys = data[group_cols].assign(_code=series_code).drop_duplicates("_code")
+    series = keys.set_index("_code").join(series).sort_index()
+
+    coded = data.assign(_series=series_code)
+    if "sale_date" in coded.columns:
+        sale_date = pd.to_datetime(coded["sale_date"])
+        last_date = sale_date.groupby(series_code).transform("max")
+        profile = coded[sale_date > last_date - pd.Timedelta(days=history_days)]
+    else:
+        profile = coded.groupby("_series").tail(history_days)
+    n_scenarios = len(scenario_discount)
+    scenarios = profile.loc[profile.index.repeat(n_scenarios)].reset_index(drop=True)
+    scenarios["_scenario"] = np.tile(np.arange(n_scenarios), len(profile))
+    scenarios["discount"] = scenario_discount[scenarios["_scenario"].to_numpy()]
+    scenarios["promo_duration"] = scenario_duration[scenarios["_scenario"].to_numpy()]
+    scenarios["promo_flag"] = True
+
+    return scenarios, series, scenario_discount, scenario_duration
+
+
+def score_promotion_grid(
+    df: pd.DataFrame,
+    model: Any,
+    group_cols: List[str],
+    discount_levels: Sequence[float] = DEFAULT_DISCOUNT_LEVELS,
+    durations: Sequence[int] = DEFAULT_DURATIONS,
+    best_per_series: bool = True,
+    min_rows: int = 10,
+    history_days: int = 28,
+) -> pd.DataFrame:
+    """
+    Score every promotion scenario with one batched model call.
+
+    Predicted uplift is averaged over each series' profile rows with a
+    bincount, reshaped to (series x scenario) and ranked with a vectorized
+    argmax on ROI. Scenarios with non-positive uplift are never recommended.
+
+    Returns:
+        pd.DataFrame: One row per recommended scenario (best per series when
+        ``best_per_series`` is set), sorted by estimated ROI.
+    """
+    scenarios, series, discounts, durations_arr = build_promotion_scenarios(
+        df, group_cols, discount_levels, durations, min_rows, history_days
+    )
+    if scenarios.empty:
+        return pd.DataFrame()
+
+    n_series, n_scenarios = len(series), len(discounts)
+    features = scenarios.drop(columns=["_series", "_scenario"])
+    predictions = np.asarray(model.predict(features), dtype=float).ravel()
+
+    cell = scenarios["_series"].to_numpy() * n_scenarios + scenarios["_scenario"]
+    size = n_series * n_scenarios
+    totals = np.bincount(cell, weights=predictions, minlength=size)
+    counts = np.bincount(cell, minlength=size)
+    uplift = (totals / np.maximum(counts, 1)).reshape(n_series, n_scenarios)
+
+    baseline = series["baseline_sales"].to_numpy(dtype=float)[:, None]
+    discount_cost = baseline * discounts[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(discount_cost > 0, (uplift - discount_cost) / discount_cost, 0.0)
+    valid = (uplift > 0) & np.isfinite(roi)
+    ranked_roi = np.where(valid, roi, -np.inf)
+
+    if best_per_series:
+        series_idx = np.flatnonzero(valid.any(axis=1))
+        scenario_idx = ranked_roi.argmax(axis=1)[series_idx]
+    else:
+        series_idx, scenario_idx = np.nonzero(valid)
+
+    result = series.iloc[series_idx][group_cols].reset_index(drop=True)
+    result["discount_percentage"] = discounts[scenario_idx]
+    result["promotion_duration_days"] = durations_arr[scenario_idx]
+    result["estimated_uplift"] = uplift[series_idx, scenario_idx]
+    result["estimated_total_uplift"] = (
+        result["estimated_uplift"] * result["promotion_duration_days"]
+    )
+    result["estimated_roi"] = roi[series_idx, scenario_idx]
+    result["baseline_sales"] = baseline[series_idx, 0]
+    result["projected_sales"] = result["baseline_sales"] + result["estimated_uplift"]
+    result["promotion_type"] = "Discount"
+
+    return result.sort_values("estimated_roi", ascending=False, kind="stable")
+
 
 def simulate_and_recommend_promotions(
     df: pd.DataFrame,
@@ -14,86 +152,49 @@ def simulate_and_recommend_promotions(
     count: int = 10,
     target_uplift: Optional[float] = None,
     target_date: Optional[datetime] = None,
+    durations: Optional[Sequence[int]] = None,
 ) -> Dict[str, Any]:
     """
     Simulate different discount levels and recommend promotions based on uplift model.
     Returns recommendations and summary statistics.
     """
-    discount_levels = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
-    discount_levels = [d for d in discount_levels if d <= max_discount]
-    recommendations = []
+    discount_levels = [d for d in DEFAULT_DISCOUNT_LEVELS if d <= max_discount]
 
     if df is None or len(df) < 10:
         return {"recommendations": [], "summary": {}}
 
-    combinations = df[group_cols].drop_duplicates()
-    if combinations is None:
-        return {"recommendations": [], "summary": {}}
+    try:
+        scored = score_promotion_grid(
+            df, model, group_cols, discount_levels, durations or DEFAULT_DURATIONS
+        )
+    except Exception as e:
+        logger.warning(f"Error scoring promotion grid: {str(e)}", exc_info=True)
+        scored = pd.DataFrame()
 
-    for _, combo in combinations.iterrows():
-        # Create a boolean mask for filtering
-        mask = pd.Series([True] * len(df), index=df.index)
+    recommendations = []
+    for row in scored.head(count).to_dict("records"):
+        rec = {
+            "discount_percentage": float(row["discount_percentage"]),
+            "promotion_duration_days": int(row["promotion_duration_days"]),
+            "estimated_uplift": float(row["estimated_uplift"]),
+            "estimated_total_uplift": float(row["estimated_total_uplift"]),
+            "estimated_roi": float(row["estimated_roi"]),
+            "baseline_sales": float(row["baseline_sales"]),
+            "projected_sales": float(row["projected_sales"]),
+            "promotion_type": row["promotion_type"],
+        }
         for col in group_cols:
-            mask = mask & (df[col] == combo[col])
-        combo_data = df[mask].copy()
-        if combo_data.shape[0] < 10:
-            continue
-        baseline = (
-            combo_data[combo_data["promo_flag"] == False]["sale_amount"].mean()
-            if "promo_flag" in combo_data.columns
-            else combo_data["sale_amount"].mean()
-        )
-        for discount in discount_levels:
-            sim_data = combo_data.copy()
-            sim_data["discount"] = discount
-            sim_data["promo_flag"] = True
-            try:
-                pred_uplift_result = model.predict(sim_data)
-                # Handle different return types from model.predict with proper type checking
-                if hasattr(pred_uplift_result, "mean"):
-                    pred_uplift = float(pred_uplift_result.mean())
-                elif hasattr(pred_uplift_result, "__iter__") and not isinstance(
-                    pred_uplift_result, (str, bytes)
-                ):
-                    pred_uplift = float(
-                        sum(pred_uplift_result) / len(pred_uplift_result)
-                    )
-                else:
-                    pred_uplift = float(pred_uplift_result)
-
-                if pred_uplift <= 0:
-                    continue
-                discount_cost = float(baseline) * discount
-                roi = (
-                    (pred_uplift - discount_cost) / discount_cost
-                    if discount_cost > 0
-                    else 0.0
-                )
-                rec = {
-                    "discount_percentage": float(discount),
-                    "estimated_uplift": float(pred_uplift),
-                    "estimated_roi": float(roi),
-                    "baseline_sales": float(baseline),
-                    "projected_sales": float(baseline + pred_uplift),
-                    "promotion_type": "Discount",
-                }
-                for col in group_cols:
-                    value = combo[col]
-                    if isinstance(value, (int, float, str)) and pd.notna(value):
-                        try:
-                            rec[col] = int(float(value))
-                        except Exception:
-                            rec[col] = None
-                    else:
-                        rec[col] = None
-                recommendations.append(rec)
-            except Exception as e:
-                logger.warning(
-                    f"Error predicting uplift for {combo}: {str(e)}", exc_info=True
-                )
-
-    recommendations.sort(key=lambda x: float(x["estimated_roi"]), reverse=True)
-    top_recommendations = recommendations[:count]
+            value = row[col]
+            if isinstance(value, (int, float, str, np.number)) and pd.notna(value):
+                try:
+                    rec[col] = int(float(value))
+                except Exception:
+                    rec[col] = None
+            else:
+                rec[col] = None
+        recommendations.append(rec)
+
+    top_recommendations = recommendations
     if target_uplift is not None:
         top_recommendations = [
             rec
@@ -0,0 +1,233 @@
+"""
+Real-time push subsystem for WebSocket notifications.
+
+Every client gets a bounded outbound queue drained by its own writer task, so
+``broadcast`` only serializes the message once and appends it to each
+subscriber's queue; it never awaits a socket. A slow consumer loses its
+oldest queued messages (or has superseded ones coalesced in place) instead
+of delaying other clients or the handler that published the event.
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from fastapi import WebSocket
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Topic every client is subscribed to unless it chooses its own topics
+ALL_TOPICS = "*"
+
+
+class ClientConnection:
+    """One WebSocket subscriber with its own queue and writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        topics: Iterable[str],
+        max_queue: int,
+        send_timeout: float,
+    ):
+        self.websocket = websocket
+        self.topics: Set[str] = set(topics)
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        # Items are [coalesce_key, text] so coalescing can replace in place
+        self.queue: Deque[List[Any]] = deque()
+        self._pending: Dict[str, List[Any]] = {}
+        self._wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0}
+
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None):
+        """Queue a frame without blocking; drop the oldest when full."""
+        if self.closed:
+            return
+        if coalesce_key is not None:
+            pending = self._pending.get(coalesce_key)
+            if pending is not None:
+                pending[1] = text
+                self.stats["coalesced"] += 1
+                return
+        item = [coalesce_key, text]
+        self.queue.append(item)
+        if coalesce_key is not None:
+            self._pending[coalesce_key] = item
+        while len(self.queue) > self.max_queue:
+            dropped = self.queue.popleft()
+            if dropped[0] is not None:
+                self._pending.pop(dropped[0], None)
+            self.stats["dropped"] += 1
+        self._wakeup.set()
+
+    async def run_writer(self, on_failure):
+        """Drain the queue to the socket until closed or the socket fails."""
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self.queue and not self.closed:
+                    coalesce_key, text = self.queue.popleft()
+                    if coalesce_key is not None:
+                        self._pending.pop(coalesce_key, None)
+                    await asyncio.wait_for(
+                        self.websocket.send_text(text), self.send_timeout
+                    )
+                    self.stats["sent"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"WebSocket writer for {self.websocket.client} failed: {e}")
+            on_failure(self.websocket)
+
+
+class ConnectionManager:
+    """Topic-aware WebSocket fan-out with per-client bounded send queues."""
+
+    def __init__(
+        self,
+        max_queue: Optional[int] = None,
+        send_timeout: Optional[float] = None,
+    ):
+        self.max_queue = max_queue or int(os.getenv("WS_MAX_QUEUE", "100"))
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT", "5"))
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.subscribers: Dict[str, Set[ClientConnection]] = {}
+        self.stats = {"broadcasts": 0, "frames_queued": 0, "disconnects": 0}
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
+
+    async def connect(
+        self, websocket: WebSocket, topics: Optional[Iterable[str]] = None
+    ):
+        await websocket.accept()
+        client = ClientConnection(
+            websocket, topics or [ALL_TOPICS], self.max_queue, self.send_timeout
+        )
+        self.clients[websocket] = client
+        for topic in client.topics:
+            self.subscribers.setdefault(topic, set()).add(client)
+        client.writer = asyncio.ensure_future(client.run_writer(self.disconnect))
+        logger.info(f"WebSocket connected: {websocket.client} topics={client.topics}")
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        client.closed = True
+        for topic in client.topics:
+            self._unsubscribe_topic(client, topic)
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        self.stats["disconnects"] += 1
+        logger.info(f"WebSocket disconnected: {websocket.client}")
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        for topic in topics:
+            client.topics.add(topic)
+            self.subscribers.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        for topic in topics:
+            client.topics.discard(topic)
+            self._unsubscribe_topic(client, topic)
+
+    def _unsubscribe_topic(self, client: ClientConnection, topic: str):
+        members = self.subscribers.get(topic)
+        if members is not None:
+            members.discard(client)
+            if not members:
+                del self.subscribers[topic]
+
+    async def send_personal_message(self, message: Any, websocket: WebSocket):
+        client = self.clients.get(websocket)
+        if client is not None:
+            client.enqueue(self._serialize(message))
+
+    async def broadcast(
+        self,
+        message: Any,
+        topic: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+    ) -> int:
+        """
+        Queue a message for every subscriber of ``topic`` (all clients if
+        omitted) and return the number of recipients.
+
+        The message is serialized once. With ``coalesce_key``, a message still
+        waiting in a client's queue under the same key is replaced rather than
+        followed, so slow clients only receive the latest state.
+        """
+        text = self._serialize(message)
+        if topic is None:
+            recipients: Iterable[ClientConnection] = self.clients.values()
+        else:
+            recipients = self.subscribers.get(topic, set()) | self.subscribers.get(
+                ALL_TOPICS, set()
+            )
+        count = 0
+        for client in recipients:
+            client.enqueue(text, coalesce_key)
+            count += 1
+        self.stats["broadcasts"] += 1
+        self.stats["frames_queued"] += count
+        return count
+
+    @staticmethod
+    def _serialize(message: Any) -> str:
+        if isinstance(message, str):
+            return message
+        return json.dumps(message, default=str)
+
+    async def handle_client_message(self, websocket: WebSocket, raw: str):
+        """
+        Apply ``{"action": "subscribe"|"unsubscribe", "topics": [...]}``
+        control messages; anything else is ignored (keep-alive pings).
+        """
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        topics = message.get("topics") or []
+        if isinstance(topics, str):
+            topics = [topics]
+        if message.get("action") == "subscribe":
+            self.subscribe(websocket, topics)
+        elif message.get("action") == "unsubscribe":
+            self.unsubscribe(websocket, topics)
+
+    def get_stats(self) -> Dict[str, Any]:
+        clients = list(self.clients.values())
+        return {
+            **self.stats,
+            "connections": len(clients),
+            "topics": {
+                topic: len(members) for topic, members in self.subscribers.items()
+            },
+            "queued": sum(len(c.queue) for c in clients),
+            "sent": sum(c.stats["sent"] for c in clients),
+            "dropped": sum(c.stats["dropped"] for c in clients),
+            "coalesced": sum(c.stats["coalesced"] for c in clients),
+        }
+
+    async def close(self):
+        """Stop every writer task (called on application shutdown)."""
+        for websocket in list(self.clients):
+            self.disconnect(websocket)
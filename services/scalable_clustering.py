@@ -0,0 +1,382 @@
+"""
+Scalable clustering backends for large entity sets.
+
+Batch ``KMeans``, ``DBSCAN`` and ``AgglomerativeClustering`` hold the whole
+feature matrix (and, for agglomerative, an O(n^2) distance structure) in
+memory. These backends keep memory bounded by the model, not the entity
+count, and assign new entities with one nearest-centre lookup:
+
+- ``StreamingKMeans``: ``MiniBatchKMeans`` fitted in mini-batches, with
+  ``partial_fit`` to fold in new rows (e.g. as new days arrive) without
+  refitting from scratch;
+- ``BirchDBSCAN``: a BIRCH CF-tree summarises the rows into at most
+  ``max_subclusters`` subclusters (the threshold grows until it fits, also
+  after ``partial_fit``), and DBSCAN runs on the subcluster centres weighted by their sizes;
+- ``BirchAgglomerative``: the same summary with Ward agglomerative
+  clustering on the centres, so the quadratic step is over subclusters.
+
+``streaming_models`` keeps fitted models per (entity type, feature set,
+algorithm, k) so repeat clustering calls update them incrementally: only
+rows the model has not seen (among the last ``MAX_SEEN_ROWS``) are folded
+in, and a repeated payload is not fed again.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN, AgglomerativeClustering, Birch, MiniBatchKMeans
+from sklearn.cluster._birch import _CFNode, _split_node
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Row count above which the clustering routes switch to these backends
+SCALABLE_MIN_ROWS = int(os.getenv("CLUSTERING_SCALABLE_MIN_ROWS", "5000"))
+MAX_SUBCLUSTERS = int(os.getenv("CLUSTERING_MAX_SUBCLUSTERS", "2000"))
+BATCH_SIZE = 2048
+# Rows used to pick the BIRCH threshold before the full CF-tree build
+CALIBRATION_ROWS = 5000
+# Row hashes remembered per stored model (older rows may be fed again)
+MAX_SEEN_ROWS = int(os.getenv("CLUSTERING_MAX_SEEN_ROWS", "200000"))
+
+SCALABLE_ALGORITHMS = {
+    "kmeans": "minibatch_kmeans",
+    "dbscan": "birch_dbscan",
+    "hierarchical": "birch_agglomerative",
+}
+
+
+def scalable_algorithm(algorithm: str, n_rows: int) -> str:
+    """The algorithm to run: the scalable variant for large inputs."""
+    algorithm = algorithm.lower()
+    if n_rows >= SCALABLE_MIN_ROWS:
+        return SCALABLE_ALGORITHMS.get(algorithm, algorithm)
+    return algorithm
+
+
+class StreamingKMeans:
+    """Mini-batch k-means that keeps learning from new rows."""
+
+    def __init__(
+        self, n_clusters: int, batch_size: int = BATCH_SIZE, random_state: int = 42
+    ):
+        self.n_clusters = n_clusters
+        self.model = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=batch_size,
+            n_init=3,
+            random_state=random_state,
+        )
+        self.n_seen = 0
+
+    def fit(self, X: np.ndarray) -> "StreamingKMeans":
+        self.model.fit(X)
+        self.n_seen = len(X)
+        return self
+
+    def partial_fit(self, X: np.ndarray) -> "StreamingKMeans":
+        """Update the centres with new rows, one mini-batch at a time."""
+        for start in range(0, len(X), self.model.batch_size):
+            self.model.partial_fit(X[start : start + self.model.batch_size])
+        self.n_seen += len(X)
+        return self
+
+    def fit_predict(self, X: np.ndarray) -> np.ndarray:
+        return self.fit(X).model.labels_
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict(X)
+
+    @property
+    def cluster_centers_(self) -> np.ndarray:
+        return self.model.cluster_centers_
+
+    @property
+    def inertia_(self) -> float:
+        return float(self.model.inertia_)
+
+
+class _CFTreeClustering(ABC):
+    """BIRCH summary of the rows plus a global clustering of its subclusters."""
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        branching_factor: int = 50,
+        max_subclusters: int = MAX_SUBCLUSTERS,
+    ):
+        self.threshold = threshold
+        self.branching_factor = branching_factor
+        self.max_subclusters = max_subclusters
+        self.birch: Optional[Birch] = None
+        self.center_labels_ = np.empty(0, dtype=int)
+        self.subcluster_sizes_ = np.empty(0)
+        self.labels_ = np.empty(0, dtype=int)
+
+    @abstractmethod
+    def _global_labels(self, centers: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Cluster of each subcluster centre."""
+
+    def _calibrate(self, X: np.ndarray):
+        """Raise the threshold on a sample first, so the full build runs once."""
+        if len(X) <= CALIBRATION_ROWS:
+            return
+        rng = np.random.default_rng(0)
+        sample = X[rng.choice(len(X), CALIBRATION_ROWS, replace=False)]
+        # A sample yields fewer subclusters than the full data; aim at half
+        while (
+            len(
+                Birch(
+                    threshold=self.threshold,
+                    branching_factor=self.branching_factor,
+                    n_clusters=None,
+                )
+                .fit(sample)
+                .subcluster_centers_
+            )
+            > self.max_subclusters // 2
+        ):
+            self.threshold *= 1.5
+
+    def _summarise(self, X: np.ndarray) -> np.ndarray:
+        """Build the CF-tree, coarsening it until it fits the budget."""
+        self._calibrate(X)
+        while True:
+            self.birch = Birch(
+                threshold=self.threshold,
+                branching_factor=self.branching_factor,
+                n_clusters=None,
+            ).fit(X)
+            if len(self.birch.subcluster_centers_) <= self.max_subclusters:
+                return self.birch.labels_
+            self.threshold *= 1.5
+
+    def _coarsen(self):
+        """Raise the threshold and rebuild the tree from its subcluster CFs.
+
+        Each leaf subcluster's (n, linear sum, squared sum) is re-inserted
+        into an empty tree at the new threshold, so subclusters within it of
+        each other merge without revisiting the rows.
+        """
+        birch = self.birch
+        while len(birch.subcluster_centers_) > self.max_subclusters:
+            self.threshold *= 1.5
+            subclusters = [
+                subcluster
+                for leaf in birch._get_leaves()
+                for subcluster in leaf.subclusters_
+            ]
+            node = dict(
+                threshold=self.threshold,
+                branching_factor=self.branching_factor,
+                n_features=birch.subcluster_centers_.shape[1],
+                dtype=birch.subcluster_centers_.dtype,
+            )
+            birch.threshold = self.threshold
+            # Same bookkeeping as ``Birch._fit`` for a new tree
+            birch.root_ = _CFNode(is_leaf=True, **node)
+            birch.dummy_leaf_ = _CFNode(is_leaf=True, **node)
+            birch.dummy_leaf_.next_leaf_ = birch.root_
+            birch.root_.prev_leaf_ = birch.dummy_leaf_
+            for subcluster in subclusters:
+                if birch.root_.insert_cf_subcluster(subcluster):
+                    first, second = _split_node(
+                        birch.root_, self.threshold, self.branching_factor
+                    )
+                    birch.root_ = _CFNode(is_leaf=False, **node)
+                    birch.root_.append_subcluster(first)
+                    birch.root_.append_subcluster(second)
+            birch.subcluster_centers_ = np.concatenate(
+                [leaf.centroids_ for leaf in birch._get_leaves()]
+            )
+            birch._n_features_out = len(birch.subcluster_centers_)
+            birch._global_clustering()
+
+    def _recluster(self):
+        # Rows absorbed per subcluster, in ``subcluster_centers_`` order (the
+        # centres are the leaves' centroids concatenated); node splits during
+        # ``partial_fit`` reorder subclusters, so sizes are always re-read
+        self.subcluster_sizes_ = np.array(
+            [
+                subcluster.n_samples_
+                for leaf in self.birch._get_leaves()
+                for subcluster in leaf.subclusters_
+            ],
+            dtype=float,
+        )
+        self.center_labels_ = self._global_labels(
+            self.birch.subcluster_centers_, self.subcluster_sizes_
+        )
+
+    def fit(self, X: np.ndarray):
+        subclusters = self._summarise(X)
+        self._recluster()
+        self.labels_ = self.center_labels_[subclusters]
+        logger.info(
+            f"{type(self).__name__}: {len(X)} rows summarised into "
+            f"{len(self.subcluster_sizes_)} subclusters "
+            f"(threshold {self.threshold:.3g})"
+        )
+        return self
+
+    def fit_predict(self, X: np.ndarray) -> np.ndarray:
+        return self.fit(X).labels_
+
+    def partial_fit(self, X: np.ndarray):
+        """Insert new rows into the CF-tree and recluster the subclusters."""
+        if self.birch is None:
+            return self.fit(X)
+        self.birch.partial_fit(X)
+        self._coarsen()
+        self._recluster()
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Cluster of each row via its nearest subcluster."""
+        return self.center_labels_[self.birch.predict(X)]
+
+
+class BirchDBSCAN(_CFTreeClustering):
+    """DBSCAN on BIRCH subcluster centres, weighted by subcluster size."""
+
+    def __init__(self, eps: float = 0.5, min_samples: int = 5, **kwargs: Any):
+        kwargs.setdefault("threshold", eps / 2)
+        super().__init__(**kwargs)
+        self.eps = eps
+        self.min_samples = min_samples
+
+    def _global_labels(self, centers: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        # Rows within eps of each other may sit in subclusters whose centres
+        # are up to eps + 2 * threshold apart (each subcluster's radius is at
+        # most the threshold); widen eps by one radius to keep them connected
+        return DBSCAN(
+            eps=self.eps + self.threshold, min_samples=self.min_samples
+        ).fit_predict(centers, sample_weight=weights)
+
+
+class BirchAgglomerative(_CFTreeClustering):
+    """Ward agglomerative clustering of BIRCH subcluster centres."""
+
+    def __init__(self, n_clusters: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.n_clusters = n_clusters
+
+    def _global_labels(self, centers: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        if len(centers) <= self.n_clusters:
+            return np.arange(len(centers))
+        return AgglomerativeClustering(
+            n_clusters=self.n_clusters, linkage="ward"
+        ).fit_predict(centers)
+
+
+ModelKey = Tuple[str, Tuple[str, ...], str, Optional[int]]
+
+
+def _row_hashes(X: np.ndarray) -> np.ndarray:
+    """64-bit content hash of each row."""
+    return pd.util.hash_pandas_object(pd.DataFrame(X), index=False).to_numpy()
+
+
+@dataclass
+class _StreamingEntry:
+    """A stored model, its lock and the rows it has been fed."""
+
+    model: Any = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Hashes of the last ``MAX_SEEN_ROWS`` distinct rows fitted, oldest first
+    seen: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint64))
+    # Hash of the last payload, so a repeated request is not fed again
+    fingerprint: Optional[int] = None
+
+    def remember(self, hashes: np.ndarray):
+        """Record fitted rows, forgetting the oldest beyond the cap."""
+        self.seen = np.concatenate([self.seen, np.unique(hashes)])[-MAX_SEEN_ROWS:]
+
+
+@dataclass
+class StreamingModelRegistry:
+    """Fitted scalable models kept for incremental updates (bounded LRU)."""
+
+    max_models: int = 32
+    models: "OrderedDict[ModelKey, _StreamingEntry]" = field(
+        default_factory=OrderedDict
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def fit_or_update(
+        self,
+        X: np.ndarray,
+        algorithm: str,
+        entity_type: str = "entities",
+        feature_set: Sequence[str] = (),
+        n_clusters: Optional[int] = None,
+        **params: Any,
+    ) -> Tuple[Any, np.ndarray, bool]:
+        """
+        Labels for ``X`` from a stored model updated with ``X``, or a new fit.
+
+        Only rows the stored model has not seen are fed to ``partial_fit``;
+        an identical payload leaves the model untouched. Calls run in worker
+        threads, so each model is updated under its own lock.
+
+        Returns:
+            tuple: (model, labels, whether an existing model was updated)
+        """
+        if algorithm not in SCALABLE_ALGORITHMS.values():
+            raise ValueError(f"Unsupported scalable clustering algorithm: {algorithm}")
+
+        key: ModelKey = (entity_type, tuple(feature_set), algorithm, n_clusters)
+        with self._lock:
+            entry = self.models.get(key)
+            if entry is None:
+                entry = self.models[key] = _StreamingEntry()
+                while len(self.models) > self.max_models:
+                    self.models.popitem(last=False)
+            else:
+                self.models.move_to_end(key)
+
+        hashes = _row_hashes(X)
+        fingerprint = hash((X.shape, hashes.tobytes()))
+        with entry.lock:
+            model = entry.model
+            if model is not None and _n_features(model) == X.shape[1]:
+                if fingerprint != entry.fingerprint:
+                    unseen = ~np.isin(hashes, entry.seen)
+                    if unseen.any():
+                        model.partial_fit(X[unseen])
+                        entry.remember(hashes[unseen])
+                    entry.fingerprint = fingerprint
+                return model, model.predict(X), True
+
+            if algorithm == "minibatch_kmeans":
+                model = StreamingKMeans(n_clusters, **params)
+            elif algorithm == "birch_dbscan":
+                model = BirchDBSCAN(**params)
+            else:
+                model = BirchAgglomerative(n_clusters, **params)
+            labels = model.fit_predict(X)
+            entry.model = model
+            entry.seen = np.empty(0, dtype=np.uint64)
+            entry.remember(hashes)
+            entry.fingerprint = fingerprint
+            return model, labels, False
+
+    def clear(self):
+        with self._lock:
+            self.models.clear()
+
+
+def _n_features(model: Any) -> Optional[int]:
+    inner = model.model if isinstance(model, StreamingKMeans) else model.birch
+    return getattr(inner, "n_features_in_", None)
+
+
+# Global instance
+streaming_models = StreamingModelRegistry()
@@ -0,0 +1,400 @@
+"""
+Category seasonality profiles: batched decomposition plus a versioned store.
+
+``CategoryLevelForecaster.analyze_category_seasonality`` ran statsmodels'
+``seasonal_decompose`` once per category on every call. Profiles here are
+computed for all categories at once:
+
+- each category's daily sales series is stacked with the others of the
+  same date range into one matrix, and the classical additive
+  decomposition (centred moving-average trend, de-trended period means as
+  the seasonal component, as in ``seasonal_decompose``) runs as numpy
+  operations over the whole matrix;
+- monthly and weekly patterns and holiday impact come from one grouped
+  aggregation over all categories.
+
+``SeasonalityProfileStore`` persists the profiles in
+``category_seasonality_profiles`` keyed by request scope (filters, window,
+aggregation level) and ``sales_data`` version, with an in-process LRU in
+front, so seasonality requests are served without re-reading sales rows
+until new history arrives.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from numpy.lib.stride_tricks import sliding_window_view  # type: ignore
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_TABLE = "category_seasonality_profiles"
+MAX_CACHED_SCOPES = int(os.getenv("SEASONALITY_PROFILE_CACHE_SIZE", "32"))
+# Fewer rows than this and a category gets no profile
+MIN_RECORDS = 52
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {PROFILE_TABLE} (
+    scope TEXT NOT NULL,
+    category TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    profile JSONB,
+    stats JSONB NOT NULL,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (scope, category)
+)
+"""
+
+EMPTY_PROFILE = {
+    "seasonal_strength": 0,
+    "trend_strength": 0,
+    "monthly_pattern": {},
+    "weekly_pattern": {},
+    "holiday_impact": 0,
+}
+
+
+def decomposition_period(n_days: int) -> int:
+    """Seasonal period for a daily series: yearly, monthly or weekly."""
+    if n_days >= 730:
+        return 365
+    if n_days >= 365:
+        return 30
+    return 7
+
+
+def decompose(series: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Additive decomposition of each row of ``series``.
+
+    Matches ``seasonal_decompose(model="additive")``: the trend is the
+    centred moving average (NaN where the window doesn't fit), the
+    seasonal component the mean de-trended value per period position,
+    centred on zero.
+
+    Returns:
+        tuple: (seasonal, trend), each shaped like ``series``
+    """
+    n_rows, n_obs = series.shape
+    if period % 2 == 0:
+        weights = np.r_[0.5, np.ones(period - 1), 0.5] / period
+    else:
+        weights = np.ones(period) / period
+    half = len(weights) // 2
+
+    trend = np.full(series.shape, np.nan)
+    trend[:, half : n_obs - half] = (
+        sliding_window_view(series, len(weights), axis=1) @ weights
+    )
+
+    detrended = series - trend
+    cycles = -(-n_obs // period)
+    padded = np.full((n_rows, cycles * period), np.nan)
+    padded[:, :n_obs] = detrended
+    period_means = np.nanmean(padded.reshape(n_rows, cycles, period), axis=1)
+    period_means -= period_means.mean(axis=1, keepdims=True)
+    seasonal = np.tile(period_means, cycles)[:, :n_obs]
+    return seasonal, trend
+
+
+def category_key(category: Any) -> str:
+    """
+    Profile key of a category id.
+
+    Ids read from float columns (``7.0``) and from JSON (``"7"``) map to
+    the same key as the integer ``7``.
+    """
+    try:
+        number = float(category)
+    except (TypeError, ValueError):
+        return str(category)
+    return str(int(number)) if number.is_integer() else str(category)
+
+
+def profile_category_id(key: str) -> Any:
+    """The category id of a profile key: an int for numeric ids."""
+    try:
+        return int(key)
+    except ValueError:
+        return key
+
+
+def _ratio(numerator: float, denominator: float, default: float = 0.0) -> float:
+    if not denominator or not np.isfinite(numerator / denominator):
+        return default
+    return float(numerator / denominator)
+
+
+def _strengths(daily: pd.Series, categories: List[Any]) -> Dict[Any, Tuple]:
+    """(seasonal, trend) strength per category; None if the series is too short."""
+    span = daily.reset_index().groupby("category")["sale_date"].agg(["min", "max"])
+    wide = daily.unstack("sale_date")
+    strengths: Dict[Any, Tuple] = {}
+    for (start, end), group in span.loc[categories].groupby(["min", "max"]):
+        days = pd.date_range(start, end, freq="D")
+        period = decomposition_period(len(days))
+        if len(days) < 2 * period:
+            # Fewer than two full cycles: no decomposition
+            strengths.update({category: None for category in group.index})
+            continue
+        series = (
+            wide.loc[group.index].reindex(columns=days).fillna(0).to_numpy(dtype=float)
+        )
+        seasonal, trend = decompose(series, period)
+        spread = series.std(axis=1)
+        for i, category in enumerate(group.index):
+            strengths[category] = (
+                _ratio(seasonal[i].std(), spread[i]),
+                _ratio(np.nanstd(trend[i]), spread[i]),
+            )
+    return strengths
+
+
+def _patterns(
+    df: pd.DataFrame, category_col: str, key: pd.Series
+) -> Dict[Any, Dict[int, float]]:
+    """Mean sales per ``key`` value relative to the category's overall mean."""
+    means = df.groupby([df[category_col], key])["category_sales"].mean()
+    overall = df.groupby(category_col)["category_sales"].mean()
+    patterns: Dict[Any, Dict[int, float]] = {}
+    for (category, value), mean in means.items():
+        patterns.setdefault(category, {})[int(value)] = _ratio(
+            mean, overall[category], 1.0
+        )
+    return patterns
+
+
+def _holiday_impacts(df: pd.DataFrame, category_col: str) -> Dict[Any, float]:
+    if "holiday_flag" not in df.columns:
+        return {}
+    flag = df["holiday_flag"]
+    holiday = df[flag > 0].groupby(category_col)["category_sales"].mean()
+    regular = df[flag == 0].groupby(category_col)["category_sales"].mean()
+    return {
+        category: _ratio(holiday.get(category, np.nan) - mean, mean)
+        for category, mean in regular.items()
+        if mean > 0
+    }
+
+
+@dataclass
+class SeasonalityProfiles:
+    """Seasonality profile and sales statistics per category."""
+
+    patterns: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Rows, total sales and date range per category (profiled or not)
+    stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        records = sum(s["records"] for s in self.stats.values())
+        total = sum(s["total_sales"] for s in self.stats.values())
+        return {
+            "date_range": {
+                "start": min(s["start"] for s in self.stats.values()),
+                "end": max(s["end"] for s in self.stats.values()),
+            },
+            "data_summary": {
+                "total_records": records,
+                "average_category_sales": _ratio(total, records),
+                "total_category_sales": total,
+            },
+        }
+
+    def average_sales(self, category: str) -> float:
+        stats = self.stats[category]
+        return _ratio(stats["total_sales"], stats["records"])
+
+
+def build_profiles(
+    df: pd.DataFrame, category_col: str = "first_category_id"
+) -> SeasonalityProfiles:
+    """
+    Seasonality profiles for every category in a category-level frame.
+
+    Categories with fewer than ``MIN_RECORDS`` rows get statistics but no
+    profile. Each daily series sums ``category_sales`` over the category's
+    rows (e.g. stores) per day, with missing days as zero.
+    """
+    df = df[df[category_col].notna()]
+    if df.empty:
+        return SeasonalityProfiles()
+
+    grouped = df.groupby(category_col, sort=False)
+    stats = grouped.agg(
+        records=("category_sales", "size"),
+        total_sales=("category_sales", "sum"),
+        start=("sale_date", "min"),
+        end=("sale_date", "max"),
+    )
+    eligible = [c for c, n in stats["records"].items() if n >= MIN_RECORDS]
+
+    daily = df.groupby([category_col, "sale_date"])["category_sales"].sum()
+    daily.index = daily.index.set_names(["category", "sale_date"])
+    strengths = _strengths(daily, eligible) if eligible else {}
+    monthly = _patterns(df, category_col, df["sale_date"].dt.month)
+    weekly = _patterns(df, category_col, df["sale_date"].dt.dayofweek)
+    holiday = _holiday_impacts(df, category_col)
+
+    patterns = {}
+    for category in eligible:
+        if strengths[category] is None:
+            patterns[category_key(category)] = dict(EMPTY_PROFILE)
+            continue
+        seasonal_strength, trend_strength = strengths[category]
+        patterns[category_key(category)] = {
+            "seasonal_strength": seasonal_strength,
+            "trend_strength": trend_strength,
+            "monthly_pattern": monthly.get(category, {}),
+            "weekly_pattern": weekly.get(category, {}),
+            "holiday_impact": holiday.get(category, 0.0),
+        }
+
+    return SeasonalityProfiles(
+        patterns=patterns,
+        stats={
+            category_key(category): {
+                "records": int(row.records),
+                "total_sales": float(row.total_sales),
+                "start": row.start.isoformat(),
+                "end": row.end.isoformat(),
+            }
+            for category, row in stats.iterrows()
+        },
+    )
+
+
+def profile_scope(**params: Any) -> str:
+    """Stable key for the request parameters a set of profiles covers."""
+    return "|".join(f"{k}={params[k]}" for k in sorted(params))
+
+
+def _decode_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    # JSON object keys are strings; patterns are looked up by int month/day
+    for key in ("monthly_pattern", "weekly_pattern"):
+        profile[key] = {int(k): v for k, v in profile[key].items()}
+    return profile
+
+
+class SeasonalityProfileStore:
+    """Versioned seasonality profiles per scope, persisted in the database."""
+
+    def __init__(self, max_scopes: int = MAX_CACHED_SCOPES):
+        self.max_scopes = max_scopes
+        self._profiles: "OrderedDict[Tuple[str, str], SeasonalityProfiles]" = (
+            OrderedDict()
+        )
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    async def ensure_schema(self, conn: Any):
+        if not self._schema_ready:
+            await conn.execute(SCHEMA_SQL)
+            self._schema_ready = True
+
+    def _remember(self, key: Tuple[str, str], profiles: SeasonalityProfiles):
+        self._profiles[key] = profiles
+        self._profiles.move_to_end(key)
+        while len(self._profiles) > self.max_scopes:
+            self._profiles.popitem(last=False)
+
+    async def load(
+        self, conn: Any, scope: str, data_version: str
+    ) -> Optional[SeasonalityProfiles]:
+        """Stored profiles for ``scope`` at ``data_version``, if any."""
+        key = (scope, data_version)
+        profiles = self._profiles.get(key)
+        if profiles is not None:
+            self._profiles.move_to_end(key)
+            self.hits += 1
+            return profiles
+
+        await self.ensure_schema(conn)
+        rows = await conn.fetch(
+            f"""
+            SELECT category, profile, stats FROM {PROFILE_TABLE}
+            WHERE scope = $1 AND data_version = $2
+            """,
+            scope,
+            data_version,
+        )
+        if not rows:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        profiles = SeasonalityProfiles(
+            patterns={
+                category_key(r["category"]): _decode_profile(json.loads(r["profile"]))
+                for r in rows
+                if r["profile"] is not None
+            },
+            stats={category_key(r["category"]): json.loads(r["stats"]) for r in rows},
+        )
+        self._remember(key, profiles)
+        return profiles
+
+    async def save(
+        self, conn: Any, scope: str, data_version: str, profiles: SeasonalityProfiles
+    ):
+        """Replace the stored profiles of ``scope``."""
+        await self.ensure_schema(conn)
+        async with conn.transaction():
+            # Concurrent saves of one scope apply one after the other
+            await conn.execute(
+                "SELECT pg_advisory_xact_lock(hashtext($1))",
+                f"{PROFILE_TABLE}:{scope}",
+            )
+            await conn.executemany(
+                f"""
+                INSERT INTO {PROFILE_TABLE}
+                    (scope, category, data_version, profile, stats)
+                VALUES ($1, $2, $3, $4::jsonb, $5::jsonb)
+                ON CONFLICT (scope, category) DO UPDATE SET
+                    data_version = EXCLUDED.data_version,
+                    profile = EXCLUDED.profile,
+                    stats = EXCLUDED.stats,
+                    computed_at = now()
+                """,
+                [
+                    (
+                        scope,
+                        category,
+                        data_version,
+                        (
+                            json.dumps(profiles.patterns[category])
+                            if category in profiles.patterns
+                            else None
+                        ),
+                        json.dumps(stats),
+                    )
+                    for category, stats in profiles.stats.items()
+                ],
+            )
+            # Categories no longer in the scope's data
+            await conn.execute(
+                f"""
+                DELETE FROM {PROFILE_TABLE}
+                WHERE scope = $1 AND NOT (category = ANY($2::text[]))
+                """,
+                scope,
+                list(profiles.stats),
+            )
+        self._remember((scope, data_version), profiles)
+        logger.info(
+            f"Stored seasonality profiles for {len(profiles.patterns)} categories "
+            f"({scope}, version {data_version})"
+        )
+
+    def clear(self):
+        self._profiles.clear()
+
+
+# Global instance
+seasonality_profiles = SeasonalityProfileStore()
@@ -598,6 +598,11 @@ class StoreClusteringService:
             df = self.preprocessor.handle_missing_values(df)
             df = self.preprocessor.add_time_features(df)
 
+            # Store features don't depend on the cluster count; extract once
+            store_features = StoreClustering(
+                clustering_method=clustering_method
+            ).extract_store_features(df)
+
             comparison_results = {}
 
             for n_clusters in n_clusters_list:
@@ -607,7 +612,9 @@ class StoreClusteringService:
                         clustering_method=clustering_method, n_clusters=n_clusters
                     )
 
-                    clustering_results = model.fit(df, auto_optimize=False)
+                    clustering_results = model.fit(
+                        auto_optimize=False, store_features=store_features
+                    )
 
                     comparison_results[str(n_clusters)] = {
                         "n_clusters": n_clusters,
@@ -0,0 +1,300 @@
+"""
+Network-Flow Transfer Solver
+Formulates cross-store rebalancing for every product at once as a single
+fixed-charge transportation problem over sparse candidate edges and solves it
+with the HiGHS MILP backend shipped with scipy.
+"""
+
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+@dataclass
+class TransferSolverReport:
+    solver: str
+    status: str
+    solve_time_ms: float
+    build_time_ms: float
+    objective_value: Optional[float]
+    dual_bound: Optional[float]
+    optimality_gap: Optional[float]
+    products: int
+    supply_nodes: int
+    demand_nodes: int
+    candidate_edges: int
+    transfers: int
+    units_moved: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def haversine_km(
+    lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray
+) -> np.ndarray:
+    """Vectorized Haversine distance in kilometres."""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def split_supply_demand(
+    inventory_data: Iterable[Dict], params: Dict[str, Any]
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split inventory rows into supply (excess) and demand (shortage) nodes.
+
+    Uses the same overstock / stockout rules as the greedy matcher so both
+    solver modes see an identical network.
+    """
+    columns = [
+        "store_id",
+        "product_id",
+        "city_id",
+        "latitude",
+        "longitude",
+        "current_stock",
+        "recommended_safety_stock",
+        "days_of_inventory",
+        "avg_daily_sales",
+        "stock_status",
+    ]
+    df = pd.DataFrame(list(inventory_data))
+    if df.empty:
+        empty = pd.DataFrame(columns=columns + ["quantity"])
+        return empty, empty.copy()
+
+    for col in columns:
+        if col not in df.columns:
+            df[col] = np.nan
+    numeric = [c for c in columns if c != "stock_status"]
+    df[numeric] = df[numeric].apply(pd.to_numeric, errors="coerce")
+
+    supply_mask = (df["stock_status"] == "overstock") & (
+        df["days_of_inventory"] > params["overstock_threshold_days"]
+    )
+    demand_mask = (df["stock_status"] == "stockout_risk") & (
+        df["days_of_inventory"] < params["stockout_threshold_days"]
+    )
+
+    supply = df.loc[supply_mask, columns].copy()
+    supply["quantity"] = np.floor(
+        (supply["current_stock"] - supply["recommended_safety_stock"]).clip(lower=0)
+    )
+    demand = df.loc[demand_mask, columns].copy()
+    demand["quantity"] = np.floor(
+        (demand["recommended_safety_stock"] - demand["current_stock"]).clip(lower=0)
+    )
+
+    min_qty = params["min_transfer_quantity"]
+    supply = supply[supply["quantity"] >= min_qty].reset_index(drop=True)
+    demand = demand[demand["quantity"] >= min_qty].reset_index(drop=True)
+    return supply, demand
+
+
+def build_candidate_edges(
+    supply: pd.DataFrame, demand: pd.DataFrame, params: Dict[str, Any]
+) -> pd.DataFrame:
+    """
+    Build sparse supply -> demand edges for all products in one join.
+
+    Edges are limited to the same product, to stores within
+    ``max_transfer_distance_km``, to a trip cost below ``max_transfer_cost``
+    and to the ``max_sources_per_target`` closest sources of each shortage.
+    """
+    if supply.empty or demand.empty:
+        return pd.DataFrame()
+
+    s = supply.reset_index().rename(columns=lambda c: f"src_{c}")
+    d = demand.reset_index().rename(columns=lambda c: f"dst_{c}")
+    edges = s.merge(d, left_on="src_product_id", right_on="dst_product_id")
+    edges = edges[edges["src_store_id"] != edges["dst_store_id"]]
+    if edges.empty:
+        return edges
+
+    edges["distance_km"] = haversine_km(
+        edges["src_latitude"].to_numpy(),
+        edges["src_longitude"].to_numpy(),
+        edges["dst_latitude"].to_numpy(),
+        edges["dst_longitude"].to_numpy(),
+    )
+    edges["transfer_cost"] = edges["distance_km"] * params["transfer_cost_per_km"]
+    edges = edges[
+        edges["distance_km"].notna()
+        & (edges["distance_km"] <= params["max_transfer_distance_km"])
+        & (edges["transfer_cost"] <= params["max_transfer_cost"])
+    ]
+
+    max_sources = params.get("max_sources_per_target")
+    if max_sources and not edges.empty:
+        edges = edges.sort_values(["dst_index", "distance_km"])
+        edges = edges[edges.groupby("dst_index").cumcount() < max_sources]
+
+    edges["capacity"] = np.minimum(edges["src_quantity"], edges["dst_quantity"])
+    edges = edges[edges["capacity"] >= params["min_transfer_quantity"]]
+    return edges.reset_index(drop=True)
+
+
+def solve_transfer_network(
+    inventory_data: Iterable[Dict], params: Dict[str, Any]
+) -> Tuple[pd.DataFrame, TransferSolverReport]:
+    """
+    Solve the network-wide rebalancing problem.
+
+    Variables per candidate edge ``e``: integer units ``x_e`` and a binary
+    trip indicator ``y_e``. The objective minimises fixed trip costs minus the
+    urgency-weighted value of covered shortage units, subject to
+
+        sum_out(x) <= excess(i)            for every supply node
+        sum_in(x)  <= shortage(j)          for every demand node
+        min_qty * y_e <= x_e <= cap_e * y_e
+
+    Returns the non-zero flows (one row per transfer) and a solver report
+    including wall time and the relative MIP optimality gap.
+    """
+    build_start = time.perf_counter()
+    supply, demand = split_supply_demand(inventory_data, params)
+    edges = build_candidate_edges(supply, demand, params)
+    n_products = int(pd.concat([supply["product_id"], demand["product_id"]]).nunique())
+
+    def _report(status: str, **kwargs: Any) -> TransferSolverReport:
+        defaults: Dict[str, Any] = dict(
+            solver="network_flow",
+            status=status,
+            solve_time_ms=0.0,
+            build_time_ms=(time.perf_counter() - build_start) * 1000,
+            objective_value=None,
+            dual_bound=None,
+            optimality_gap=None,
+            products=n_products,
+            supply_nodes=len(supply),
+            demand_nodes=len(demand),
+            candidate_edges=len(edges),
+            transfers=0,
+            units_moved=0,
+        )
+        defaults.update(kwargs)
+        return TransferSolverReport(**defaults)
+
+    if edges.empty:
+        return pd.DataFrame(), _report("no_candidates")
+
+    n_edges = len(edges)
+    edge_idx = np.arange(n_edges)
+    src = edges["src_index"].to_numpy()
+    dst = edges["dst_index"].to_numpy()
+    capacity = edges["capacity"].to_numpy(dtype=float)
+    min_qty = float(params["min_transfer_quantity"])
+
+    # Shortage urgency scales the value of a covered unit: a store at zero
+    # days of inventory is worth up to twice as much as one at the threshold.
+    threshold = float(params["stockout_threshold_days"])
+    urgency = 1 + (
+        (threshold - edges["dst_days_of_inventory"].fillna(threshold)).clip(lower=0)
+        / threshold
+    ).clip(upper=1)
+    unit_value = params["unit_revenue"] * urgency.to_numpy()
+
+    # Variable layout: [x_0 .. x_{E-1}, y_0 .. y_{E-1}]
+    c = np.concatenate([-unit_value, edges["transfer_cost"].to_numpy(dtype=float)])
+
+    supply_rows = sparse.coo_matrix(
+        (np.ones(n_edges), (src, edge_idx)), shape=(len(supply), 2 * n_edges)
+    )
+    demand_rows = sparse.coo_matrix(
+        (np.ones(n_edges), (dst, edge_idx)), shape=(len(demand), 2 * n_edges)
+    )
+    upper_link = sparse.coo_matrix(
+        (
+            np.concatenate([np.ones(n_edges), -capacity]),
+            (
+                np.concatenate([edge_idx, edge_idx]),
+                np.concatenate([edge_idx, edge_idx + n_edges]),
+            ),
+        ),
+        shape=(n_edges, 2 * n_edges),
+    )
+    lower_link = sparse.coo_matrix(
+        (
+            np.concatenate([-np.ones(n_edges), np.full(n_edges, min_qty)]),
+            (
+                np.concatenate([edge_idx, edge_idx]),
+                np.concatenate([edge_idx, edge_idx + n_edges]),
+            ),
+        ),
+        shape=(n_edges, 2 * n_edges),
+    )
+    A = sparse.vstack([supply_rows, demand_rows, upper_link, lower_link]).tocsr()
+    ub = np.concatenate(
+        [
+            supply["quantity"].to_numpy(dtype=float),
+            demand["quantity"].to_numpy(dtype=float),
+            np.zeros(2 * n_edges),
+        ]
+    )
+    lb = np.full(A.shape[0], -np.inf)
+
+    build_ms = (time.perf_counter() - build_start) * 1000
+    solve_start = time.perf_counter()
+    result = milp(
+        c,
+        constraints=LinearConstraint(A, lb, ub),
+        integrality=np.ones(2 * n_edges),
+        bounds=Bounds(
+            np.zeros(2 * n_edges), np.concatenate([capacity, np.ones(n_edges)])
+        ),
+        options={
+            "time_limit": params["solver_time_limit_s"],
+            "mip_rel_gap": params["solver_mip_rel_gap"],
+        },
+    )
+    solve_ms = (time.perf_counter() - solve_start) * 1000
+
+    status = {0: "optimal", 1: "time_limit", 2: "infeasible", 3: "unbounded"}.get(
+        result.status, "error"
+    )
+    if result.x is None:
+        logger.warning(f"Transfer MILP returned no solution: {result.message}")
+        return pd.DataFrame(), _report(
+            status, solve_time_ms=solve_ms, build_time_ms=build_ms
+        )
+
+    units = np.round(result.x[:n_edges])
+    flows = edges.loc[units >= min_qty].copy()
+    flows["quantity"] = units[units >= min_qty].astype(int)
+
+    gap = getattr(result, "mip_gap", None)
+    dual_bound = getattr(result, "mip_dual_bound", None)
+    report = _report(
+        status,
+        solve_time_ms=solve_ms,
+        build_time_ms=build_ms,
+        objective_value=float(result.fun),
+        dual_bound=float(dual_bound) if dual_bound is not None else None,
+        optimality_gap=float(gap) if gap is not None else None,
+        transfers=len(flows),
+        units_moved=int(flows["quantity"].sum()),
+    )
+    logger.info(
+        f"Transfer network solved: {report.candidate_edges} edges, "
+        f"{report.transfers} transfers, gap={report.optimality_gap}, "
+        f"{report.solve_time_ms:.1f}ms"
+    )
+    return flows.reset_index(drop=True), report
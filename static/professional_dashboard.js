@@ -22,6 +22,26 @@ function getValidParameters() {
 // Chart instances
 let charts = {};
 
+// Dashboard snapshot: every panel for the current selection comes from one
+// /enhanced/dashboard-snapshot request shared by all loaders below
+let snapshotPromise = null;
+
+function loadDashboardSnapshot() {
+    snapshotPromise = fetch(`${API_BASE_URL}/enhanced/dashboard-snapshot`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            ...getValidParameters(),
+        })
+    }).then(response => response.json());
+    return snapshotPromise;
+}
+
+async function fetchPanel(name) {
+    const snapshot = await (snapshotPromise || loadDashboardSnapshot());
+    return (snapshot && snapshot.panels && snapshot.panels[name]) || {};
+}
+
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', function() {
     initializeDashboard();
@@ -86,7 +106,8 @@ async function refreshAllData() {
     showLoading(true);
     
     try {
-        // Load data in parallel for better performance
+        // One snapshot request feeds all panel loaders
+        loadDashboardSnapshot();
         await Promise.all([
             loadCuratedData(),
             loadForecastingData(),
@@ -109,8 +130,7 @@ async function refreshAllData() {
 // Load curated data and update key metrics
 async function loadCuratedData() {
     try {
-        const response = await fetch(`${API_BASE_URL}/enhanced/curated-data`);
-        const result = await response.json();
+        const result = await fetchPanel('curated_data');
         
         if (result && result.summary) {
             updateKeyMetrics(result.summary);
@@ -179,34 +199,14 @@ function populateDropdowns(data) {
 async function loadForecastingData() {
     try {
         // Load basic forecast
-        const forecastResponse = await fetch(`${API_BASE_URL}/enhanced/forecast`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-                forecast_days: 30,
-                model_type: 'ensemble',
-                include_weather: true,
-                include_holidays: true,
-                include_promotions: true
-            })
-        });
-        
-        const forecastData = await forecastResponse.json();
+        const forecastData = await fetchPanel('forecast');
         
         if (forecastData && forecastData.forecast_data) {
             createForecastChart(forecastData.forecast_data);
         }
         
         // Load confidence intervals
-        const confidenceResponse = await fetch(`${API_BASE_URL}/enhanced/confidence-intervals`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const confidenceData = await confidenceResponse.json();
+        const confidenceData = await fetchPanel('confidence_intervals');
         
         if (confidenceData && confidenceData.confidence_intervals) {
             displayConfidenceIntervals(confidenceData);
@@ -370,28 +370,14 @@ function displayForecastAccuracy(modelPerformance) {
 async function loadWeatherData() {
     try {
         // Load seasonal patterns
-        const seasonalResponse = await fetch(`${API_BASE_URL}/enhanced/seasonal-patterns`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const seasonalData = await seasonalResponse.json();
+        const seasonalData = await fetchPanel('seasonal_patterns');
         
         if (seasonalData && seasonalData.seasonal_patterns) {
             displaySeasonalPatterns(seasonalData);
         }
         
         // Load weather scenarios
-        const weatherResponse = await fetch(`${API_BASE_URL}/enhanced/weather-scenarios`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const weatherData = await weatherResponse.json();
+        const weatherData = await fetchPanel('weather_scenarios');
         
         if (weatherData && weatherData.success) {
             displayGenericResults('weatherScenariosResults', weatherData, 'Weather Scenarios');
@@ -475,42 +461,21 @@ function displayWeatherScenarios(insights) {
 async function loadMarketData() {
     try {
         // Load market share
-        const marketResponse = await fetch(`${API_BASE_URL}/enhanced/market-share`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const marketData = await marketResponse.json();
+        const marketData = await fetchPanel('market_share');
         
         if (marketData && marketData.market_insights) {
             displayMarketShare(marketData.market_insights);
         }
         
         // Load category correlations
-        const correlationResponse = await fetch(`${API_BASE_URL}/enhanced/category-correlations`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const correlationData = await correlationResponse.json();
+        const correlationData = await fetchPanel('category_correlations');
         
         if (correlationData && correlationData.correlation_insights) {
             displayCategoryCorrelations(correlationData.correlation_insights);
         }
         
         // Load portfolio optimization
-        const portfolioResponse = await fetch(`${API_BASE_URL}/enhanced/portfolio-optimization`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const portfolioData = await portfolioResponse.json();
+        const portfolioData = await fetchPanel('portfolio_optimization');
         
         if (portfolioData && portfolioData.optimization_insights) {
             displayPortfolioOptimization(portfolioData.optimization_insights);
@@ -648,28 +613,14 @@ function displayPortfolioOptimization(optimizationInsights) {
 async function loadStoreData() {
     try {
         // Load store clustering
-        const clusterResponse = await fetch(`${API_BASE_URL}/enhanced/store-clustering`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const clusterData = await clusterResponse.json();
+        const clusterData = await fetchPanel('store_clustering');
         
         if (clusterData && clusterData.success) {
             displayStoreClustering(clusterData);
         }
         
         // Load performance ranking
-        const rankingResponse = await fetch(`${API_BASE_URL}/enhanced/performance-ranking`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const rankingData = await rankingResponse.json();
+        const rankingData = await fetchPanel('performance_ranking');
         
         if (rankingData && rankingData.success) {
             displayPerformanceRanking(rankingData);
@@ -801,42 +752,21 @@ function displayPerformanceRanking(rankingData) {
 async function loadInventoryData() {
     try {
         // Load safety stock
-        const safetyResponse = await fetch(`${API_BASE_URL}/enhanced/safety-stock`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const safetyData = await safetyResponse.json();
+        const safetyData = await fetchPanel('safety_stock');
         
         if (safetyData && safetyData.success) {
             displaySafetyStock(safetyData);
         }
         
         // Load reorder optimization
-        const reorderResponse = await fetch(`${API_BASE_URL}/enhanced/reorder-optimization`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const reorderData = await reorderResponse.json();
+        const reorderData = await fetchPanel('reorder_optimization');
         
         if (reorderData && reorderData.success) {
             displayGenericResults('reorderOptimizationResults', reorderData, 'Reorder Optimization');
         }
         
         // Load cross-store optimization
-        const crossStoreResponse = await fetch(`${API_BASE_URL}/enhanced/cross-store-optimization`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const crossStoreData = await crossStoreResponse.json();
+        const crossStoreData = await fetchPanel('cross_store_optimization');
         
         if (crossStoreData && crossStoreData.success) {
             displayGenericResults('crossStoreOptimizationResults', crossStoreData, 'Cross-Store Optimization');
@@ -966,42 +896,21 @@ function displayCrossStoreOptimization(insights) {
 async function loadPromotionData() {
     try {
         // Load cross-product effects
-        const crossProductResponse = await fetch(`${API_BASE_URL}/enhanced/cross-product-effects`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const crossProductData = await crossProductResponse.json();
+        const crossProductData = await fetchPanel('cross_product_effects');
         
         if (crossProductData && crossProductData.success) {
             displayGenericResults('crossProductEffectsResults', crossProductData, 'Cross-Product Effects');
         }
         
         // Load optimal pricing
-        const pricingResponse = await fetch(`${API_BASE_URL}/enhanced/optimal-pricing`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const pricingData = await pricingResponse.json();
+        const pricingData = await fetchPanel('optimal_pricing');
         
         if (pricingData && pricingData.success) {
             displayGenericResults('optimalPricingResults', pricingData, 'Optimal Pricing');
         }
         
         // Load ROI optimization
-        const roiResponse = await fetch(`${API_BASE_URL}/enhanced/roi-optimization`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const roiData = await roiResponse.json();
+        const roiData = await fetchPanel('roi_optimization');
         
         if (roiData && roiData.success) {
             displayGenericResults('roiOptimizationResults', roiData, 'ROI Optimization');
@@ -1067,28 +976,14 @@ function displayROIOptimization(insights) {
 async function loadRealTimeData() {
     try {
         // Load live alerts
-        const alertsResponse = await fetch(`${API_BASE_URL}/enhanced/live-alerts`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const alertsData = await alertsResponse.json();
+        const alertsData = await fetchPanel('live_alerts');
         
         if (alertsData && alertsData.success) {
             displayGenericResults('liveAlertsResults', alertsData, 'Live Alerts');
         }
         
         // Load demand monitoring
-        const demandResponse = await fetch(`${API_BASE_URL}/enhanced/demand-monitoring`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const demandData = await demandResponse.json();
+        const demandData = await fetchPanel('demand_monitoring');
         
         if (demandData && demandData.success) {
             displayGenericResults('demandMonitoringResults', demandData, 'Demand Monitoring');
@@ -1157,42 +1052,21 @@ function displayDemandMonitoring(insights) {
 async function loadAdvancedData() {
     try {
         // Load competitive intelligence
-        const competitiveResponse = await fetch(`${API_BASE_URL}/enhanced/competitive-intelligence`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const competitiveData = await competitiveResponse.json();
+        const competitiveData = await fetchPanel('competitive_intelligence');
         
         if (competitiveData && competitiveData.success) {
             displayGenericResults('competitiveIntelligenceResults', competitiveData, 'Competitive Intelligence');
         }
         
         // Load customer behavior
-        const behaviorResponse = await fetch(`${API_BASE_URL}/enhanced/customer-behavior`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const behaviorData = await behaviorResponse.json();
+        const behaviorData = await fetchPanel('customer_behavior');
         
         if (behaviorData && behaviorData.success) {
             displayGenericResults('customerBehaviorResults', behaviorData, 'Customer Behavior');
         }
         
         // Load anomaly detection
-        const anomalyResponse = await fetch(`${API_BASE_URL}/enhanced/anomaly-detection`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                ...getValidParameters(),
-            })
-        });
-        const anomalyData = await anomalyResponse.json();
+        const anomalyData = await fetchPanel('anomaly_detection');
         
         if (anomalyData && anomalyData.success) {
             displayGenericResults('anomalyDetectionResults', anomalyData, 'Anomaly Detection');
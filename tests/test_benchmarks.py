@@ -0,0 +1,148 @@
+import asyncio
+from datetime import date
+
+from benchmarks.database import StandInPool, translate_sql
+from benchmarks.loadgen import (
+    SLO,
+    Sample,
+    find_saturation,
+    load_replay,
+    percentile,
+    summarize_by_scenario,
+)
+from benchmarks.suite import compare_reports
+from benchmarks.synthetic_data import SyntheticScale, generate_dataset
+
+SCALE = SyntheticScale(cities=2, stores_per_city=2, products=3, days=40)
+
+
+class TestSyntheticData:
+    """Test suite for the synthetic dataset generator"""
+
+    def test_shape_and_determinism(self):
+        dataset = generate_dataset(SCALE)
+        assert len(dataset.sales) == SCALE.rows == 2 * 2 * 3 * 40
+        assert dataset.hours_sale.shape == (SCALE.rows, 24)
+        assert dataset.sales["dt"].max().date() == SCALE.end_date
+        assert generate_dataset(SCALE).sales.equals(dataset.sales)
+
+    def test_hourly_arrays_are_consistent(self):
+        dataset = generate_dataset(SCALE)
+        sales = dataset.sales
+        assert (
+            abs(dataset.hours_sale.sum(axis=1).round(4) - sales["sale_amount"]) < 1e-3
+        ).all()
+        # Out-of-stock hours sell nothing and are counted between 06:00 and 22:00
+        assert (dataset.hours_sale[dataset.hours_stock_status == 0] == 0).all()
+        assert (
+            (dataset.hours_stock_status[:, 6:22] == 0).sum(axis=1)
+            == sales["stock_hour6_22_cnt"]
+        ).all()
+
+
+class TestStandInDatabase:
+    """Test suite for the embedded stand-in database"""
+
+    def test_translation(self):
+        sql = translate_sql(
+            "SELECT STDDEV(x::float) FROM t WHERE id = ANY($1::int[]) "
+            "AND CAST(dt AS DATE) >= (CURRENT_DATE - INTERVAL '30 days') "
+            "AND store_id = $2",
+            date(2024, 6, 30),
+        )
+        assert sql == (
+            "SELECT pg_stddev(x) FROM t WHERE id IN (SELECT value FROM "
+            "json_each(?1)) AND date(dt) >= ('2024-05-31') AND store_id = ?2"
+        )
+
+    def test_app_style_query(self):
+        pool = StandInPool(generate_dataset(SCALE))
+        query = """
+        SELECT dt, CAST(sale_amount AS FLOAT) as sale_amount
+        FROM sales_data
+        WHERE city_id = '1' AND store_id = '1' AND product_id = 2
+            AND CAST(dt AS DATE) >= (CURRENT_DATE - INTERVAL '9 days')
+        ORDER BY CAST(dt AS DATE)
+        """
+
+        async def run():
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(query)
+                latest = await conn.fetchval("SELECT MAX(dt) FROM sales_data")
+            return rows, latest
+
+        rows, latest = asyncio.run(run())
+        assert len(rows) == 10
+        assert rows[0]["dt"] == date(2024, 6, 21)
+        assert rows[-1][0] == latest == SCALE.end_date
+
+
+class TestCompareReports:
+    """Test suite for regression detection between result files"""
+
+    def test_regressions(self):
+        baseline = {
+            "results": {
+                "a": {"median_ms": 10.0},
+                "b": {"median_ms": 10.0},
+                "c": {"median_ms": 10.0},
+            }
+        }
+        current = {
+            "results": {
+                "a": {"median_ms": 10.5},
+                "b": {"median_ms": 13.0},
+                "c": {"error": "boom"},
+                "new": {"median_ms": 1.0},
+            }
+        }
+        regressions = compare_reports(baseline, current, tolerance=0.1)
+        assert [r["name"] for r in regressions] == ["b", "c"]
+        assert regressions[0]["change"] == 0.3
+
+
+class TestLoadReport:
+    """Test suite for load-test statistics, SLOs and saturation"""
+
+    def test_percentiles_and_summary(self):
+        samples = [Sample("a", 0, float(ms), 200) for ms in range(1, 101)]
+        samples.append(Sample("a", 0, 5000.0, 500))
+        summary = summarize_by_scenario(samples, elapsed=10.0)
+        assert percentile([3, 1, 2], 50) == 2
+        assert summary["a"]["p50_ms"] == 50
+        assert summary["a"]["p99_ms"] == 99
+        assert summary["*"]["errors"] == 1
+        assert summary["*"]["throughput_rps"] == 10.1
+
+    def test_slos_and_saturation(self):
+        def stage(load, rps, p95):
+            summary = {"*": {"throughput_rps": rps, "p95_ms": p95}}
+            slos = [SLO("*", "p95_ms", 1000), SLO("missing", "p95_ms", 1)]
+            return {
+                "load": load,
+                "summary": summary,
+                "slos": [s.evaluate(summary) for s in slos],
+            }
+
+        first = stage(1, 10.0, 200)
+        assert [r["passed"] for r in first["slos"]] == [True, None]
+        assert (
+            find_saturation([first, stage(2, 19.0, 300), stage(4, 20.0, 600)])["load"]
+            == 4
+        )
+        assert find_saturation([first, stage(2, 30.0, 1500)])["load"] == 2
+        assert find_saturation([first, stage(2, 19.0, 300)]) is None
+
+    def test_replay_file(self, tmp_path):
+        path = tmp_path / "calls.jsonl"
+        path.write_text(
+            '{"path": "/api/cities"}\n\n'
+            '{"method": "post", "path": "/api/x", "body": {"a": 1}, "weight": 2}\n'
+        )
+        scenarios = load_replay(str(path))
+        assert [s.name for s in scenarios] == [
+            "replay:GET /api/cities",
+            "replay:POST /api/x",
+        ]
+        assert scenarios[1].weight == 2
+        assert scenarios[1].build(None, []) == ("POST", "/api/x", {"a": 1})
@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI, Request
+
+from database.connection import CACHE_REFRESH_HEADER, CACHE_REFRESH_TOKEN, cached
+from services.cache_warmup_service import (
+    CacheWarmer,
+    WarmupProgress,
+    default_targets,
+    parse_targets,
+)
+
+
+class TestWarmupTargets:
+    """Test suite for ranking the requests to warm"""
+
+    def test_parse_merges_repeated_requests(self):
+        lines = [
+            '{"path": "/api/cities"}',
+            "",
+            '{"path": "/api/x", "body": {"a": 1, "refresh": true}}',
+            '{"method": "post", "path": "/api/x", "body": {"a": 1}, "count": 3}',
+        ]
+        targets = parse_targets(lines)
+        assert [(t.name, t.hits) for t in targets] == [
+            ("GET /api/cities", 1),
+            ("POST /api/x", 4),
+        ]
+        assert targets[1].body == {"a": 1}
+
+    def test_pinned_first_then_hottest(self, tmp_path):
+        pinned = tmp_path / "pinned.json"
+        pinned.write_text(json.dumps([{"path": "/api/pinned"}]))
+        log = tmp_path / "access.jsonl"
+        log.write_text('{"path": "/api/a"}\n' * 2 + '{"path": "/api/b"}\n')
+
+        warmer = CacheWarmer(top_n=2, access_log=str(log), pinned=str(pinned))
+        for _ in range(3):
+            warmer.record("GET", "/api/c", None)
+        warmer.record("GET", "/api/pinned", None)
+        assert [t.path for t in warmer.select_targets()] == [
+            "/api/pinned",
+            "/api/c",
+            "/api/a",
+        ]
+
+    def test_defaults_from_valid_combinations(self, tmp_path):
+        path = tmp_path / "combinations.json"
+        path.write_text(
+            json.dumps([{"city_id": 1, "store_id": 2, "product_id": 3}] * 5)
+        )
+        targets = default_targets(str(path), 3)
+        assert [t.path for t in targets] == [
+            "/api/enhanced/dashboard-snapshot",
+            "/api/multi-dimensional-forecast",
+            "/api/enhanced/dashboard-snapshot",
+        ]
+        assert targets[1].body["store_ids"] == ["2"]
+
+        warmer = CacheWarmer(top_n=4, combinations=str(path))
+        assert len(warmer.select_targets()) == 4
+
+
+class TestCacheWarmer:
+    """Test suite for replaying targets through the app"""
+
+    def test_run_replays_with_refresh_header(self, tmp_path):
+        app = FastAPI()
+        app.state.db_manager = None
+        calls = []
+
+        @app.post("/api/hot")
+        async def hot(body: dict, request: Request):
+            calls.append((body, request.headers.get(CACHE_REFRESH_HEADER)))
+            return {"ok": True}
+
+        warmer = CacheWarmer(top_n=5, interval=0)
+        warmer.record("POST", "/api/hot", {"n": 1})
+        warmer.record("POST", "/api/missing", {"n": 2})
+        summary = asyncio.run(warmer.run(app))
+
+        assert calls == [({"n": 1}, CACHE_REFRESH_TOKEN)]
+        assert summary["state"] == "ready" and summary["warmed"]
+        assert summary["completed"] == summary["total"]
+        assert any("/api/missing: HTTP 404" in e for e in summary["errors"])
+
+    def test_progress_before_first_run(self):
+        progress = WarmupProgress()
+        assert not progress.warmed
+        assert WarmupProgress(state="disabled").warmed
+        assert progress.to_dict()["progress"] == 0.0
+
+    def test_only_the_warmer_bypasses_the_cache(self):
+        app = FastAPI()
+        app.state.db_manager = SimpleNamespace(query_cache={}, max_cache_size=10)
+        computed = []
+
+        @app.get("/api/cached")
+        @cached(ttl=300, http=True)
+        async def cached_route(request: Request):
+            computed.append(1)
+            return {"n": len(computed)}
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                await client.get("/api/cached")
+                # A caller cannot force a recompute with the bare header
+                forged = await client.get(
+                    "/api/cached", headers={CACHE_REFRESH_HEADER: "1"}
+                )
+                assert forged.json() == {"n": 1}
+
+            warmer = CacheWarmer(top_n=5, interval=0)
+            warmer.record("GET", "/api/cached", None)
+            await warmer.run(app)
+
+        asyncio.run(scenario())
+        assert len(computed) == 2
+
+    def test_http_caching_is_opt_in(self):
+        app = FastAPI()
+        app.state.db_manager = SimpleNamespace(query_cache={}, max_cache_size=10)
+        computed = []
+
+        @app.get("/api/uncached")
+        @cached(ttl=300)
+        async def uncached_route(request: Request):
+            computed.append(1)
+            return {"n": len(computed)}
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                for _ in range(2):
+                    await client.get("/api/uncached")
+
+        asyncio.run(scenario())
+        assert len(computed) == 2 and not app.state.db_manager.query_cache
+
+    def test_periodic_refresh_is_opt_in(self, monkeypatch):
+        monkeypatch.delenv("WARMUP_INTERVAL_SECONDS", raising=False)
+        assert CacheWarmer().interval == 0
+        monkeypatch.setenv("WARMUP_INTERVAL_SECONDS", "240")
+        assert CacheWarmer().interval == 240
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from services.category_cube import CUBE_VIEW, CategoryCube, cube_query
+
+
+class FakeConnection:
+    """Records statements; the cube view exists if ``existed`` is set."""
+
+    def __init__(self, existed=False, rows=()):
+        self.existed = existed
+        self.rows = list(rows)
+        self.statements = []
+
+    async def fetchval(self, query, *args):
+        return self.existed
+
+    async def execute(self, query, *args):
+        self.statements.append(query)
+        return "OK"
+
+    async def fetch(self, query, *args):
+        self.statements.append(query)
+        return self.rows
+
+    @property
+    def refreshes(self):
+        return sum(s.startswith("REFRESH") for s in self.statements)
+
+
+class TestCategoryCube:
+    """Test suite for the category cube roll-ups and refreshes"""
+
+    def test_rolls_up_and_slices(self):
+        sql, params = cube_query(
+            ["category", "city"],
+            filters={"store_id": 7, "city_id": None},
+            start_date="2024-01-01",
+            end_date=date(2024, 3, 31),
+        )
+        assert f"FROM {CUBE_VIEW}" in sql
+        assert "GROUP BY first_category_id, city_id" in sql
+        assert "store_id = $1 AND sale_date >= $2 AND sale_date <= $3" in sql
+        assert params == [7, date(2024, 1, 1), date(2024, 3, 31)]
+        # Means are recomputed from the additive sums and counts
+        assert "SUM(sales_sum) / SUM(row_count) AS sale_amount_mean" in sql
+
+    def test_totals_and_unknown_names(self):
+        sql, params = cube_query([])
+        assert "GROUP BY" not in sql and "WHERE" not in sql
+        assert params == []
+        with pytest.raises(ValueError):
+            cube_query(["region"])
+        with pytest.raises(ValueError):
+            cube_query(["category"], filters={"brand_id": 1})
+
+    def test_refreshes_only_on_new_versions(self):
+        cube = CategoryCube(min_refresh_seconds=0)
+        conn = FakeConnection()
+
+        df = asyncio.run(cube.query(conn, ["date", "category"], data_version="v1"))
+        assert list(df.columns[:2]) == ["sale_date", "first_category_id"]
+        # Created with data: no refresh needed
+        assert conn.refreshes == 0
+
+        asyncio.run(cube.ensure(conn, "v1"))
+        assert conn.refreshes == 0
+        asyncio.run(cube.ensure(conn, "v2"))
+        assert conn.refreshes == 1 and cube.refreshes == 1
+
+    def test_refresh_interval_and_existing_view(self):
+        cube = CategoryCube(min_refresh_seconds=3600)
+        conn = FakeConnection(existed=True)
+
+        # A view from an earlier process is refreshed once on first use
+        asyncio.run(cube.ensure(conn, "v1"))
+        assert conn.refreshes == 1
+        # Newer versions wait for the refresh interval
+        asyncio.run(cube.ensure(conn, "v2"))
+        assert conn.refreshes == 1
@@ -0,0 +1,168 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.category_forecaster import UNKNOWN_CITY_ID, CategoryLevelForecaster
+from services.category_forecast_service import CategoryForecastService
+from services.holiday_calendar import HolidayCalendar
+
+
+def category_sales(days=120, seed=0):
+    """Daily sales of two categories in one store, weekly pattern"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=days, freq="D")
+    frames = []
+    for category, level in ((1, 20.0), (2, 60.0)):
+        sales = level + 5 * (dates.dayofweek >= 5) + rng.normal(0, 1, days)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "sale_date": dates,
+                    "first_category_id": category,
+                    "store_id": 7,
+                    "city_id": 10,
+                    "category_sales": sales,
+                    "sale_amount": sales,
+                    "holiday_flag": 0,
+                    "promo_flag": 0,
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def forecaster(tmp_path_factory):
+    model = CategoryLevelForecaster(
+        model_type="linear", save_path=tmp_path_factory.mktemp("category")
+    )
+    model.fit(category_sales())
+    return model
+
+
+class TestCategoryForecastFrame:
+    """Test suite for the category forecast grid"""
+
+    def test_grid_shape_order_and_cities(self, tmp_path):
+        calendar = HolidayCalendar(
+            pd.DataFrame({"date": ["2024-05-02"]}),
+            city_holidays={10: ["2024-05-03"]},
+        )
+        frame = CategoryLevelForecaster(save_path=tmp_path).build_forecast_frame(
+            categories=[2, 1],
+            stores=[7, 8],
+            start_date="2024-05-01",
+            periods=3,
+            store_cities={7: 10},
+            holiday_calendar=calendar,
+        )
+
+        assert len(frame) == 3 * 2 * 2
+        assert frame["sale_date"].dt.day.tolist() == [1] * 4 + [2] * 4 + [3] * 4
+        assert frame["first_category_id"].tolist()[:4] == [2, 2, 1, 1]
+        assert frame["store_id"].tolist()[:4] == [7, 8, 7, 8]
+
+        # Store 8 has no city: a sentinel, not NaN
+        assert frame["city_id"].dtype.kind == "i"
+        assert frame["city_id"].tolist()[:2] == [10, UNKNOWN_CITY_ID]
+
+        # The network holiday flags every store, the city holiday only store 7
+        flags = frame.groupby([frame["sale_date"].dt.day, "store_id"])[
+            "holiday_flag"
+        ].max()
+        assert flags.to_dict() == {
+            (1, 7): 0,
+            (1, 8): 0,
+            (2, 7): 1,
+            (2, 8): 1,
+            (3, 7): 1,
+            (3, 8): 0,
+        }
+
+    def test_without_cities_or_calendar(self, tmp_path):
+        frame = CategoryLevelForecaster(save_path=tmp_path).build_forecast_frame(
+            [1], [7, 8], "2024-05-01", periods=2
+        )
+        assert (frame["city_id"] == UNKNOWN_CITY_ID).all()
+        assert (frame["holiday_flag"] == 0).all()
+
+    def test_forecast_keeps_grid_order(self, forecaster):
+        args = ([1, 2], [7], "2024-04-30", 14, {7: 10})
+        forecasts = forecaster.forecast_category_demand(*args, history=category_sales())
+        frame = forecaster.build_forecast_frame(*args)
+
+        assert len(forecasts) == 28
+        pd.testing.assert_frame_equal(forecasts[frame.columns], frame)
+        assert np.isfinite(forecasts["predicted_category_sales"]).all()
+
+    def test_forecast_features_come_from_history(self, forecaster):
+        forecasts = forecaster.forecast_category_demand(
+            [1, 2], [7, 8], "2024-04-30", 14, {7: 10}, history=category_sales()
+        )
+        by_series = forecasts.groupby(["first_category_id", "store_id"])[
+            "predicted_category_sales"
+        ].mean()
+        # Each category forecast near its own level (20-25 and 60-65)
+        assert 18 < by_series[(1, 7)] < 27 and 55 < by_series[(2, 7)] < 67
+        # Store 8 has no history to build its lags from
+        assert by_series[(1, 8)] == by_series[(2, 8)] == 0
+        unscored = forecasts[forecasts["store_id"] == 8]
+        assert (unscored["prediction_confidence"] == 0).all()
+
+    def test_unbuildable_features_raise(self, forecaster, monkeypatch):
+        with pytest.raises(ValueError, match="history is needed"):
+            forecaster.forecast_category_demand([1], [7], "2024-04-30", 7)
+
+        # A trained feature the history does not carry
+        monkeypatch.setattr(
+            forecaster,
+            "feature_columns",
+            forecaster.feature_columns + ["discount_mean"],
+        )
+        with pytest.raises(ValueError, match="discount_mean"):
+            forecaster.forecast_category_demand(
+                [1], [7], "2024-04-30", 7, history=category_sales()
+            )
+
+
+class FakeManager:
+    """Returns store_hierarchy rows and records the queried stores"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    @contextlib.asynccontextmanager
+    async def get_connection(self):
+        manager = self
+
+        class Conn:
+            async def fetch(self, query, *args):
+                manager.queries.append((query, args))
+                return manager.rows
+
+        yield Conn()
+
+
+class TestFetchStoreCities:
+    """Test suite for looking up the city of each forecast store"""
+
+    def test_maps_store_to_city(self):
+        manager = FakeManager(
+            [{"store_id": 7, "city_id": 10}, {"store_id": np.int64(9), "city_id": 3}]
+        )
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+        request.app.state.db_manager = manager
+
+        cities = asyncio.run(
+            CategoryForecastService().fetch_store_cities(request, [7, 8, 9])
+        )
+
+        assert cities == {7: 10, 9: 3}
+        assert all(type(k) is int and type(v) is int for k, v in cities.items())
+        query, args = manager.queries[0]
+        assert "store_hierarchy" in query and args == ([7, 8, 9],)
@@ -0,0 +1,63 @@
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from services.category_training import ParallelCategoryTrainer, time_series_folds
+
+CONFIG = {"n_estimators": 20, "max_depth": 3, "random_state": 42}
+
+
+def datasets(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i, n in enumerate(sizes):
+        X = rng.normal(size=(n, 5))
+        y = X @ rng.normal(size=5) + rng.normal(scale=0.1, size=n)
+        data[str(i)] = (X, y)
+    return data
+
+
+class TestCategoryTraining:
+    """Test suite for the parallel category training engine"""
+
+    def test_matches_serial_cross_validation(self):
+        X, y = datasets([120])["0"]
+        model = GradientBoostingRegressor(**CONFIG)
+        scaler = StandardScaler()
+        expected = []
+        for train, test in TimeSeriesSplit(n_splits=3).split(X):
+            model.fit(scaler.fit_transform(X[train]), y[train])
+            expected.append(r2_score(y[test], model.predict(scaler.transform(X[test]))))
+        model.fit(scaler.fit_transform(X), y)
+
+        result = ParallelCategoryTrainer("gradient_boost", CONFIG, n_jobs=1).train(
+            {"0": (X, y)}
+        )["0"]
+        assert np.allclose(result.cv_scores, expected)
+        assert np.allclose(
+            result.model.predict(result.scaler.transform(X)),
+            model.predict(scaler.transform(X)),
+        )
+        assert result.data_size == 120 and result.training_seconds > 0
+
+    def test_parallel_results_are_deterministic(self):
+        data = datasets([60, 200, 90])
+        serial = ParallelCategoryTrainer("gradient_boost", CONFIG, n_jobs=1).train(data)
+        parallel = ParallelCategoryTrainer("gradient_boost", CONFIG, n_jobs=2).train(
+            data
+        )
+        assert list(parallel) == ["0", "1", "2"]
+        for category, (X, _) in data.items():
+            assert serial[category].cv_scores == parallel[category].cv_scores
+            assert np.array_equal(
+                serial[category].model.predict(X), parallel[category].model.predict(X)
+            )
+
+    def test_schedules_largest_fits_first_and_shares_folds(self):
+        trainer = ParallelCategoryTrainer("linear", {}, n_jobs=1)
+        schedule = trainer.schedule(datasets([60, 200]))
+        assert schedule[0] == ("1", None) and len(schedule) == 8
+        assert schedule.index(("0", None)) < schedule.index(("1", 0))
+        assert time_series_folds(200) is time_series_folds(200)
@@ -0,0 +1,95 @@
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.datasets import make_blobs
+from sklearn.metrics import silhouette_score
+
+from services.cluster_count_search import (
+    ClusterCountCache,
+    cluster_count_cache,
+    elbow_point,
+    estimate_silhouette,
+    search_cluster_count,
+    select_cluster_count,
+    stratified_sample,
+)
+
+
+def blobs(n, centers, seed=0):
+    X, _ = make_blobs(
+        n_samples=n, centers=centers, n_features=6, cluster_std=1.0, random_state=seed
+    )
+    return X
+
+
+class TestSilhouetteEstimate:
+    """Test suite for the stratified silhouette estimate"""
+
+    def test_small_clusters_keep_a_minimum_share(self):
+        labels = np.array([0] * 5000 + [1] * 30)
+        rng = np.random.default_rng(0)
+        indices, strata, counts = stratified_sample(labels, 500, rng)
+        assert list(counts) == [5000, 30]
+        assert (strata == 1).sum() >= 20
+        assert len(indices) == len(set(indices.tolist())) < 600
+
+    def test_exact_when_sample_covers_everything(self):
+        X = blobs(400, 3)
+        labels = np.repeat([0, 1, 2, 3], 100)
+        estimate, low, high, scored = estimate_silhouette(
+            X, labels, 1000, np.random.default_rng(0)
+        )
+        assert scored == 400
+        assert low == high == estimate
+        assert abs(estimate - silhouette_score(X, labels)) < 1e-9
+
+    def test_sampled_interval_covers_exact_score(self):
+        X = blobs(6000, 4, seed=1)
+        labels = KMeans(4, n_init=1, random_state=0).fit_predict(X)
+        estimate, low, high, scored = estimate_silhouette(
+            X, labels, 800, np.random.default_rng(0)
+        )
+        exact = silhouette_score(X, labels)
+        assert scored < 1000
+        assert low < high
+        assert low - 0.01 <= exact <= high + 0.01
+
+
+class TestClusterCountSearch:
+    """Test suite for the cluster-count search and its cache"""
+
+    def test_finds_the_number_of_blobs(self):
+        assert search_cluster_count(blobs(300, 4)).optimal_k == 4
+        selection = search_cluster_count(blobs(5000, 5, seed=2), sample_size=500)
+        assert selection.optimal_k == 5
+        assert not selection.exact
+        assert selection.cluster_range == list(range(2, 11))
+
+    def test_tiny_inputs(self):
+        selection = search_cluster_count(blobs(3, 1))
+        assert selection.optimal_k == 2 and selection.cluster_range == [2]
+        assert search_cluster_count(blobs(2, 1)).candidates == []
+
+    def test_elbow(self):
+        assert elbow_point([2, 3, 4, 5], [100.0, 40.0, 35.0, 33.0]) == 3
+        assert elbow_point([2, 3], [1.0, 0.5]) is None
+
+    def test_cache_per_entity_features_and_data(self):
+        cluster_count_cache.clear()
+        X = blobs(200, 3)
+        first = select_cluster_count(X, "stores", ["a", "b"])
+        again = select_cluster_count(X, "stores", ["a", "b"])
+        assert not first.from_cache and again.from_cache
+        assert again.optimal_k == first.optimal_k and again.search_ms == 0.0
+        assert not select_cluster_count(X, "products", ["a", "b"]).from_cache
+        assert not select_cluster_count(X + 1.0, "stores", ["a", "b"]).from_cache
+        assert not select_cluster_count(
+            X, "stores", ["a", "b"], data_version="v2"
+        ).from_cache
+
+    def test_cache_is_bounded(self):
+        cache = ClusterCountCache(max_entries=2)
+        selection = search_cluster_count(blobs(50, 2))
+        for key in ("a", "b", "c"):
+            cache.put((key, (), "v", 2, 10), selection)
+        assert cache.get(("a", (), "v", 2, 10)) is None
+        assert cache.get(("c", (), "v", 2, 10)) is selection
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pandas as pd
+
+from services.clustering_feature_store import (
+    ClusteringFeatureStore,
+    feature_query,
+    persist_query,
+)
+
+WINDOW = (date(2024, 1, 1), date(2024, 3, 31))
+
+
+class FakeConnection:
+    """Feature table held in memory; the compute step writes fixed rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.table = []
+        self.computes = 0
+
+    async def execute(self, query, *args):
+        if query.lstrip().startswith("INSERT"):
+            self.computes += 1
+            self.table = [{"features": json.dumps(row)} for row in self.rows]
+            return f"INSERT 0 {len(self.rows)}"
+        return "OK"
+
+    async def fetch(self, query, *args):
+        return list(self.table)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+def feature_row(entity_id, active_days, transactions):
+    return {
+        "entity_id": entity_id,
+        "active_days": active_days,
+        "total_transactions": transactions,
+        "avg_daily_sales": 10.0,
+        "avg_transaction_value": 2.5,
+        "sales_volatility": 1.0,
+        "temperature_sensitivity": 0.4,
+        "precipitation_sensitivity": -0.2,
+        "humidity_sensitivity": 0.1,
+    }
+
+
+class TestClusteringFeatureStore:
+    """Test suite for the versioned clustering feature store"""
+
+    def test_queries_group_each_entity_in_one_pass(self):
+        for entity_type in ("products", "stores", "cities"):
+            query = feature_query(entity_type)
+            assert query.count("FROM sales_data") == 1
+            assert "GROUPING SETS" in query
+            assert "$1::date AND $2::date" in query
+        assert "store_hierarchy" in feature_query("cities")
+        assert "'city_name'" in persist_query("cities")
+
+    def test_filters_and_renames_per_entity(self):
+        conn = FakeConnection([feature_row(1, 30, 100), feature_row(2, 5, 3)])
+        store = ClusteringFeatureStore()
+
+        df = asyncio.run(
+            store.get_features(conn, "products", *WINDOW, min_data_points=10)
+        )
+        assert list(df["product_id"]) == [1]
+        assert df.loc[0, "avg_sale_amount"] == 2.5
+
+        df = asyncio.run(store.get_features(conn, "stores", *WINDOW, min_data_points=5))
+        assert list(df["store_id"]) == [1, 2]
+        # Too few rows for a correlation: sensitivities are zeroed
+        assert df.loc[1, "temperature_sensitivity"] == 0.0
+        assert df.loc[0, "temperature_sensitivity"] == 0.4
+
+    def test_frames_are_cached_per_version(self):
+        conn = FakeConnection([feature_row(1, 30, 100)])
+        store = ClusteringFeatureStore(max_frames=1)
+
+        asyncio.run(store.get_features(conn, "stores", *WINDOW, data_version="v1"))
+        asyncio.run(store.get_features(conn, "stores", *WINDOW, data_version="v1"))
+        assert (store.hits, store.misses, conn.computes) == (1, 1, 1)
+
+        # The persisted rows are read back without recomputing
+        asyncio.run(store.invalidate())
+        asyncio.run(store.get_features(conn, "stores", *WINDOW, data_version="v1"))
+        assert (store.misses, conn.computes) == (2, 1)
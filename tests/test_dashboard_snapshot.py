@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import pandas as pd
+
+from api.enhanced_multi_modal_api import DASHBOARD_PANELS, _panel_endpoint
+from services import dashboard_snapshot_service as snapshots
+from services.dashboard_snapshot_service import BaseDataset, active_base_dataset
+from services.dynamic_store_service import DynamicStoreService
+
+
+def base_rows():
+    """Two stores x two products over five days"""
+    rows = []
+    for store_id in (104, 105):
+        for product_id in (4, 5):
+            for day in pd.date_range("2024-03-01", periods=5, freq="D"):
+                rows.append(
+                    {
+                        "date": day.date(),
+                        "store_id": store_id,
+                        "product_id": product_id,
+                        "city_id": 0,
+                        "sale_amount": "1.5",
+                        "first_category_id": product_id % 2,
+                        "activity_flag": 1,
+                        "stock_hour6_22_cnt": 3,
+                        "precpt": "0.2",
+                        "avg_wind_level": "4.0",
+                        "second_category_id": 1,
+                        "third_category_id": 1,
+                        "discount": "0.9",
+                        "holiday_flag": 0,
+                        "avg_temperature": "18.5",
+                        "avg_humidity": "60.0",
+                        "product_name": f"Product {product_id}",
+                        "store_name": f"Store {store_id}",
+                        "format_type": "supermarket",
+                        "size_type": "large",
+                    }
+                )
+    return rows
+
+
+class FakeManager:
+    """Counts connections; every fetch returns the base rows"""
+
+    pool = object()
+
+    def __init__(self):
+        self.fetches = 0
+
+    @contextlib.asynccontextmanager
+    async def get_connection(self):
+        manager = self
+
+        class Conn:
+            async def fetch(self, query, *args):
+                manager.fetches += 1
+                await asyncio.sleep(0.01)
+                return base_rows()
+
+        yield Conn()
+
+
+class TestBaseDataset:
+    """Test suite for the shared dashboard base dataset"""
+
+    def test_view_filters_limits_and_renames(self):
+        base = BaseDataset(pd.DataFrame(base_rows()))
+
+        view = base.view("stockout", 3, store_id=104, product_id=5)
+
+        assert len(view) == 3
+        assert set(view["store_id"]) == {104} and set(view["product_id"]) == {5}
+        assert view["date"].is_monotonic_decreasing
+        assert view["stock_level"].tolist() == [3, 3, 3]
+        assert view["promotion_flag"].tolist() == [1, 1, 1]
+        assert view["sale_amount"].dtype == float
+
+    def test_none_filters_are_ignored(self):
+        base = BaseDataset(pd.DataFrame(base_rows()))
+
+        assert len(base.view("store", None, store_id=None)) == 20
+        assert len(base.view("category", None, first_category_id=1)) == 10
+
+    def test_day_of_week_matches_sql_extract(self):
+        base = BaseDataset(pd.DataFrame(base_rows()))
+
+        # 2024-03-03 is a Sunday, which EXTRACT(DOW) reports as 0
+        sunday = base.view("promotion", None, store_id=104, product_id=4)
+        sunday = sunday[sunday["date"] == "2024-03-03"]
+        assert sunday["day_of_week"].tolist() == [0]
+
+    def test_empty_base_returns_empty_views(self):
+        assert BaseDataset().view("weather", 100, city_id=1).empty
+        # A loaded selection without rows can't tell what the query returns
+        assert BaseDataset(city_id=0, store_id=104).view("store", 5) is None
+
+    def test_scoped_views_only_where_they_match_the_query(self):
+        base = BaseDataset(pd.DataFrame(base_rows()), city_id=0, store_id=104)
+
+        assert len(base.view("store", 10, store_id=104)) == 10
+        # Store 105 is in the selection's city, so all its rows were loaded
+        assert len(base.view("stockout", 5, store_id=105, product_id=5)) == 5
+        assert len(base.view("weather", 20, city_id=0)) == 20
+        # All stores: the base only has the selection's city
+        assert base.view("store", 5) is None
+        assert base.view("category", 5, first_category_id=1) is None
+        # Fewer rows in the window than the limit: the query reaches back
+        assert base.view("promotion", 1000, store_id=104, product_id=4) is None
+
+        other_city = BaseDataset(pd.DataFrame(base_rows()), city_id=9, store_id=104)
+        assert other_city.view("store", 5, store_id=105) is None
+
+    def test_truncated_base_skips_its_oldest_day(self):
+        base = BaseDataset(
+            pd.DataFrame(base_rows()), city_id=0, store_id=104, truncated=True
+        )
+        assert base.view("promotion", 5, store_id=104, product_id=4) is None
+        view = base.view("promotion", 4, store_id=104, product_id=4)
+        assert view["date"].min() == pd.Timestamp("2024-03-02")
+
+    def test_fetcher_queries_what_the_view_cannot_serve(self):
+        manager = FakeManager()
+        request = SimpleNamespace(
+            app=SimpleNamespace(state=SimpleNamespace(db_manager=manager))
+        )
+        base = BaseDataset(pd.DataFrame(base_rows()), city_id=0, store_id=104)
+        service = DynamicStoreService()
+
+        async def run():
+            with snapshots.use_base_dataset(base):
+                target = await service.get_store_data(request, 104, limit=10)
+                every_store = await service.get_store_data(request, None, limit=5000)
+            return target, every_store
+
+        target, every_store = asyncio.run(run())
+        assert len(target) == 10
+        assert manager.fetches == 1 and len(every_store) == 20
+
+
+class TestSnapshotCache:
+    """Test suite for base dataset loading and caching"""
+
+    def setup_method(self):
+        snapshots.clear_snapshot_cache()
+
+    def test_concurrent_requests_share_one_load(self):
+        manager = FakeManager()
+        key = snapshots.snapshot_key(0, 104, 4, 90)
+
+        async def run():
+            return await asyncio.gather(
+                *(snapshots.get_snapshot_entry(manager, key) for _ in range(5))
+            )
+
+        results = asyncio.run(run())
+
+        assert manager.fetches == 1
+        assert len({id(entry) for entry, _ in results}) == 1
+        assert sum(not cached for _, cached in results) == 1
+
+    def test_cached_until_refresh(self):
+        manager = FakeManager()
+        key = snapshots.snapshot_key(0, 104, 4, 90)
+
+        asyncio.run(snapshots.get_snapshot_entry(manager, key))
+        _, cached = asyncio.run(snapshots.get_snapshot_entry(manager, key))
+        asyncio.run(snapshots.get_snapshot_entry(manager, key, refresh=True))
+
+        assert cached
+        assert manager.fetches == 2
+
+    def test_base_dataset_is_scoped_to_context(self):
+        base = BaseDataset(pd.DataFrame(base_rows()))
+
+        with snapshots.use_base_dataset(base):
+            assert active_base_dataset() is base
+        assert active_base_dataset() is None
+
+
+class TestSnapshotPanels:
+    """Test suite for the handlers snapshot panels run"""
+
+    def test_panels_skip_the_endpoint_result_cache(self):
+        # @cached keys ignore the snapshot's window and base dataset, so a
+        # panel must not read or fill the plain endpoint's cache entries
+        for path in DASHBOARD_PANELS.values():
+            assert not hasattr(_panel_endpoint(path), "__wrapped__"), path
@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import types
+
+from services.data_version_service import DataVersionRegistry, HttpCachePolicy
+
+
+class FakeManager:
+    """Serves pg_stat_user_tables rows from a dict of change counters"""
+
+    pool = object()
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.probes = 0
+
+    @contextlib.asynccontextmanager
+    async def get_connection(self):
+        manager = self
+
+        class Conn:
+            async def fetch(self, query, tables):
+                manager.probes += 1
+                return [
+                    {"relname": t, "changes": manager.changes[t], "n_live_tup": 1}
+                    for t in tables
+                    if t in manager.changes
+                ]
+
+        yield Conn()
+
+
+def fake_request(manager, headers=None):
+    return types.SimpleNamespace(
+        app=types.SimpleNamespace(state=types.SimpleNamespace(db_manager=manager)),
+        url=types.SimpleNamespace(path="/api/cities", query=""),
+        headers=headers or {},
+    )
+
+
+class TestDataVersionRegistry:
+    """Test suite for table/partition version tracking"""
+
+    def test_probes_are_throttled_and_detect_changes(self):
+        manager = FakeManager({"city_hierarchy": 3})
+        registry = DataVersionRegistry(probe_interval=60)
+
+        async def run():
+            first = await registry.versions(manager, ["city_hierarchy"])
+            manager.changes["city_hierarchy"] = 4
+            cached = await registry.versions(manager, ["city_hierarchy"])
+            await registry.refresh(manager, force=True)
+            fresh = await registry.versions(manager, ["city_hierarchy"])
+            return first, cached, fresh
+
+        first, cached, fresh = asyncio.run(run())
+
+        assert manager.probes == 2
+        assert first[0][1].token == cached[0][1].token
+        assert fresh[0][1].token != first[0][1].token
+
+    def test_partition_bumps(self):
+        manager = FakeManager({"sales_data": 1})
+        registry = DataVersionRegistry(probe_interval=60)
+        keys = ["sales_data", "sales_data:store=104", "sales_data:store=105"]
+
+        before = dict(asyncio.run(registry.versions(manager, keys)))
+        registry.bump("sales_data", "store=104")
+        after = dict(asyncio.run(registry.versions(manager, keys)))
+
+        assert after["sales_data:store=104"].token != before["sales_data"].token
+        assert after["sales_data"].token != before["sales_data"].token
+        assert after["sales_data:store=105"] == before["sales_data:store=105"]
+
+        registry.bump("sales_data")
+        wide = dict(asyncio.run(registry.versions(manager, keys)))
+
+        assert wide["sales_data:store=105"] != after["sales_data:store=105"]
+
+
+class TestHttpCachePolicy:
+    """Test suite for ETag/Last-Modified validators"""
+
+    def test_validators_and_revalidation(self):
+        manager = FakeManager({"city_hierarchy": 3})
+        policy = HttpCachePolicy(["city_hierarchy"], "public, max-age=300")
+        registry = DataVersionRegistry(probe_interval=0)
+
+        validators = asyncio.run(policy.validators(fake_request(manager), registry))
+
+        assert validators["Cache-Control"] == "public, max-age=300"
+        etag = validators["ETag"]
+        assert policy.is_not_modified({"if-none-match": etag}, validators)
+        assert policy.is_not_modified({"if-none-match": f'"x", W/{etag}'}, validators)
+        assert not policy.is_not_modified({"if-none-match": '"x"'}, validators)
+        assert policy.is_not_modified(
+            {"if-modified-since": validators["Last-Modified"]}, validators
+        )
+        assert not policy.is_not_modified({}, validators)
+
+    def test_unknown_version_disables_caching(self):
+        policy = HttpCachePolicy(["missing_table"])
+        registry = DataVersionRegistry(probe_interval=0)
+
+        request = fake_request(FakeManager({}))
+        assert asyncio.run(policy.validators(request, registry)) is None
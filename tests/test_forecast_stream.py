@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+from services.forecast_stream_service import (
+    StreamingForecastSummary,
+    encode_event,
+    negotiate_stream_format,
+    stream_combinations,
+)
+
+
+class FakeManager:
+    """Hands out dummy connections and counts them"""
+
+    def __init__(self):
+        self.connections = 0
+
+    @contextlib.asynccontextmanager
+    async def get_connection(self):
+        self.connections += 1
+        yield object()
+
+
+class FlakyManager(FakeManager):
+    """Refuses the first ``refusals`` connections"""
+
+    def __init__(self, refusals):
+        super().__init__()
+        self.refusals = refusals
+
+    @contextlib.asynccontextmanager
+    async def get_connection(self):
+        self.connections += 1
+        if self.connections <= self.refusals:
+            raise ConnectionError("pool exhausted")
+        yield object()
+
+
+class TestStreamFormat:
+    """Test suite for stream format negotiation and encoding"""
+
+    def test_negotiation(self):
+        assert negotiate_stream_format() == "ndjson"
+        assert negotiate_stream_format(accept="text/event-stream") == "sse"
+        assert negotiate_stream_format("NDJSON", "text/event-stream") == "ndjson"
+        with pytest.raises(ValueError):
+            negotiate_stream_format("xml")
+
+    def test_encoding(self):
+        line = encode_event("ndjson", "summary", {"total": 1})
+        frame = encode_event("sse", "summary", {"total": 1})
+
+        assert line.endswith("\n") and line.count("\n") == 1
+        assert json.loads(line) == {"event": "summary", "data": {"total": 1}}
+        assert frame == 'event: summary\ndata: {"total": 1}\n\n'
+
+
+class TestStreamCombinations:
+    """Test suite for the progressive grid runner"""
+
+    def test_results_arrive_as_they_complete(self):
+        async def worker(conn, combo):
+            await asyncio.sleep(0.2 if combo[2] == 1 else 0.0)
+            if combo[2] == 3:
+                raise RuntimeError("no data")
+            return {"product": combo[2]}
+
+        async def run():
+            manager = FakeManager()
+            combos = [("1", "1", p) for p in (1, 2, 3)]
+            order = []
+            async for combo, result, error in stream_combinations(
+                manager, combos, worker, concurrency=2
+            ):
+                order.append((combo[2], error is not None))
+            return manager.connections, order
+
+        connections, order = asyncio.run(run())
+
+        assert connections == 2
+        assert order[-1] == (1, False)
+        assert sorted(order) == [(1, False), (2, False), (3, True)]
+
+    def test_closing_stops_workers(self):
+        calls = []
+
+        async def worker(conn, combo):
+            calls.append(combo)
+            return {}
+
+        async def run():
+            combos = [("1", "1", p) for p in range(1000)]
+            results = stream_combinations(FakeManager(), combos, worker, 1)
+            await results.__anext__()
+            await results.aclose()
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+
+        # Bounded queue: only a few forecasts run ahead of the consumer
+        assert len(calls) < 10
+
+    def test_unprocessed_combinations_are_reported(self):
+        async def worker(conn, combo):
+            return {"product": combo[2]}
+
+        async def run(refusals):
+            combos = [("1", "1", p) for p in range(5)]
+            results = []
+            async for combo, result, error in stream_combinations(
+                FlakyManager(refusals), combos, worker, concurrency=2
+            ):
+                results.append((combo[2], error))
+            return results
+
+        # Every worker fails to connect: each combination comes back failed
+        failed = asyncio.run(run(refusals=2))
+        assert sorted(p for p, _ in failed) == list(range(5))
+        assert all(isinstance(e, ConnectionError) for _, e in failed)
+
+        # One worker is enough to finish the grid
+        served = asyncio.run(run(refusals=1))
+        assert sorted(p for p, _ in served) == list(range(5))
+        assert all(e is None for _, e in served)
+
+
+class TestStreamingForecastSummary:
+    """Test suite for the incremental grid summary"""
+
+    def test_folds_totals_and_aggregates(self):
+        summary = StreamingForecastSummary()
+        forecast = {
+            "dates": ["2024-01-01", "2024-01-02"],
+            "predictions": [10.0, 20.0],
+            "total_predicted": 30.0,
+            "model_accuracy": 0.5,
+        }
+        summary.add(("1", "10", 4), forecast, historical_avg=10.0)
+        summary.add(("1", "11", 4), forecast, historical_avg=20.0)
+
+        result = summary.to_dict()
+
+        assert result["total_combinations"] == 2
+        assert result["total_predicted"] == 60.0
+        assert result["avg_model_accuracy"] == 50.0
+        assert result["avg_growth_rate"] == 12.5
+        assert result["high_growth_combinations"] == 1
+        assert result["declining_combinations"] == 1
+        city = result["aggregated_data"]["by_city"]["1"]
+        assert city["predictions"] == [20.0, 40.0]
+        assert city["combination_count"] == 2
+        assert set(result["aggregated_data"]["by_store"]) == {"10", "11"}
+
+    def test_empty_summary(self):
+        assert StreamingForecastSummary().to_dict()["total_combinations"] == 0
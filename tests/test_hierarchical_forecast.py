@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.hierarchical_forecast import (
+    align_residuals,
+    build_hierarchy,
+    reconcile,
+    shrinkage_intensity,
+    top_down,
+)
+
+LEVELS = [["city_id"], ["city_id", "store_id"], ["city_id", "store_id", "product_id"]]
+
+
+def grid_hierarchy():
+    leaves = pd.DataFrame(
+        [
+            (c, s, p)
+            for c in range(2)
+            for s in range(c * 3, c * 3 + 3)
+            for p in range(4)
+        ],
+        columns=["city_id", "store_id", "product_id"],
+    )
+    return build_hierarchy(leaves, LEVELS)
+
+
+def dense_mint(S, W, base):
+    W_inv = np.linalg.inv(W)
+    return np.linalg.solve(S.T @ W_inv @ S, S.T @ W_inv @ base)
+
+
+class TestHierarchicalForecast:
+    """Test suite for top-down disaggregation and MinT reconciliation"""
+
+    def test_summing_matrix(self):
+        hierarchy = grid_hierarchy()
+        S = hierarchy.summing.toarray()
+        # total + 2 cities + 6 stores + 24 leaves
+        assert S.shape == (33, 24)
+        assert (S[0] == 1).all()
+        assert (S[-24:] == np.eye(24)).all()
+        assert list(hierarchy.nodes["level"].value_counts().sort_index()) == [
+            1,
+            2,
+            6,
+            24,
+        ]
+        # Stores of city 1 hang off city 1's node
+        assert (hierarchy.parent[hierarchy.level_slices[2]] == [1, 1, 1, 2, 2, 2]).all()
+        assert hierarchy.node_keys(0) == [()]
+        assert hierarchy.node_keys(2)[:2] == [(0, 0), (0, 1)]
+        with pytest.raises(ValueError):
+            build_hierarchy(hierarchy.leaves, [["store_id"], ["city_id"]])
+
+    @pytest.mark.parametrize("method", ["ols", "wls_struct", "wls_var", "mint_shrink"])
+    def test_reconcile_matches_dense_mint(self, method):
+        hierarchy = grid_hierarchy()
+        S = hierarchy.summing.toarray()
+        rng = np.random.default_rng(0)
+        base = rng.gamma(3, size=(hierarchy.n_nodes, 5)) * S.sum(axis=1)[:, None]
+        residuals = S @ rng.normal(size=(24, 30)) + rng.normal(size=(33, 30))
+
+        leaves = reconcile(hierarchy, base, method, residuals)
+
+        variance = (residuals**2).mean(axis=1)
+        covariance = residuals @ residuals.T / residuals.shape[1]
+        shrinkage = shrinkage_intensity(residuals)
+        W = {
+            "ols": np.eye(33),
+            "wls_struct": np.diag(S.sum(axis=1)),
+            "wls_var": np.diag(variance),
+            "mint_shrink": shrinkage * np.diag(variance) + (1 - shrinkage) * covariance,
+        }[method]
+        np.testing.assert_allclose(leaves, dense_mint(S, W, base), atol=1e-8)
+
+    def test_reconcile_keeps_coherent_forecasts(self):
+        hierarchy = grid_hierarchy()
+        leaves = np.arange(24, dtype=float)
+        np.testing.assert_allclose(
+            reconcile(hierarchy, hierarchy.aggregate(leaves)), leaves, atol=1e-9
+        )
+        with pytest.raises(ValueError):
+            reconcile(hierarchy, hierarchy.aggregate(leaves), "mint_shrink")
+
+    def test_top_down_historical_proportions(self):
+        hierarchy = grid_hierarchy()
+        history = np.arange(1, 25, dtype=float)
+        base = np.full((hierarchy.n_nodes, 3), np.nan)
+        base[0] = [100.0, 200.0, 300.0]
+
+        leaves = top_down(hierarchy, base, history)
+        np.testing.assert_allclose(leaves.sum(axis=0), base[0])
+        np.testing.assert_allclose(leaves[:, 0], 100 * history / history.sum())
+
+    def test_top_down_forecast_proportions(self):
+        hierarchy = grid_hierarchy()
+        history = np.ones(24)
+        history[:4] = 0  # store 0 never sold: its products split evenly
+        base = np.full((hierarchy.n_nodes, 1), np.nan)
+        base[:9, 0] = [90, 30, 60, 10, 0, 20, 20, 20, 20]
+
+        nodes = hierarchy.aggregate(top_down(hierarchy, base, history))
+        # Cities take the total by their forecast shares, stores their city's
+        np.testing.assert_allclose(nodes[1:9, 0], [30, 60, 10, 0, 20, 20, 20, 20])
+        np.testing.assert_allclose(nodes[-24:-20, 0], 2.5)
+        with pytest.raises(ValueError):
+            top_down(hierarchy, np.full((33, 1), np.nan), history)
+
+    def test_residuals_aligned_by_date(self):
+        days = pd.date_range("2024-01-01", periods=6)
+        full = pd.Series(np.arange(6.0), index=days)
+        # Starts two days late and skips 2024-01-04
+        late = pd.Series([12.0, 14.0, 15.0], index=days[[2, 4, 5]])
+        matrix = align_residuals([full, late, full.iloc[::-1]])
+        np.testing.assert_array_equal(
+            matrix, [[2.0, 4.0, 5.0], [12.0, 14.0, 15.0], [2.0, 4.0, 5.0]]
+        )
+        assert align_residuals([full, pd.Series(dtype=float)]).shape == (2, 0)
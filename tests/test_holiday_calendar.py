@@ -0,0 +1,155 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+import pandas as pd
+import numpy as np
+
+import services.holiday_calendar as holiday_calendar
+from services.feature_builder import AdvancedFeatureBuilder
+from services.forecast_service import fetch_holiday_data
+from services.holiday_calendar import (
+    HolidayCalendar,
+    NO_HOLIDAY_DAYS,
+    load_holiday_calendar,
+)
+from models.holiday_impact import analyze_holiday_impact
+from models.weather_demand_model import WeatherSensitiveDemandModel
+
+
+@pytest.fixture
+def sales_data():
+    """Sixty days of sales with a few flagged holidays"""
+    dates = pd.date_range("2024-01-01", periods=60, freq="D")
+    holidays = pd.to_datetime(["2024-01-01", "2024-01-15", "2024-02-10"])
+    return pd.DataFrame(
+        {
+            "sale_date": dates,
+            "city_id": np.where(np.arange(len(dates)) % 2 == 0, 1, 2),
+            "product_id": np.arange(len(dates)) % 3,
+            "sale_amount": np.where(dates.isin(holidays), 150.0, 100.0),
+            "holiday_flag": dates.isin(holidays).astype(int),
+        }
+    )
+
+
+class CountingManager:
+    """Database manager stub that counts ``holiday_calendar`` queries"""
+
+    def __init__(self):
+        self.holiday_queries = 0
+
+    async def fetch(self, query, *args):
+        if "FROM holiday_calendar" in query:
+            self.holiday_queries += 1
+            return [
+                {
+                    "date": date(2024, 1, 15),
+                    "holiday_name": "Festival",
+                    "holiday_type": "national",
+                    "significance": "high",
+                }
+            ]
+        return []
+
+    @asynccontextmanager
+    async def get_connection(self):
+        yield self
+
+
+@pytest.fixture
+def fresh_calendar_cache(monkeypatch):
+    monkeypatch.setattr(
+        holiday_calendar, "_calendar_cache", {"manager": None, "calendar": None}
+    )
+
+
+def brute_force(df):
+    """Reference row-wise implementation"""
+    holiday_dates = df[df["holiday_flag"] == 1]["sale_date"].unique()
+    since, until = [], []
+    for date in df["sale_date"]:
+        past = holiday_dates[holiday_dates <= date]
+        future = holiday_dates[holiday_dates > date]
+        since.append((date - past.max()).days if len(past) else NO_HOLIDAY_DAYS)
+        until.append((future.min() - date).days if len(future) else NO_HOLIDAY_DAYS)
+    return since, until
+
+
+class TestHolidayCalendar:
+    """Test suite for the shared holiday calendar"""
+
+    def test_matches_row_wise_reference(self, sales_data):
+        calendar = HolidayCalendar.from_sales(sales_data)
+        since, until = brute_force(sales_data)
+
+        assert calendar.days_since(sales_data["sale_date"]).tolist() == since
+        assert calendar.days_until(sales_data["sale_date"]).tolist() == until
+
+    def test_feature_builder_uses_calendar(self, sales_data, tmp_path):
+        builder = AdvancedFeatureBuilder(save_path=tmp_path)
+        since, until = brute_force(sales_data)
+
+        assert builder._calculate_days_since_holiday(sales_data).tolist() == since
+        assert builder._calculate_days_until_holiday(sales_data).tolist() == until
+
+    def test_per_city_dates_and_window(self):
+        calendar = HolidayCalendar(
+            pd.DataFrame({"date": ["2024-03-01"], "holiday_name": ["Network"]}),
+            city_holidays={7: ["2024-03-10"]},
+        )
+        dates = ["2024-03-09", "2024-03-09", "2024-03-11"]
+        city_ids = [7, 8, 7]
+
+        assert calendar.days_until(dates, city_ids).tolist() == [
+            1,
+            NO_HOLIDAY_DAYS,
+            NO_HOLIDAY_DAYS,
+        ]
+        assert calendar.days_since(dates, city_ids).tolist() == [8, 8, 1]
+        assert calendar.in_window(dates, city_ids).tolist() == [True, False, True]
+        assert len(calendar.to_frame("2024-02-01", "2024-03-31")) == 1
+
+    def test_holiday_impact_per_product(self, sales_data):
+        impact = analyze_holiday_impact(sales_data)
+
+        assert set(impact["product_id"]) == {0, 1, 2}
+        assert impact["percentage_lift"].tolist() == pytest.approx([50.0] * 3)
+        assert analyze_holiday_impact(sales_data.drop(columns=["holiday_flag"])).empty
+
+    def test_warm_calendar_serves_forecast_paths(self, fresh_calendar_cache, tmp_path):
+        manager = CountingManager()
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+        request.app.state.db_manager = manager
+        assert holiday_calendar.cached_holiday_calendar() is None
+
+        asyncio.run(load_holiday_calendar(manager))
+        assert manager.holiday_queries == 1
+
+        for _ in range(3):
+            holidays = asyncio.run(
+                fetch_holiday_data(request, "2024-01-01", "2024-01-31")
+            )
+            assert holidays["holiday_name"].tolist() == ["Festival"]
+        empty = asyncio.run(fetch_holiday_data(request, "2024-03-01", "2024-03-31"))
+        assert empty.empty and "holiday_name" in empty.columns
+
+        # Model feature building uses the warm calendar, not its own flags
+        sales = pd.DataFrame(
+            {
+                "sale_date": pd.date_range("2024-01-10", periods=10, freq="D"),
+                "sale_amount": 1.0,
+                "holiday_flag": 0,
+                "avg_temperature": 20.0,
+                "avg_humidity": 60.0,
+                "precpt": 0.0,
+                "avg_wind_level": 1.0,
+            }
+        )
+        model = WeatherSensitiveDemandModel(save_path=tmp_path)
+        features = model.prepare_weather_features(sales)
+        assert features["days_until_next_holiday"].iloc[0] == 5
+        assert features["days_since_last_holiday"].iloc[-1] == 4
+        assert manager.holiday_queries == 1
@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.startup import parse_importtime, time_import
+from utils.lazy_routes import (
+    LazyRouter,
+    LazyRouterMiddleware,
+    LazyRouterRegistry,
+    StartupProfile,
+)
+
+LAZY_MODULE = """
+from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get("/reports/{name}")
+async def report(name: str):
+    return {"report": name}
+"""
+
+
+def make_app(registry):
+    app = FastAPI()
+    app.add_middleware(LazyRouterMiddleware, registry=registry)
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def get(app, path):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get(path)
+
+    return asyncio.run(run())
+
+
+class TestLazyRouters:
+    """Test suite for mounting routers on first use"""
+
+    def test_claims(self):
+        router = LazyRouter("m", paths=["/api/enhanced", "/api/demand-forecast"])
+        assert router.claims("/api/enhanced")
+        assert router.claims("/api/enhanced/dashboard-snapshot")
+        assert router.claims("/api/demand-forecast/stream")
+        assert not router.claims("/api/enhanced-other")
+        assert not router.claims("/api/cities")
+        assert LazyRouter("m", prefix="/v2").claims("/v2/reports")
+        assert not LazyRouter("m").claims("/v2/reports")
+
+    def test_mounts_on_first_matching_request(self, tmp_path, monkeypatch):
+        (tmp_path / "lazy_reports_api.py").write_text(LAZY_MODULE)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        registry = LazyRouterRegistry()
+        entry = registry.add("lazy_reports_api", prefix="/api", paths=["/api/reports"])
+        app = make_app(registry)
+
+        assert get(app, "/health").status_code == 200
+        assert not entry.loaded
+
+        response = get(app, "/api/reports/sales")
+        assert response.json() == {"report": "sales"}
+        assert entry.loaded and entry.import_ms is not None
+        assert registry.pending() == []
+
+    def test_unmatched_path_loads_nothing(self, tmp_path, monkeypatch):
+        (tmp_path / "lazy_unlisted_api.py").write_text(LAZY_MODULE)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        registry = LazyRouterRegistry()
+        # No paths: the mount prefix is claimed
+        unlisted = registry.add("lazy_unlisted_api", prefix="/v2")
+        broken = registry.add("lazy_missing_api", paths=["/missing"])
+        app = make_app(registry)
+
+        assert get(app, "/nowhere").status_code == 404
+        assert registry.pending() == [unlisted, broken]
+
+        assert get(app, "/v2/reports/x").status_code == 200
+        assert get(app, "/missing").status_code == 404
+        assert broken.error.startswith("ModuleNotFoundError")
+        assert registry.pending() == []
+
+
+class TestStartupBudget:
+    """Test suite for the startup profile and import-time report"""
+
+    def test_profile(self):
+        profile = StartupProfile(budget_ms=100, registry=LazyRouterRegistry())
+        profile.phases.update({"import": 60.0, "startup": 30.0})
+        assert profile.within_budget
+        profile.phases["startup"] = 50.0
+        report = profile.to_dict()
+        assert report["total_ms"] == 110.0 and not report["within_budget"]
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     numpy.core\n"
+            "import time:      2000 |       2500 |   numpy\n"
+            "import time:       500 |       3000 | app.main\n"
+        )
+        rows = parse_importtime(stderr)
+        assert [(r["module"], r["depth"]) for r in rows] == [
+            ("numpy.core", 2),
+            ("numpy", 1),
+            ("app.main", 0),
+        ]
+        assert rows[1]["self_ms"] == 2.0 and rows[2]["cumulative_ms"] == 3.0
+
+    def test_app_import_skips_heavy_libraries(self):
+        assert time_import("app.main")["heavy_modules"] == []
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from services.live_weather_service import LiveWeatherService, _RateLimiter
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    """Service with a key, a temporary cache file and a counting provider"""
+    monkeypatch.delenv("WEATHER_API_KEY", raising=False)
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test-key")
+    monkeypatch.setenv("WEATHER_CACHE_PATH", str(tmp_path / "weather.json"))
+    monkeypatch.setenv("WEATHER_CACHE_SAVE_DELAY", "0.05")
+    service = LiveWeatherService()
+
+    async def fake_fetch(city_id, city_name):
+        service.stats["provider_calls"] += 1
+        await asyncio.sleep(0.05)
+        return {"temperature": 70.0, "city_name": city_name.split(",")[0]}
+
+    monkeypatch.setattr(service, "_fetch_current_weather", fake_fetch)
+    return service
+
+
+class TestLiveWeatherService:
+    """Test suite for the live weather cache, coalescing and rate limiting"""
+
+    def test_concurrent_lookups_share_one_provider_call(self, service):
+        async def scenario():
+            results = await asyncio.gather(
+                *(service.get_current_weather("1") for _ in range(10))
+            )
+            again = await service.get_current_weather("1")
+            return results, again
+
+        results, again = asyncio.run(scenario())
+
+        assert all(r["city_name"] == "New York" for r in results)
+        assert again == results[0]
+        stats = service.get_stats()
+        assert stats["provider_calls"] == 1
+        assert stats["coalesced"] == 9
+        assert stats["cache_hits"] == 1
+
+    def test_cache_persisted_off_the_request_path(self, service):
+        async def scenario():
+            await service.get_weather_for_cities(["1", "2", "3"])
+            # The write is deferred, not done inside the request
+            written_early = service.cache_path.exists()
+            await asyncio.sleep(0.2)
+            return written_early
+
+        assert asyncio.run(scenario()) is False
+        assert len(json.loads(service.cache_path.read_text())) == 3
+
+        # A restarted service is served from the file
+        restarted = LiveWeatherService()
+        assert asyncio.run(restarted.get_current_weather("2"))["city_name"] == (
+            "Chicago"
+        )
+        assert restarted.stats["cache_hits"] == 1
+
+    def test_flush_writes_pending_entries(self, service):
+        async def scenario():
+            await service.get_current_weather("4")
+            await service.close()
+
+        asyncio.run(scenario())
+        assert len(json.loads(service.cache_path.read_text())) == 1
+
+    def test_rate_limiter_spaces_calls(self):
+        limiter = _RateLimiter(rate=20)
+
+        async def scenario():
+            stamps = []
+
+            async def call():
+                await limiter.acquire()
+                stamps.append(time.monotonic())
+
+            await asyncio.gather(*(call() for _ in range(5)))
+            return sorted(stamps)
+
+        stamps = asyncio.run(scenario())
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        assert min(gaps) >= 0.04
+        assert stamps[-1] - stamps[0] >= 0.19
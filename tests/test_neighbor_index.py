@@ -0,0 +1,60 @@
+import numpy as np
+from sklearn.cluster import DBSCAN
+from sklearn.datasets import make_blobs
+from sklearn.neighbors import NearestNeighbors
+
+from services.neighbor_index import NeighborIndex, NeighborIndexCache
+
+
+def blobs(n, seed=0):
+    X, _ = make_blobs(n_samples=n, centers=3, n_features=4, random_state=seed)
+    return X
+
+
+class TestNeighborIndex:
+    """Test suite for the shared nearest-neighbour index"""
+
+    def test_exact_k_distances_match_nearest_neighbors(self):
+        X = blobs(500)
+        distances, _ = NearestNeighbors(n_neighbors=4).fit(X).kneighbors(X)
+        index = NeighborIndex(X, sample_size=1000)
+        assert index.exact
+        assert np.allclose(index.k_distances(4), np.sort(distances[:, 3]))
+        assert index.k_distances(4) is index.k_distances(4)
+
+    def test_sampled_k_distances_estimate_the_curve(self):
+        X = blobs(20000, seed=1)
+        distances, _ = NearestNeighbors(n_neighbors=4).fit(X).kneighbors(X)
+        index = NeighborIndex(X, sample_size=2000)
+        assert not index.exact and len(index.k_distances(4)) == 2000
+        exact = np.percentile(distances[:, 3], 75)
+        assert abs(np.percentile(index.k_distances(4), 75) - exact) < 0.05 * exact
+
+    def test_dbscan_on_radius_graph_matches_direct_dbscan(self):
+        X = blobs(800, seed=2)
+        index = NeighborIndex(X)
+        direct = DBSCAN(eps=0.6, min_samples=5).fit_predict(X)
+        graph = DBSCAN(eps=0.6, min_samples=5, metric="precomputed").fit_predict(
+            index.radius_graph(0.6)
+        )
+        assert (direct == graph).all()
+
+    def test_nearest_to_centre_stays_in_cluster(self):
+        X = np.vstack([np.zeros((50, 2)), np.ones((10, 2)) * 5])
+        X[:50] += np.linspace(0, 1, 50)[:, None]
+        labels = np.array([0] * 50 + [1] * 10)
+        index = NeighborIndex(X)
+        nearest = index.nearest_to_centre(labels, 0, count=3)
+        assert len(nearest) == 3 and set(labels[nearest]) == {0}
+        assert 24 in nearest or 25 in nearest
+        assert len(index.nearest_to_centre(labels, 1, count=20)) == 10
+        assert len(index.nearest_to_centre(labels, 7)) == 0
+
+    def test_cache_reuses_index_per_matrix(self):
+        cache = NeighborIndexCache(max_entries=1)
+        X = blobs(200)
+        first = cache.get_or_build(X)
+        assert cache.get_or_build(X.copy()) is first
+        assert cache.get_or_build(X + 1) is not first
+        assert cache.get_or_build(X) is not first
+        assert (cache.hits, cache.misses) == (1, 3)
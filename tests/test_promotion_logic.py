@@ -0,0 +1,129 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from models.promo_uplift_model import PromoUpliftModel, promo_run_lengths
+from services.promotion_logic import (
+    score_promotion_grid,
+    simulate_and_recommend_promotions,
+)
+
+
+class CountingUpliftModel:
+    """Uplift model stub: uplift rises with discount, counts predict calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+
+    def predict(self, df):
+        self.calls += 1
+        self.rows += len(df)
+        # Store 2 responds twice as strongly as store 1
+        return df["discount"] * 100 * df["store_id"] - 2
+
+
+@pytest.fixture
+def sales_data():
+    """30 days for 2 stores x 3 products, a third of the days on promo"""
+    dates = pd.date_range("2024-01-01", periods=30, freq="D")
+    frames = []
+    for store_id in (1, 2):
+        for product_id in (10, 11, 12):
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "sale_date": dates,
+                        "store_id": store_id,
+                        "product_id": product_id,
+                        "sale_amount": np.full(len(dates), 20.0),
+                        "promo_flag": np.arange(len(dates)) % 3 == 0,
+                        "discount": 0.0,
+                    }
+                )
+            )
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestPromotionGrid:
+    """Test suite for the batched promotion simulation engine"""
+
+    def test_whole_grid_scored_in_one_predict_call(self, sales_data):
+        model = CountingUpliftModel()
+        scored = score_promotion_grid(
+            sales_data,
+            model,
+            ["store_id", "product_id"],
+            discount_levels=[0.1, 0.2, 0.3],
+            durations=[7, 14],
+        )
+
+        assert model.calls == 1
+        # 6 series x 28 profile days x 3 discounts x 2 durations
+        assert model.rows == 6 * 28 * 3 * 2
+        # One best scenario per series
+        assert len(scored) == 6
+        assert not scored.duplicated(["store_id", "product_id"]).any()
+
+    def test_argmax_matches_brute_force_roi(self, sales_data):
+        scored = score_promotion_grid(
+            sales_data,
+            CountingUpliftModel(),
+            ["store_id", "product_id"],
+            discount_levels=[0.1, 0.2, 0.3],
+        )
+        # uplift = 100*d*s - 2, cost = 20*d -> roi = (100*d*s - 2 - 20d) / 20d
+        # which increases with d, so the largest discount wins
+        assert (scored["discount_percentage"] == 0.3).all()
+        store2 = scored[scored["store_id"] == 2].iloc[0]
+        assert store2["estimated_uplift"] == pytest.approx(58.0)
+        assert store2["estimated_roi"] == pytest.approx((58.0 - 6.0) / 6.0)
+        assert scored.iloc[0]["store_id"] == 2
+
+    def test_recommendation_payload(self, sales_data):
+        result = simulate_and_recommend_promotions(
+            sales_data, CountingUpliftModel(), ["store_id", "product_id"], count=4
+        )
+
+        assert result["summary"]["total_recommendations"] == 4
+        rec = result["recommendations"][0]
+        assert rec["store_id"] == 2
+        assert rec["promotion_duration_days"] == 7
+        assert rec["discount_percentage"] == 0.5
+
+    def test_series_with_too_little_history_are_skipped(self, sales_data):
+        short = sales_data[sales_data["sale_date"] < "2024-01-06"]
+        scored = score_promotion_grid(
+            short, CountingUpliftModel(), ["store_id", "product_id"]
+        )
+        assert scored.empty
+
+    def test_promo_run_lengths(self, sales_data):
+        shuffled = sales_data.sample(frac=1, random_state=0)
+        shuffled["promo_flag"] = shuffled["sale_date"].dt.day.isin([1, 2, 3, 10])
+        lengths = pd.Series(promo_run_lengths(shuffled), index=shuffled.index)
+        by_day = lengths.groupby(shuffled["sale_date"].dt.day).unique()
+        assert list(by_day[[1, 2, 3, 4, 10]].str[0]) == [3, 3, 3, 0, 1]
+
+    def test_duration_changes_uplift(self, sales_data):
+        data = sales_data.copy()
+        # Promotions of growing length: 2, 4, 6 ... days, each run starting a week
+        day = (data["sale_date"] - data["sale_date"].min()).dt.days
+        data["promo_flag"] = day % 7 < 2 + 2 * (day // 7) % 5
+        data["promo_duration"] = promo_run_lengths(data)
+        data["uplift"] = data["promo_duration"] * 1.5
+        model = PromoUpliftModel()
+        model.train(data.drop(columns=["promo_duration"]))
+        assert "promo_duration" in model.feature_names
+
+        scored = score_promotion_grid(
+            sales_data,
+            model,
+            ["store_id", "product_id"],
+            discount_levels=[0.2],
+            durations=[2, 8],
+            best_per_series=False,
+        )
+        uplift = scored.groupby("promotion_duration_days")["estimated_uplift"].mean()
+        # Longer promotions were learned to lift more (1.5 per day of length)
+        assert uplift[8] - uplift[2] > 5
@@ -0,0 +1,68 @@
+import asyncio
+
+from services.realtime_push_service import ConnectionManager
+
+
+class FakeWebSocket:
+    """Records frames; ``delay`` simulates a slow consumer"""
+
+    def __init__(self, name, delay=0.0):
+        self.client = name
+        self.delay = delay
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+
+class TestConnectionManager:
+    """Test suite for WebSocket fan-out"""
+
+    def test_slow_client_does_not_block_broadcast(self):
+        async def run():
+            manager = ConnectionManager(max_queue=10, send_timeout=5)
+            slow, fast = FakeWebSocket("slow", delay=1.0), FakeWebSocket("fast")
+            await manager.connect(slow)
+            await manager.connect(fast)
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            recipients = await manager.broadcast("hello")
+            elapsed = loop.time() - start
+            await asyncio.sleep(0.05)
+            await manager.close()
+            return recipients, elapsed, fast.sent
+
+        recipients, elapsed, fast_sent = asyncio.run(run())
+
+        assert recipients == 2
+        assert elapsed < 0.1
+        assert fast_sent == ["hello"]
+
+    def test_topics_drop_oldest_and_coalescing(self):
+        async def run():
+            manager = ConnectionManager(max_queue=2, send_timeout=5)
+            forecast, alerts = FakeWebSocket("forecast"), FakeWebSocket("alerts")
+            await manager.connect(forecast, ["forecast"])
+            await manager.connect(alerts, ["alerts"])
+
+            # Nothing is sent until the writers run, so queues fill up
+            for i in range(3):
+                await manager.broadcast(f"m{i}", topic="forecast")
+            await manager.broadcast({"a": 1}, topic="alerts", coalesce_key="k")
+            await manager.broadcast({"a": 2}, topic="alerts", coalesce_key="k")
+            stats = manager.get_stats()
+            await asyncio.sleep(0.05)
+            await manager.close()
+            return forecast.sent, alerts.sent, stats
+
+        forecast_sent, alerts_sent, stats = asyncio.run(run())
+
+        assert forecast_sent == ["m1", "m2"]
+        assert alerts_sent == ['{"a": 2}']
+        assert stats["dropped"] == 1 and stats["coalesced"] == 1
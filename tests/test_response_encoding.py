@@ -0,0 +1,169 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, FastAPI
+from pydantic import BaseModel, Field
+
+from utils.response_encoding import (
+    CompressionMiddleware,
+    EncodedAPIRoute,
+    dumps,
+    to_columnar,
+)
+
+
+def run_middleware(body, headers, more_body=False, minimum_size=100):
+    """Send one response through the middleware and collect the messages"""
+
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": headers}
+    middleware = CompressionMiddleware(app, minimum_size=minimum_size)
+    asyncio.run(middleware(scope, None, send))
+    return dict(sent[0]["headers"]), sent[1]["body"]
+
+
+class TestDumps:
+    """Test suite for the JSON fast path"""
+
+    def test_numpy_and_pandas_values(self):
+        payload = {
+            "array": np.arange(3),
+            "scalar": np.float32(1.5),
+            "missing": float("nan"),
+            "when": pd.Timestamp("2024-03-01"),
+            "series": pd.Series([1, 2]),
+            "frame": pd.DataFrame({"a": [1], "b": [None]}),
+            7: "int key",
+        }
+
+        assert json.loads(dumps(payload)) == {
+            "array": [0, 1, 2],
+            "scalar": 1.5,
+            "missing": None,
+            "when": "2024-03-01T00:00:00",
+            "series": [1, 2],
+            "frame": [{"a": 1, "b": None}],
+            "7": "int key",
+        }
+
+
+class TestColumnar:
+    """Test suite for the packed columnar layout"""
+
+    def test_uniform_rows_are_packed(self):
+        rows = [{"date": "2024-03-01", "y": 1.0}, {"date": "2024-03-02", "y": 2.0}]
+
+        packed = json.loads(dumps(to_columnar({"forecast": rows, "n": 2})))
+
+        assert packed == {
+            "forecast": {
+                "$columns": {"date": ["2024-03-01", "2024-03-02"], "y": [1.0, 2.0]},
+                "$length": 2,
+            },
+            "n": 2,
+        }
+
+    def test_mixed_rows_are_kept(self):
+        rows = [{"a": 1}, {"b": 2}]
+
+        assert to_columnar(rows) == rows
+
+
+class TestCompressionMiddleware:
+    """Test suite for response compression"""
+
+    def test_large_body_is_gzipped(self):
+        body = b'{"values": [' + b"1," * 500 + b"1]}"
+
+        headers, sent = run_middleware(body, [(b"accept-encoding", b"gzip, br")])
+
+        assert headers[b"content-encoding"] == b"gzip"
+        assert int(headers[b"content-length"]) == len(sent)
+        assert gzip.decompress(sent) == body
+
+    def test_small_streaming_or_unaccepted_bodies_pass_through(self):
+        body = b"x" * 1000
+
+        assert (
+            b"content-encoding"
+            not in run_middleware(b"{}", [(b"accept-encoding", b"gzip")])[0]
+        )
+        assert (
+            run_middleware(body, [(b"accept-encoding", b"gzip")], more_body=True)[1]
+            == body
+        )
+        assert run_middleware(body, [])[1] == body
+
+
+class Reading(BaseModel):
+    store_id: int = Field(alias="storeId")
+    sales: float | None = None
+    note: str = "ok"
+
+
+def get_json(router, path):
+    """Call ``path`` on an app serving ``router`` and decode the body"""
+    app = FastAPI()
+    app.include_router(router)
+
+    async def call():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return (await c.get(path)).json()
+
+    return asyncio.run(call())
+
+
+class TestEncodedAPIRoute:
+    """Test suite for the response-encoding route class"""
+
+    def test_response_model_options_apply(self):
+        router = APIRouter(route_class=EncodedAPIRoute)
+
+        @router.get("/alias", response_model=Reading)
+        def alias():
+            return {"storeId": 1, "sales": 2.5}
+
+        @router.get(
+            "/trimmed",
+            response_model=list[Reading],
+            response_model_exclude_none=True,
+            response_model_exclude={"__all__": {"note"}},
+            response_model_by_alias=False,
+        )
+        def trimmed():
+            return [{"storeId": 1}, {"storeId": 2, "sales": 3.0}]
+
+        @router.get("/unset", response_model=Reading, response_model_exclude_unset=True)
+        def unset():
+            return Reading(storeId=3)
+
+        @router.get("/plain")
+        def plain():
+            return Reading(storeId=4)
+
+        assert get_json(router, "/alias") == {"storeId": 1, "sales": 2.5, "note": "ok"}
+        assert get_json(router, "/trimmed") == [
+            {"store_id": 1},
+            {"store_id": 2, "sales": 3.0},
+        ]
+        assert get_json(router, "/unset") == {"storeId": 3}
+        assert get_json(router, "/plain") == {"storeId": 4, "sales": None, "note": "ok"}
@@ -0,0 +1,149 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score
+
+from services import scalable_clustering
+from services.scalable_clustering import (
+    BirchAgglomerative,
+    BirchDBSCAN,
+    StreamingKMeans,
+    StreamingModelRegistry,
+    _CFTreeClustering,
+    scalable_algorithm,
+)
+
+
+def blobs(n, centers=3, seed=0):
+    return make_blobs(
+        n_samples=n, centers=centers, n_features=4, cluster_std=0.6, random_state=seed
+    )
+
+
+class TestScalableClustering:
+    """Test suite for the mini-batch and BIRCH clustering backends"""
+
+    def test_switches_to_scalable_variant_for_large_inputs(self):
+        assert scalable_algorithm("KMeans", 10) == "kmeans"
+        assert scalable_algorithm("kmeans", 10**6) == "minibatch_kmeans"
+        assert scalable_algorithm("dbscan", 10**6) == "birch_dbscan"
+        assert scalable_algorithm("hierarchical", 10**6) == "birch_agglomerative"
+        assert scalable_algorithm("birch_dbscan", 10) == "birch_dbscan"
+
+    def test_streaming_kmeans_recovers_blobs_and_updates(self):
+        X, y = blobs(3000)
+        model = StreamingKMeans(n_clusters=3)
+        assert adjusted_rand_score(y, model.fit_predict(X)) > 0.95
+        model.partial_fit(X[:500])
+        assert model.n_seen == 3500
+        assert adjusted_rand_score(y, model.predict(X)) > 0.95
+        assert model.cluster_centers_.shape == (3, 4) and model.inertia_ > 0
+
+    def test_birch_dbscan_bounds_subclusters(self):
+        X, y = blobs(4000)
+        model = BirchDBSCAN(eps=0.5, min_samples=5, threshold=0.05, max_subclusters=200)
+        labels = model.fit_predict(X)
+        assert len(model.subcluster_sizes_) <= 200
+        assert model.subcluster_sizes_.sum() == len(X)
+        assert adjusted_rand_score(y, labels) > 0.95
+
+        model.partial_fit(X[:1000])
+        assert model.subcluster_sizes_.sum() == len(X) + 1000
+        assert adjusted_rand_score(y[:200], model.predict(X[:200])) > 0.95
+
+    def test_partial_fit_keeps_subcluster_budget(self):
+        X, _ = blobs(1000)
+        model = BirchDBSCAN(eps=0.5, min_samples=5, threshold=0.05, max_subclusters=100)
+        model.fit(X)
+        fitted_threshold = model.threshold
+        # New rows spread far beyond the fitted ones, adding subclusters
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            model.partial_fit(rng.uniform(-30, 30, (1000, 4)))
+            assert len(model.subcluster_sizes_) <= 100
+            assert len(model.birch.subcluster_centers_) == len(model.subcluster_sizes_)
+        assert model.threshold > fitted_threshold
+        # Coarsening merges CFs, so every row is still counted once
+        assert model.subcluster_sizes_.sum() == 6000
+        assert len(model.predict(X)) == 1000
+
+    def test_birch_agglomerative(self):
+        X, y = blobs(4000, centers=4, seed=1)
+        labels = BirchAgglomerative(n_clusters=4, max_subclusters=300).fit_predict(X)
+        assert adjusted_rand_score(y, labels) > 0.95
+
+    def test_registry_updates_stored_models(self):
+        X, _ = blobs(2000)
+        registry = StreamingModelRegistry(max_models=1)
+        model, _, updated = registry.fit_or_update(
+            X, "minibatch_kmeans", "stores", ["a"], n_clusters=3
+        )
+        assert not updated
+        again, labels, updated = registry.fit_or_update(
+            X[:100], "minibatch_kmeans", "stores", ["a"], n_clusters=3
+        )
+        assert updated and again is model and len(labels) == 100
+        # Rows the model has already seen are not fed again
+        assert model.n_seen == 2000
+        registry.fit_or_update(X, "minibatch_kmeans", "stores", ["b"], n_clusters=3)
+        assert list(registry.models) == [("stores", ("b",), "minibatch_kmeans", 3)]
+
+    def test_registry_feeds_only_unseen_rows(self, monkeypatch):
+        X, _ = blobs(2000)
+        registry = StreamingModelRegistry()
+        model, _, _ = registry.fit_or_update(X, "birch_dbscan", "stores", ["a"])
+        fed = []
+        original = model.partial_fit
+        monkeypatch.setattr(
+            model, "partial_fit", lambda rows: fed.append(len(rows)) or original(rows)
+        )
+
+        for _ in range(3):
+            registry.fit_or_update(X, "birch_dbscan", "stores", ["a"])
+        new, _ = blobs(300, seed=5)
+        _, labels, _ = registry.fit_or_update(
+            np.vstack([X[:500], new]), "birch_dbscan", "stores", ["a"]
+        )
+        assert fed == [300] and len(labels) == 800
+        assert model.subcluster_sizes_.sum() == 2300
+
+    def test_registry_caps_seen_rows(self, monkeypatch):
+        monkeypatch.setattr(scalable_clustering, "MAX_SEEN_ROWS", 1500)
+        X, _ = blobs(2000)
+        registry = StreamingModelRegistry()
+        model, _, _ = registry.fit_or_update(
+            X[:1000], "minibatch_kmeans", "stores", ["a"], n_clusters=3
+        )
+        registry.fit_or_update(X, "minibatch_kmeans", "stores", ["a"], n_clusters=3)
+        entry = registry.models[("stores", ("a",), "minibatch_kmeans", 3)]
+        assert len(entry.seen) == 1500 and model.n_seen == 2000
+
+    def test_registry_concurrent_updates(self):
+        X, _ = blobs(4000)
+        registry = StreamingModelRegistry()
+        model, _, _ = registry.fit_or_update(
+            X[:1000], "minibatch_kmeans", "stores", ["a"], n_clusters=3
+        )
+
+        def update(i):
+            # Each payload overlaps the fitted rows and brings 500 new ones
+            rows = np.vstack([X[:1000], X[1000 + 500 * i : 1500 + 500 * i]])
+            return registry.fit_or_update(
+                rows, "minibatch_kmeans", "stores", ["a"], n_clusters=3
+            )
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(update, range(6)))
+        assert all(updated and m is model for m, _, updated in results)
+        assert model.n_seen == 4000
+        assert len(registry.models[("stores", ("a",), "minibatch_kmeans", 3)].seen) == (
+            4000
+        )
+
+    def test_cf_tree_base_is_abstract(self):
+        with pytest.raises(TypeError):
+            _CFTreeClustering()
+        with pytest.raises(ValueError):
+            StreamingModelRegistry().fit_or_update(np.ones((3, 2)), "kmeans")
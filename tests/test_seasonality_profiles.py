@@ -0,0 +1,145 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pandas as pd
+
+from services.seasonality_profiles import (
+    EMPTY_PROFILE,
+    SeasonalityProfileStore,
+    build_profiles,
+    category_key,
+    decompose,
+    decomposition_period,
+    profile_category_id,
+    profile_scope,
+)
+
+
+def category_frame(category, days, start="2023-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days)
+    weekly = np.array([0, 1, 2, 3, 2, 5, -13.0])
+    return pd.DataFrame(
+        {
+            "sale_date": dates,
+            "first_category_id": category,
+            "category_sales": 50 + weekly[dates.dayofweek] + rng.normal(size=days),
+            "holiday_flag": (dates.day == 1).astype(int),
+        }
+    )
+
+
+class FakeConnection:
+    """Records statements; fetch returns the given rows"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, query, *args):
+        self.statements.append((" ".join(query.split()), args))
+
+    async def executemany(self, query, args):
+        self.statements.append((" ".join(query.split()), list(args)))
+
+    async def fetch(self, query, *args):
+        return self.rows
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class TestSeasonalityProfiles:
+    """Test suite for batched category seasonality profiles"""
+
+    def test_decompose_recovers_trend_and_weekly_pattern(self):
+        t = np.arange(70, dtype=float)
+        pattern = np.array([3, -1, -1, 2, 0, -2, -1.0])
+        series = np.vstack([0.5 * t + pattern[t.astype(int) % 7], np.full(70, 4.0)])
+        seasonal, trend = decompose(series, 7)
+        assert np.isnan(trend[:, :3]).all() and np.isnan(trend[:, -3:]).all()
+        assert np.allclose(trend[0, 3:-3], 0.5 * t[3:-3])
+        assert np.allclose(seasonal[0, :7], pattern - pattern.mean())
+        assert np.allclose(seasonal[1], 0)
+
+    def test_profiles_for_all_categories_at_once(self):
+        df = pd.concat(
+            [
+                category_frame(1, 120),
+                category_frame(2, 400, seed=1),
+                category_frame(3, 30),
+                category_frame(4, 60, start="2023-03-01"),
+            ],
+            ignore_index=True,
+        )
+        profiles = build_profiles(df)
+
+        # Category 3 has too few rows for a profile but counts in the summary
+        assert list(profiles.patterns) == ["1", "2", "4"]
+        assert profiles.summary()["data_summary"]["total_records"] == len(df)
+        assert profiles.patterns["1"]["seasonal_strength"] > 0.5
+        assert set(profiles.patterns["2"]["weekly_pattern"]) == set(range(7))
+        saturday = profiles.patterns["1"]["weekly_pattern"][5]
+        assert saturday > profiles.patterns["1"]["weekly_pattern"][6]
+        assert decomposition_period(400) == 30 and decomposition_period(800) == 365
+
+    def test_series_shorter_than_two_cycles_get_empty_profile(self):
+        df = pd.concat([category_frame(1, 13)] * 5, ignore_index=True)
+        assert build_profiles(df).patterns == {"1": EMPTY_PROFILE}
+
+    def test_scope_is_order_independent(self):
+        assert profile_scope(a=1, b=None) == profile_scope(b=None, a=1)
+
+    def test_category_keys_are_consistent(self):
+        assert category_key(7) == category_key(7.0) == category_key("7.0") == "7"
+        assert category_key("brand-a") == "brand-a" and category_key(2.5) == "2.5"
+        assert profile_category_id("7") == 7
+        assert profile_category_id("brand-a") == "brand-a"
+
+        # Ids from a float column key the profiles like ints
+        df = category_frame(1, 120)
+        df["first_category_id"] = df["first_category_id"].astype(float)
+        profiles = build_profiles(df)
+        assert list(profiles.patterns) == list(profiles.stats) == ["1"]
+
+
+class TestSeasonalityProfileStore:
+    """Test suite for persisting seasonality profiles"""
+
+    def test_save_upserts_under_scope_lock(self):
+        profiles = build_profiles(
+            pd.concat(
+                [category_frame(1, 120), category_frame(3, 30)], ignore_index=True
+            )
+        )
+        conn = FakeConnection()
+        asyncio.run(SeasonalityProfileStore().save(conn, "s", "v1", profiles))
+
+        statements = [query for query, _ in conn.statements[1:]]
+        assert "pg_advisory_xact_lock" in statements[0]
+        assert conn.statements[1][1] == ("category_seasonality_profiles:s",)
+        assert "ON CONFLICT (scope, category) DO UPDATE" in statements[1]
+        # No blanket delete of the scope; only categories that went away
+        assert not any(q.startswith("DELETE") and "ANY" not in q for q in statements)
+        assert conn.statements[-1][1] == ("s", ["1", "3"])
+
+        rows = conn.statements[2][1]
+        assert [(r[1], r[3] is None) for r in rows] == [("1", False), ("3", True)]
+
+    def test_load_normalises_stored_keys(self):
+        profile = dict(EMPTY_PROFILE, weekly_pattern={"5": 1.2})
+        conn = FakeConnection(
+            [
+                {
+                    "category": "4.0",
+                    "profile": json.dumps(profile),
+                    "stats": json.dumps({"records": 60}),
+                }
+            ]
+        )
+        loaded = asyncio.run(SeasonalityProfileStore().load(conn, "s", "v1"))
+        assert list(loaded.patterns) == list(loaded.stats) == ["4"]
+        assert loaded.patterns["4"]["weekly_pattern"] == {5: 1.2}
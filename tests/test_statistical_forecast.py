@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from services.statistical_forecast import (
+    croston,
+    fit_accuracy,
+    forecast_matrix,
+    seasonal_naive,
+    select_methods,
+    tsb,
+)
+
+
+def loop_croston(y, horizon, alpha=0.1):
+    demand = np.flatnonzero(y > 0)
+    if not len(demand):
+        return np.zeros(horizon)
+    size, interval, since = y[demand[0]], demand[0] + 1.0, 0
+    for t in range(demand[0] + 1, len(y)):
+        since += 1
+        if y[t] > 0:
+            size += alpha * (y[t] - size)
+            interval += alpha * (since - interval)
+            since = 0
+    return np.full(horizon, (1 - alpha / 2) * size / interval)
+
+
+def loop_tsb(y, horizon, alpha=0.1, beta=0.05):
+    demand = np.flatnonzero(y > 0)
+    if not len(demand):
+        return np.zeros(horizon)
+    size, probability = y[demand[0]], 1 / (demand[0] + 1)
+    for t in range(demand[0] + 1, len(y)):
+        probability += beta * ((y[t] > 0) - probability)
+        if y[t] > 0:
+            size += alpha * (y[t] - size)
+    return np.full(horizon, probability * size)
+
+
+def intermittent(rng, n_series=20, days=120):
+    return rng.gamma(2, 3, size=(n_series, days)) * (rng.random((n_series, days)) < 0.2)
+
+
+class TestStatisticalForecast:
+    """Test suite for the vectorised statistical forecasting engine"""
+
+    def test_seasonal_naive_repeats_last_season(self):
+        Y = np.arange(30, dtype=float).reshape(2, 15)
+        forecasts, residuals = seasonal_naive(Y, 10)
+        np.testing.assert_array_equal(
+            forecasts[0], [8, 9, 10, 11, 12, 13, 14, 8, 9, 10]
+        )
+        # Every value is 7 more than a week before
+        np.testing.assert_array_equal(residuals[:, 7:], 7)
+
+    def test_intermittent_methods_match_loops(self):
+        Y = intermittent(np.random.default_rng(0))
+        Y[0] = 0  # never sold
+        for vectorised, loop in ((croston, loop_croston), (tsb, loop_tsb)):
+            forecasts, _ = vectorised(Y, 5)
+            expected = np.vstack([loop(y, 5) for y in Y])
+            np.testing.assert_allclose(forecasts, expected)
+
+    def test_tsb_fit_does_not_look_ahead(self):
+        Y = intermittent(np.random.default_rng(4), 2)
+        # Same first 60 days, then one series stops selling
+        Y[1, :60] = Y[0, :60]
+        Y[1, 60:] = 0
+        _, residuals = tsb(Y, 5)
+        np.testing.assert_array_equal(residuals[0, :61], residuals[1, :61])
+
+    def test_auto_selection(self):
+        rng = np.random.default_rng(1)
+        Y = np.vstack(
+            [
+                intermittent(rng, 2),
+                10 + rng.normal(size=(2, 120)),
+            ]
+        )
+        assert list(select_methods(Y)) == ["tsb", "tsb", "ets", "ets"]
+        assert list(select_methods(Y[2:, :10])) == ["seasonal_naive"] * 2
+
+    def test_ets_follows_weekly_pattern(self):
+        week = np.array([5, 5, 5, 5, 5, 12, 14], dtype=float)
+        Y = np.tile(week, (3, 16)) + np.random.default_rng(2).normal(0, 0.1, (3, 112))
+        result = forecast_matrix(Y, 14)
+        assert list(result.methods) == ["ets"] * 3
+        np.testing.assert_allclose(result.mean, np.tile(week, (3, 2)), atol=0.5)
+        assert (fit_accuracy(Y, result.residuals) > 0.9).all()
+
+    def test_forecasts_and_intervals(self):
+        Y = np.vstack([intermittent(np.random.default_rng(3), 3), np.zeros((1, 120))])
+        result = forecast_matrix(Y, 7, level=0.9)
+        assert result.mean.shape == result.lower.shape == (4, 7)
+        assert (result.lower >= 0).all() and (result.lower <= result.mean).all()
+        # Intervals widen with the horizon
+        width = result.upper - result.mean
+        assert (np.diff(width[:3], axis=1) > 0).all()
+        np.testing.assert_array_equal(result.mean[3], 0)
+
+        # Three days: too short for a season, still forecast
+        short = forecast_matrix(np.array([[1.0, 2.0, 3.0]]), 4)
+        np.testing.assert_array_equal(short.mean[0], [1, 2, 3, 1])
+
+    def test_series_start_at_their_first_observation(self):
+        rng = np.random.default_rng(5)
+        steady = 10 + rng.normal(0, 1, 30)
+        sparse = intermittent(rng, 1, 40)[0]
+        sparse[0] = 4.0
+        Y = np.full((3, 120), np.nan)
+        Y[0, 90:] = steady
+        Y[1, 80:] = sparse
+        Y[2] = intermittent(rng, 1)[0]
+        result = forecast_matrix(Y, 7)
+
+        # A recent starter is not read as months of zero demand
+        assert list(result.methods[:2]) == ["ets", "tsb"]
+        assert forecast_matrix(np.nan_to_num(Y[:1]), 7).methods[0] == "tsb"
+        for row, start in ((0, 90), (1, 80), (2, 0)):
+            alone = forecast_matrix(Y[row : row + 1, start:], 7)
+            assert result.methods[row] == alone.methods[0]
+            np.testing.assert_allclose(result.mean[row], alone.mean[0])
+            np.testing.assert_allclose(result.upper[row], alone.upper[0])
+            np.testing.assert_array_equal(np.isnan(result.residuals[row, :start]), True)
+            np.testing.assert_allclose(
+                result.residuals[row, start:], alone.residuals[0]
+            )
+
+        # Gaps after the start are zero demand; an empty row forecasts zero
+        gappy = np.vstack([np.r_[np.nan, 3.0, np.nan, 5.0], np.full(4, np.nan)])
+        short = forecast_matrix(gappy, 3, method="seasonal_naive")
+        np.testing.assert_array_equal(short.mean, [[3, 0, 5], [0, 0, 0]])
+
+    def test_invalid_input(self):
+        with pytest.raises(ValueError):
+            forecast_matrix(np.ones((2, 30)), 7, method="arima")
+        with pytest.raises(ValueError):
+            forecast_matrix(np.ones((2, 0)), 7)
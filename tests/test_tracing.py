@@ -0,0 +1,69 @@
+import asyncio
+
+from utils.tracing import (
+    Histogram,
+    MetricsRegistry,
+    TracingMiddleware,
+    metrics,
+    render_metrics,
+    span,
+)
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "test", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, "/a")
+        samples = {
+            (name, labels.get("le")): value
+            for name, labels, value in histogram.samples()
+        }
+        assert samples[("latency_seconds_bucket", "0.1")] == 2
+        assert samples[("latency_seconds_bucket", "1.0")] == 3
+        assert samples[("latency_seconds_bucket", "+Inf")] == 4
+        assert samples[("latency_seconds_count", None)] == 4
+        assert samples[("latency_seconds_sum", None)] == 2.65
+
+
+class TestRenderMetrics:
+    def test_text_exposition(self):
+        registry = MetricsRegistry()
+        registry.counter("hits", "Cache hits", ("cache",)).inc("snapshot")
+        registry.gauge("connections", "Open sockets", lambda: [({}, 3)])
+        text = render_metrics(registry)
+        assert "# TYPE hits counter" in text
+        assert 'hits_total{cache="snapshot"} 1.0' in text
+        assert "# TYPE connections gauge" in text
+        assert "connections 3" in text
+        assert text.endswith("\n")
+
+
+class TestTracingMiddleware:
+    def test_server_timing_and_route_histogram(self):
+        class Route:
+            path_format = "/items/{item_id}"
+
+        async def app(scope, receive, send):
+            scope["route"] = Route()
+            with span("db_fetch"):
+                pass
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "path": "/items/1", "method": "GET"}
+        asyncio.run(TracingMiddleware(app)(scope, None, send))
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"server-timing"].startswith(b"db_fetch;dur=")
+        text = render_metrics(metrics)
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/items/{item_id}",status="200"}'
+        ) in text
+        assert 'stage="db_fetch"' in text
@@ -0,0 +1,95 @@
+from math import atan2, cos, radians, sin, sqrt
+
+import pytest
+import numpy as np
+
+from services.inventory_optimization_service import InventoryOptimizationService
+from services.transfer_flow_solver import haversine_km, solve_transfer_network
+
+
+def scalar_haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = (
+        sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    )
+    return 6371 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def make_row(store_id, product_id, status, stock, safety, days, lat, lon):
+    return {
+        "store_id": store_id,
+        "product_id": product_id,
+        "city_id": 1,
+        "latitude": lat,
+        "longitude": lon,
+        "current_stock": stock,
+        "recommended_safety_stock": safety,
+        "days_of_inventory": days,
+        "avg_daily_sales": 5.0,
+        "stock_status": status,
+    }
+
+
+@pytest.fixture
+def params():
+    return dict(InventoryOptimizationService().optimization_params)
+
+
+@pytest.fixture
+def inventory_rows():
+    """Two products, two excess stores, two shortage stores"""
+    return [
+        make_row(1, 10, "overstock", 200, 20, 40, 31.20, 121.40),
+        make_row(2, 10, "stockout_risk", 2, 30, 0.4, 31.21, 121.41),
+        make_row(3, 10, "stockout_risk", 5, 25, 1.0, 31.25, 121.45),
+        make_row(1, 11, "stockout_risk", 1, 40, 0.2, 31.20, 121.40),
+        make_row(4, 11, "overstock", 90, 10, 35, 31.22, 121.42),
+        make_row(5, 11, "normal", 50, 20, 10, 31.23, 121.43),
+    ]
+
+
+class TestTransferFlowSolver:
+    """Test suite for the network-flow transfer solver"""
+
+    def test_haversine_matches_scalar_formula(self):
+        expected = scalar_haversine(31.2, 121.4, 39.9, 116.4)
+        result = haversine_km(
+            np.array([31.2]), np.array([121.4]), np.array([39.9]), np.array([116.4])
+        )
+        assert result[0] == pytest.approx(expected)
+
+    def test_solves_all_products_in_one_call(self, inventory_rows, params):
+        flows, report = solve_transfer_network(inventory_rows, params)
+
+        assert report.status == "optimal"
+        assert report.products == 2
+        assert report.optimality_gap is not None
+        assert report.optimality_gap <= params["solver_mip_rel_gap"] + 1e-9
+        assert set(flows["src_product_id"]) == {10, 11}
+
+        # Shortages are fully covered and supplies are never exceeded
+        covered = flows.groupby("dst_store_id")["quantity"].sum().to_dict()
+        assert covered == {2: 28, 3: 20, 1: 39}
+        shipped = flows.groupby("src_store_id")["quantity"].sum().to_dict()
+        assert shipped[1] <= 180
+        assert shipped[4] <= 80
+
+    def test_respects_distance_limit(self, inventory_rows, params):
+        params["max_transfer_distance_km"] = 0.1
+        flows, report = solve_transfer_network(inventory_rows, params)
+
+        assert flows.empty
+        assert report.status == "no_candidates"
+        assert report.candidate_edges == 0
+
+    def test_service_builds_opportunities(self, inventory_rows):
+        service = InventoryOptimizationService()
+        opportunities = service._solve_network_transfers(inventory_rows)
+
+        assert len(opportunities) == service.last_solver_report.transfers
+        assert all(
+            o.recommended_quantity
+            >= service.optimization_params["min_transfer_quantity"]
+            for o in opportunities
+        )
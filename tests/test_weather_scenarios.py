@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.weather_demand_model import WeatherSensitiveDemandModel
+
+SCENARIOS = [
+    {},
+    {"avg_temperature": 32.0},
+    {"precpt": 8.0, "avg_humidity": 95.0},
+    {"avg_wind_level": 6.0, "avg_temperature": 5.0},
+]
+
+
+@pytest.fixture(scope="module")
+def weather_sales():
+    """120 days of one series whose sales follow temperature and rain"""
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2024-01-01", periods=120, freq="D")
+    temperature = 15 + 10 * np.sin(np.arange(120) / 10) + rng.normal(0, 1, 120)
+    rain = rng.gamma(0.5, 2, 120)
+    return pd.DataFrame(
+        {
+            "sale_date": dates,
+            "store_id": 1,
+            "product_id": 1,
+            "avg_temperature": temperature,
+            "avg_humidity": 60 + rng.normal(0, 5, 120),
+            "precpt": rain,
+            "avg_wind_level": rng.uniform(0, 4, 120),
+            "holiday_flag": 0,
+            "sale_amount": 50 + 2 * temperature - 3 * rain + rng.normal(0, 2, 120),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def fitted_model(weather_sales, tmp_path_factory):
+    model = WeatherSensitiveDemandModel(
+        model_type="ensemble", save_path=tmp_path_factory.mktemp("weather")
+    )
+    model.fit(weather_sales)
+    return model
+
+
+def one_at_a_time(model, df, scenario):
+    """Reference: apply one scenario and score it on its own"""
+    scenario_df = df.copy()
+    for weather_var, value in scenario.items():
+        scenario_df[weather_var] = value
+    processed = model.prepare_weather_features(scenario_df)
+    X = processed[model.feature_columns].fillna(0)
+    predictions = pd.Series(model._predict_matrix(X), index=processed.index)
+    return predictions.reindex(df.index).to_numpy()
+
+
+class TestWeatherScenarios:
+    """Test suite for batched weather scenario scoring"""
+
+    def test_matches_one_at_a_time(self, fitted_model, weather_sales):
+        df = weather_sales.tail(40)
+        batched = fitted_model.predict_scenarios(df, SCENARIOS)
+
+        assert batched.shape == (len(SCENARIOS), len(df))
+        for i, scenario in enumerate(SCENARIOS):
+            np.testing.assert_allclose(
+                batched[i], one_at_a_time(fitted_model, df, scenario)
+            )
+        # The scenarios actually move the predictions
+        assert not np.allclose(batched[0], batched[1])
+
+    def test_chunked_blocks_match(self, fitted_model, weather_sales, monkeypatch):
+        df = weather_sales.tail(40)
+        expected = fitted_model.predict_scenarios(df, SCENARIOS)
+
+        # Two scenarios per block
+        monkeypatch.setattr(fitted_model, "max_scenario_block_rows", 2 * len(df))
+        np.testing.assert_allclose(
+            fitted_model.predict_scenarios(df, SCENARIOS), expected
+        )
+
+    def test_predict_weather_demand_columns(self, fitted_model, weather_sales):
+        df = weather_sales.tail(20)
+        results = fitted_model.predict_weather_demand(df, SCENARIOS[1:])
+
+        batched = fitted_model.predict_scenarios(df, SCENARIOS)
+        np.testing.assert_allclose(results["predicted_demand"], batched[0])
+        np.testing.assert_allclose(results["scenario_3_demand"], batched[3])
@@ -0,0 +1,238 @@
+"""
+Lazy router loading and the startup budget.
+
+The feature routers (analytics, enhanced, multi-dimensional forecast,
+clustering) are 1000-5000 line modules that pull in scikit-learn, scipy,
+statsmodels and Prophet. Importing them eagerly makes every worker pay for
+them at boot, including workers that only ever answer ``/health``.
+
+Instead, ``lazy_routers.add`` registers each router as a stub: the module
+name, the prefix it is mounted under, and the path prefixes it serves.
+``LazyRouterMiddleware`` imports a router's module (in a worker thread, so
+the event loop keeps serving) and mounts it the first time a request for
+one of its paths arrives. Only routers whose path prefixes match are
+loaded; any other path is routed as is, so a 404 costs no imports (a stub
+without paths claims everything under its mount prefix). After startup the rest are preloaded in the
+background (``LAZY_ROUTES=background``, the default), only on demand
+(``on-demand``), or all before serving (``eager``).
+
+``startup_profile`` times the application import, the startup hooks and
+every router import against ``STARTUP_BUDGET_MS``; ``/startup`` reports it.
+``python -m benchmarks.startup`` gives the per-module import-time profile.
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.logger import get_logger
+from utils.tracing import span
+
+logger = get_logger(__name__)
+
+# Requests that need every route mounted (the OpenAPI schema lists them all)
+SCHEMA_PATHS = ("/openapi.json", "/docs", "/redoc")
+
+# Libraries a lightweight worker should not have imported
+HEAVY_MODULES = ("prophet", "statsmodels", "scipy", "sklearn")
+
+
+@dataclass
+class LazyRouter:
+    """
+    A router mounted on first use.
+
+    Args:
+        module: Module defining the router
+        prefix: Prefix the router is included under
+        paths: Full path prefixes served by the router (default: ``prefix``)
+        attribute: Name of the router in ``module``
+    """
+
+    module: str
+    prefix: str = ""
+    paths: Sequence[str] = ()
+    attribute: str = "router"
+    loaded: bool = False
+    import_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    def claims(self, path: str) -> bool:
+        paths = self.paths or ([self.prefix] if self.prefix else [])
+        return any(path == p or path.startswith(p.rstrip("/") + "/") for p in paths)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "module": self.module,
+            "prefix": self.prefix,
+            "loaded": self.loaded,
+            "import_ms": self.import_ms,
+            "error": self.error,
+        }
+
+
+class LazyRouterRegistry:
+    """Router stubs and the routers mounted from them so far."""
+
+    def __init__(self):
+        self.routers: List[LazyRouter] = []
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._preload: Optional[asyncio.Task] = None
+
+    def add(
+        self,
+        module: str,
+        prefix: str = "",
+        paths: Sequence[str] = (),
+        attribute: str = "router",
+    ) -> LazyRouter:
+        entry = LazyRouter(module, prefix, tuple(paths), attribute)
+        self.routers.append(entry)
+        return entry
+
+    def pending(self) -> List[LazyRouter]:
+        return [r for r in self.routers if not r.loaded and r.error is None]
+
+    async def load(self, app: Any, entry: LazyRouter):
+        """Import ``entry``'s module off the event loop and mount its router."""
+        lock = self._locks.setdefault(id(entry), asyncio.Lock())
+        async with lock:
+            if entry.loaded or entry.error is not None:
+                return
+            start = time.perf_counter()
+            try:
+                module = await asyncio.to_thread(importlib.import_module, entry.module)
+                app.include_router(
+                    getattr(module, entry.attribute), prefix=entry.prefix
+                )
+            except Exception as e:
+                # Same outcome as a failed eager import: the routes are missing
+                entry.error = f"{type(e).__name__}: {e}"
+                logger.error(f"Could not load router {entry.module}: {entry.error}")
+                return
+            finally:
+                entry.import_ms = round((time.perf_counter() - start) * 1000, 1)
+            # Regenerate the schema with the new routes
+            app.openapi_schema = None
+            entry.loaded = True
+            logger.info(
+                f"Mounted {entry.module} at '{entry.prefix or '/'}' "
+                f"in {entry.import_ms:.0f}ms"
+            )
+
+    async def load_all(self, app: Any):
+        for entry in self.pending():
+            await self.load(app, entry)
+
+    async def resolve(self, app: Any, scope: Dict[str, Any]):
+        """Mount whatever routers ``scope``'s path needs before routing."""
+        path = scope["path"]
+        if path in SCHEMA_PATHS:
+            await self.load_all(app)
+            return
+        for entry in self.pending():
+            if entry.claims(path):
+                await self.load(app, entry)
+
+    def start(self, app: Any, mode: Optional[str] = None):
+        """Preload pending routers in the background (``LAZY_ROUTES`` mode)."""
+        mode = mode or os.getenv("LAZY_ROUTES", "background")
+        if mode == "background" and self.pending():
+            self._preload = asyncio.create_task(self._background(app))
+
+    async def _background(self, app: Any):
+        for entry in self.pending():
+            # Let requests in between imports
+            await asyncio.sleep(0)
+            await self.load(app, entry)
+        startup_profile.report()
+
+    async def stop(self):
+        if self._preload is not None:
+            self._preload.cancel()
+            try:
+                await self._preload
+            except asyncio.CancelledError:
+                pass
+            self._preload = None
+
+
+# Global instance
+lazy_routers = LazyRouterRegistry()
+
+
+class LazyRouterMiddleware:
+    """Mounts lazily registered routers before a request for them is routed."""
+
+    def __init__(self, app, registry: Optional[LazyRouterRegistry] = None):
+        self.app = app
+        self.registry = registry or lazy_routers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and self.registry.pending():
+            with span("router_import"):
+                await self.registry.resolve(scope["app"], scope)
+        await self.app(scope, receive, send)
+
+
+@dataclass
+class StartupProfile:
+    """
+    Phases of process startup checked against a time budget.
+
+    ``mark`` records a phase duration in milliseconds.
+    """
+
+    budget_ms: float = field(
+        default_factory=lambda: float(os.getenv("STARTUP_BUDGET_MS", "2000"))
+    )
+    phases: Dict[str, float] = field(default_factory=dict)
+    registry: LazyRouterRegistry = field(default_factory=lambda: lazy_routers)
+
+    def mark(self, phase: str, started: float):
+        self.phases[phase] = round((time.perf_counter() - started) * 1000, 1)
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(self.phases.values()), 1)
+
+    @property
+    def within_budget(self) -> bool:
+        return self.total_ms <= self.budget_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget_ms": self.budget_ms,
+            "total_ms": self.total_ms,
+            "within_budget": self.within_budget,
+            "phases": dict(self.phases),
+            "routers": [r.to_dict() for r in self.registry.routers],
+            "heavy_modules_loaded": sorted(
+                m for m in HEAVY_MODULES if m in sys.modules
+            ),
+        }
+
+    def report(self):
+        """Log the startup phases, warning when over budget."""
+        routers = ", ".join(
+            f"{r.module}={r.import_ms:.0f}ms"
+            for r in self.registry.routers
+            if r.import_ms is not None
+        )
+        message = (
+            f"Startup took {self.total_ms:.0f}ms of a {self.budget_ms:.0f}ms budget "
+            f"({', '.join(f'{k}={v:.0f}ms' for k, v in self.phases.items())})"
+            + (f"; lazy routers: {routers}" if routers else "")
+        )
+        if self.within_budget:
+            logger.info(message)
+        else:
+            logger.warning(message)
+
+
+# Global instance
+startup_profile = StartupProfile()
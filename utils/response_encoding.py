@@ -0,0 +1,369 @@
+"""
+Response encoding for forecast and analytics payloads.
+
+- ``dumps`` serializes with orjson when it is installed, handling numpy and
+  pandas values natively (NaN/NaT become ``null``), and falls back to the
+  standard library otherwise.
+- ``EncodedAPIRoute`` is a route class for heavy routers: it encodes the
+  endpoint result directly instead of going through ``jsonable_encoder``, and
+  serves a packed columnar layout when the client sends
+  ``Accept: application/vnd.freshretail.columnar+json``.
+- Endpoints decorated with ``services.data_version_service.http_cache`` get
+  ETag/Last-Modified revalidation, answered before any handler work.
+- ``CompressionMiddleware`` compresses complete responses above a size
+  threshold with brotli (when installed) or gzip.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import gzip
+import inspect
+import json
+import os
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from utils.tracing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.freshretail.columnar+json"
+COMPRESSIBLE_TYPES = ("application/json", "application/vnd.", "text/")
+
+_current_request: ContextVar[Optional[Request]] = ContextVar(
+    "encoded_route_request", default=None
+)
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson/json do not serialize themselves."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _sanitize(obj: Any) -> Any:
+    """Standard-library path: turn NaN/inf into None like orjson does."""
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(v) for v in obj]
+    return obj
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize ``content`` to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+    def default(obj):
+        return _sanitize(_default(obj))
+
+    return json.dumps(
+        _sanitize(content), default=default, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def to_columnar(content: Any) -> Any:
+    """
+    Pack row-oriented tables into one array per column.
+
+    Lists of dicts sharing the same keys (and DataFrames) become
+    ``{"$columns": {name: [values...]}, "$length": n}``; everything else is
+    walked recursively and kept as is.
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    if isinstance(content, pd.DataFrame):
+        return {
+            "$columns": {str(col): content[col].to_numpy() for col in content.columns},
+            "$length": len(content),
+        }
+    if isinstance(content, dict):
+        return {k: to_columnar(v) for k, v in content.items()}
+    if isinstance(content, list):
+        if content and all(isinstance(row, dict) for row in content):
+            keys = list(content[0])
+            if all(
+                len(row) == len(keys) and row.keys() == content[0].keys()
+                for row in content
+            ):
+                return {
+                    "$columns": {
+                        k: [to_columnar(row[k]) for row in content] for k in keys
+                    },
+                    "$length": len(content),
+                }
+        return [to_columnar(v) for v in content]
+    return content
+
+
+def wants_columnar(request: Optional[Request]) -> bool:
+    return request is not None and COLUMNAR_MEDIA_TYPE in request.headers.get(
+        "accept", ""
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with ``dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def encode_response(
+    content: Any,
+    request: Optional[Request] = None,
+    status_code: int = 200,
+) -> Response:
+    """Build a JSON or columnar response for ``content`` per the Accept header."""
+    with span("serialize"):
+        if wants_columnar(request):
+            media_type = COLUMNAR_MEDIA_TYPE
+            body = dumps(to_columnar(content))
+        else:
+            media_type = JSON_MEDIA_TYPE
+            body = dumps(content)
+    return Response(
+        body,
+        status_code=status_code,
+        media_type=media_type,
+        headers={"Vary": "Accept"},
+    )
+
+
+class EncodedAPIRoute(APIRoute):
+    """
+    Route class that encodes results with ``encode_response``.
+
+    Use as ``APIRouter(route_class=EncodedAPIRoute)``. Endpoints that return a
+    ``Response`` themselves are passed through untouched; plain results are
+    checked against the route's ``response_model`` and dumped with its
+    ``response_model_include``/``exclude``/``by_alias``/``exclude_unset``/
+    ``exclude_defaults``/``exclude_none`` options (as FastAPI would), then
+    encoded without the ``jsonable_encoder`` round trip.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not getattr(endpoint, "_encoded_endpoint", False):
+            endpoint = self._wrap_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _wrap_endpoint(self, endpoint):
+        route = self
+        is_coroutine = inspect.iscoroutinefunction(endpoint)
+        adapters: Dict[Any, TypeAdapter] = {}
+
+        @wraps(endpoint)
+        async def encoded_endpoint(*args, **kwargs):
+            if is_coroutine:
+                result = await endpoint(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(endpoint, *args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            model = route.response_model
+            if model is not None:
+                adapter = adapters.get(model)
+                if adapter is None:
+                    adapter = adapters[model] = TypeAdapter(model)
+                if not isinstance(result, BaseModel):
+                    result = adapter.validate_python(result)
+                result = route._dump(result, adapter)
+            elif isinstance(result, BaseModel):
+                # FastAPI encodes models without a response_model by alias
+                result = result.model_dump(by_alias=True)
+            return encode_response(
+                result, _current_request.get(), route.status_code or 200
+            )
+
+        encoded_endpoint._encoded_endpoint = True  # type: ignore[attr-defined]
+        encoded_endpoint.raw_endpoint = endpoint  # type: ignore[attr-defined]
+        return encoded_endpoint
+
+    def _dump(self, result: Any, adapter: TypeAdapter) -> Any:
+        """``result`` as plain data, with the route's response_model options."""
+        options = dict(
+            include=self.response_model_include,
+            exclude=self.response_model_exclude,
+            by_alias=self.response_model_by_alias,
+            exclude_unset=self.response_model_exclude_unset,
+            exclude_defaults=self.response_model_exclude_defaults,
+            exclude_none=self.response_model_exclude_none,
+        )
+        if isinstance(result, BaseModel):
+            return result.model_dump(**options)
+        return adapter.dump_python(result, **options)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        # Set by ``services.data_version_service.http_cache``
+        policy = getattr(self.endpoint, "http_cache_policy", None)
+
+        async def route_handler(request: Request) -> Response:
+            validators = None
+            if policy is not None and request.method in ("GET", "HEAD"):
+                validators = await policy.validators(request)
+                if validators and policy.is_not_modified(request.headers, validators):
+                    return Response(status_code=304, headers=validators)
+
+            token = _current_request.set(request)
+            try:
+                response = await handler(request)
+            finally:
+                _current_request.reset(token)
+            if validators and response.status_code == 200:
+                response.headers.update(validators)
+            return response
+
+        return route_handler
+
+
+class CompressionMiddleware:
+    """
+    Compress complete responses of at least ``minimum_size`` bytes.
+
+    Brotli is preferred when the ``brotli`` package is installed and the
+    client accepts it, otherwise gzip. Streaming responses (NDJSON/SSE) and
+    bodies that are already encoded pass through unchanged.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        self.app = app
+        self.minimum_size = (
+            minimum_size
+            if minimum_size is not None
+            else int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+        )
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, scope) -> Optional[str]:
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1").lower()
+                break
+        if brotli is not None and "br" in accept:
+            return "br"
+        if "gzip" in accept:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers: List = list(start_message.get("headers", []))
+            header_map = {k.lower(): v for k, v in headers}
+            content_type = header_map.get(b"content-type", b"").decode("latin-1")
+            if (
+                message.get("more_body", False)
+                or b"content-encoding" in header_map
+                or len(body) < self.minimum_size
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self._compress(body, encoding)
+            headers = [
+                (k, v) for k, v in headers if k.lower() not in (b"content-length",)
+            ]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            vary = header_map.get(b"vary")
+            if vary is None:
+                headers.append((b"vary", b"Accept-Encoding"))
+            elif b"accept-encoding" not in vary.lower():
+                headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+                headers.append((b"vary", vary + b", Accept-Encoding"))
+            start_message["headers"] = headers
+            passthrough = True
+            await send(start_message)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)